@@ -0,0 +1,583 @@
+"""
+A persistent, content-addressed on-disk cache for CDISC Library API responses.
+
+The cache plugs into ``AuthenticatedClient`` as an httpx transport, so every
+generated endpoint function (``sync``/``sync_detailed``) benefits from it
+without any change to the generated code:
+
+    transport = cached_transport(httpx.HTTPTransport(retries=5))
+    client = AuthenticatedClient(..., httpx_args={"transport": transport})
+
+Responses are keyed by URL, ``Accept`` header and API version. Response bodies
+are stored once per content digest, so identical documents served from
+different URLs share a single blob. Stale entries are revalidated with
+conditional requests (``If-None-Match``/``If-Modified-Since``), and the
+library-wide ``/mdr/lastupdated`` timestamp lets entries stored after the last
+publication be served without any network round trip. The cache is bounded in
+size and evicts the least recently used entries first.
+
+The cache is configured through environment variables:
+
+- ``CDISC_CACHE_DIR``: cache directory (default ``.cache/cdisc_library``).
+- ``CDISC_CACHE_MAX_MB``: maximum size of the cached bodies (default 512).
+- ``CDISC_CACHE_DISABLED``: set to ``1``/``true`` to bypass the cache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Version of the CDISC Library OpenAPI specification the client was generated from.
+API_VERSION = "1.1.0"
+
+DEFAULT_CACHE_DIR = Path(".cache/cdisc_library")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Response headers worth replaying from the cache. Transfer-level headers such
+# as Content-Encoding are dropped because the stored body is already decoded.
+_STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "date")
+
+LASTUPDATED_PATH = "/mdr/lastupdated"
+
+
+@dataclass
+class CacheEntry:
+    """
+    Metadata describing a cached API response.
+
+    Attributes:
+        url (str): The URL of the cached request.
+        status_code (int): The HTTP status code of the cached response.
+        headers (Dict[str, str]): The replayable response headers.
+        digest (str): The SHA-256 digest of the response body.
+        size (int): The size of the response body in bytes.
+        stored_at (float): The epoch timestamp at which the entry was
+            stored or last revalidated.
+    """
+
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    digest: str
+    size: int
+    stored_at: float = field(default_factory=time.time)
+
+
+class MetadataCache:
+    """
+    A size-bounded, content-addressed store for API responses.
+
+    Entries live in ``entries/<key>.json`` and bodies in
+    ``objects/<digest[:2]>/<digest>``. Each entry file's modification time
+    records its last access, which drives LRU eviction. All writes are atomic,
+    so several processes can safely share one cache directory. Within a
+    process, the cache can be shared by threads: a lock guards the running
+    size of the bodies and eviction.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        api_version: str = API_VERSION,
+    ):
+        """
+        Initializes the MetadataCache.
+
+        Args:
+            directory (str | Path): The root directory of the cache.
+            max_bytes (int): The maximum total size of the stored bodies.
+            api_version (str): The API version that is part of every cache key.
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.api_version = api_version
+        self._size: Optional[int] = None
+        # Reentrant, as put() evicts while holding it
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls) -> Optional["MetadataCache"]:
+        """
+        Creates a cache configured from the ``CDISC_CACHE_*`` environment variables.
+
+        Returns:
+            Optional[MetadataCache]: The configured cache, or None if caching
+                                     has been disabled.
+        """
+        if os.getenv("CDISC_CACHE_DISABLED", "").lower() in {"1", "true", "yes"}:
+            return None
+        directory = os.getenv("CDISC_CACHE_DIR") or DEFAULT_CACHE_DIR
+        max_mb = os.getenv("CDISC_CACHE_MAX_MB")
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        return cls(directory, max_bytes=max_bytes)
+
+    @property
+    def _entries_dir(self) -> Path:
+        return self.directory / "entries"
+
+    @property
+    def _objects_dir(self) -> Path:
+        return self.directory / "objects"
+
+    def key(self, request: httpx.Request) -> str:
+        """
+        Computes the cache key of a request.
+
+        Args:
+            request (httpx.Request): The request to compute the key for.
+
+        Returns:
+            str: A hex digest identifying the request.
+        """
+        accept = request.headers.get("accept", "")
+        raw = "\n".join([self.api_version, request.method, str(request.url), accept])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self._entries_dir / f"{key}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self._objects_dir / digest[:2] / digest
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Looks up a cache entry.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[CacheEntry]: The entry, or None if it is missing or its
+                                  body has been evicted.
+        """
+        try:
+            entry = CacheEntry(**json.loads(self._entry_path(key).read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not self._object_path(entry.digest).exists():
+            return None
+        return entry
+
+    def read(self, entry: CacheEntry) -> bytes:
+        """
+        Reads the body of a cache entry.
+
+        Args:
+            entry (CacheEntry): The entry to read.
+
+        Returns:
+            bytes: The cached response body.
+        """
+        return self._object_path(entry.digest).read_bytes()
+
+    def put(
+        self,
+        key: str,
+        url: str,
+        status_code: int,
+        headers: Dict[str, str],
+        content: bytes,
+    ) -> CacheEntry:
+        """
+        Stores a response body and its metadata.
+
+        Args:
+            key (str): The cache key.
+            url (str): The URL of the request.
+            status_code (int): The HTTP status code of the response.
+            headers (Dict[str, str]): The response headers.
+            content (bytes): The decoded response body.
+
+        Returns:
+            CacheEntry: The stored entry.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(digest)
+        with self._lock:
+            if not object_path.exists():
+                _atomic_write(object_path, content)
+                if self._size is not None:
+                    self._size += len(content)
+
+        entry = CacheEntry(
+            url=url,
+            status_code=status_code,
+            headers={k: headers[k] for k in _STORED_HEADERS if k in headers},
+            digest=digest,
+            size=len(content),
+        )
+        _atomic_write(self._entry_path(key), json.dumps(asdict(entry)).encode("utf-8"))
+        _stamp(self._entry_path(key))
+        with self._lock:
+            if self.total_size() > self.max_bytes:
+                self.evict()
+        return entry
+
+    def touch(self, key: str, revalidated: bool = False) -> None:
+        """
+        Marks an entry as recently used.
+
+        Args:
+            key (str): The cache key.
+            revalidated (bool): Whether the server confirmed the entry is still
+                                current, which resets its stored timestamp.
+        """
+        path = self._entry_path(key)
+        try:
+            if revalidated:
+                data = json.loads(path.read_text())
+                data["stored_at"] = time.time()
+                _atomic_write(path, json.dumps(data).encode("utf-8"))
+            _stamp(path)
+        except (OSError, ValueError):
+            pass
+
+    def total_size(self) -> int:
+        """
+        Returns the total size of the stored bodies in bytes.
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = sum(
+                    p.stat().st_size
+                    for p in self._objects_dir.glob("*/*")
+                    if p.is_file()
+                )
+            return self._size
+
+    def evict(self) -> None:
+        """
+        Evicts least recently used entries until the cache fits in ``max_bytes``.
+
+        Bodies that are no longer referenced by any entry are deleted.
+        """
+        with self._lock:
+            entries = []
+            for path in self._entries_dir.glob("*.json"):
+                try:
+                    data = json.loads(path.read_text())
+                    entries.append((path.stat().st_mtime_ns, path, data["digest"]))
+                except (OSError, ValueError, KeyError):
+                    path.unlink(missing_ok=True)
+            entries.sort()
+
+            referenced: Dict[str, int] = {}
+            for _, _, digest in entries:
+                referenced[digest] = referenced.get(digest, 0) + 1
+
+            size = self.total_size()
+            for _, path, digest in entries:
+                if size <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                referenced[digest] -= 1
+                if referenced[digest] == 0:
+                    object_path = self._object_path(digest)
+                    try:
+                        size -= object_path.stat().st_size
+                        object_path.unlink()
+                    except OSError:
+                        pass
+            self._size = size
+
+    def clear(self) -> None:
+        """
+        Removes every entry and body from the cache.
+        """
+        with self._lock:
+            for path in list(self._entries_dir.glob("*.json")) + list(
+                self._objects_dir.glob("*/*")
+            ):
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+
+class _RevalidatingTransport:
+    """
+    State and helpers shared by the synchronous and asynchronous caching transports.
+    """
+
+    def __init__(
+        self,
+        transport: Any,
+        cache: MetadataCache,
+        check_lastupdated: bool = True,
+        lastupdated_ttl: float = 3600.0,
+    ):
+        """
+        Initializes the caching transport.
+
+        Args:
+            transport: The wrapped httpx transport used for network requests.
+            cache (MetadataCache): The cache to read from and write to.
+            check_lastupdated (bool): Whether to use ``/mdr/lastupdated`` to skip
+                                      revalidation of current entries.
+            lastupdated_ttl (float): How long, in seconds, a fetched
+                                     ``/mdr/lastupdated`` timestamp is trusted.
+        """
+        self._transport = transport
+        self.cache = cache
+        self.check_lastupdated = check_lastupdated
+        self.lastupdated_ttl = lastupdated_ttl
+        self._lastupdated: Optional[float] = None
+        self._lastupdated_checked_at: Optional[float] = None
+
+    def _lastupdated_due(self) -> bool:
+        now = time.time()
+        if (
+            self._lastupdated_checked_at is not None
+            and now - self._lastupdated_checked_at <= self.lastupdated_ttl
+        ):
+            return False
+        self._lastupdated_checked_at = now
+        self._lastupdated = None
+        return True
+
+    def _record_lastupdated(self, response: httpx.Response) -> None:
+        if response.status_code != 200:
+            return
+        try:
+            self._lastupdated = _parse_lastupdated(response.json())
+        except ValueError:
+            self._lastupdated = None
+
+
+class CachingTransport(_RevalidatingTransport, httpx.BaseTransport):
+    """
+    An httpx transport that serves CDISC Library GET requests from a MetadataCache.
+
+    Cached entries stored after the library's last publication date (as
+    reported by ``/mdr/lastupdated``) are served without contacting the
+    server. Older entries are revalidated with a conditional request, and a
+    ``304 Not Modified`` answer is served from the cache.
+    """
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not _is_cacheable(request):
+            return self._transport.handle_request(request)
+
+        key = self.cache.key(request)
+        entry = self.cache.get(key)
+        if entry is not None:
+            if self._is_current(entry, request):
+                self.cache.touch(key)
+                return _cached_response(self.cache, entry, request)
+            _add_validators(request, entry)
+
+        response = self._transport.handle_request(request)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.cache.touch(key, revalidated=True)
+            return _cached_response(self.cache, entry, request)
+        if response.status_code == 200:
+            response.read()
+            self.cache.put(
+                key, str(request.url), 200, dict(response.headers), response.content
+            )
+        return response
+
+    def _is_current(self, entry: CacheEntry, request: httpx.Request) -> bool:
+        if not self.check_lastupdated:
+            return False
+        if self._lastupdated_due():
+            try:
+                response = self._transport.handle_request(_lastupdated_request(request))
+                response.read()
+                self._record_lastupdated(response)
+            except httpx.HTTPError:
+                pass
+        return self._lastupdated is not None and entry.stored_at > self._lastupdated
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncCachingTransport(_RevalidatingTransport, httpx.AsyncBaseTransport):
+    """
+    The asynchronous counterpart of CachingTransport, for use with ``httpx.AsyncClient``.
+
+    It shares the cache directory and revalidation rules of CachingTransport,
+    and fetches ``/mdr/lastupdated`` only once even when many requests are in
+    flight concurrently.
+    """
+
+    _lastupdated_lock: Optional[asyncio.Lock] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not _is_cacheable(request):
+            return await self._transport.handle_async_request(request)
+
+        key = self.cache.key(request)
+        entry = self.cache.get(key)
+        if entry is not None:
+            if await self._is_current(entry, request):
+                self.cache.touch(key)
+                return _cached_response(self.cache, entry, request)
+            _add_validators(request, entry)
+
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.cache.touch(key, revalidated=True)
+            return _cached_response(self.cache, entry, request)
+        if response.status_code == 200:
+            await response.aread()
+            self.cache.put(
+                key, str(request.url), 200, dict(response.headers), response.content
+            )
+        return response
+
+    async def _is_current(self, entry: CacheEntry, request: httpx.Request) -> bool:
+        if not self.check_lastupdated:
+            return False
+        if self._lastupdated_lock is None:
+            self._lastupdated_lock = asyncio.Lock()
+        async with self._lastupdated_lock:
+            if self._lastupdated_due():
+                try:
+                    response = await self._transport.handle_async_request(
+                        _lastupdated_request(request)
+                    )
+                    await response.aread()
+                    self._record_lastupdated(response)
+                except httpx.HTTPError:
+                    pass
+        return self._lastupdated is not None and entry.stored_at > self._lastupdated
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def cached_transport(
+    transport: httpx.BaseTransport, cache: Optional[MetadataCache] = None
+) -> httpx.BaseTransport:
+    """
+    Wraps a transport with the shared metadata cache unless caching is disabled.
+
+    Args:
+        transport (httpx.BaseTransport): The transport used for network requests.
+        cache (Optional[MetadataCache]): The cache to use. Defaults to the cache
+                                         configured by the environment.
+
+    Returns:
+        httpx.BaseTransport: The caching transport, or *transport* itself if
+                             caching is disabled.
+    """
+    cache = cache if cache is not None else MetadataCache.from_env()
+    if cache is None:
+        return transport
+    return CachingTransport(transport, cache)
+
+
+def cached_async_transport(
+    transport: httpx.AsyncBaseTransport, cache: Optional[MetadataCache] = None
+) -> httpx.AsyncBaseTransport:
+    """
+    Wraps an async transport with the shared metadata cache unless caching is disabled.
+
+    Args:
+        transport (httpx.AsyncBaseTransport): The transport used for network requests.
+        cache (Optional[MetadataCache]): The cache to use. Defaults to the cache
+                                         configured by the environment.
+
+    Returns:
+        httpx.AsyncBaseTransport: The caching transport, or *transport* itself
+                                  if caching is disabled.
+    """
+    cache = cache if cache is not None else MetadataCache.from_env()
+    if cache is None:
+        return transport
+    return AsyncCachingTransport(transport, cache)
+
+
+def _is_cacheable(request: httpx.Request) -> bool:
+    if request.method != "GET":
+        return False
+    if request.url.path.endswith(LASTUPDATED_PATH):
+        return False
+    return "no-store" not in request.headers.get("cache-control", "")
+
+
+def _add_validators(request: httpx.Request, entry: CacheEntry) -> None:
+    if "etag" in entry.headers:
+        request.headers["If-None-Match"] = entry.headers["etag"]
+    if "last-modified" in entry.headers:
+        request.headers["If-Modified-Since"] = entry.headers["last-modified"]
+
+
+def _cached_response(
+    cache: MetadataCache, entry: CacheEntry, request: httpx.Request
+) -> httpx.Response:
+    headers = dict(entry.headers)
+    headers["x-cache"] = "HIT"
+    return httpx.Response(
+        status_code=entry.status_code,
+        headers=headers,
+        content=cache.read(entry),
+        request=request,
+    )
+
+
+def _lastupdated_request(request: httpx.Request) -> httpx.Request:
+    path = request.url.path
+    prefix = path[: path.find("/mdr/")] if "/mdr/" in path else ""
+    headers = {
+        k: v
+        for k, v in request.headers.items()
+        if k.lower() not in {"if-none-match", "if-modified-since", "host"}
+    }
+    return httpx.Request(
+        "GET",
+        request.url.copy_with(path=prefix + LASTUPDATED_PATH, query=None),
+        headers=headers,
+    )
+
+
+def _parse_lastupdated(payload: dict) -> Optional[float]:
+    """
+    Converts the ``overall`` value of ``/mdr/lastupdated`` to an epoch timestamp.
+
+    The value is a date, so the returned timestamp is the end of that day to
+    stay conservative about same-day publications.
+    """
+    overall = payload.get("overall")
+    if not overall:
+        return None
+    parsed = datetime.fromisoformat(str(overall).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if len(str(overall)) <= 10:
+        return parsed.timestamp() + 86400
+    return parsed.timestamp()
+
+
+def _stamp(path: Path) -> None:
+    # File systems stamp with a coarse clock; use a precise one so that the
+    # access order of entries touched in quick succession is preserved.
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
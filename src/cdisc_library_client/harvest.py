@@ -1,72 +1,177 @@
 from __future__ import annotations
 
-import os
-from typing import List, Optional
+import asyncio
+import re
+from http import HTTPStatus
+from typing import Any, List, Optional
 
-import httpx
-from cdisc_library_client.client import AuthenticatedClient
+from cdisc_library_client.errors import UnexpectedStatus
+from cdisc_library_client.types import Response
 from cdisc_library_client.api.cdash_implementation_guide_cdashig import (
-    get_mdr_cdashig_version,
     get_mdr_cdashig_version_domains,
-    get_mdr_cdashig_version_scenarios,
+    get_mdr_cdashig_version_domains_domain,
+    get_mdr_cdashig_version_scenarios_domain_scenario,
 )
 from cdisc_library_client.api.default import get_mdr_products_data_collection
 
-from clinical_data_study_buddy.core.models.schema import Form, FieldDef
+from clinical_data_study_buddy.core.cdisc_library_service import (
+    DEFAULT_CONCURRENCY,
+    get_async_client,
+    get_client,
+)
+from clinical_data_study_buddy.core.models.schema import Codelist, Form, FieldDef
+from clinical_data_study_buddy.core.standards_store import StandardsStore, library_version
+
+_DATATYPES = {
+    "char": "text",
+    "text": "text",
+    "num": "float",
+    "float": "float",
+    "integer": "integer",
+    "date": "date",
+    "datetime": "datetime",
+    "boolean": "boolean",
+}
 
 
 class CrfGen:
     """A class for harvesting CRF data from the CDISC Library API."""
 
-    def __init__(self, api_key: str, ig_filter: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: str,
+        ig_filter: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ):
         self.api_key = api_key
         self.ig_filter = ig_filter
-        self.client = self._get_client()
+        self.concurrency = max(1, concurrency)
+        self.client = get_client(api_key)
 
-    def _get_client(self) -> AuthenticatedClient:
+    def versions(self) -> List[str]:
         """
-        Get an authenticated client for the CDISC Library API.
-
-        This method sets up an httpx client with appropriate headers, timeouts, and retries.
+        Return the CDASHIG versions listed by the CDISC Library, filtered by ``ig_filter``.
         """
-        transport = httpx.HTTPTransport(retries=5)
-        client = AuthenticatedClient(
-            base_url="https://library.cdisc.org/api",
-            token=self.api_key,
-            headers={"Accept": "application/json", "Cache-Control": "no-cache"},
-            auth_header_name="api-key",
-            prefix="",
-            timeout=30.0,
-            httpx_args={"transport": transport},
+        return self._versions(
+            _parsed(get_mdr_products_data_collection.sync_detailed(client=self.client))
         )
-        return client
 
-    def harvest(self) -> List[Form]:
+    def harvest(self, versions: Optional[List[str]] = None) -> List[Form]:
         """
         Pull CDASH IG -> domains -> scenarios and convert to Form objects.
 
         This method iterates through the CDASH Implementation Guides, their domains,
-        and scenarios, fetching the data for each and converting them into Form objects.
+        and scenarios, fetching the data for each one at a time and converting them
+        into Form objects. See harvest_async for the concurrent equivalent.
+
+        Args:
+            versions: The CDASHIG versions to harvest. Defaults to versions().
+        """
+        if versions is None:
+            versions = self.versions()
+        return [form for version in versions for form in self._harvest_version(version)]
+
+    def _harvest_version(self, version: str) -> List[Form]:
+        """
+        Pull the domains and scenarios of one CDASHIG version, one request at a time.
         """
-        products = get_mdr_products_data_collection.sync(client=self.client)
-        cdashig_links = products.additional_properties.get("_links", {}).get("cdashig", [])
         forms: list[Form] = []
-        for ver_link in cdashig_links:
-            if self.ig_filter and self.ig_filter not in ver_link["title"]:
-                continue
-            ig = get_mdr_cdashig_version.sync(client=self.client, version=ver_link["title"])
-            for dom_link in ig["_links"].get("domains", []):
-                dom = get_mdr_cdashig_version_domains.sync(client=self.client, version=ver_link["title"], domain=dom_link["title"])
-                scenarios = dom["_links"].get("scenarios") or []
-                payloads = [dom] + [
-                    get_mdr_cdashig_version_scenarios.sync(client=self.client, version=ver_link["title"], domain=dom_link["title"], scenario=s["title"])
-                    for s in scenarios
-                ]
-                for p in payloads:
-                    forms.append(self._form_from_api(p))
+        domains = _parsed(
+            get_mdr_cdashig_version_domains.sync_detailed(client=self.client, version=version)
+        )
+        for domain in _link_names(domains, "domains"):
+            dom = _parsed(
+                get_mdr_cdashig_version_domains_domain.sync_detailed(
+                    client=self.client, version=version, domain=domain
+                )
+            )
+            forms.append(self._form_from_api(dom, domain))
+            for scenario in _link_names(dom, "scenarios"):
+                names = _split_scenario(scenario)
+                scen = _parsed(
+                    get_mdr_cdashig_version_scenarios_domain_scenario.sync_detailed(
+                        client=self.client, version=version, **names
+                    )
+                )
+                forms.append(self._form_from_api(scen, domain, names["scenario"]))
         return forms
 
-    def _form_from_api(self, data: dict) -> Form:
+    async def harvest_async(self, versions: Optional[List[str]] = None) -> List[Form]:
+        """
+        Pull CDASH IG -> domains -> scenarios concurrently and convert to Form objects.
+
+        Domain and scenario documents are fetched through a shared connection pool
+        (see ``core.cdisc_library_service.get_async_client``), with at most
+        ``concurrency`` requests in flight. The forms are returned in the same
+        order as harvest().
+
+        Args:
+            versions: The CDASHIG versions to harvest. Defaults to versions().
+        """
+        per_version = await self._harvest_versions_async(versions)
+        return [form for forms in per_version for form in forms]
+
+    async def _harvest_versions_async(
+        self, versions: Optional[List[str]] = None
+    ) -> List[List[Form]]:
+        """
+        Pull CDASHIG versions concurrently, returning the forms of each version in order.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        client = get_async_client(self.api_key, self.concurrency)
+
+        async def fetch(endpoint: Any, **kwargs: Any) -> dict:
+            async with semaphore:
+                return _parsed(await endpoint.asyncio_detailed(client=client, **kwargs))
+
+        async def harvest_domain(version: str, domain: str) -> List[Form]:
+            dom = await fetch(get_mdr_cdashig_version_domains_domain, version=version, domain=domain)
+            scenarios = _link_names(dom, "scenarios")
+            payloads = await asyncio.gather(
+                *(
+                    fetch(
+                        get_mdr_cdashig_version_scenarios_domain_scenario,
+                        version=version,
+                        **_split_scenario(scenario),
+                    )
+                    for scenario in scenarios
+                )
+            )
+            return [self._form_from_api(dom, domain)] + [
+                self._form_from_api(scen, domain, _split_scenario(scenario)["scenario"])
+                for scen, scenario in zip(payloads, scenarios)
+            ]
+
+        async def harvest_version(version: str) -> List[Form]:
+            domains = await fetch(get_mdr_cdashig_version_domains, version=version)
+            per_domain = await asyncio.gather(
+                *(harvest_domain(version, domain) for domain in _link_names(domains, "domains"))
+            )
+            return [form for forms in per_domain for form in forms]
+
+        async with client:
+            if versions is None:
+                versions = self._versions(await fetch(get_mdr_products_data_collection))
+            return list(await asyncio.gather(*(harvest_version(version) for version in versions)))
+
+    def _versions(self, products: dict) -> List[str]:
+        """
+        Return the CDASHIG versions listed in a data collection products payload.
+
+        Versions are filtered by ``ig_filter`` when one is set, matched
+        against the link title as well as the version in the href.
+        """
+        links = products.get("_links", {}).get("cdashig") or []
+        return [
+            version
+            for link, version in zip(
+                [link for link in links if link.get("href")],
+                _link_names(products, "cdashig"),
+            )
+            if _matches_ig(self.ig_filter, version, link.get("title") or "")
+        ]
+
+    def _form_from_api(self, data: dict, domain: str, scenario: Optional[str] = None) -> Form:
         """
         Convert a CDISC Library API response for a domain or scenario into a Form object.
 
@@ -77,26 +182,145 @@ class CrfGen:
         for f in data.get("fields", []):
             field_def = FieldDef(
                 oid=f.get("name"),
-                prompt=f.get("label"),
-                datatype=f.get("fieldType"),
+                prompt=f.get("prompt") or f.get("label") or f.get("name"),
+                datatype=_DATATYPES.get(str(f.get("simpleDatatype", "")).lower(), "text"),
                 cdash_var=f.get("name"),
+                codelist=_codelist(f.get("_links", {}).get("codelist")),
                 range_check=f.get("rangeCheck"),
             )
             fields.append(field_def)
 
         return Form(
-            title=data.get("name"),
-            domain=data.get("domain"),
-            scenario=data.get("scenario"),
+            title=data.get("scenario") or data.get("label") or domain,
+            domain=domain,
+            scenario=scenario,
             fields=fields,
         )
 
 
-def harvest(api_key: str, ig_filter: str | None = None) -> List[Form]:
+def _parsed(response: Response) -> dict:
+    """
+    Return the parsed body of a successful API response as a plain dictionary.
+
+    Raises:
+        UnexpectedStatus: If the CDISC Library did not answer with 200 OK.
+    """
+    if response.status_code != HTTPStatus.OK or response.parsed is None:
+        raise UnexpectedStatus(response.status_code, response.content)
+    return response.parsed.to_dict()
+
+
+def _link_names(data: dict, rel: str) -> List[str]:
+    """
+    Return the last path segment of each ``_links[rel]`` href, e.g. ``2-2`` or ``VS``.
+    """
+    links = data.get("_links", {}).get(rel) or []
+    return [link["href"].rstrip("/").rsplit("/", 1)[-1] for link in links if link.get("href")]
+
+
+def _matches_ig(ig_filter: Optional[str], version: str, title: str = "") -> bool:
+    """
+    Return whether an IG version matches an ``ig_filter`` substring.
+
+    The filter may be written as in the link title (``2.3``) or as in the
+    href (``2-3``).
+    """
+    if not ig_filter:
+        return True
+    return ig_filter in title or library_version(ig_filter) in version
+
+
+def _split_scenario(name: str) -> dict:
+    """
+    Split a scenario link name such as ``VS.Generic`` into endpoint arguments.
+    """
+    domain, _, scenario = name.partition(".")
+    return {"domain": domain, "scenario": scenario}
+
+
+def _codelist(links: Optional[List[dict]]) -> Optional[Codelist]:
+    """
+    Return the first codelist linked from a field, e.g. ``/mdr/root/ct/sdtmct/codelists/C66742``.
+    """
+    for link in links or []:
+        href = link.get("href") or ""
+        code = href.rstrip("/").rsplit("/", 1)[-1]
+        if re.fullmatch(r"C\d+", code):
+            return Codelist(nci_code=code, href=href)
+    return None
+
+
+def forms_from_store(store: StandardsStore, versions: List[str]) -> List[Form]:
+    """
+    Build Form objects from CDASHIG snapshots in the offline standards store.
+
+    The forms are returned in the same order as a harvest from the API: each
+    domain followed by its scenarios.
+    """
+    forms: list[Form] = []
+    for version in versions:
+        for group in store.groups("cdashig", version):
+            rows = store.frame("cdashig", version, group=group)
+            first = rows.iloc[0]
+            scenario = first["scenario"] if isinstance(first["scenario"], str) else None
+            fields = [
+                FieldDef(
+                    oid=row.variable,
+                    prompt=row.prompt or row.label or row.variable,
+                    datatype=_DATATYPES.get(str(row.datatype or "").lower(), "text"),
+                    cdash_var=row.variable,
+                    codelist=_codelist(
+                        [{"href": href} for href in (row.codelist_href or "").split(", ")]
+                    ),
+                )
+                for row in rows.itertuples()
+            ]
+            forms.append(
+                Form(
+                    title=first["domain_label"] or first["domain"],
+                    domain=first["domain"],
+                    scenario=scenario,
+                    fields=fields,
+                )
+            )
+    return forms
+
+
+def harvest(
+    api_key: str,
+    ig_filter: str | None = None,
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> List[Form]:
     """
     A high-level function to pull CDASH IG -> domains -> scenarios and convert to Form objects.
 
-    This function is a convenient wrapper around the CrfGen class.
+    CDASHIG versions available in the offline standards store are read from it,
+    and the other versions selected by ``ig_filter`` are fetched through the
+    CrfGen class; the forms are returned in the CDISC Library's version order.
+    An ``ig_filter`` naming a single stored version (e.g. ``v2.3`` or ``2-3``)
+    is served from the store without any network access. With a concurrency
+    above 1 the API harvest runs on an asyncio event loop; async callers should
+    use CrfGen.harvest_async directly.
     """
-    crfgen = CrfGen(api_key, ig_filter)
-    return crfgen.harvest()
+    store = StandardsStore.from_env()
+    stored = store.versions("cdashig")
+    if ig_filter and library_version(ig_filter) in stored:
+        return forms_from_store(store, [library_version(ig_filter)])
+
+    crfgen = CrfGen(api_key, ig_filter, concurrency)
+    versions = crfgen.versions()
+    missing = [version for version in versions if version not in stored]
+    if crfgen.concurrency > 1:
+        per_version = asyncio.run(crfgen._harvest_versions_async(missing))
+    else:
+        per_version = [crfgen._harvest_version(version) for version in missing]
+    fetched = dict(zip(missing, per_version))
+
+    forms: list[Form] = []
+    for version in versions:
+        if version in fetched:
+            forms.extend(fetched[version])
+        else:
+            forms.extend(forms_from_store(store, [version]))
+    return forms
@@ -22,9 +22,12 @@ import clinical_data_study_buddy.generators.crfgen.exporter.odm  # noqa
 import clinical_data_study_buddy.generators.crfgen.exporter.pdf  # noqa
 import clinical_data_study_buddy.generators.crfgen.exporter.rtf  # noqa
 import clinical_data_study_buddy.generators.crfgen.exporter.xlsx  # noqa
-from cdisc_library_client.harvest import harvest
+from cdisc_library_client.harvest import DEFAULT_CONCURRENCY, harvest
 from clinical_data_study_buddy.core.models.schema import Form
 from clinical_data_study_buddy.generators.crfgen.exporter import registry as reg
+from clinical_data_study_buddy.generators.crfgen.exporter.pipeline import (
+    build_artifacts,
+)
 from clinical_data_study_buddy.generators.crfgen.utils import get_api_key
 
 load_dotenv()
@@ -40,6 +43,12 @@ def build_canonical(
     version: Optional[str] = typer.Option(
         None, "--version", "-v", help="IG version substring (optional)"
     ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        "-c",
+        help="Maximum number of concurrent CDISC Library requests",
+    ),
 ):
     """
     Fetches canonical CRF data from the CDISC Library and saves it as a JSON file.
@@ -51,6 +60,7 @@ def build_canonical(
     Args:
         out (pathlib.Path): The path where the output JSON file will be saved.
         version (Optional[str]): An optional version string to filter the IG.
+        concurrency (int): The maximum number of concurrent API requests.
     """
     try:
         api_key = get_api_key()
@@ -59,7 +69,7 @@ def build_canonical(
         sys.exit(1)
 
     console.print("Harvesting CRF data from CDISC Library...")
-    forms = harvest(api_key, ig_filter=version)
+    forms = harvest(api_key, ig_filter=version, concurrency=concurrency)
     with open(out, "w") as f:
         json.dump([f.to_dict() for f in forms], f, indent=2)
     console.print(f"✅  Saved {len(forms)} forms -> {out}")
@@ -76,6 +86,12 @@ def build(
     formats: Optional[List[str]] = typer.Option(
         None, "--formats", "-f", help="Which formats to generate"
     ),
+    force: bool = typer.Option(
+        False, "--force", help="Render every artifact, even if it is up to date"
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="Number of worker processes rendering the formats"
+    ),
 ):
     """
     Generates various CRF artifacts from a canonical CRF JSON file.
@@ -84,12 +100,23 @@ def build(
     registered exporters to generate artifacts in various formats like DOCX,
     PDF, CSV, etc.
 
+    The build is incremental: a manifest in the output directory records the
+    digest of the inputs of each artifact, that is the forms it holds, the
+    source of its exporter and its templates. Artifacts whose inputs are
+    unchanged are skipped. Exporters writing one file per group of forms are
+    rendered per group, so only the groups whose forms changed are rendered.
+
+    With several jobs, the formats are rendered concurrently in a process
+    pool. PDF and RTF are converted from a single shared DOCX rendering.
+
     Args:
         source (pathlib.Path): The path to the source canonical JSON file.
         outdir (pathlib.Path): The directory where the generated artifacts will be saved.
         formats (Optional[List[str]]): A list of specific formats to generate.
                                        If not provided, all registered formats
                                        will be generated.
+        force (bool): Whether to render every artifact, ignoring the manifest.
+        jobs (int): The number of worker processes rendering the formats.
     """
     if not source.exists():
         console.print(f"ERROR: source file not found: {source}", style="bold red")
@@ -99,12 +126,21 @@ def build(
         data = json.load(fp)
     forms = [Form(**d) for d in data]
 
-    outdir.mkdir(parents=True, exist_ok=True)
-
     if not formats:
         formats = reg.formats()
 
-    for fmt in formats:
-        fn = reg.get(fmt)
-        console.print(f"[build] Rendering {fmt} → {outdir}")
-        fn(forms, outdir)
+    try:
+        results = build_artifacts(forms, outdir, formats, force=force, jobs=jobs)
+    except ValueError as e:
+        console.print(f"ERROR: {e}", style="bold red")
+        sys.exit(1)
+
+    for result in results:
+        if result.rendered:
+            console.print(
+                f"[build] Rendered {result.format} → {outdir} "
+                f"({result.rendered} rendered, {result.up_to_date} up to date) "
+                f"in {result.seconds:.2f}s"
+            )
+        else:
+            console.print(f"[build] {result.format} is up to date")
@@ -7,12 +7,14 @@ CDISC Library.
 
 import pathlib
 import sys
+from typing import Optional
 
 import typer
 from dotenv import load_dotenv
 from rich.console import Console
 
 from clinical_data_study_buddy.core import download_service
+from clinical_data_study_buddy.core.standards_store import StandardsStore
 
 load_dotenv()
 console = Console()
@@ -22,31 +24,91 @@ download_app = typer.Typer()
 @download_app.command()
 def standard(
     standard: str = typer.Option(
-        ..., "--standard", "-s", help="The standard to download (e.g., sdtmig, adamig)."
+        ...,
+        "--standard",
+        "-s",
+        help="The standard to download (sdtmig, sendig, cdashig, adamig, ct or qrs).",
     ),
     version: str = typer.Option(
-        ..., "--version", "-v", help="The version of the standard (e.g., 3-3)."
+        ...,
+        "--version",
+        "-v",
+        help="The version of the standard (e.g., 3-3), the CT package name, "
+        "or <measure>/<version> for QRS.",
     ),
     output_dir: pathlib.Path = typer.Option(
         ".", "--output-dir", "-o", help="The directory to save the downloaded files."
     ),
+    jobs: int = typer.Option(
+        download_service.DEFAULT_JOBS,
+        "--jobs",
+        "-j",
+        help="The maximum number of concurrent requests.",
+    ),
 ):
     """
     Downloads a specified CDISC data standard from the CDISC Library.
 
     This command calls the download service to fetch the specified standard
-    and version, saving it to the designated output directory.
+    and version, saving it to the designated output directory. An interrupted
+    download resumes where it left off when the command is run again.
 
     Args:
         standard (str): The name of the standard to download (e.g., "sdtmig").
         version (str): The version of the standard to download.
         output_dir (pathlib.Path): The directory where the downloaded standard
                                    will be saved.
+        jobs (int): The maximum number of concurrent requests.
     """
     console.print(f"Downloading {standard} version {version} to {output_dir}...")
     try:
-        download_service.download_standard(standard, version, output_dir)
-        console.print("✅  Download complete.")
+        output_file = download_service.download_standard(
+            standard, version, output_dir, jobs=jobs
+        )
+        console.print(f"✅  Download complete: {output_file}")
+    except Exception as e:
+        console.print(f"ERROR: {e}", style="bold red")
+        sys.exit(1)
+
+
+@download_app.command()
+def snapshot(
+    standard: str = typer.Option(
+        ...,
+        "--standard",
+        "-s",
+        help="The standard to snapshot (sdtmig, sendig, cdashig, adamig or ct).",
+    ),
+    version: str = typer.Option(
+        ...,
+        "--version",
+        "-v",
+        help="The version of the standard (e.g., 3-3), or the CT package name.",
+    ),
+    store_dir: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--store-dir",
+        help="The standards store directory (defaults to CDISC_STANDARDS_DIR).",
+    ),
+):
+    """
+    Downloads a CDISC standard into the offline standards store.
+
+    Once a snapshot is in the store, the generators read the standard from it
+    instead of the CDISC Library API.
+
+    Args:
+        standard (str): The name of the standard to snapshot.
+        version (str): The version of the standard, or the CT package name.
+        store_dir (Optional[pathlib.Path]): The standards store directory.
+    """
+    store = StandardsStore(store_dir) if store_dir else StandardsStore.from_env()
+    console.print(
+        f"Snapshotting {standard} version {version} into {store.directory}..."
+    )
+    try:
+        path = download_service.snapshot_standard(standard, version, store)
+        console.print(f"✅  Snapshot saved to {path}")
     except Exception as e:
         console.print(f"ERROR: {e}", style="bold red")
         sys.exit(1)
@@ -67,13 +67,30 @@ def edc_raw_dataset_package(
         ..., "--domains", help="List of domains to include (e.g., DM AE VS LB)"
     ),
     study_story: str = typer.Option(
-        "none", "--study-story", help="Study story to simulate (none, high_dropout)"
+        "none",
+        "--study-story",
+        help="Study stories to simulate, comma separated (none, high_dropout, "
+        "protocol_deviations, missing_data, site_effects, realistic_demographics)",
     ),
     output_dir: pathlib.Path = typer.Option(
         ".", "--output-dir", help="Directory to save the generated package"
     ),
     output_format: str = typer.Option(
-        "csv", "--output-format", help="Output format for datasets (csv, json, xpt)"
+        "csv", "--output-format", help="Output format for datasets (csv, parquet, xpt)"
+    ),
+    seed: Optional[int] = typer.Option(
+        None, "--seed", help="Seed for reproducible, bit-identical datasets"
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="Number of worker processes generating the datasets"
+    ),
+    compression: str = typer.Option(
+        "deflate",
+        "--compression",
+        help="Compression of the package (stored, deflate, bzip2, lzma)",
+    ),
+    compression_level: Optional[int] = typer.Option(
+        None, "--compression-level", help="Compression level (e.g., 0-9 for deflate)"
     ),
 ):
     """
@@ -89,6 +106,10 @@ def edc_raw_dataset_package(
         study_story (str): The study story to simulate (e.g., "high_dropout").
         output_dir (pathlib.Path): The directory to save the generated package.
         output_format (str): The output format for the datasets (e.g., "csv").
+        seed (Optional[int]): The seed for reproducible datasets.
+        jobs (int): The number of worker processes generating the datasets.
+        compression (str): The compression of the package.
+        compression_level (Optional[int]): The compression level.
     """
     try:
         generation_service.generate_edc_raw_dataset_package(
@@ -98,6 +119,10 @@ def edc_raw_dataset_package(
             study_story,
             output_dir,
             output_format,
+            seed=seed,
+            jobs=jobs,
+            compression=compression,
+            compression_level=compression_level,
         )
         console.print(f"EDC Raw Dataset Package generated successfully in {output_dir}")
     except Exception as e:
@@ -120,6 +145,9 @@ def synthetic_data(
     output_dir: pathlib.Path = typer.Option(
         ".", "--output-dir", help="Directory to save the file."
     ),
+    output_format: str = typer.Option(
+        "csv", "--output-format", help="Output format (csv, parquet, xpt)."
+    ),
 ):
     """
     Generates synthetic CDISC datasets for a specific domain.
@@ -133,10 +161,11 @@ def synthetic_data(
         domain (str): The domain to generate data for (e.g., "DM").
         num_subjects (int): The number of subjects.
         output_dir (pathlib.Path): The directory where the generated file will be saved.
+        output_format (str): The format of the generated file.
     """
     try:
         file_path = generation_service.generate_synthetic_data(
-            standard, version, domain, num_subjects, output_dir
+            standard, version, domain, num_subjects, output_dir, output_format
         )
         console.print(f"✅  Saved dataset -> {file_path}")
     except Exception as e:
@@ -208,6 +237,12 @@ def cdash_crf(
     openfda_max_results: int = typer.Option(
         20, "--openfda-max-results", help="Max adverse events to fetch from OpenFDA."
     ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="Number of worker processes rendering the domains"
+    ),
+    force: bool = typer.Option(
+        False, "--force", help="Render every CRF, even if it is up to date"
+    ),
 ):
     """
     Generates Word CRF (Case Report Form) shells from the CDISC Library API.
@@ -223,6 +258,8 @@ def cdash_crf(
         config_path (pathlib.Path): The path to the configuration file.
         openfda_drug_name (Optional[str]): Drug name to fetch AEs from OpenFDA.
         openfda_max_results (int): Max AEs to fetch from OpenFDA.
+        jobs (int): The number of worker processes rendering the domains.
+        force (bool): Whether to render every CRF, ignoring the build manifest.
     """
     try:
         generation_service.generate_cdash_crf(
@@ -232,6 +269,9 @@ def cdash_crf(
             config_path,
             openfda_drug_name,
             openfda_max_results,
+            jobs=jobs,
+            force=force,
+            progress=console.print,
         )
         console.print("CDASH CRF generated successfully.")
     except Exception as e:
@@ -6,18 +6,58 @@ Excel-based specification file.
 """
 
 import pathlib
+from typing import List
 
 import typer
 from dotenv import load_dotenv
 from rich.console import Console
 
-from clinical_data_study_buddy.generators.spec import generate_dataset, validate
+from clinical_data_study_buddy.core.cdisc_library_service import DEFAULT_CONCURRENCY
+from clinical_data_study_buddy.generators.spec import (
+    generate_dataset,
+    generate_template,
+    validate,
+    validate_dir,
+)
 
 load_dotenv()
 console = Console()
 spec_app = typer.Typer()
 
 
+@spec_app.command("generate-template")
+def spec_generate_template(
+    product: str = typer.Option(
+        ..., "--product", help="The CDISC product (e.g., sdtmig, adamig)."
+    ),
+    version: str = typer.Option(
+        ..., "--version", help="The version of the product (e.g., 3-3)."
+    ),
+    domains: List[str] = typer.Option(
+        ..., "--domains", help="A domain to include; repeat for several domains."
+    ),
+    output_dir: pathlib.Path = typer.Option(
+        ".", "--output-dir", help="The directory to save the generated Excel file."
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        help="Maximum number of concurrent CDISC Library requests.",
+    ),
+):
+    """
+    Generates an Excel specification template from the CDISC Library.
+
+    Args:
+        product (str): The CDISC product.
+        version (str): The version of the product.
+        domains (List[str]): The domains to include in the specification.
+        output_dir (pathlib.Path): The directory to save the generated Excel file.
+        concurrency (int): The maximum number of concurrent requests.
+    """
+    generate_template(product, version, domains, str(output_dir), concurrency)
+
+
 @spec_app.command("generate-dataset")
 def spec_generate_dataset(
     spec_file: pathlib.Path = typer.Option(
@@ -28,6 +68,9 @@ def spec_generate_dataset(
     output_dir: pathlib.Path = typer.Option(
         ".", "--output-dir", help="The directory to save the generated dataset files."
     ),
+    output_format: str = typer.Option(
+        "csv", "--output-format", help="Output format for datasets (csv, parquet, xpt)."
+    ),
 ):
     """
     Generates a synthetic dataset from an Excel specification file.
@@ -35,8 +78,9 @@ def spec_generate_dataset(
     Args:
         spec_file (pathlib.Path): Path to the Excel specification file.
         output_dir (pathlib.Path): The directory to save the generated dataset files.
+        output_format (str): The format of the generated dataset files.
     """
-    generate_dataset(str(spec_file), str(output_dir))
+    generate_dataset(str(spec_file), str(output_dir), output_format)
 
 
 @spec_app.command("validate")
@@ -45,14 +89,72 @@ def spec_validate(
         ..., "--spec-file", help="Path to the Excel specification file."
     ),
     dataset_file: pathlib.Path = typer.Option(
-        ..., "--dataset-file", help="Path to the dataset file (e.g., a CSV)."
+        ..., "--dataset-file", help="Path to the dataset file (csv, parquet, xpt)."
+    ),
+    domain: str = typer.Option(
+        None,
+        "--domain",
+        help="The domain of the dataset. Defaults to the domain in its filename.",
+    ),
+    report: pathlib.Path = typer.Option(
+        None, "--report", help="Write the validation report to a .json or .xlsx file."
     ),
 ):
     """
     Validates a dataset against an Excel specification file.
 
+    Exits with status 1 if the dataset fails validation.
+
     Args:
         spec_file (pathlib.Path): Path to the Excel specification file.
         dataset_file (pathlib.Path): Path to the dataset file to be validated.
+        domain (str): The domain of the dataset.
+        report (pathlib.Path): The file to write the validation report to.
+    """
+    result = validate(
+        str(spec_file),
+        str(dataset_file),
+        domain=domain,
+        report_path=str(report) if report else None,
+    )
+    if result is None or not result.passed:
+        raise typer.Exit(code=1)
+
+
+@spec_app.command("validate-dir")
+def spec_validate_dir(
+    spec_file: pathlib.Path = typer.Option(
+        ..., "--spec-file", help="Path to the Excel specification file."
+    ),
+    dataset_dir: pathlib.Path = typer.Option(
+        ...,
+        "--dataset-dir",
+        help="Directory of the dataset files (csv, parquet, xpt), named by domain.",
+    ),
+    report: pathlib.Path = typer.Option(
+        None, "--report", help="Write the merged report to a .json or .xlsx file."
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="Number of worker processes validating the datasets"
+    ),
+):
+    """
+    Validates every dataset of a directory against an Excel specification file.
+
+    The specification is parsed once. Exits with status 1 if any dataset fails
+    validation.
+
+    Args:
+        spec_file (pathlib.Path): Path to the Excel specification file.
+        dataset_dir (pathlib.Path): Directory of the dataset files.
+        report (pathlib.Path): The file to write the merged report to.
+        jobs (int): The number of worker processes.
     """
-    validate(str(spec_file), str(dataset_file))
+    reports = validate_dir(
+        str(spec_file),
+        str(dataset_dir),
+        report_path=str(report) if report else None,
+        jobs=jobs,
+    )
+    if not all(result.passed for result in reports):
+        raise typer.Exit(code=1)
@@ -2,29 +2,44 @@
 This module provides a centralized service for interacting with the CDISC Library API.
 """
 
+import importlib.util
+from typing import Optional
+
 import httpx
 
+from cdisc_library_client.cache import cached_async_transport, cached_transport
 from cdisc_library_client.client import AuthenticatedClient
 from clinical_data_study_buddy.generators.crfgen.utils import get_api_key
 
+BASE_URL = "https://library.cdisc.org/api"
+DEFAULT_CONCURRENCY = 16
+# HTTP/2 needs the optional ``h2`` package; fall back to HTTP/1.1 without it.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 
-def get_client() -> AuthenticatedClient:
+def get_client(api_key: Optional[str] = None) -> AuthenticatedClient:
     """
     Get an authenticated client for the CDISC Library API.
 
     This function retrieves the API key and creates an AuthenticatedClient
     instance with appropriate settings for connecting to the CDISC Library API,
-    including automatic retries.
+    including automatic retries. Responses are served from the shared on-disk
+    metadata cache (see ``cdisc_library_client.cache``) whenever possible. The
+    client keeps a connection pool, so callers making many requests should
+    create it once and share it.
+
+    Args:
+        api_key (Optional[str]): The API key to use. Defaults to the configured key.
 
     Returns:
         AuthenticatedClient: An authenticated client for the CDISC Library API.
     """
-    api_key = get_api_key()
+    api_key = api_key or get_api_key()
     headers = {"api-key": api_key, "Accept": "application/json"}
-    transport = httpx.HTTPTransport(retries=5)
+    transport = cached_transport(httpx.HTTPTransport(retries=5))
     client = AuthenticatedClient(
-        base_url="https://library.cdisc.org/api",
-        token="dummy",
+        base_url=BASE_URL,
+        token=api_key,
         headers=headers,
         auth_header_name="api-key",
         prefix="",
@@ -32,3 +47,42 @@ def get_client() -> AuthenticatedClient:
         httpx_args={"transport": transport},
     )
     return client
+
+
+def get_async_client(
+    api_key: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY
+) -> AuthenticatedClient:
+    """
+    Get an authenticated client for concurrent requests to the CDISC Library API.
+
+    The client is meant for the ``asyncio``/``asyncio_detailed`` endpoint
+    functions and must be entered with ``async with``. Its connection pool is
+    sized to the given concurrency and uses HTTP/2 when the ``h2`` package is
+    installed, so concurrent requests share a small number of connections.
+    Responses are served from the shared on-disk metadata cache whenever
+    possible.
+
+    Args:
+        api_key (Optional[str]): The API key to use. Defaults to the configured key.
+        concurrency (int): The maximum number of concurrent connections.
+
+    Returns:
+        AuthenticatedClient: An authenticated client for the CDISC Library API.
+    """
+    api_key = api_key or get_api_key()
+    concurrency = max(1, concurrency)
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    transport = cached_async_transport(
+        httpx.AsyncHTTPTransport(retries=5, http2=HTTP2_AVAILABLE, limits=limits)
+    )
+    return AuthenticatedClient(
+        base_url=BASE_URL,
+        token=api_key,
+        headers={"api-key": api_key, "Accept": "application/json"},
+        auth_header_name="api-key",
+        prefix="",
+        timeout=30.0,
+        httpx_args={"transport": transport},
+    )
@@ -0,0 +1,164 @@
+"""
+This module provides a service for converting documents with pandoc.
+
+pandoc converts one document per invocation, and PDF output also starts a
+LaTeX engine, so converting many small documents is dominated by process
+startup. The service does not remove that cost: every conversion still starts
+its own pandoc (and LaTeX) process, since pandoc has no mode that converts
+several inputs to separate outputs and neither program can be kept running
+between documents. What the service does is run those processes from a
+bounded pool of worker threads, so conversions submitted from several threads
+overlap instead of queueing one after another. The number of queued
+conversions is bounded so producers cannot run ahead of the workers, and each
+conversion is killed after a timeout.
+
+All pandoc-backed exporters go through the shared service returned by
+get_conversion_service.
+"""
+
+import os
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import pypandoc
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+DEFAULT_QUEUE_SIZE = 4 * DEFAULT_WORKERS
+DEFAULT_TIMEOUT = 300.0
+
+
+class ConversionService:
+    """
+    Converts documents with a pool of pandoc processes.
+
+    Attributes:
+        workers (int): The maximum number of concurrent pandoc processes.
+        queue_size (int): The maximum number of conversions queued or
+                          running; submitting more blocks until one is done.
+        timeout (float): The number of seconds after which a pandoc process
+                         is killed.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        pandoc_path: Optional[str] = None,
+    ):
+        """
+        Initializes the service.
+
+        Args:
+            workers (int): The maximum number of concurrent pandoc processes.
+            queue_size (int): The maximum number of conversions queued or
+                              running.
+            timeout (float): The number of seconds after which a pandoc
+                             process is killed.
+            pandoc_path (Optional[str]): The pandoc executable. Defaults to the
+                                         one pypandoc finds.
+        """
+        self.workers = workers
+        self.queue_size = max(queue_size, workers)
+        self.timeout = timeout
+        self._pandoc_path = pandoc_path
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="pandoc"
+        )
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+
+    @property
+    def pandoc_path(self) -> str:
+        """The pandoc executable, looked up on first use."""
+        if self._pandoc_path is None:
+            self._pandoc_path = pypandoc.get_pandoc_path()
+        return self._pandoc_path
+
+    def submit(self, source: Path, to: str, outputfile: Path) -> Future:
+        """
+        Queues a conversion, waiting while the queue is full.
+
+        Args:
+            source (Path): The document to convert; its format is inferred
+                           from its extension.
+            to (str): The output format, e.g. "rtf" or "pdf".
+            outputfile (Path): The converted document.
+
+        Returns:
+            Future: The conversion, resolving to the output file.
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(
+                self._convert, Path(source), to, Path(outputfile)
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def convert(self, source: Path, to: str, outputfile: Path) -> None:
+        """
+        Converts a document, waiting for the conversion to finish.
+
+        Args:
+            source (Path): The document to convert.
+            to (str): The output format, e.g. "rtf" or "pdf".
+            outputfile (Path): The converted document.
+
+        Raises:
+            RuntimeError: If pandoc fails or times out.
+        """
+        self.submit(source, to, outputfile).result()
+
+    def close(self) -> None:
+        """Waits for the queued conversions and stops the workers."""
+        self._executor.shutdown(wait=True)
+
+    def _convert(self, source: Path, to: str, outputfile: Path) -> Path:
+        """Runs pandoc on a document."""
+        # pandoc writes PDF through LaTeX, selected by the output extension
+        args = [self.pandoc_path, str(source), "--output", str(outputfile)]
+        if to != "pdf":
+            args.append(f"--to={to}")
+        try:
+            result = subprocess.run(
+                args, capture_output=True, text=True, timeout=self.timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(
+                f"pandoc timed out after {self.timeout}s converting {source.name}"
+            )
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"pandoc failed to convert {source.name} to {to}: "
+                f"{result.stderr.strip()}"
+            )
+        return outputfile
+
+
+_service: Optional[ConversionService] = None
+_service_pid: Optional[int] = None
+_service_lock = threading.Lock()
+
+
+def get_conversion_service() -> ConversionService:
+    """
+    Returns the conversion service shared by the pandoc-backed exporters.
+
+    Each process has its own service, so worker processes forked by a build
+    do not inherit the worker threads of their parent.
+
+    Returns:
+        ConversionService: The service.
+    """
+    global _service, _service_pid
+    with _service_lock:
+        if _service is None or _service_pid != os.getpid():
+            _service = ConversionService()
+            _service_pid = os.getpid()
+        return _service
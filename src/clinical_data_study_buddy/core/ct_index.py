@@ -0,0 +1,283 @@
+"""
+This module provides an in-memory index of controlled terminology for sampling
+codelist values.
+
+The index maps the NCI code of each codelist to the submission values of its
+terms, and draws whole arrays of values at once with vectorized weighted
+sampling. It is built once per package: from a CT snapshot in the offline
+standards store when there is one, otherwise with one CDISC Library request
+per codelist. Those requests go through the on-disk metadata cache (see
+``cdisc_library_client.cache``), which keys them by package and NCI code, so
+later builds of the same codelists do not hit the network.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+from cdisc_library_client.api.controlled_terminology_ct import (
+    get_mdr_ct_packages_package_codelists_codelist,
+)
+from clinical_data_study_buddy.core.cdisc_library_service import get_client
+from clinical_data_study_buddy.core.standards_store import StandardsStore
+
+CT_PACKAGE_ENV = "CDISC_CT_PACKAGE"
+DEFAULT_JOBS = 8
+
+# Codelists fetched from the CDISC Library, keyed by package and NCI code
+_FETCHED: Dict[tuple, np.ndarray] = {}
+
+
+class ControlledTerminologyIndex:
+    """
+    An in-memory index of codelist submission values, keyed by NCI code.
+
+    Values are sampled uniformly unless weights are set for the codelist, e.g.
+    to reproduce a realistic distribution of sexes or races.
+    """
+
+    def __init__(self, terms: Optional[Mapping[str, Iterable[str]]] = None):
+        """
+        Initializes the ControlledTerminologyIndex.
+
+        Args:
+            terms (Optional[Mapping[str, Iterable[str]]]): The submission values
+                of each codelist, keyed by NCI code.
+        """
+        self._values: Dict[str, np.ndarray] = {}
+        self._weights: Dict[str, np.ndarray] = {}
+        for code, values in (terms or {}).items():
+            self.add(code, values)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, code: str, values: Iterable[str]):
+        """
+        Adds the submission values of a codelist to the index.
+
+        Codelists without any value are ignored.
+
+        Args:
+            code (str): The NCI code of the codelist (e.g. "C66731").
+            values (Iterable[str]): The submission values of its terms.
+        """
+        values = np.asarray(list(values), dtype=object)
+        if len(values):
+            self._values[code] = values
+            self._weights.pop(code, None)
+
+    def values(self, code: str) -> list:
+        """
+        Returns the submission values of a codelist.
+
+        Args:
+            code (str): The NCI code of the codelist.
+
+        Returns:
+            list: The submission values, empty if the codelist is not indexed.
+        """
+        return list(self._values.get(code, []))
+
+    def set_weights(self, code: str, weights: Mapping[str, float]):
+        """
+        Sets the relative frequency of the values of a codelist.
+
+        Values without a weight are never sampled.
+
+        Args:
+            code (str): The NCI code of the codelist.
+            weights (Mapping[str, float]): The weight of each submission value.
+
+        Raises:
+            KeyError: If the codelist is not indexed.
+            ValueError: If no indexed value has a positive weight.
+        """
+        values = self._values[code]
+        probabilities = np.array([weights.get(v, 0.0) for v in values], dtype=float)
+        total = probabilities.sum()
+        if total <= 0:
+            raise ValueError(f"No value of codelist {code} has a positive weight")
+        self._weights[code] = probabilities / total
+
+    def sample(self, code: str, size: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Draws submission values of a codelist.
+
+        Args:
+            code (str): The NCI code of the codelist.
+            size (int): The number of values to draw.
+            rng (numpy.random.Generator): The random number generator to draw from.
+
+        Returns:
+            numpy.ndarray: The drawn values.
+
+        Raises:
+            KeyError: If the codelist is not indexed.
+        """
+        values = self._values[code]
+        return values[rng.choice(len(values), size=size, p=self._weights.get(code))]
+
+    @classmethod
+    def from_store(
+        cls, store: StandardsStore, package: str, codes: Optional[Iterable[str]] = None
+    ) -> "ControlledTerminologyIndex":
+        """
+        Builds the index from a CT package snapshot in the offline standards store.
+
+        Args:
+            store (StandardsStore): The standards store.
+            package (str): The CT package (e.g. "sdtmct-2024-03-29").
+            codes (Optional[Iterable[str]]): The codelists to index. Defaults
+                                             to every codelist of the package.
+
+        Returns:
+            ControlledTerminologyIndex: The index.
+        """
+        terms = store.frame("ct", package, columns=["codelist", "submission_value"])
+        if codes is not None:
+            terms = terms[terms["codelist"].isin(set(codes))]
+        return cls(
+            {
+                code: group["submission_value"].dropna()
+                for code, group in terms.groupby("codelist", sort=False)
+            }
+        )
+
+    @classmethod
+    def from_api(
+        cls,
+        package: str,
+        codes: Iterable[str],
+        api_key: Optional[str] = None,
+        jobs: int = DEFAULT_JOBS,
+    ) -> "ControlledTerminologyIndex":
+        """
+        Builds the index from the CDISC Library, with one request per codelist.
+
+        The requests run concurrently over one pooled client. Codelists that
+        were already fetched by this process are not requested again, and
+        codelists that cannot be fetched are left out of the index.
+
+        Args:
+            package (str): The CT package (e.g. "sdtmct-2024-03-29").
+            codes (Iterable[str]): The NCI codes of the codelists to index.
+            api_key (Optional[str]): The CDISC Library API key. Defaults to the
+                                     configured key.
+            jobs (int): The maximum number of concurrent requests.
+
+        Returns:
+            ControlledTerminologyIndex: The index.
+        """
+        codes = sorted(set(codes))
+        missing = [code for code in codes if (package, code) not in _FETCHED]
+        if missing:
+            client = get_client(api_key=api_key)
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+                fetched = pool.map(
+                    lambda code: _fetch_codelist(client, package, code), missing
+                )
+                for code, values in zip(missing, fetched):
+                    if values is not None:
+                        _FETCHED[(package, code)] = values
+        return cls(
+            {
+                code: _FETCHED[(package, code)]
+                for code in codes
+                if (package, code) in _FETCHED
+            }
+        )
+
+
+def _fetch_codelist(client, package: str, code: str) -> Optional[np.ndarray]:
+    """Fetches the submission values of a codelist, or None if it cannot be fetched."""
+    try:
+        response = get_mdr_ct_packages_package_codelists_codelist.sync_detailed(
+            client=client, package=package, codelist=code
+        )
+    except Exception:
+        return None
+    if response.status_code != HTTPStatus.OK:
+        return None
+    terms = json.loads(response.content).get("terms") or []
+    return np.asarray(
+        [t["submissionValue"] for t in terms if t.get("submissionValue")],
+        dtype=object,
+    )
+
+
+def codelist_package(href: Optional[str]) -> Optional[str]:
+    """
+    Returns the CT package named by a codelist href, if any.
+
+    Args:
+        href (Optional[str]): The href, e.g.
+                              "/mdr/ct/packages/sdtmct-2024-03-29/codelists/C66731".
+
+    Returns:
+        Optional[str]: The package, e.g. "sdtmct-2024-03-29", or None for hrefs
+                       that do not name a package version.
+    """
+    parts = (href or "").strip("/").split("/")
+    if "packages" in parts[:-1]:
+        return parts[parts.index("packages") + 1]
+    return None
+
+
+def load_ct_index(
+    codelists: Iterable,
+    package: Optional[str] = None,
+    store: Optional[StandardsStore] = None,
+    api_key: Optional[str] = None,
+) -> ControlledTerminologyIndex:
+    """
+    Builds the controlled terminology index of the given codelists.
+
+    Each codelist is read from the package named by its href. Codelists whose
+    href does not name a package are read from ``package``, which defaults to
+    the ``CDISC_CT_PACKAGE`` environment variable and then to the newest CT
+    snapshot in the standards store. Packages in the store are read from it;
+    the others are fetched from the CDISC Library when an API key is
+    available. Codelists that cannot be resolved are left out of the index.
+
+    Args:
+        codelists (Iterable): The codelists, as ``Codelist`` models.
+        package (Optional[str]): The default CT package.
+        store (Optional[StandardsStore]): The standards store. Defaults to the
+                                          store configured by the environment.
+        api_key (Optional[str]): The CDISC Library API key.
+
+    Returns:
+        ControlledTerminologyIndex: The index.
+    """
+    store = store if store is not None else StandardsStore.from_env()
+    package = package or os.environ.get(CT_PACKAGE_ENV)
+    if not package:
+        snapshots = store.versions("ct")
+        package = snapshots[-1] if snapshots else None
+
+    by_package: Dict[str, set] = {}
+    for codelist in codelists:
+        source = codelist_package(codelist.href) or package
+        if source:
+            by_package.setdefault(source, set()).add(codelist.nci_code)
+
+    index = ControlledTerminologyIndex()
+    for source, codes in by_package.items():
+        if store.has("ct", source):
+            part = ControlledTerminologyIndex.from_store(store, source, codes)
+        elif api_key:
+            part = ControlledTerminologyIndex.from_api(source, codes, api_key=api_key)
+        else:
+            continue
+        for code in codes:
+            if code in part:
+                index.add(code, part.values(code))
+    return index
@@ -1,57 +1,333 @@
 """
 This module provides a service for downloading CDISC standards from the CDISC Library API.
+
+Downloads are checkpointed: every fetched resource is written to its own file
+in a ``.<standard>_<version>.parts`` directory next to the output, so an
+interrupted download resumes where it left off when run again. The linked
+resources are fetched concurrently, and the final JSON document is streamed
+to disk one resource at a time.
 """
 
 import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
 from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+import httpx
 
+from cdisc_library_client.api.analysis_data_model_and_implementation_guide_a_da_m_and_a_da_mig import (
+    get_mdr_adam_product,
+    get_mdr_adam_product_datastructures,
+)
+from cdisc_library_client.api.cdash_implementation_guide_cdashig import (
+    get_mdr_cdashig_version,
+    get_mdr_cdashig_version_classes,
+    get_mdr_cdashig_version_domains,
+    get_mdr_cdashig_version_scenarios,
+)
+from cdisc_library_client.api.controlled_terminology_ct import (
+    get_mdr_ct_packages_package_codelists,
+    get_mdr_ct_packages_product,
+)
+from cdisc_library_client.api.measures import (
+    get_mdr_qrs_measure_version,
+    get_mdr_qrs_measure_version_items,
+    get_mdr_qrs_measure_version_responsegroups,
+)
 from cdisc_library_client.api.sdtm_implementation_guide_sdtmig import (
     get_mdr_sdtmig_version,
     get_mdr_sdtmig_version_classes,
     get_mdr_sdtmig_version_datasets,
 )
+from cdisc_library_client.api.send_implementation_guide_sendig import (
+    get_mdr_sendig_version,
+    get_mdr_sendig_version_classes,
+    get_mdr_sendig_version_datasets,
+)
+from cdisc_library_client.client import AuthenticatedClient
+from cdisc_library_client.types import Response
 from clinical_data_study_buddy.core.cdisc_library_service import get_client
+from clinical_data_study_buddy.core.standards_store import STANDARDS, StandardsStore
+
+DEFAULT_JOBS = 8
+
+
+def _version_args(version: str) -> Dict[str, str]:
+    return {"version": version}
+
+
+def _qrs_args(version: str) -> Dict[str, str]:
+    measure, _, measure_version = version.partition("/")
+    if not measure_version:
+        raise ValueError(
+            f"QRS versions are given as <measure>/<version>, e.g. AIMS01/2-0, not {version}"
+        )
+    return {"measure": measure, "version": measure_version}
+
+
+@dataclass(frozen=True)
+class _Product:
+    """
+    The CDISC Library endpoints describing one kind of product.
+
+    Attributes:
+        root: The endpoint module returning the product document.
+        relations: Maps each relation (the ``_links`` key listing the linked
+                   resources, e.g. "datasets") to its list endpoint module.
+        arguments: Builds the root endpoint arguments from a version.
+        listing_arguments: Builds the list endpoint arguments from a version,
+                           if they differ from the root endpoint's.
+    """
+
+    root: ModuleType
+    relations: Dict[str, ModuleType]
+    arguments: Callable[[str], Dict[str, str]] = _version_args
+    listing_arguments: Optional[Callable[[str], Dict[str, str]]] = None
+
+    def fetch_root(self, client: AuthenticatedClient, version: str) -> Response:
+        return self.root.sync_detailed(client=client, **self.arguments(version))
+
+    def fetch_listing(
+        self, client: AuthenticatedClient, relation: str, version: str
+    ) -> Response:
+        arguments = self.listing_arguments or self.arguments
+        return self.relations[relation].sync_detailed(
+            client=client, **arguments(version)
+        )
+
+
+_PRODUCTS: Dict[str, _Product] = {
+    "sdtmig": _Product(
+        get_mdr_sdtmig_version,
+        {
+            "classes": get_mdr_sdtmig_version_classes,
+            "datasets": get_mdr_sdtmig_version_datasets,
+        },
+    ),
+    "sendig": _Product(
+        get_mdr_sendig_version,
+        {
+            "classes": get_mdr_sendig_version_classes,
+            "datasets": get_mdr_sendig_version_datasets,
+        },
+    ),
+    "cdashig": _Product(
+        get_mdr_cdashig_version,
+        {
+            "classes": get_mdr_cdashig_version_classes,
+            "domains": get_mdr_cdashig_version_domains,
+            "scenarios": get_mdr_cdashig_version_scenarios,
+        },
+    ),
+    "adamig": _Product(
+        get_mdr_adam_product,
+        {"dataStructures": get_mdr_adam_product_datastructures},
+        arguments=lambda version: {"product": f"adamig-{version}"},
+    ),
+    "ct": _Product(
+        get_mdr_ct_packages_product,
+        {"codelists": get_mdr_ct_packages_package_codelists},
+        arguments=lambda version: {"product": version},
+        listing_arguments=lambda version: {"package": version},
+    ),
+    "qrs": _Product(
+        get_mdr_qrs_measure_version,
+        {
+            "items": get_mdr_qrs_measure_version_items,
+            "responsegroups": get_mdr_qrs_measure_version_responsegroups,
+        },
+        arguments=_qrs_args,
+    ),
+}
+
+
+def _product(standard: str) -> _Product:
+    try:
+        return _PRODUCTS[standard]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported standard: {standard}. Supported: {', '.join(_PRODUCTS)}"
+        ) from None
+
+
+def _content(response: Response, what: str) -> bytes:
+    """
+    Returns the body of a successful API response.
 
+    Raises:
+        ValueError: If the CDISC Library did not answer with 200 OK.
+    """
+    if response.status_code != HTTPStatus.OK:
+        raise ValueError(f"Could not download {what}: HTTP {response.status_code}")
+    return response.content
+
+
+def _atomic_write(path: Path, data: bytes):
+    """Writes a file so that it is either complete or absent, never partial."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+        tmp.write(data)
+    os.replace(tmp.name, path)
+
+
+def _checkpoint(path: Path, fetch: Callable[[], bytes]) -> bytes:
+    """Returns the checkpointed content at *path*, fetching and saving it if missing."""
+    if path.exists():
+        return path.read_bytes()
+    data = fetch()
+    _atomic_write(path, data)
+    return data
+
+
+def _fetch_resource(http: httpx.Client, href: str, path: Path):
+    response = http.get(href)
+    response.raise_for_status()
+    _atomic_write(path, response.content)
 
-def download_standard(standard: str, version: str, output_dir: Path):
+
+def _write_document(output_file: Path, root: dict, relations: Dict[str, List[Path]]):
+    """
+    Streams the product document and its linked resources to *output_file*.
+
+    Each linked resource is copied from its checkpoint file, so only one of them
+    is held in memory at a time.
+    """
+    for relation in relations:
+        root.pop(relation, None)
+    head = json.dumps(root)[:-1]
+    with tempfile.NamedTemporaryFile(
+        "w", dir=output_file.parent, delete=False, encoding="utf-8"
+    ) as out:
+        out.write(head)
+        separator = ", " if root else ""
+        for relation, paths in relations.items():
+            out.write(f"{separator}{json.dumps(relation)}: [")
+            for i, path in enumerate(paths):
+                if i:
+                    out.write(", ")
+                out.write(path.read_text(encoding="utf-8"))
+            out.write("]")
+            separator = ", "
+        out.write("}")
+    os.replace(out.name, output_file)
+
+
+def download_standard(
+    standard: str, version: str, output_dir: Path, jobs: int = DEFAULT_JOBS
+) -> Path:
     """
     Downloads a CDISC data standard from the CDISC Library.
 
-    This function currently supports downloading the "sdtmig" standard.
-    It fetches the standard's data, including its classes and datasets,
-    and saves it as a JSON file in the specified output directory.
+    This function fetches the product document of the standard, then every
+    resource it links to (e.g. the classes and datasets of an SDTMIG), and
+    saves them together as a JSON file in the specified output directory. The
+    linked resources are fetched concurrently and checkpointed one file per
+    resource, so running the function again after an interruption only fetches
+    what is still missing.
 
     Args:
-        standard (str): The name of the standard to download. Currently, only "sdtmig" is supported.
-        version (str): The version of the standard to download.
+        standard (str): The name of the standard to download: "sdtmig", "sendig",
+                        "cdashig", "adamig", "ct" or "qrs".
+        version (str): The version of the standard to download. For "ct", the
+                       name of the terminology package (e.g. "sdtmct-2024-03-29");
+                       for "qrs", ``<measure>/<version>`` (e.g. "AIMS01/2-0").
         output_dir (Path): The directory where the downloaded standard will be saved.
+        jobs (int): The maximum number of concurrent requests.
+
+    Returns:
+        Path: The path of the written JSON file.
 
     Raises:
-        ValueError: If a standard other than "sdtmig" is requested.
+        ValueError: If the standard is not supported or could not be downloaded.
     """
-    if standard.lower() != "sdtmig":
-        raise ValueError("Only sdtmig is supported at this time.")
-
+    standard = standard.lower()
+    product = _product(standard)
     client = get_client()
-    data = get_mdr_sdtmig_version.sync(client=client, version=version)
 
-    classes = []
-    for class_link in data["_links"]["classes"]:
-        class_data = get_mdr_sdtmig_version_classes.sync(
-            client=client, version=version, class_name=class_link["title"]
+    name = f"{standard}_{version.replace('/', '_')}"
+    parts = output_dir / f".{name}.parts"
+    root = json.loads(
+        _checkpoint(
+            parts / "root.json",
+            lambda: _content(
+                product.fetch_root(client, version), f"{standard} {version}"
+            ),
         )
-        classes.append(class_data)
-    data["classes"] = classes
+    )
 
-    datasets = []
-    for dataset_link in data["_links"]["datasets"]:
-        dataset_data = get_mdr_sdtmig_version_datasets.sync(
-            client=client, version=version, dataset_name=dataset_link["title"]
+    relations: Dict[str, List[Path]] = {}
+    pending = []
+    for relation in product.relations:
+        listing = json.loads(
+            _checkpoint(
+                parts / relation / "index.json",
+                lambda: _content(
+                    product.fetch_listing(client, relation, version),
+                    f"{standard} {version} {relation}",
+                ),
+            )
         )
-        datasets.append(dataset_data)
-    data["datasets"] = datasets
+        links = listing.get("_links", {}).get(relation) or []
+        relations[relation] = []
+        for i, link in enumerate(links):
+            path = parts / relation / f"{i:05d}.json"
+            relations[relation].append(path)
+            if not path.exists():
+                pending.append((link["href"], path))
+
+    http = client.get_httpx_client()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [
+            pool.submit(_fetch_resource, http, href, path) for href, path in pending
+        ]
+        for future in futures:
+            future.result()
 
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_file = output_dir / f"{standard}_{version}.json"
-    with open(output_file, "w") as f:
-        json.dump(data, f, indent=2)
+    output_file = output_dir / f"{name}.json"
+    _write_document(output_file, root, relations)
+    shutil.rmtree(parts)
+    return output_file
+
+
+def snapshot_standard(
+    standard: str, version: str, store: Optional[StandardsStore] = None
+) -> Path:
+    """
+    Downloads a CDISC standard into the offline standards store.
+
+    The whole product document is fetched in a single request and written to
+    the store as a columnar table, from which ``load_ig``, ``harvest``,
+    ``generate_template`` and ``generate_define_xml`` read it without network
+    access.
+
+    Args:
+        standard (str): The standard to download: "sdtmig", "sendig", "cdashig",
+                        "adamig" or "ct".
+        version (str): The version of the standard (e.g. "3-3"). For "ct", the
+                       name of the terminology package (e.g. "sdtmct-2024-03-29").
+        store (Optional[StandardsStore]): The store to write to. Defaults to the
+                                          store configured by the environment.
+
+    Returns:
+        Path: The directory of the written snapshot.
+
+    Raises:
+        ValueError: If the standard is not supported or could not be downloaded.
+    """
+    standard = standard.lower()
+    if standard not in STANDARDS:
+        raise ValueError(
+            f"Unsupported standard: {standard}. Supported: {', '.join(STANDARDS)}"
+        )
+
+    response = _product(standard).fetch_root(get_client(), version)
+    document = json.loads(_content(response, f"{standard} {version}"))
+    store = store if store is not None else StandardsStore.from_env()
+    return store.save(standard, version, document)
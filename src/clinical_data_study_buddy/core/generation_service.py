@@ -11,19 +11,35 @@ The services offered include the generation of:
 - Excel-based specification templates for CDISC datasets.
 """
 
+import functools
 import logging
 import pathlib
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, List, Optional
 
-import pandas as pd
 import yaml
 
 from cdisc_library_client.harvest import harvest
+from clinical_data_study_buddy.core.ct_index import load_ct_index
 from clinical_data_study_buddy.generators.analysisgen.generator import AnalysisGenerator
-from clinical_data_study_buddy.generators.crfgen.cdash import build_domain_crf, load_ig
+from clinical_data_study_buddy.generators.build_manifest import (
+    BuildManifest,
+    digest,
+    source_digest,
+)
+from clinical_data_study_buddy.generators.crfgen.cdash import (
+    build_domain_crf,
+    crf_path,
+    load_ig,
+)
 from clinical_data_study_buddy.generators.crfgen.populators import populate_ae_from_fda
 from clinical_data_study_buddy.generators.crfgen.utils import get_api_key
-from clinical_data_study_buddy.generators.data_generator import DataGenerator
+from clinical_data_study_buddy.generators.data_generator import (
+    DataGenerator,
+    iter_ordered,
+)
+from clinical_data_study_buddy.generators.dataset_io import dataset_path, write_chunks
 from clinical_data_study_buddy.generators.documents.study_protocols_generator import (
     StudyProtocolsGenerator,
 )
@@ -61,6 +77,10 @@ def generate_edc_raw_dataset_package(
     study_story: str,
     output_dir: pathlib.Path,
     output_format: str,
+    seed: Optional[int] = None,
+    jobs: int = 1,
+    compression: str = "deflate",
+    compression_level: Optional[int] = None,
 ):
     """
     Generates an EDC (Electronic Data Capture) Raw Dataset Package.
@@ -72,6 +92,10 @@ def generate_edc_raw_dataset_package(
         study_story (str): The study story to simulate.
         output_dir (pathlib.Path): The directory where the generated package will be saved.
         output_format (str): The output format for the datasets.
+        seed (Optional[int]): The seed for reproducible datasets.
+        jobs (int): The number of worker processes generating the datasets.
+        compression (str): The compression of the package (e.g., "deflate").
+        compression_level (Optional[int]): The compression level.
     """
     generator = EDCRawDatasetPackageGenerator(
         num_subjects=num_subjects,
@@ -80,6 +104,10 @@ def generate_edc_raw_dataset_package(
         study_story=study_story,
         output_dir=output_dir,
         output_format=output_format,
+        seed=seed,
+        jobs=jobs,
+        compression=compression,
+        compression_level=compression_level,
     )
     generator.generate()
 
@@ -90,6 +118,7 @@ def generate_synthetic_data(
     domain: str,
     num_subjects: int,
     output_dir: pathlib.Path,
+    output_format: str = "csv",
 ) -> str:
     """
     Generates a synthetic CDISC dataset for a specific domain.
@@ -100,6 +129,7 @@ def generate_synthetic_data(
         domain (str): The domain to generate data for.
         num_subjects (int): The number of subjects.
         output_dir (pathlib.Path): The directory where the generated file will be saved.
+        output_format (str): The format of the dataset: "csv", "parquet" or "xpt".
 
     Returns:
         str: The path to the generated file.
@@ -113,13 +143,17 @@ def generate_synthetic_data(
     if not domain_form:
         raise ValueError(f"Domain {domain} not found in {standard} {version}")
 
-    generator = DataGenerator(domain_form)
-    dataset = generator.generate(num_subjects)
-
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_file = output_dir / f"{domain}.csv"
-    df = pd.DataFrame(dataset)
-    df.to_csv(output_file, index=False)
+    ct_index = load_ct_index(
+        [field.codelist for field in domain_form.fields if field.codelist],
+        api_key=api_key,
+    )
+    generator = DataGenerator(domain_form, ct_index=ct_index)
+    output_file = dataset_path(output_dir, domain, output_format)
+    write_chunks(
+        generator.iter_chunks(num_subjects),
+        output_file,
+        variables=generator.variables(),
+    )
     return str(output_file)
 
 
@@ -154,10 +188,23 @@ def generate_cdash_crf(
     config_path: pathlib.Path,
     openfda_drug_name: Optional[str],
     openfda_max_results: int,
+    jobs: int = 1,
+    force: bool = False,
+    progress: Optional[Callable[[str], None]] = None,
 ):
     """
     Generates Word CRF (Case Report Form) shells from the CDISC Library API.
 
+    The build is incremental: a manifest in the output directory records the
+    digest of the inputs of each domain's CRF, that is its IG variables, the
+    configuration, the OpenFDA terms of the AE CRF and the source of the CRF
+    builder. CRFs whose inputs are unchanged are not rendered again.
+
+    The domains are independent, so with several jobs they are rendered in a
+    process pool. The IG is split by domain once and each worker receives only
+    the rows of its domain, so the IG is pickled once in total rather than once
+    per worker. Progress is reported as each domain is rendered, in order.
+
     Args:
         ig_version (str): The CDASHIG version.
         out_dir (pathlib.Path): The directory for the generated Word documents.
@@ -165,7 +212,12 @@ def generate_cdash_crf(
         config_path (pathlib.Path): The path to the configuration file.
         openfda_drug_name (Optional[str]): The drug name to fetch adverse events from OpenFDA.
         openfda_max_results (int): The maximum number of adverse events to fetch from OpenFDA.
+        jobs (int): The number of worker processes rendering the domains.
+        force (bool): Whether to render every CRF, ignoring the manifest.
+        progress (Optional[Callable[[str], None]]): Called with a message as
+            each domain is rendered. Defaults to logging the messages.
     """
+    progress = progress or logging.info
     out_dir.mkdir(parents=True, exist_ok=True)
 
     config = {}
@@ -189,16 +241,54 @@ def generate_cdash_crf(
         )
 
     ig_df = load_ig(ig_version)
+    by_domain = dict(tuple(ig_df.groupby("Domain", sort=False)))
 
-    target_domains = [d.upper() for d in (domains or ig_df["Domain"].unique())]
-    for dom in target_domains:
-        dom_df = ig_df[ig_df["Domain"] == dom]
-        if dom_df.empty:
+    target_domains = []
+    for dom in [d.upper() for d in (domains or by_domain)]:
+        if dom not in by_domain:
             logging.warning(f"Domain {dom} not found in IG – skipped")
             continue
-        build_domain_crf(
-            dom_df, dom, out_dir, config, fda_adverse_events=fda_adverse_events
+        target_domains.append(dom)
+
+    builder = source_digest(build_domain_crf)
+    manifest = BuildManifest.load(out_dir)
+    stale = []
+    for dom in target_domains:
+        # Only the AE CRF lists the OpenFDA terms
+        events = fda_adverse_events if dom == "AE" else None
+        inputs = digest(
+            builder,
+            config,
+            by_domain[dom].to_json(orient="split", default_handler=str),
+            events,
+        )
+        if force or not manifest.is_current(f"cdash/{dom}", inputs):
+            # A CRF that fails to render is no longer up to date
+            manifest.entries.pop(f"cdash/{dom}", None)
+            stale.append((dom, events, inputs))
+    if len(stale) < len(target_domains):
+        progress(f"{len(target_domains) - len(stale)} CRFs are up to date")
+
+    calls = [
+        functools.partial(
+            build_domain_crf,
+            by_domain[dom],
+            dom,
+            out_dir,
+            config,
+            fda_adverse_events=events,
         )
+        for dom, events, _ in stale
+    ]
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()
+    try:
+        with executor as pool:
+            results = iter_ordered(calls, pool, prefetch=2 * jobs)
+            for i, ((dom, _, inputs), _) in enumerate(zip(stale, results), 1):
+                manifest.record(f"cdash/{dom}", inputs, [crf_path(out_dir, dom).name])
+                progress(f"[{i}/{len(stale)}] Rendered {dom} CRF")
+    finally:
+        manifest.save()
 
 
 def generate_study_protocols(
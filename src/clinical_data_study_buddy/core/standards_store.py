@@ -0,0 +1,486 @@
+"""
+A local, offline store of CDISC standards snapshots.
+
+Each snapshot is downloaded once from the CDISC Library (see
+``download_service.snapshot_standard``) and flattened into a single columnar
+table, written in the Arrow IPC file format next to a small JSON index:
+
+    <store>/<standard>/<version>/table.arrow
+    <store>/<standard>/<version>/index.json
+
+Rows are grouped by domain (or dataset, analysis data structure or codelist),
+and the index maps every group to its row range and every variable (or term)
+to its row, so a single domain or variable is read without scanning the table.
+Tables are memory-mapped when opened, so reading them costs almost nothing
+compared to fetching the same metadata from the API.
+
+The store directory defaults to ``.cache/cdisc_standards`` and can be changed
+with the ``CDISC_STANDARDS_DIR`` environment variable. The store requires the
+optional ``pyarrow`` package; without it, ``has()`` reports every snapshot as
+missing so callers fall back to the CDISC Library API.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+DEFAULT_STORE_DIR = Path(".cache/cdisc_standards")
+TABLE_FILE = "table.arrow"
+INDEX_FILE = "index.json"
+
+# Columns of the variable tables built from the implementation guides. Every
+# column is a string except ``order``. Scenario rows (CDASHIG only) are grouped
+# as ``<domain>.<scenario>``.
+VARIABLE_COLUMNS = [
+    "domain",
+    "scenario",
+    "domain_label",
+    "variable",
+    "order",
+    "label",
+    "prompt",
+    "datatype",
+    "role",
+    "core",
+    "codelist",
+    "codelist_href",
+    "ct_values",
+    "description",
+    "completion_instructions",
+    "implementation_notes",
+]
+
+# Columns of the term tables built from controlled terminology packages.
+TERM_COLUMNS = [
+    "codelist",
+    "codelist_name",
+    "codelist_submission_value",
+    "extensible",
+    "code",
+    "submission_value",
+    "preferred_term",
+    "definition",
+    "synonyms",
+]
+
+
+def library_version(version: str) -> str:
+    """
+    Returns a standard version as written by the CDISC Library.
+
+    Versions are often given as in a document title (``v2.3`` or ``2.3``),
+    while the CDISC Library and the store key them as in an href (``2-3``).
+
+    Args:
+        version (str): The version, e.g. "v2.3", "2.3" or "2-3".
+
+    Returns:
+        str: The version, e.g. "2-3".
+    """
+    version = version.strip()
+    if version[:1] in ("v", "V"):
+        version = version[1:]
+    return version.replace(".", "-")
+
+
+def _pyarrow():
+    """
+    Imports pyarrow, which the standards store needs to read and write tables.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "The offline standards store requires pyarrow. "
+            "Install it with the 'arrow' extra: "
+            "'pip install clinical-data-study-buddy[arrow]' or "
+            "'poetry install --extras arrow'."
+        ) from e
+    return pyarrow
+
+
+def _join(values: Iterable[Any], sep: str = "; ") -> Optional[str]:
+    joined = sep.join(str(v) for v in values if v)
+    return joined or None
+
+
+def _codelists(item: dict) -> List[dict]:
+    return item.get("_links", {}).get("codelist") or []
+
+
+def _ordinal(item: dict) -> Optional[int]:
+    try:
+        return int(item.get("ordinal"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _variable_row(group: dict, item: dict, **extra: Any) -> Dict[str, Any]:
+    """Flattens an IG variable or field document into a variable table row."""
+    codelists = _codelists(item)
+    row = {
+        "domain": group.get("name"),
+        "scenario": None,
+        "domain_label": group.get("label"),
+        "variable": item.get("name"),
+        "order": _ordinal(item),
+        "label": item.get("label"),
+        "prompt": item.get("prompt"),
+        "datatype": item.get("simpleDatatype"),
+        "role": item.get("role"),
+        "core": item.get("core"),
+        "codelist": _join(c.get("href", "").rsplit("/", 1)[-1] for c in codelists),
+        "codelist_href": _join((c.get("href") for c in codelists), ", "),
+        "ct_values": _join(
+            item.get("valueList") or item.get("codelistSubmissionValues") or []
+        ),
+        "description": item.get("description") or item.get("definition"),
+        "completion_instructions": item.get("completionInstructions"),
+        "implementation_notes": item.get("implementationNotes"),
+    }
+    row.update(extra)
+    return row
+
+
+def _sorted_rows(group: dict, items: List[dict], **extra: Any) -> List[dict]:
+    rows = [_variable_row(group, item, **extra) for item in items]
+    return sorted(rows, key=lambda r: (r["order"] is None, r["order"] or 0))
+
+
+def _flatten_tabulation_ig(document: dict) -> List[dict]:
+    """Flattens an SDTMIG or SENDIG product document (classes -> datasets)."""
+    rows = []
+    for cls in document.get("classes", []):
+        for dataset in cls.get("datasets", []):
+            rows.extend(_sorted_rows(dataset, dataset.get("datasetVariables", [])))
+    return rows
+
+
+def _flatten_cdashig(document: dict) -> List[dict]:
+    """
+    Flattens a CDASHIG product document (classes -> domains and scenarios).
+
+    Each domain is followed by its scenarios, which is the order in which the
+    harvester emits forms.
+    """
+    domains: Dict[str, List[dict]] = {}
+    scenarios: Dict[str, List[dict]] = {}
+    for cls in document.get("classes", []):
+        for domain in cls.get("domains", []):
+            domains[domain.get("name")] = _sorted_rows(domain, domain.get("fields", []))
+        for scenario in cls.get("scenarios", []):
+            href = scenario.get("_links", {}).get("self", {}).get("href", "")
+            code, _, name = href.rsplit("/", 1)[-1].partition(".")
+            if not code or not name:
+                continue
+            group = {"name": code, "label": scenario.get("scenario")}
+            scenarios.setdefault(code, []).extend(
+                _sorted_rows(group, scenario.get("fields", []), scenario=name)
+            )
+    rows = []
+    for code, domain_rows in domains.items():
+        rows.extend(domain_rows)
+        rows.extend(scenarios.pop(code, []))
+    for scenario_rows in scenarios.values():
+        rows.extend(scenario_rows)
+    return rows
+
+
+def _flatten_adamig(document: dict) -> List[dict]:
+    """Flattens an ADaMIG product document (data structures -> variable sets)."""
+    rows = []
+    for structure in document.get("dataStructures", []):
+        variables = []
+        for varset in structure.get("analysisVariableSets", []):
+            variables.extend(varset.get("analysisVariables", []))
+        rows.extend(_variable_row(structure, item) for item in variables)
+    return rows
+
+
+def _flatten_ct(document: dict) -> List[dict]:
+    """Flattens a controlled terminology package (codelists -> terms)."""
+    rows = []
+    for codelist in document.get("codelists", []):
+        for term in codelist.get("terms", []):
+            rows.append(
+                {
+                    "codelist": codelist.get("conceptId"),
+                    "codelist_name": codelist.get("name"),
+                    "codelist_submission_value": codelist.get("submissionValue"),
+                    "extensible": codelist.get("extensible"),
+                    "code": term.get("conceptId"),
+                    "submission_value": term.get("submissionValue"),
+                    "preferred_term": term.get("preferredTerm"),
+                    "definition": term.get("definition"),
+                    "synonyms": _join(term.get("synonyms") or []),
+                }
+            )
+    return rows
+
+
+# standard -> (flattener, table columns)
+_LAYOUTS: Dict[str, tuple[Callable[[dict], List[dict]], List[str]]] = {
+    "sdtmig": (_flatten_tabulation_ig, VARIABLE_COLUMNS),
+    "sendig": (_flatten_tabulation_ig, VARIABLE_COLUMNS),
+    "cdashig": (_flatten_cdashig, VARIABLE_COLUMNS),
+    "adamig": (_flatten_adamig, VARIABLE_COLUMNS),
+    "ct": (_flatten_ct, TERM_COLUMNS),
+}
+
+STANDARDS = tuple(_LAYOUTS)
+
+
+def _group_key(row: dict) -> str:
+    if "codelist" in row and "submission_value" in row:
+        return row["codelist"]
+    if row.get("scenario"):
+        return f"{row['domain']}.{row['scenario']}"
+    return row["domain"]
+
+
+def _record_key(row: dict) -> str:
+    return row["submission_value"] if "submission_value" in row else row["variable"]
+
+
+class StandardsStore:
+    """
+    A directory of columnar CDISC standards snapshots.
+
+    Attributes:
+        directory (Path): The root directory of the store.
+    """
+
+    def __init__(self, directory: Path | str = DEFAULT_STORE_DIR):
+        """
+        Initializes the StandardsStore.
+
+        Args:
+            directory (Path | str): The root directory of the store.
+        """
+        self.directory = Path(directory)
+        self._tables: Dict[tuple[str, str], Any] = {}
+        self._indexes: Dict[tuple[str, str], dict] = {}
+
+    @classmethod
+    def from_env(cls) -> "StandardsStore":
+        """
+        Creates the store configured by the ``CDISC_STANDARDS_DIR`` environment variable.
+
+        Returns:
+            StandardsStore: The configured store.
+        """
+        return cls(os.environ.get("CDISC_STANDARDS_DIR") or DEFAULT_STORE_DIR)
+
+    def path(self, standard: str, version: str) -> Path:
+        """Returns the directory of a snapshot."""
+        return self.directory / standard.lower() / version
+
+    def has(self, standard: str, version: str) -> bool:
+        """
+        Checks whether a snapshot of a standard version is available offline.
+
+        Args:
+            standard (str): The standard (e.g. "sdtmig", "cdashig", "ct").
+            version (str): The version, as used by the CDISC Library (e.g. "3-3").
+
+        Returns:
+            bool: True if the snapshot exists and pyarrow is installed.
+        """
+        return (
+            importlib.util.find_spec("pyarrow") is not None
+            and (self.path(standard, version) / INDEX_FILE).exists()
+        )
+
+    def versions(self, standard: str) -> List[str]:
+        """
+        Lists the versions of a standard available offline.
+
+        Args:
+            standard (str): The standard (e.g. "cdashig").
+
+        Returns:
+            List[str]: The available versions, sorted.
+        """
+        root = self.directory / standard.lower()
+        if not root.is_dir():
+            return []
+        return sorted(p.name for p in root.iterdir() if self.has(standard, p.name))
+
+    def save(self, standard: str, version: str, document: dict) -> Path:
+        """
+        Flattens a CDISC Library product document and writes it to the store.
+
+        Args:
+            standard (str): The standard the document belongs to.
+            version (str): The version of the standard.
+            document (dict): The full product document, as returned by the API.
+
+        Returns:
+            Path: The directory of the written snapshot.
+
+        Raises:
+            ValueError: If the standard is not supported.
+        """
+        standard = standard.lower()
+        if standard not in _LAYOUTS:
+            raise ValueError(
+                f"Unsupported standard: {standard}. Supported: {', '.join(STANDARDS)}"
+            )
+        flatten, columns = _LAYOUTS[standard]
+        return self.write(standard, version, flatten(document), columns)
+
+    def write(
+        self, standard: str, version: str, rows: List[dict], columns: List[str]
+    ) -> Path:
+        """
+        Writes flattened rows as a snapshot table and builds its index.
+
+        Rows must already be ordered so that each group is contiguous.
+
+        Args:
+            standard (str): The standard the rows belong to.
+            version (str): The version of the standard.
+            rows (List[dict]): The flattened rows.
+            columns (List[str]): The table columns.
+
+        Returns:
+            Path: The directory of the written snapshot.
+        """
+        pa = _pyarrow()
+        groups: Dict[str, List[int]] = {}
+        keys: Dict[str, Dict[str, int]] = {}
+        for i, row in enumerate(rows):
+            group = _group_key(row)
+            span = groups.setdefault(group, [i, i])
+            span[1] = i + 1
+            keys.setdefault(group, {}).setdefault(_record_key(row), i)
+
+        schema = pa.schema(
+            [(c, pa.int64() if c == "order" else pa.string()) for c in columns]
+        )
+        table = pa.Table.from_pylist(
+            [{c: row.get(c) for c in columns} for row in rows], schema=schema
+        )
+
+        target = self.path(standard, version)
+        target.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=target, delete=False) as tmp:
+            with pa.ipc.new_file(tmp, schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp.name, target / TABLE_FILE)
+
+        index = {
+            "standard": standard,
+            "version": version,
+            "rows": len(rows),
+            "groups": groups,
+            "keys": keys,
+        }
+        # The index is written last: a snapshot without one is incomplete.
+        with tempfile.NamedTemporaryFile(
+            "w", dir=target, delete=False, encoding="utf-8"
+        ) as tmp:
+            json.dump(index, tmp)
+        os.replace(tmp.name, target / INDEX_FILE)
+
+        self._tables.pop((standard, version), None)
+        self._indexes.pop((standard, version), None)
+        return target
+
+    def index(self, standard: str, version: str) -> dict:
+        """
+        Returns the index of a snapshot.
+
+        Raises:
+            FileNotFoundError: If the snapshot does not exist.
+        """
+        key = (standard.lower(), version)
+        if key not in self._indexes:
+            path = self.path(*key) / INDEX_FILE
+            self._indexes[key] = json.loads(path.read_text(encoding="utf-8"))
+        return self._indexes[key]
+
+    def table(self, standard: str, version: str):
+        """
+        Returns the memory-mapped table of a snapshot.
+
+        Returns:
+            pyarrow.Table: The snapshot table.
+
+        Raises:
+            FileNotFoundError: If the snapshot does not exist.
+        """
+        key = (standard.lower(), version)
+        if key not in self._tables:
+            pa = _pyarrow()
+            source = pa.memory_map(str(self.path(*key) / TABLE_FILE), "r")
+            self._tables[key] = pa.ipc.open_file(source).read_all()
+        return self._tables[key]
+
+    def groups(self, standard: str, version: str) -> List[str]:
+        """
+        Lists the groups (domains, scenarios or codelists) of a snapshot in table order.
+        """
+        return list(self.index(standard, version)["groups"])
+
+    def frame(
+        self,
+        standard: str,
+        version: str,
+        group: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Reads a snapshot, or one group of it, as a DataFrame.
+
+        Args:
+            standard (str): The standard (e.g. "sdtmig").
+            version (str): The version of the standard.
+            group (Optional[str]): A domain, ``<domain>.<scenario>`` or codelist
+                                   code. Reads the whole table if omitted.
+            columns (Optional[List[str]]): The columns to read. Reads all
+                                           columns if omitted.
+
+        Returns:
+            pd.DataFrame: The selected rows. Empty if the group does not exist.
+        """
+        table = self.table(standard, version)
+        if columns is not None:
+            table = table.select(columns)
+        if group is not None:
+            span = self.index(standard, version)["groups"].get(group)
+            if span is None:
+                return table.slice(0, 0).to_pandas()
+            table = table.slice(span[0], span[1] - span[0])
+        return table.to_pandas()
+
+    def record(
+        self, standard: str, version: str, group: str, key: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Looks up a single variable or term.
+
+        Args:
+            standard (str): The standard (e.g. "sdtmig").
+            version (str): The version of the standard.
+            group (str): The domain, ``<domain>.<scenario>`` or codelist code.
+            key (str): The variable name or term submission value.
+
+        Returns:
+            Optional[Dict[str, Any]]: The row, or None if it does not exist.
+        """
+        row = self.index(standard, version)["keys"].get(group, {}).get(key)
+        if row is None:
+            return None
+        return self.table(standard, version).slice(row, 1).to_pylist()[0]
@@ -0,0 +1,241 @@
+"""
+This module keeps the manifest of incremental artifact builds.
+
+A build renders its artifacts in units, such as one format of a group of
+forms, or the CRF of one domain. The manifest is saved as JSON in the output
+directory. For each unit, it records the digest of the unit's inputs and the
+files the unit wrote. A unit is up to date, and is not rendered again, when
+its inputs have the recorded digest and all of its files still exist.
+
+The inputs of a unit are whatever its rendering depends on: the model of its
+forms or variables, the configuration, the source of the code that renders
+it, including the project modules that code imports, and its template files.
+"""
+
+import ast
+import functools
+import hashlib
+import importlib.util
+import inspect
+import json
+import pathlib
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+MANIFEST_NAME = ".build-manifest.json"
+# Bumped whenever the manifest format changes, so older manifests are ignored
+MANIFEST_VERSION = 1
+
+
+def digest(*parts: Any) -> str:
+    """
+    Returns the SHA-256 digest of a sequence of values.
+
+    Args:
+        *parts (Any): The values. Bytes are hashed as they are; other values
+                      are hashed as JSON, with sorted keys.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    sha = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, default=str).encode()
+        # The length separates the parts, so ("ab", "c") != ("a", "bc")
+        sha.update(len(part).to_bytes(8, "big"))
+        sha.update(part)
+    return sha.hexdigest()
+
+
+def files_digest(paths: Iterable[pathlib.Path]) -> str:
+    """
+    Returns the digest of the contents of files.
+
+    Args:
+        paths (Iterable[pathlib.Path]): The files. Missing files are hashed as
+                                        missing rather than raising an error.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    contents = []
+    for path in paths:
+        try:
+            contents.append(pathlib.Path(path).read_bytes())
+        except OSError:
+            contents.append(None)
+    return digest(*contents)
+
+
+def _find_source(name: str) -> Optional[pathlib.Path]:
+    """Returns the source file of a module, or None if it has none."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError, AttributeError):
+        return None
+    if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+        return None
+    return pathlib.Path(spec.origin)
+
+
+def _imports(name: str, path: pathlib.Path) -> Iterator[str]:
+    """Yields the modules a module imports, anywhere in its source."""
+    package = name if path.name == "__init__.py" else name.rpartition(".")[0]
+    for node in ast.walk(ast.parse(path.read_bytes(), str(path))):
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            try:
+                base = importlib.util.resolve_name(
+                    "." * node.level + (node.module or ""), package
+                )
+            except (ImportError, ValueError):
+                continue
+            imports_names = False
+            for alias in node.names:
+                # "from package import module" depends on the module alone
+                if _find_source(f"{base}.{alias.name}") is not None:
+                    yield f"{base}.{alias.name}"
+                else:
+                    imports_names = True
+            if imports_names:
+                yield base
+
+
+def _in_tree(name: str, path: pathlib.Path, tree: pathlib.Path) -> bool:
+    """Checks whether a module is a top-level module or package of a directory."""
+    top = name.partition(".")[0]
+    return path.is_relative_to(tree) and path.relative_to(tree).parts[0] in (
+        top,
+        f"{top}.py",
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _source_files(name: str) -> Tuple[pathlib.Path, ...]:
+    """
+    Returns the source files of a module and of the modules it imports from
+    the same source tree, transitively.
+    """
+    root = _find_source(name)
+    if root is None or name.partition(".")[0] in sys.stdlib_module_names:
+        return ()
+    # The directory holding the top-level package of the module
+    tree = root.parents[len(name.split(".")) - (root.name != "__init__.py")]
+    files = set()
+    pending = [name]
+    while pending:
+        module = pending.pop()
+        path = _find_source(module)
+        if path is None or path in files or not _in_tree(module, path, tree):
+            continue
+        files.add(path)
+        pending.extend(_imports(module, path))
+    return tuple(sorted(files))
+
+
+def source_digest(obj: Any) -> str:
+    """
+    Returns the digest of the source of the module defining an object.
+
+    This stands for the version of an exporter or builder: editing its module,
+    or any module of the project it imports, directly or not, changes the
+    digest, so its artifacts are rendered again.
+
+    Args:
+        obj (Any): A function or class.
+
+    Returns:
+        str: The hexadecimal digest, or the digest of the object's qualified
+             name when its source file cannot be found.
+    """
+    module = getattr(inspect.unwrap(obj), "__module__", None)
+    files = _source_files(module) if module else ()
+    if not files:
+        return digest(getattr(obj, "__module__", ""), getattr(obj, "__qualname__", ""))
+    return files_digest(files)
+
+
+@dataclass
+class BuildManifest:
+    """
+    The manifest of the units built into an output directory.
+
+    Attributes:
+        out_dir (pathlib.Path): The output directory.
+        entries (Dict[str, Dict[str, Any]]): The "digest" and "outputs" of each
+                                             unit, keyed by unit.
+    """
+
+    out_dir: pathlib.Path
+    entries: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def path(self) -> pathlib.Path:
+        """The manifest file."""
+        return pathlib.Path(self.out_dir) / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, out_dir: pathlib.Path) -> "BuildManifest":
+        """
+        Loads the manifest of an output directory.
+
+        Args:
+            out_dir (pathlib.Path): The output directory.
+
+        Returns:
+            BuildManifest: The manifest; empty if the directory has none, or
+                           if it cannot be read, so every unit is rendered.
+        """
+        manifest = cls(pathlib.Path(out_dir))
+        try:
+            with open(manifest.path, "r") as f:
+                document = json.load(f)
+            if document.get("version") == MANIFEST_VERSION:
+                manifest.entries = dict(document["entries"])
+        except (OSError, ValueError, AttributeError, KeyError, TypeError):
+            pass
+        return manifest
+
+    def is_current(self, key: str, inputs_digest: str) -> bool:
+        """
+        Checks whether a unit is up to date.
+
+        Args:
+            key (str): The unit.
+            inputs_digest (str): The digest of the unit's current inputs.
+
+        Returns:
+            bool: True if the unit was built from the same inputs and all of
+                  the files it wrote still exist.
+        """
+        entry = self.entries.get(key)
+        return (
+            entry is not None
+            and entry.get("digest") == inputs_digest
+            and all((self.out_dir / name).is_file() for name in entry["outputs"])
+        )
+
+    def record(self, key: str, inputs_digest: str, outputs: Iterable[str]) -> None:
+        """
+        Records that a unit was built.
+
+        Args:
+            key (str): The unit.
+            inputs_digest (str): The digest of the inputs it was built from.
+            outputs (Iterable[str]): The names of the files it wrote, relative
+                                     to the output directory.
+        """
+        self.entries[key] = {"digest": inputs_digest, "outputs": sorted(outputs)}
+
+    def save(self) -> None:
+        """Saves the manifest into the output directory."""
+        with open(self.path, "w") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "entries": self.entries},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
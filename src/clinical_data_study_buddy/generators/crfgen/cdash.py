@@ -7,12 +7,23 @@ It includes functions for:
 - Creating and styling various components of a Word document, such as headers,
   footers, tables, and form controls.
 - Assembling the complete CRF for a given domain.
+
+The parts shared by every domain (page setup, styles, header, footer and the
+administrative section) are rendered once per configuration into a cached base
+document, which is cloned for each domain. Repeated OXML elements such as cell
+shading, checkboxes, date pickers and table rows are built once and inserted
+as copies, instead of being constructed element by element for every cell.
 """
 
+import copy
+import functools
+import io
+import json
 import os
 import pathlib
 from typing import Any, Dict, List, Tuple
 
+import httpx
 import pandas as pd
 from docx import Document
 from docx.enum.section import WD_ORIENT
@@ -20,12 +31,23 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml import OxmlElement, parse_xml
 from docx.oxml.ns import nsdecls, qn
 from docx.shared import Pt, RGBColor
+from docx.table import _Row
 
 from cdisc_library_client.api.cdash_implementation_guide_cdashig import (
     get_mdr_cdashig_version_domains,
+    get_mdr_cdashig_version_domains_domain,
     get_mdr_cdashig_version_domains_domain_fields,
+    get_mdr_cdashig_version_domains_domain_fields_field,
 )
+from cdisc_library_client.cache import cached_transport
 from cdisc_library_client.client import AuthenticatedClient
+from cdisc_library_client.models.cdashig_domain import CdashigDomain
+from cdisc_library_client.models.default_error_response import DefaultErrorResponse
+from cdisc_library_client.types import Unset
+from clinical_data_study_buddy.core.standards_store import (
+    StandardsStore,
+    library_version,
+)
 
 ###############################################################################
 # Domain‑to‑category mapping
@@ -148,8 +170,23 @@ def _set_cell_shading(cell, color_hex: str = "4F81BD"):
     for shd in tc_pr.findall("w:shd", tc_pr.nsmap):
         tc_pr.remove(shd)
     # Add new shading element
-    shd_elm = parse_xml(f'<w:shd {nsdecls("w")} w:fill="{color_hex}" w:val="clear"/>')
-    tc_pr.append(shd_elm)
+    tc_pr.append(copy.deepcopy(_shading(color_hex)))
+
+
+@functools.lru_cache(maxsize=None)
+def _shading(color_hex: str):
+    """Returns the shading element of a color, parsed once per color."""
+    return parse_xml(f'<w:shd {nsdecls("w")} w:fill="{color_hex}" w:val="clear"/>')
+
+
+@functools.lru_cache(maxsize=None)
+def _bottom_border():
+    """Returns the thin bottom border element, built once."""
+    bottom = OxmlElement("w:bottom")
+    bottom.set(qn("w:val"), "single")
+    bottom.set(qn("w:sz"), "4")
+    bottom.set(qn("w:color"), "auto")
+    return bottom
 
 
 def _add_bottom_border(cell) -> None:
@@ -166,34 +203,43 @@ def _add_bottom_border(cell) -> None:
         tc_pr.append(borders)
     bottom = borders.find(qn("w:bottom"))
     if bottom is None:
-        bottom = OxmlElement("w:bottom")
-        borders.append(bottom)
-    bottom.set(qn("w:val"), "single")
-    bottom.set(qn("w:sz"), "4")
-    bottom.set(qn("w:color"), "auto")
+        borders.append(copy.deepcopy(_bottom_border()))
+    else:
+        borders.replace(bottom, copy.deepcopy(_bottom_border()))
 
 
-def _add_checkbox(paragraph) -> None:
+@functools.lru_cache(maxsize=None)
+def _content_control(control: str, placeholder: str):
     """
-    Inserts a checkbox content control into a paragraph.
+    Returns a content control element, built once per kind of control.
 
     Args:
-        paragraph: The docx.paragraph.Paragraph object where the checkbox
-                   will be inserted.
+        control (str): The qualified tag of the control, e.g. "w14:checkbox".
+        placeholder (str): The text shown in the control.
     """
     sdt = OxmlElement("w:sdt")
     pr = OxmlElement("w:sdtPr")
-    cb = OxmlElement("w14:checkbox")
-    pr.append(cb)
+    pr.append(OxmlElement(control))
     content = OxmlElement("w:sdtContent")
     r = OxmlElement("w:r")
     t = OxmlElement("w:t")
-    t.text = " "
+    t.text = placeholder
     r.append(t)
     content.append(r)
     sdt.append(pr)
     sdt.append(content)
-    paragraph._p.append(sdt)
+    return sdt
+
+
+def _add_checkbox(paragraph) -> None:
+    """
+    Inserts a checkbox content control into a paragraph.
+
+    Args:
+        paragraph: The docx.paragraph.Paragraph object where the checkbox
+                   will be inserted.
+    """
+    paragraph._p.append(copy.deepcopy(_content_control("w14:checkbox", " ")))
 
 
 def _add_date_picker(paragraph) -> None:
@@ -204,19 +250,7 @@ def _add_date_picker(paragraph) -> None:
         paragraph: The docx.paragraph.Paragraph object where the date picker
                    will be inserted.
     """
-    sdt = OxmlElement("w:sdt")
-    pr = OxmlElement("w:sdtPr")
-    dt = OxmlElement("w14:date")
-    pr.append(dt)
-    content = OxmlElement("w:sdtContent")
-    r = OxmlElement("w:r")
-    t = OxmlElement("w:t")
-    t.text = ""
-    r.append(t)
-    content.append(r)
-    sdt.append(pr)
-    sdt.append(content)
-    paragraph._p.append(sdt)
+    paragraph._p.append(copy.deepcopy(_content_control("w14:date", "")))
 
 
 def _add_underline_entry(paragraph, length: int) -> None:
@@ -250,10 +284,121 @@ def _style_header_cell(cell):
 ###############################################################################
 
 
+def _field_value(value: Any) -> Any:
+    """Returns *value*, or None if the API left the attribute unset."""
+    return None if isinstance(value, Unset) else value
+
+
+def _is_incomplete(field: Any) -> bool:
+    """
+    Checks whether an embedded field document lacks attributes needed for a CRF row.
+
+    Args:
+        field: A field model from a CDASHIG domain document.
+
+    Returns:
+        bool: True if the field has to be fetched individually.
+    """
+    return not (
+        _field_value(field.name)
+        and _field_value(field.ordinal)
+        and (_field_value(field.prompt) or _field_value(field.label))
+        and _field_value(field.simple_datatype)
+    )
+
+
+def _variable_row(domain_name: str, field: Any) -> Dict[str, Any]:
+    """
+    Normalizes a CDASHIG field document into a CRF variable row.
+
+    Args:
+        domain_name (str): The two-letter domain code of the field.
+        field: A CDASHIG field model, either embedded in a domain document or
+               fetched individually.
+
+    Returns:
+        Dict[str, Any]: The row, keyed by the normalized DataFrame columns.
+    """
+    ct_values = (field.additional_properties or {}).get("codelistSubmissionValues")
+    return {
+        "Domain": domain_name,
+        "Variable": _field_value(field.name),
+        "Order": _field_value(field.ordinal),
+        "Display Label": _field_value(field.prompt) or _field_value(field.label),
+        "CRF Instructions": _field_value(field.completion_instructions),
+        "Type": _field_value(field.simple_datatype),
+        "CT Values": "; ".join(ct_values) if ct_values else None,
+        "CT Codes": None,  # Not available in the CDASHIG field documents
+        "Implementation Notes": _field_value(field.implementation_notes),
+    }
+
+
+def _fetch_field(client: AuthenticatedClient, ig_version: str, domain: str, field: str):
+    """
+    Fetches a single CDASHIG field document.
+
+    Returns:
+        The field model, or None if the field could not be retrieved.
+    """
+    details = get_mdr_cdashig_version_domains_domain_fields_field.sync(
+        client=client, version=ig_version, domain=domain, field=field
+    )
+    return None if isinstance(details, DefaultErrorResponse) else details
+
+
+def _fetch_domain_fields_paged(
+    client: AuthenticatedClient, ig_version: str, domain_name: str
+) -> List[Dict[str, Any]]:
+    """
+    Fetches a domain's variables one field at a time.
+
+    This is the slow path, used only when the domain document does not embed
+    its fields.
+
+    Args:
+        client (AuthenticatedClient): The CDISC Library client.
+        ig_version (str): The CDASHIG version.
+        domain_name (str): The two-letter domain code.
+
+    Returns:
+        List[Dict[str, Any]]: The normalized variable rows.
+    """
+    rows = []
+    page = 1
+    while True:
+        fields_response = get_mdr_cdashig_version_domains_domain_fields.sync(
+            client=client,
+            version=ig_version,
+            domain=domain_name,
+            page=page,
+            page_size=100,
+        )
+        if (
+            not fields_response
+            or not fields_response.field_links
+            or not fields_response.field_links.fields
+        ):
+            break
+
+        for field_ref in fields_response.field_links.fields:
+            field_name = field_ref.href.split("/")[-1]
+            field_details = _fetch_field(client, ig_version, domain_name, field_name)
+            if field_details:
+                rows.append(_variable_row(domain_name, field_details))
+
+        page += 1
+    return rows
+
+
 def get_cdashig_variables_from_api(ig_version: str) -> pd.DataFrame:
     """
     Loads and normalizes CDASHIG variables from the CDISC Library API.
 
+    Each domain is read from a single domain document, which embeds all of its
+    fields. Individual field documents are only fetched for fields whose
+    embedded copy is missing attributes, or for domains that do not embed
+    their fields at all.
+
     Args:
         ig_version (str): The version of the CDASHIG to fetch (e.g., "v2.3").
 
@@ -268,7 +413,9 @@ def get_cdashig_variables_from_api(ig_version: str) -> pd.DataFrame:
         raise ValueError("CDISC_PRIMARY_KEY environment variable not set.")
 
     client = AuthenticatedClient(
-        base_url="https://library.cdisc.org/api", token=api_key
+        base_url="https://library.cdisc.org/api",
+        token=api_key,
+        httpx_args={"transport": cached_transport(httpx.HTTPTransport(retries=5))},
     )
 
     all_variables = []
@@ -290,82 +437,75 @@ def get_cdashig_variables_from_api(ig_version: str) -> pd.DataFrame:
         if not domain_name:
             continue
 
-        # Get all fields for the given domain
-        page = 1
-        while True:
-            fields_response = get_mdr_cdashig_version_domains_domain_fields.sync(
-                client=client,
-                version=ig_version,
-                domain=domain_name,
-                page=page,
-                page_size=100,
-            )
-            if (
-                not fields_response
-                or not fields_response.field_links
-                or not fields_response.field_links.fields
-            ):
-                break
-
-            from cdisc_library_client.api.cdash_implementation_guide_cdashig import (
-                get_mdr_cdashig_version_domains_domain_fields_field,
+        domain_doc = get_mdr_cdashig_version_domains_domain.sync(
+            client=client, version=ig_version, domain=domain_name
+        )
+        if not isinstance(domain_doc, CdashigDomain) or not domain_doc.fields:
+            all_variables.extend(
+                _fetch_domain_fields_paged(client, ig_version, domain_name)
             )
+            continue
 
-            for field_ref in fields_response.field_links.fields:
-                field_name = field_ref.href.split("/")[-1]
-                field_details = (
-                    get_mdr_cdashig_version_domains_domain_fields_field.sync(
-                        client=client,
-                        version=ig_version,
-                        domain=domain_name,
-                        field=field_name,
-                    )
+        for field in domain_doc.fields:
+            if _is_incomplete(field) and _field_value(field.name):
+                field = (
+                    _fetch_field(client, ig_version, domain_name, field.name) or field
                 )
-                if not field_details:
-                    continue
-
-                variable_data = {
-                    "Domain": domain_name,
-                    "Variable": field_details.name,
-                    "Order": field_details.ordinal,
-                    "Display Label": field_details.prompt or field_details.label,
-                    "CRF Instructions": field_details.completion_instructions,
-                    "Type": field_details.simple_datatype,
-                    "CT Values": (
-                        "; ".join(
-                            field_details.additional_properties.get(
-                                "codelistSubmissionValues", []
-                            )
-                        )
-                        if field_details.additional_properties
-                        and field_details.additional_properties.get(
-                            "codelistSubmissionValues"
-                        )
-                        else None
-                    ),
-                    "CT Codes": None,  # Not available in this endpoint
-                    "Implementation Notes": field_details.implementation_notes,
-                }
-                all_variables.append(variable_data)
-
-            page += 1
+            all_variables.append(_variable_row(domain_name, field))
 
     df = pd.DataFrame(all_variables)
     return df
 
 
+def get_cdashig_variables_from_store(
+    ig_version: str, store: StandardsStore
+) -> pd.DataFrame:
+    """
+    Loads and normalizes CDASHIG variables from the offline standards store.
+
+    Args:
+        ig_version (str): The version of the CDASHIG to load (e.g., "2-3").
+        store (StandardsStore): A store holding a snapshot of that version.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the same columns as
+                      get_cdashig_variables_from_api.
+    """
+    df = store.frame("cdashig", ig_version)
+    df = df[df["scenario"].isna()]
+    return pd.DataFrame(
+        {
+            "Domain": df["domain"],
+            "Variable": df["variable"],
+            "Order": df["order"],
+            "Display Label": df["prompt"].fillna(df["label"]),
+            "CRF Instructions": df["completion_instructions"],
+            "Type": df["datatype"],
+            "CT Values": df["ct_values"],
+            "CT Codes": None,
+            "Implementation Notes": df["implementation_notes"],
+        }
+    ).reset_index(drop=True)
+
+
 def load_ig(ig_version: str) -> pd.DataFrame:
     """
-    Loads and normalizes CDASHIG variables from the CDISC Library API.
+    Loads and normalizes CDASHIG variables.
 
-    This function serves as a wrapper around get_cdashig_variables_from_api.
+    The variables are read from the offline standards store when it holds a
+    snapshot of the version, and from the CDISC Library API otherwise.
 
     Args:
-        ig_version (str): The version of the CDASHIG to fetch.
+        ig_version (str): The version of the CDASHIG to fetch, e.g. "v2.3",
+                          "2.3" or "2-3".
 
     Returns:
         pd.DataFrame: A DataFrame containing the CDASHIG variables.
     """
+    ig_version = library_version(ig_version)
+    store = StandardsStore.from_env()
+    if store.has("cdashig", ig_version):
+        return get_cdashig_variables_from_store(ig_version, store)
     return get_cdashig_variables_from_api(ig_version)
 
 
@@ -520,12 +660,18 @@ def _create_variables_table(
         _set_cell_shading(hdr_cells[idx], table_header_color)
         _style_header_cell(hdr_cells[idx])
 
+    # Table.add_row sizes every cell from the grid; size one row and copy it
+    prototype = var_tbl.add_row()._tr
+    var_tbl._tbl.remove(prototype)
+
     ct_legend: dict[str, int] = {}
     footnotes: dict[str, int] = {}
 
     # Data rows ordered by the "Variable Order" column
     for idx, (_, row) in enumerate(domain_df.sort_values("Order").iterrows(), start=1):
-        cells = var_tbl.add_row().cells
+        tr = copy.deepcopy(prototype)
+        var_tbl._tbl.append(tr)
+        cells = _Row(tr, var_tbl).cells
         # 0 Variable name
         cells[0].text = row["Variable"]
 
@@ -639,6 +785,88 @@ def _create_variables_table(
             row_ct[1].text = ct_text
 
 
+# Base documents, rendered once per configuration (as JSON) and saved as .docx
+_BASE_DOCUMENTS: Dict[str, bytes] = {}
+
+
+def _base_document(config: dict):
+    """
+    Returns a new document holding the parts shared by the CRFs of all domains.
+
+    The page setup, styles, header, footer and administrative section are
+    rendered once per configuration; later calls load a copy of the saved
+    document. The domain title is left blank, to be filled in by _set_title.
+
+    Args:
+        config (dict): A dictionary containing configuration settings.
+
+    Returns:
+        The docx.Document object.
+    """
+    key = json.dumps(config, sort_keys=True, default=str)
+    if key not in _BASE_DOCUMENTS:
+        document = Document()
+
+        section = document.sections[0]
+        section.orientation = WD_ORIENT.LANDSCAPE
+        section.page_width, section.page_height = (
+            section.page_height,
+            section.page_width,
+        )
+
+        # Uniform font for entire document
+        style = document.styles["Normal"]
+        styling = config.get("styling", {})
+        style.font.name = styling.get("font_name", "Arial")
+        style.font.size = Pt(styling.get("font_size", 10))
+
+        _create_header(section, config, "")
+        _create_footer(section, config, "")
+        _create_admin_section(document, "", config)
+
+        stream = io.BytesIO()
+        document.save(stream)
+        _BASE_DOCUMENTS[key] = stream.getvalue()
+    return Document(io.BytesIO(_BASE_DOCUMENTS[key]))
+
+
+def _set_title(document, full_title: str, config: dict) -> None:
+    """
+    Fills the domain title into a base document.
+
+    Args:
+        document: A docx.Document object returned by _base_document.
+        full_title (str): The full title of the CRF.
+        config (dict): The configuration the document was rendered with.
+    """
+    section = document.sections[0]
+    # The title cell of the header table
+    section.header.tables[0].cell(0, 1).paragraphs[0].runs[0].text = full_title
+    # The left footer paragraph; the last one holds the page number
+    version_label = config.get("version_label", "Version 1.0 DRAFT")
+    section.footer.paragraphs[-2].runs[0].text = f"{full_title}, {version_label}"
+    # The completion question of the administrative section
+    document.tables[0].cell(1, 0).paragraphs[0].runs[
+        0
+    ].text = f"Was {full_title.lower()} completed?"
+
+
+def crf_path(out_dir: pathlib.Path, domain: str) -> pathlib.Path:
+    """
+    Returns the path of the Word document of a domain's CRF.
+
+    Args:
+        out_dir (pathlib.Path): The directory of the generated documents.
+        domain (str): The two-letter domain code.
+
+    Returns:
+        pathlib.Path: The document path, named after the domain and its title.
+    """
+    _, full_title = get_domain_info(domain)
+    safe_title = full_title.replace(" / ", "_").replace(" ", "_")
+    return out_dir / f"{domain}_{safe_title}_CRF.docx"
+
+
 def build_domain_crf(
     domain_df: pd.DataFrame,
     domain: str,
@@ -663,26 +891,15 @@ def build_domain_crf(
     category, full_title = get_domain_info(domain)
 
     # ---------------------------------------------------------------------
-    #  Document meta & base formatting
+    #  Document meta, base formatting and shared components
     # ---------------------------------------------------------------------
-    document = Document()
-
+    document = _base_document(config)
     section = document.sections[0]
-    section.orientation = WD_ORIENT.LANDSCAPE
-    section.page_width, section.page_height = section.page_height, section.page_width
-
-    # Uniform font for entire document
-    style = document.styles["Normal"]
-    styling = config.get("styling", {})
-    style.font.name = styling.get("font_name", "Arial")
-    style.font.size = Pt(styling.get("font_size", 10))
+    _set_title(document, full_title, config)
 
     # ---------------------------------------------------------------------
     #  Create document components
     # ---------------------------------------------------------------------
-    _create_header(section, config, full_title)
-    _create_footer(section, config, full_title)
-    _create_admin_section(document, full_title, config)
     _create_variables_table(
         document,
         section,
@@ -695,7 +912,6 @@ def build_domain_crf(
     # ---------------------------------------------------------------------
     #  Save document
     # ---------------------------------------------------------------------
-    safe_title = full_title.replace(" / ", "_").replace(" ", "_")
-    out_path = out_dir / f"{domain}_{safe_title}_CRF.docx"
+    out_path = crf_path(out_dir, domain)
     document.save(out_path)
     print(f"\u2713 Saved {out_path.relative_to(out_dir.parent)}")
@@ -0,0 +1,147 @@
+"""
+This module streams the rows of large Word tables as WordprocessingML.
+
+python-docx builds every cell added by Table.add_row through several
+Python-level element operations, and sizes each new cell from the table grid,
+which makes tables of thousands of rows slow to build. TableWriter instead
+writes the rows with lxml's incremental XML writer, in batches, and parses
+each batch into the table in a single call. The rows are the same as those
+python-docx writes for cells holding plain text, so the rest of the document
+can still be built with python-docx.
+"""
+
+import io
+import re
+from typing import Any, Iterable, Sequence
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsmap, qn
+from lxml import etree
+
+# The number of rows serialized and parsed at a time
+BATCH_ROWS = 1000
+# Tables with more data rows than this are written with a TableWriter
+STREAMING_THRESHOLD = 200
+
+# Tabs and line breaks become their own run elements, as in python-docx
+_RUN_CONTENT = re.compile(r"([\t\r\n])")
+
+_W = nsmap["w"]
+_TBL, _TR, _TC, _TC_PR, _TC_W, _P, _R, _T, _TAB, _BR = (
+    qn(tag)
+    for tag in (
+        "w:tbl",
+        "w:tr",
+        "w:tc",
+        "w:tcPr",
+        "w:tcW",
+        "w:p",
+        "w:r",
+        "w:t",
+        "w:tab",
+        "w:br",
+    )
+)
+_XML_SPACE = qn("xml:space")
+
+
+class TableWriter:
+    """
+    Appends rows of plain-text cells to a python-docx table.
+
+    The cells of the new rows have the widths python-docx gives the cells
+    of Table.add_row.
+
+    Attributes:
+        table: The docx.table.Table object the rows are appended to.
+        batch_rows (int): The number of rows serialized and parsed at a time.
+    """
+
+    def __init__(self, table, batch_rows: int = BATCH_ROWS):
+        """
+        Initializes the writer.
+
+        Args:
+            table: The docx.table.Table object the rows are appended to.
+            batch_rows (int): The number of rows serialized and parsed at a time.
+        """
+        self.table = table
+        self.batch_rows = batch_rows
+        # Size one row the python-docx way and keep its cell properties
+        prototype = table.add_row()._tr
+        table._tbl.remove(prototype)
+        self._cell_widths = [
+            dict(tc.tcPr.tcW.attrib) if tc.tcPr is not None else None
+            for tc in prototype.tc_lst
+        ]
+
+    def write_rows(self, rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Appends rows to the table.
+
+        Args:
+            rows (Iterable[Sequence[Any]]): The rows, as sequences of cell
+                                            values. Values are written as text,
+                                            one per column; extra values are
+                                            ignored and missing ones left empty.
+
+        Returns:
+            int: The number of rows written.
+        """
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_rows:
+                count += self._write_batch(batch)
+                batch = []
+        if batch:
+            count += self._write_batch(batch)
+        return count
+
+    def _write_batch(self, rows: Sequence[Sequence[Any]]) -> int:
+        """Serializes rows into a table fragment and moves them into the table."""
+        stream = io.BytesIO()
+        with etree.xmlfile(stream, encoding="utf-8") as xf:
+            # The rows are wrapped in a w:tbl element that declares the namespace
+            with xf.element(_TBL, nsmap={"w": _W}):
+                for row in rows:
+                    self._write_row(xf, row)
+        trs = list(parse_xml(stream.getvalue()))
+        self.table._tbl.extend(trs)
+        return len(trs)
+
+    def _write_row(self, xf, row: Sequence[Any]) -> None:
+        """Writes a w:tr element with one plain-text cell per column."""
+        values = list(row)
+        with xf.element(_TR):
+            for i, width in enumerate(self._cell_widths):
+                with xf.element(_TC):
+                    if width is not None:
+                        with xf.element(_TC_PR):
+                            with xf.element(_TC_W, width):
+                                pass
+                    with xf.element(_P):
+                        if i < len(values):
+                            _write_run(xf, str(values[i]))
+
+
+def _write_run(xf, text: str) -> None:
+    """Writes a w:r element holding text, as python-docx's Run.text does."""
+    with xf.element(_R):
+        for part in _RUN_CONTENT.split(text):
+            if part == "\t":
+                with xf.element(_TAB):
+                    pass
+            elif part in ("\r", "\n"):
+                with xf.element(_BR):
+                    pass
+            elif part.strip() != part:
+                # xmlfile does not map the xml namespace to its reserved
+                # prefix, so elements with xml:space are written whole
+                t = etree.Element(_T, {_XML_SPACE: "preserve"}, nsmap={"w": _W})
+                t.text = part
+                xf.write(t)
+            elif part:
+                with xf.element(_T):
+                    xf.write(part)
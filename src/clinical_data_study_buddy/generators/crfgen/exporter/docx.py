@@ -9,6 +9,10 @@ from typing import Sequence
 import docx
 
 from clinical_data_study_buddy.core.models.schema import Form
+from clinical_data_study_buddy.generators.crfgen.docx_table import (
+    STREAMING_THRESHOLD,
+    TableWriter,
+)
 from clinical_data_study_buddy.generators.crfgen.style.style import apply_styles
 
 from .registry import register
@@ -22,7 +26,8 @@ def export_docx(
     Exports a sequence of Form objects to a .docx file.
 
     This function creates a Word document, applies styles if provided, and then
-    populates the document with data from the forms.
+    populates the document with data from the forms. The rows of large data
+    tables, such as listings, are streamed into the document by a TableWriter.
 
     Args:
         forms (Sequence[Form]): A sequence of Form objects to be exported.
@@ -45,10 +50,13 @@ def export_docx(
                 hdr_cells = table.rows[0].cells
                 for i, key in enumerate(form.data[0].keys()):
                     hdr_cells[i].text = key
-                for item in form.data:
-                    row_cells = table.add_row().cells
-                    for i, value in enumerate(item.values()):
-                        row_cells[i].text = str(value)
+                if len(form.data) > STREAMING_THRESHOLD:
+                    TableWriter(table).write_rows(item.values() for item in form.data)
+                else:
+                    for item in form.data:
+                        row_cells = table.add_row().cells
+                        for i, value in enumerate(item.values()):
+                            row_cells[i].text = str(value)
             else:
                 doc.add_paragraph("No data available for this table.")
         else:
@@ -15,7 +15,11 @@ from .registry import register
 env = Environment(loader=FileSystemLoader("templates/crfgen"))
 
 
-@register("tex")
+@register(
+    "tex",
+    group_by=lambda form: form.domain,
+    templates=["templates/crfgen/latex.j2"],
+)
 def render_tex(forms: Sequence[Form], out_dir: Path):
     """
     Renders a sequence of Form objects to .tex files.
@@ -18,7 +18,11 @@ env = Environment(
 )
 
 
-@register("md")
+@register(
+    "md",
+    group_by=lambda form: form.domain,
+    templates=["templates/crfgen/markdown.j2"],
+)
 def render_md(forms: Sequence[Form], out_dir: Path):
     """
     Renders a sequence of Form objects to .md files.
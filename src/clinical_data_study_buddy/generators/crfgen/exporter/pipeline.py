@@ -0,0 +1,297 @@
+"""
+This module schedules the exporters of a CRF artifact build.
+
+A build renders each requested format from the canonical forms. Formats are
+split into units (one per group of forms for exporters that declare a
+``group_by``), and units whose inputs are unchanged since the last build are
+skipped, as recorded by the build manifest of the output directory.
+
+The remaining units form a small dependency graph: formats converted from an
+intermediate format, such as PDF and RTF from DOCX, wait for that format to
+be rendered, once, and then run their conversions from the shared file. The
+DOCX artifact itself serves as the intermediate when it is part of the build.
+Units run concurrently in a process pool when ``jobs`` is above 1, so a build
+takes about as long as its slowest chain of units rather than the sum of all
+of them. Conversions mostly wait on pandoc processes, so they always run on
+threads of the building process, as many at a time as the conversion service
+(see ``core.conversion_service``) runs pandoc processes, whatever ``jobs``.
+Each unit renders into its own staging directory, and its files are moved
+into the output directory once it is done.
+"""
+
+import functools
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from clinical_data_study_buddy.core.conversion_service import get_conversion_service
+from clinical_data_study_buddy.core.models.schema import Form
+from clinical_data_study_buddy.generators.build_manifest import (
+    BuildManifest,
+    digest,
+    files_digest,
+    source_digest,
+)
+
+from . import registry as reg
+
+
+@dataclass
+class FormatResult:
+    """
+    The outcome of building a format.
+
+    Attributes:
+        format (str): The format.
+        rendered (int): The number of units rendered.
+        up_to_date (int): The number of units skipped as up to date.
+        seconds (float): The time spent rendering the units, in seconds. With
+                         several jobs, the units may overlap in time.
+    """
+
+    format: str
+    rendered: int = 0
+    up_to_date: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class _Unit:
+    """A unit of a format to render: its manifest key, forms and input digest."""
+
+    format: str
+    key: str
+    forms: List[Form]
+    inputs: str
+    # The digest of the forms alone, which identifies intermediates
+    forms_digest: str
+
+
+def _timed(call: Callable[[], object]) -> float:
+    """Runs a call and returns its duration, in seconds."""
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def _submit(pool, call: Callable[[], object]) -> Future:
+    """Runs a timed call on the pool, or at once without one."""
+    if pool is not None:
+        return pool.submit(_timed, call)
+    future = Future()
+    try:
+        future.set_result(_timed(call))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def exporter_digest(fmt: str) -> str:
+    """
+    Returns the digest of what the output of a format depends on, besides
+    its forms: the source of its exporter, its templates and, for converted
+    formats, the digest of its intermediate format.
+
+    Args:
+        fmt (str): The format.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    parts = [source_digest(reg.get(fmt)), files_digest(reg.templates(fmt))]
+    intermediate = reg.intermediate(fmt)
+    if intermediate is not None:
+        parts.append(exporter_digest(intermediate[0]))
+    return digest(*parts)
+
+
+def _units(fmt: str, forms: Sequence[Form]) -> Dict[str, List[Form]]:
+    """Splits the forms of a format into units, keyed by manifest key."""
+    group_by = reg.group_by(fmt)
+    if group_by is None:
+        return {fmt: list(forms)}
+    units = {}
+    for form in forms:
+        units.setdefault(f"{fmt}/{group_by(form)}", []).append(form)
+    return units
+
+
+def _move_outputs(staging: Path, outdir: Path) -> List[str]:
+    """Moves the files of a staging directory into the output directory."""
+    outputs = []
+    for path in staging.iterdir():
+        if path.is_file():
+            os.replace(path, outdir / path.name)
+            outputs.append(path.name)
+    shutil.rmtree(staging, ignore_errors=True)
+    return outputs
+
+
+def _find_output(paths: Sequence[Path], fmt: str) -> Path:
+    """Returns the file of a format among the outputs of a unit."""
+    for path in paths:
+        if path.suffix == f".{fmt}":
+            return path
+    raise FileNotFoundError(f"The {fmt} exporter did not write a .{fmt} file.")
+
+
+def build_artifacts(
+    forms: Sequence[Form],
+    outdir: Path,
+    formats: Sequence[str],
+    force: bool = False,
+    jobs: int = 1,
+) -> List[FormatResult]:
+    """
+    Builds artifacts of forms in several formats.
+
+    Args:
+        forms (Sequence[Form]): The forms.
+        outdir (Path): The directory where the artifacts will be saved.
+        formats (Sequence[str]): The registered formats to build.
+        force (bool): Whether to render every unit, ignoring the manifest.
+        jobs (int): The number of worker processes rendering the units.
+
+    Returns:
+        List[FormatResult]: The outcome of each format, in the order given,
+                            followed by the intermediates rendered only for
+                            conversions, as "<format> (intermediate)".
+
+    Raises:
+        ValueError: If a format is not registered.
+    """
+    unknown = [fmt for fmt in formats if reg.get(fmt) is None]
+    if unknown:
+        raise ValueError(f"Unknown formats: {', '.join(unknown)}")
+
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    manifest = BuildManifest.load(outdir)
+    results = {fmt: FormatResult(fmt) for fmt in formats}
+
+    stale: List[_Unit] = []
+    # Files of units that are up to date, by (format, forms digest); they
+    # serve as intermediates without being rendered again
+    current: Dict[Tuple[str, str], Path] = {}
+    for fmt in formats:
+        exporter = exporter_digest(fmt)
+        for key, unit_forms in _units(fmt, forms).items():
+            forms_digest = digest([form.model_dump(mode="json") for form in unit_forms])
+            unit = _Unit(
+                fmt, key, unit_forms, digest(exporter, forms_digest), forms_digest
+            )
+            if not force and manifest.is_current(key, unit.inputs):
+                results[fmt].up_to_date += 1
+                outputs = [outdir / name for name in manifest.entries[key]["outputs"]]
+                if any(path.suffix == f".{fmt}" for path in outputs):
+                    current[(fmt, forms_digest)] = _find_output(outputs, fmt)
+            else:
+                # A unit that fails to render is no longer up to date
+                manifest.entries.pop(key, None)
+                stale.append(unit)
+
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()
+    converter = ThreadPoolExecutor(
+        max_workers=get_conversion_service().workers, thread_name_prefix="convert"
+    )
+    try:
+        with tempfile.TemporaryDirectory(dir=outdir, prefix=".build-") as tmp:
+            with executor as pool, converter:
+                _run(
+                    pool,
+                    converter,
+                    stale,
+                    outdir,
+                    Path(tmp),
+                    manifest,
+                    results,
+                    current,
+                )
+    finally:
+        manifest.save()
+    return list(results.values())
+
+
+def _run(
+    pool,
+    converter: ThreadPoolExecutor,
+    units: Sequence[_Unit],
+    outdir: Path,
+    staging_root: Path,
+    manifest: BuildManifest,
+    results: Dict[str, FormatResult],
+    current: Dict[Tuple[str, str], Path],
+) -> None:
+    """Renders units, running conversions once their intermediate is ready."""
+    # What each pending future renders: (unit or None for a private
+    # intermediate, intermediate id it provides, staging directory)
+    pending: Dict[Future, Tuple[Optional[_Unit], Tuple[str, str], Path]] = {}
+    # Conversions waiting for each intermediate
+    waiting: Dict[Tuple[str, str], List[_Unit]] = {}
+    providers = {
+        (u.format, u.forms_digest) for u in units if not reg.intermediate(u.format)
+    }
+
+    def submit(
+        unit: Optional[_Unit], fmt: str, call: Callable, provides, executor=pool
+    ) -> None:
+        # The call is completed with the staging directory as output directory
+        staging = Path(tempfile.mkdtemp(dir=staging_root, prefix=f"{fmt}-"))
+        future = _submit(executor, functools.partial(call, staging))
+        pending[future] = (unit, provides, staging)
+
+    def convert(unit: _Unit, source: Path) -> None:
+        _, conversion = reg.intermediate(unit.format)
+        call = functools.partial(conversion, source, unit.forms)
+        submit(unit, unit.format, call, None, executor=converter)
+
+    for unit in units:
+        intermediate = reg.intermediate(unit.format)
+        if intermediate is None:
+            call = functools.partial(reg.get(unit.format), unit.forms)
+            submit(unit, unit.format, call, (unit.format, unit.forms_digest))
+            continue
+        ident = (intermediate[0], unit.forms_digest)
+        if ident in current:
+            convert(unit, current[ident])
+            continue
+        if ident not in waiting and ident not in providers:
+            # Rendered privately, as the intermediate format is not built
+            call = functools.partial(reg.get(ident[0]), unit.forms)
+            submit(None, ident[0], call, ident)
+            providers.add(ident)
+        waiting.setdefault(ident, []).append(unit)
+
+    while pending:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in done:
+            unit, provides, staging = pending.pop(future)
+            seconds = future.result()
+            if unit is None:
+                name = f"{provides[0]} (intermediate)"
+                result = results.setdefault(name, FormatResult(name))
+                result.rendered += 1
+                result.seconds += seconds
+                source = _find_output(list(staging.iterdir()), provides[0])
+            else:
+                outputs = _move_outputs(staging, outdir)
+                manifest.record(unit.key, unit.inputs, outputs)
+                results[unit.format].rendered += 1
+                results[unit.format].seconds += seconds
+                if provides is None or provides not in waiting:
+                    continue
+                source = _find_output([outdir / name for name in outputs], provides[0])
+            for waiting_unit in waiting.pop(provides, []):
+                convert(waiting_unit, source)
@@ -4,17 +4,48 @@ This module provides a registry for exporter functions.
 The registry allows different exporter functions to be registered under a
 specific format name (e.g., "csv", "docx"), and then retrieved by that name.
 This makes it easy to add new export formats without modifying the core logic.
+
+Exporters can also declare what incremental builds need to know about them:
+how they group forms into output files, which template files they read, and
+whether they convert the output of another exporter.
 """
 
+from typing import Callable, Iterable, Optional, Tuple
+
 _registry = {}
+_group_by = {}
+_templates = {}
+_intermediates = {}
 
 
-def register(name: str):
+def register(
+    name: str,
+    group_by: Optional[Callable] = None,
+    templates: Iterable[str] = (),
+    intermediate: Optional[str] = None,
+    convert: Optional[Callable] = None,
+):
     """
     A decorator to register an exporter function for a given format name.
 
     Args:
         name (str): The name of the format (e.g., "pdf", "docx").
+        group_by (Optional[Callable]): For exporters writing one file per group
+                                       of forms, returns the group of a form
+                                       (e.g. its domain). Incremental builds
+                                       then render each group on its own.
+                                       Exporters writing a single file for all
+                                       forms leave it unset.
+        templates (Iterable[str]): The paths of the template files the
+                                   exporter renders with.
+        intermediate (Optional[str]): For exporters converting the output of
+                                      another format, that format (e.g.
+                                      "docx"). Builds render it once and share
+                                      it between the exporters converting it.
+        convert (Optional[Callable]): The conversion, called with the path of
+                                      the intermediate file, the forms and the
+                                      output directory. Required with
+                                      ``intermediate``.
 
     Returns:
         A decorator function that registers the decorated function.
@@ -22,6 +53,10 @@ def register(name: str):
 
     def decorator(fn):
         _registry[name] = fn
+        _group_by[name] = group_by
+        _templates[name] = tuple(templates)
+        if intermediate is not None:
+            _intermediates[name] = (intermediate, convert)
         return fn
 
     return decorator
@@ -48,3 +83,44 @@ def formats():
         list: A list of strings, where each string is a registered format name.
     """
     return list(_registry.keys())
+
+
+def group_by(name: str) -> Optional[Callable]:
+    """
+    Gets the function grouping the forms of a format into output files.
+
+    Args:
+        name (str): The name of the format.
+
+    Returns:
+        The function returning the group of a form, or None if the exporter
+        writes all forms into a single output.
+    """
+    return _group_by.get(name)
+
+
+def templates(name: str) -> Tuple[str, ...]:
+    """
+    Gets the template files of a format.
+
+    Args:
+        name (str): The name of the format.
+
+    Returns:
+        Tuple[str, ...]: The paths of the template files the exporter reads.
+    """
+    return _templates.get(name, ())
+
+
+def intermediate(name: str) -> Optional[Tuple[str, Callable]]:
+    """
+    Gets the intermediate format of a format, and the conversion from it.
+
+    Args:
+        name (str): The name of the format.
+
+    Returns:
+        The intermediate format and the conversion function, or None if the
+        exporter renders the forms directly.
+    """
+    return _intermediates.get(name)
@@ -8,15 +8,33 @@ import tempfile
 from pathlib import Path
 from typing import Sequence
 
-import pypandoc
-
+from clinical_data_study_buddy.core.conversion_service import get_conversion_service
 from clinical_data_study_buddy.core.models.schema import Form
 
 from .docx import export_docx
 from .registry import register
 
 
-@register("rtf")
+def convert_docx_to_rtf(
+    docx_path: Path,
+    forms: Sequence[Form],
+    outdir: Path,
+) -> None:
+    """
+    Converts the .docx rendering of forms to RTF using pandoc.
+
+    The conversion runs on the shared conversion service.
+
+    Args:
+        docx_path (Path): The .docx document rendered from the forms.
+        forms (Sequence[Form]): The forms, which name the output file.
+        outdir (Path): The output directory where the RTF file will be saved.
+    """
+    rtf_path = Path(outdir) / f"{forms[0].id}.rtf"
+    get_conversion_service().convert(Path(docx_path), "rtf", rtf_path)
+
+
+@register("rtf", intermediate="docx", convert=convert_docx_to_rtf)
 def export_rtf(forms: Sequence[Form], outdir: Path, style: dict = None) -> None:
     """
     Exports a sequence of Form objects to an RTF document.
@@ -31,9 +49,6 @@ def export_rtf(forms: Sequence[Form], outdir: Path, style: dict = None) -> None:
                                 to the intermediate .docx document. Defaults to None.
     """
     with tempfile.NamedTemporaryFile(suffix=".docx") as tmp:
-        docx_path = tmp.name
-        export_docx(
-            forms, Path(docx_path).parent, style, output_filename=Path(docx_path).name
-        )
-        rtf_path = outdir / f"{forms[0].id}.rtf"
-        pypandoc.convert_file(str(docx_path), "rtf", outputfile=str(rtf_path))
+        docx_path = Path(tmp.name)
+        export_docx(forms, docx_path.parent, style, output_filename=docx_path.name)
+        convert_docx_to_rtf(docx_path, forms, outdir)
@@ -18,6 +18,7 @@ class TFL(BaseModel):
         data (Optional[List[Dict]]): The data for the TFL.
         style (Optional[Dict]): The style options for the TFL.
         domain (Optional[str]): The domain of the TFL.
+        columns (Optional[List[str]]): The columns of the domain the TFL uses.
     """
 
     id: str = Field(..., description="The unique ID of the TFL.")
@@ -26,3 +27,6 @@ class TFL(BaseModel):
     data: Optional[List[Dict]] = Field(None, description="The data for the TFL.")
     style: Optional[Dict] = Field(None, description="The style options for the TFL.")
     domain: Optional[str] = Field(None, description="The domain of the TFL.")
+    columns: Optional[List[str]] = Field(
+        None, description="The columns of the domain the TFL uses."
+    )
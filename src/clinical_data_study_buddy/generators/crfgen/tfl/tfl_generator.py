@@ -1,14 +1,18 @@
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
+from ...dataset_io import DATASET_FORMATS, read_dataset
 from ..exporter.registry import get as get_exporter
 from .figures import Figure
 from .listings import Listing
 from .tables import Table
 from .TFL import TFL
 
+# Typed formats first, as they need no type inference
+_READ_ORDER = sorted(DATASET_FORMATS, key=lambda output_format: output_format == "csv")
+
 
 class TFLGenerator:
     """
@@ -25,7 +29,8 @@ class TFLGenerator:
                     - 'tfls': A list of TFL definitions.
                     - 'output_dir': The directory to save the generated files.
                     - 'output_formats': A list of output formats (e.g., 'docx', 'pdf').
-                    - 'data_path': The path to the directory containing synthetic data.
+                    - 'data_path': The path to the directory containing synthetic data,
+                      as CSV, Parquet or XPT files named after their domain.
                     - 'style': Global style options.
         """
         self.tfls_config = config.get("tfls", [])
@@ -38,14 +43,37 @@ class TFLGenerator:
 
     def _load_data(self):
         """
-        Loads synthetic data from CSV files.
+        Loads the synthetic data of the domains the TFLs use.
+
+        Only the columns listed by the TFLs of a domain are loaded, unless one
+        of them lists none. When a domain has files in several formats, the
+        typed formats (Parquet, XPT) are preferred over CSV.
         """
         if self.data_path:
             data_dir = Path(self.data_path)
             if data_dir.is_dir():
-                for csv_file in data_dir.glob("*.csv"):
-                    domain = csv_file.stem
-                    self.data[domain] = pd.read_csv(csv_file)
+                columns: Dict[str, Optional[set]] = {}
+                for tfl_config in self.tfls_config:
+                    domain = tfl_config.get("domain")
+                    if not domain:
+                        continue
+                    wanted = tfl_config.get("columns")
+                    if domain in columns and columns[domain] is None:
+                        continue
+                    columns[domain] = (
+                        None
+                        if wanted is None
+                        else columns.get(domain, set()) | set(wanted)
+                    )
+                for domain, wanted in columns.items():
+                    for output_format in _READ_ORDER:
+                        dataset_file = data_dir / f"{domain}.{output_format}"
+                        if dataset_file.exists():
+                            self.data[domain] = read_dataset(
+                                dataset_file,
+                                columns=None if wanted is None else sorted(wanted),
+                            )
+                            break
             else:
                 print(f"Warning: Data path '{self.data_path}' is not a directory.")
 
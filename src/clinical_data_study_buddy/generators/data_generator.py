@@ -1,11 +1,59 @@
 """
 This module contains the DataGenerator class, which is responsible for generating synthetic data
 based on a given CDISC standard form definition.
+
+Data is generated column by column: each field is produced as a whole NumPy
+array and the arrays are assembled into a DataFrame directly, so generating
+hundreds of thousands of subjects does not run a Python loop per cell.
+
+Subjects are generated in fixed-size chunks, each from its own random stream
+spawned from the generator's ``numpy.random.SeedSequence``. The chunks only
+depend on the seed and the number of subjects, so they can be generated in any
+order, in any process, and still give bit-identical output for a given seed.
 """
 
-import random
+import os
 import string
-from datetime import datetime, timedelta
+import zlib
+from collections import deque
+from concurrent.futures import Executor
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+_TEXT_ALPHABET = np.frombuffer(
+    (string.ascii_uppercase + string.digits).encode("ascii"), dtype=np.uint8
+)
+_START_DATE = np.datetime64("2020-01-01", "D")
+_END_DATE = np.datetime64("2023-12-31", "D")
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+T = TypeVar("T")
+
+
+def domain_seed(
+    study_seed: np.random.SeedSequence, domain: str
+) -> np.random.SeedSequence:
+    """
+    Derives the independent seed sequence of a domain from the study's.
+
+    The sequence is keyed by the domain name rather than its position, so
+    adding or removing a domain does not change the data of the others.
+
+    Args:
+        study_seed (numpy.random.SeedSequence): The seed sequence of the study.
+        domain (str): The domain name.
+
+    Returns:
+        numpy.random.SeedSequence: The seed sequence of the domain.
+    """
+    return np.random.SeedSequence(
+        study_seed.entropy,
+        spawn_key=study_seed.spawn_key + (zlib.crc32(domain.upper().encode()),),
+    )
 
 
 class DataGenerator:
@@ -16,121 +64,302 @@ class DataGenerator:
     that conforms to the specified fields and their data types.
     """
 
-    def __init__(self, form_data):
+    def __init__(
+        self, form_data, seed=None, chunk_size=DEFAULT_CHUNK_SIZE, ct_index=None
+    ):
         """
         Initializes the DataGenerator.
 
         Args:
             form_data: An object containing the definition of the form,
                        including its fields and their properties.
+            seed: The seed (an int or a ``numpy.random.SeedSequence``) for
+                  reproducible data. Defaults to fresh entropy from the
+                  operating system.
+            chunk_size (int): The number of subjects generated per chunk.
+            ct_index (Optional[ControlledTerminologyIndex]): The controlled
+                terminology to sample codelist fields from (see
+                ``core.ct_index.load_ct_index``).
         """
         self.form_data = form_data
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.chunk_size = max(1, chunk_size)
+        self.ct_index = ct_index
 
-    def _generate_text(self, length=10):
+    def _generate_text(self, rng, size, length=10):
         """
-        Generates a random string of text.
+        Generates an array of random strings of text.
+
+        The characters of all strings are drawn at once into a single byte
+        buffer, which is then viewed as fixed-width strings.
 
         Args:
-            length (int): The length of the string to generate.
+            rng (numpy.random.Generator): The random number generator to draw from.
+            size (int): The number of strings to generate.
+            length (int): The length of each string.
 
         Returns:
-            str: A random string of uppercase letters and digits.
+            numpy.ndarray: Random strings of uppercase letters and digits.
         """
-        return "".join(random.choices(string.ascii_uppercase + string.digits, k=length))
+        if length <= 0:
+            return np.full(size, "", dtype=object)
+        codes = rng.integers(0, len(_TEXT_ALPHABET), size=(size, length))
+        buffer = np.ascontiguousarray(_TEXT_ALPHABET[codes])
+        return buffer.view(f"S{length}").ravel().astype(str).astype(object)
 
-    def _generate_integer(self, min_val=0, max_val=100):
+    def _generate_integer(self, rng, size, min_val=0, max_val=100):
         """
-        Generates a random integer within a specified range.
+        Generates an array of random integers within a specified range.
 
         Args:
-            min_val (int): The minimum value of the random integer (inclusive).
-            max_val (int): The maximum value of the random integer (inclusive).
+            rng (numpy.random.Generator): The random number generator to draw from.
+            size (int): The number of integers to generate.
+            min_val (int): The minimum value of the random integers (inclusive).
+            max_val (int): The maximum value of the random integers (inclusive).
 
         Returns:
-            int: A random integer.
+            numpy.ndarray: Random integers.
         """
-        return random.randint(min_val, max_val)
+        return rng.integers(min_val, max_val, size=size, endpoint=True)
 
-    def _generate_float(self, min_val=0.0, max_val=100.0, decimal_places=2):
+    def _generate_float(self, rng, size, min_val=0.0, max_val=100.0, decimal_places=2):
         """
-        Generates a random float within a specified range.
+        Generates an array of random floats within a specified range.
 
         Args:
-            min_val (float): The minimum value of the random float (inclusive).
-            max_val (float): The maximum value of the random float (inclusive).
-            decimal_places (int): The number of decimal places for the float.
+            rng (numpy.random.Generator): The random number generator to draw from.
+            size (int): The number of floats to generate.
+            min_val (float): The minimum value of the random floats (inclusive).
+            max_val (float): The maximum value of the random floats (inclusive).
+            decimal_places (int): The number of decimal places for the floats.
 
         Returns:
-            float: A random float.
+            numpy.ndarray: Random floats.
         """
-        return round(random.uniform(min_val, max_val), decimal_places)
+        return np.round(rng.uniform(min_val, max_val, size=size), decimal_places)
 
-    def _generate_date(self):
+    def _generate_date(self, rng, size):
         """
-        Generates a random date in ISO format.
+        Generates an array of random dates in ISO format.
+
+        The dates will be between January 1, 2020, and December 31, 2023.
 
-        The date will be between January 1, 2020, and December 31, 2023.
+        Args:
+            rng (numpy.random.Generator): The random number generator to draw from.
+            size (int): The number of dates to generate.
 
         Returns:
-            str: A random date in ISO 8601 format.
+            numpy.ndarray: Random dates in ISO 8601 format.
         """
-        start_date = datetime(2020, 1, 1)
-        end_date = datetime(2023, 12, 31)
-        delta = end_date - start_date
-        random_days = random.randint(0, delta.days)
-        return (start_date + timedelta(days=random_days)).date().isoformat()
+        days = (_END_DATE - _START_DATE).astype(int)
+        offsets = rng.integers(0, days, size=size, endpoint=True)
+        dates = _START_DATE + offsets.astype("timedelta64[D]")
+        return np.datetime_as_string(dates, unit="D").astype(object)
 
-    def _generate_from_codelist(self, codelist):
+    def _generate_from_codelist(self, rng, size, codelist):
         """
-        Generates a value from a codelist.
+        Generates an array of values from a codelist.
 
-        Note: This is a placeholder implementation. In a real implementation,
-        this method would fetch the codelist from the CDISC Library and select
-        a value from it. For now, it returns a dummy value.
+        The values are drawn from the submission values of the codelist in the
+        controlled terminology index, with the index's weights. Codelists that
+        are not indexed yield a placeholder value.
 
         Args:
+            rng (numpy.random.Generator): The random number generator to draw from.
+            size (int): The number of values to generate.
             codelist: The codelist object.
 
         Returns:
-            str: The NCI code of the codelist.
+            numpy.ndarray: The generated values.
         """
-        # This is a placeholder implementation.
-        # In a real implementation, we would fetch the codelist from the CDISC Library.
-        # For now, we will just return a dummy value.
-        return "MALE"
+        if self.ct_index is not None and codelist.nci_code in self.ct_index:
+            return self.ct_index.sample(codelist.nci_code, size, rng)
+        return np.full(size, "MALE", dtype=object)
 
-    def _generate_field_value(self, field):
+    def _generate_field_values(self, rng, field, size):
         """
-        Generates a value for a given field based on its data type.
+        Generates the values of a given field based on its data type.
 
         Args:
-            field: The field object for which to generate a value.
+            rng (numpy.random.Generator): The random number generator to draw from.
+            field: The field object for which to generate values.
+            size (int): The number of values to generate.
 
         Returns:
-            The generated value, or None if the data type is unknown.
+            numpy.ndarray: The generated values, all None if the data type is unknown.
         """
         if field.codelist:
-            return self._generate_from_codelist(field.codelist)
+            return self._generate_from_codelist(rng, size, field.codelist)
 
         datatype = field.datatype.lower()
         if datatype == "text":
             length = field.length if field.length is not None else 10
-            return self._generate_text(length)
+            return self._generate_text(rng, size, length)
         elif datatype == "integer":
-            return self._generate_integer()
+            return self._generate_integer(rng, size)
         elif datatype == "float":
-            return self._generate_float()
+            return self._generate_float(rng, size)
         elif datatype == "date":
-            return self._generate_date()
+            return self._generate_date(rng, size)
         else:
-            return None
+            return np.full(size, None, dtype=object)
+
+    def variables(self) -> Dict[str, dict]:
+        """
+        Describes the variables generated for the fields of the form.
+
+        Dataset writers that store variable metadata, such as the XPT writer,
+        use it instead of inferring types and lengths from the data.
+
+        Returns:
+            Dict[str, dict]: The "label", "type" ("char" or "num") and "length"
+            (the maximum number of characters, None if unknown) of each
+            variable, keyed by CDASH variable name.
+        """
+        variables = {}
+        for field in self.form_data.fields:
+            datatype = field.datatype.lower()
+            length = field.length
+            if field.codelist:
+                kind = "char"
+                code = field.codelist.nci_code
+                if self.ct_index is not None and code in self.ct_index:
+                    values = self.ct_index.values(code)
+                else:
+                    values = ["MALE"]
+                length = max(len(str(value)) for value in values)
+            elif datatype in ("integer", "float", "boolean"):
+                kind = "num"
+                length = 8
+            elif datatype == "date":
+                kind = "char"
+                length = 10
+            else:
+                kind = "char"
+                if datatype == "text" and length is None:
+                    length = 10
+            variables[field.cdash_var] = {
+                "label": field.prompt,
+                "type": kind,
+                "length": length,
+            }
+        return variables
+
+    def chunk_plan(self, num_subjects: int) -> List[Tuple[np.random.SeedSequence, int]]:
+        """
+        Splits the subjects into chunks, each with its own seed sequence.
+
+        Every call spawns new seed sequences, so repeated calls on the same
+        generator produce new data.
+
+        Args:
+            num_subjects (int): The number of subjects to generate data for.
+
+        Returns:
+            List[Tuple[numpy.random.SeedSequence, int]]: The seed sequence and
+            the number of subjects of each chunk, in subject order.
+        """
+        sizes = [
+            min(self.chunk_size, num_subjects - start)
+            for start in range(0, num_subjects, self.chunk_size)
+        ] or [0]
+        return list(zip(self.seed_sequence.spawn(len(sizes)), sizes))
+
+    def generate_chunk(
+        self, seed_sequence: np.random.SeedSequence, size: int
+    ) -> pd.DataFrame:
+        """
+        Generates one chunk of subjects from its seed sequence.
+
+        Args:
+            seed_sequence (numpy.random.SeedSequence): The seed of the chunk.
+            size (int): The number of subjects in the chunk.
+
+        Returns:
+            pd.DataFrame: One row per subject and one column per field.
+        """
+        return self.generate_records(np.random.default_rng(seed_sequence), size)
+
+    def generate_records(self, rng: np.random.Generator, size: int) -> pd.DataFrame:
+        """
+        Generates records with independent random values for every field.
+
+        Args:
+            rng (numpy.random.Generator): The random number generator to draw from.
+            size (int): The number of records.
+
+        Returns:
+            pd.DataFrame: One row per record and one column per field.
+        """
+        return pd.DataFrame(
+            {
+                field.cdash_var: self._generate_field_values(rng, field, size)
+                for field in self.form_data.fields
+            },
+            index=pd.RangeIndex(size),
+        )
+
+    def iter_chunks(
+        self,
+        num_subjects: int,
+        executor: Optional[Executor] = None,
+        prefetch: Optional[int] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Generates a dataset with a given number of subjects chunk by chunk.
+
+        Only the chunk being consumed and the chunks being prefetched are held
+        in memory, so datasets larger than memory can be streamed to disk with
+        ``dataset_io.write_chunks``.
+
+        Args:
+            num_subjects (int): The number of subjects to generate data for.
+            executor (Optional[Executor]): Runs the chunks concurrently when
+                                           given; otherwise they run in turn.
+            prefetch (Optional[int]): The maximum number of chunks generated
+                                      ahead of the consumer on the executor.
+
+        Yields:
+            pd.DataFrame: The chunks, in subject order, with at most
+            ``chunk_size`` rows each.
+        """
+        calls = (
+            partial(self.generate_chunk, seed_sequence, size)
+            for seed_sequence, size in self.chunk_plan(num_subjects)
+        )
+        return iter_ordered(calls, executor, prefetch)
+
+    def generate_frame(
+        self, num_subjects: int, executor: Optional[Executor] = None
+    ) -> pd.DataFrame:
+        """
+        Generates a dataset with a given number of subjects as a DataFrame.
+
+        Each field is generated as a whole column, named after its CDASH
+        variable. The output only depends on the seed, not on the executor.
+        Prefer iter_chunks for datasets that should not be held in memory.
+
+        Args:
+            num_subjects (int): The number of subjects to generate data for.
+            executor (Optional[Executor]): Runs the chunks concurrently when
+                                           given; otherwise they run in turn.
+
+        Returns:
+            pd.DataFrame: One row per subject and one column per field.
+        """
+        return pd.concat(
+            list(self.iter_chunks(num_subjects, executor)), ignore_index=True
+        )
 
     def generate(self, num_subjects: int):
         """
         Generates a dataset with a given number of subjects.
 
-        This method iterates through the specified number of subjects and, for each,
-        generates data for all fields in the form.
+        Prefer generate_frame for large datasets; this method converts its
+        result to one dictionary per subject.
 
         Args:
             num_subjects (int): The number of subjects to generate data for.
@@ -138,10 +367,41 @@ class DataGenerator:
         Returns:
             list: A list of dictionaries, where each dictionary represents a subject's data.
         """
-        dataset = []
-        for i in range(num_subjects):
-            subject_data = {}
-            for field in self.form_data.fields:
-                subject_data[field.cdash_var] = self._generate_field_value(field)
-            dataset.append(subject_data)
-        return dataset
+        return self.generate_frame(num_subjects).to_dict("records")
+
+
+def iter_ordered(
+    calls: Iterable[Callable[[], T]],
+    executor: Optional[Executor] = None,
+    prefetch: Optional[int] = None,
+) -> Iterator[T]:
+    """
+    Runs calls on an executor and yields their results in order.
+
+    At most ``prefetch`` calls are submitted ahead of the consumer, which
+    bounds the memory held by finished but not yet consumed results.
+
+    Args:
+        calls (Iterable[Callable[[], T]]): The calls to run. They must be
+                                           picklable for a process pool.
+        executor (Optional[Executor]): The executor to run the calls on. The
+                                       calls run in turn when not given.
+        prefetch (Optional[int]): The maximum number of pending calls.
+                                  Defaults to twice the number of CPUs.
+
+    Yields:
+        T: The result of each call, in the order of the calls.
+    """
+    if executor is None:
+        for call in calls:
+            yield call()
+        return
+
+    prefetch = max(1, prefetch or 2 * (os.cpu_count() or 1))
+    pending = deque()
+    for call in calls:
+        pending.append(executor.submit(call))
+        if len(pending) >= prefetch:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
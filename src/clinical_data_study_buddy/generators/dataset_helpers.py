@@ -4,38 +4,178 @@ This module provides helper functions for dataset generation.
 The functions in this module are used to:
 - Generate a define.xml file from a set of domains.
 - Package generated datasets into a zip archive.
-- Apply a "study story" to the datasets to simulate real-world scenarios.
 """
 
+import io
+import json
 import os
-import random
 import shutil
-import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from pathlib import Path
 
-import httpx
-import pandas as pd
 from odmlib.define_2_1 import model as DEF
 from odmlib.odm_1_3_2 import model as ODM
 from rich.console import Console
 
-from cdisc_library_client.client import AuthenticatedClient
+from cdisc_library_client.api.sdtm_implementation_guide_sdtmig import (
+    get_mdr_sdtmig_version_datasets_dataset,
+)
+from clinical_data_study_buddy.core.cdisc_library_service import get_client
+from clinical_data_study_buddy.core.standards_store import StandardsStore
+from clinical_data_study_buddy.generators.dataset_io import (
+    DATASET_FORMATS,
+    dataset_columns,
+    dataset_path,
+)
+from clinical_data_study_buddy.generators.dataset_package import DatasetPackage
 
 console = Console()
 
+PACKAGE_NAME = "edc_raw_datasets.zip"
+
+# Mapping from CDISC Library simpleDatatype to define.xml DataType
+_DEFINE_DATATYPES = {"Char": "text", "Num": "float"}
+
+
+def _find_dataset_file(temp_dir, domain):
+    """
+    Finds the dataset file of a domain, named either ``sdtm_<domain>*.<format>``
+    or ``<DOMAIN>.<format>``, in any supported dataset format.
+    """
+    for output_format in DATASET_FORMATS:
+        domain_file = next(
+            temp_dir.glob(f"sdtm_{domain.lower()}*.{output_format}"), None
+        )
+        if domain_file is None:
+            candidate = dataset_path(temp_dir, domain.upper(), output_format)
+            domain_file = candidate if candidate.exists() else None
+        if domain_file is not None:
+            return domain_file
+    return None
+
+
+def _variable_metadata(variable):
+    """Extracts the define.xml metadata of a dataset variable document."""
+    return {
+        "label": variable.get("label"),
+        "datatype": _DEFINE_DATATYPES.get(variable.get("simpleDatatype"), "text"),
+        "length": None,
+    }
+
+
+def _fetch_dataset_metadata(client, sdtmig_version, domain):
+    """
+    Fetches the metadata of all variables of a domain in a single request.
+
+    Returns:
+        dict: The variable metadata, keyed by variable name.
+    """
+    response = get_mdr_sdtmig_version_datasets_dataset.sync_detailed(
+        client=client, version=sdtmig_version, dataset=domain
+    )
+    if response.status_code != HTTPStatus.OK:
+        raise ValueError(f"HTTP {response.status_code}")
+    dataset = json.loads(response.content)
+    return {
+        variable["name"]: _variable_metadata(variable)
+        for variable in dataset.get("datasetVariables", [])
+    }
+
+
+def resolve_variable_metadata(domains, sdtmig_version, store=None, api_key=None):
+    """
+    Resolves the metadata of every variable of the given domains in one batched pass.
+
+    Domains are read from the offline standards store when it holds the SDTMIG
+    version. Otherwise each domain is fetched with one dataset-level request;
+    the requests run concurrently over a single pooled client and go through
+    the on-disk metadata cache.
+
+    Args:
+        domains (list): The domain names.
+        sdtmig_version (str): The SDTMIG version (e.g. "3-3").
+        store (StandardsStore): The offline standards store, if any.
+        api_key (str): The CDISC Library API key, used when the store lacks
+                       the version.
+
+    Returns:
+        dict: The variable metadata, keyed by domain and then variable name.
+              Domains whose metadata could not be resolved map to an empty dict.
+    """
+    domains = [domain.upper() for domain in domains]
+    if store is not None and store.has("sdtmig", sdtmig_version):
+        index = {}
+        for domain in domains:
+            rows = store.frame(
+                "sdtmig",
+                sdtmig_version,
+                group=domain,
+                columns=["variable", "label", "datatype"],
+            )
+            index[domain] = {
+                row.variable: _variable_metadata(
+                    {"label": row.label, "simpleDatatype": row.datatype}
+                )
+                for row in rows.itertuples()
+            }
+        return index
+
+    client = get_client(api_key=api_key)
+    index = {}
+    with ThreadPoolExecutor(max_workers=min(8, max(1, len(domains)))) as pool:
+        futures = {
+            domain: pool.submit(_fetch_dataset_metadata, client, sdtmig_version, domain)
+            for domain in domains
+        }
+        for domain, future in futures.items():
+            try:
+                index[domain] = future.result()
+            except Exception as e:
+                console.print(
+                    f"  - Error fetching metadata for domain {domain}: {e}",
+                    style="yellow",
+                )
+                index[domain] = {}
+    return index
+
 
 def generate_define_xml(temp_dir, domains):
     """
-    Generates a define.xml file for the given domains.
+    Generates a define.xml file for the datasets of the given domains.
 
-    This function creates a define.xml file by fetching metadata from the CDISC Library
-    for the specified domains and their variables. The generated file is saved in the
-    temporary directory.
+    Only the header row or schema of each dataset file is read (see
+    build_define_xml).
+    The generated file is saved in the temporary directory.
 
     Args:
         temp_dir (pathlib.Path): The temporary directory containing the dataset files.
         domains (list): A list of domain names to include in the define.xml file.
     """
+    columns = {}
+    for domain in domains:
+        domain_file = _find_dataset_file(temp_dir, domain)
+        if domain_file:
+            columns[domain] = dataset_columns(domain_file)
+    (temp_dir / "define.xml").write_bytes(build_define_xml(columns))
+
+
+def build_define_xml(columns):
+    """
+    Builds a define.xml document for datasets with the given columns.
+
+    This function creates a define.xml document from the CDISC Library metadata
+    of the specified domains and their variables. The metadata of all domains
+    is resolved up front, with one request per domain, or from the offline
+    standards store when it holds a snapshot of the SDTMIG version.
+
+    Args:
+        columns (dict): The variable names of each domain's dataset, in order,
+                        keyed by domain name.
+
+    Returns:
+        bytes: The define.xml document.
+    """
     console.print("Generating define.xml...")
 
     # Create the basic ODM structure
@@ -65,26 +205,23 @@ def generate_define_xml(temp_dir, domains):
     )
     study.MetaDataVersion.append(meta_data_version)
 
-    # Instantiate the CDISC Library client
+    sdtmig_version = "3-3"  # Using a recent version as a default
+    store = StandardsStore.from_env()
+
     api_key = os.environ.get("CDISC_API_KEY")
-    if not api_key:
+    if not api_key and not store.has("sdtmig", sdtmig_version):
         console.print(
             "Warning: CDISC_API_KEY environment variable not set. Cannot fetch metadata.",
             style="yellow",
         )
-        # Create an empty define.xml
-        define_xml_path = temp_dir / "define.xml"
-        with open(define_xml_path, "w") as f:
-            f.write("<ODM></ODM>")
-        return
-
-    sdtmig_version = "3-3"  # Using a recent version as a default
+        # An empty define.xml
+        return b"<ODM></ODM>"
 
-    for domain in domains:
-        domain_file = next(temp_dir.glob(f"sdtm_{domain.lower()}*.csv"), None)
-        if not domain_file:
-            continue
+    metadata = resolve_variable_metadata(
+        list(columns), sdtmig_version, store=store, api_key=api_key
+    )
 
+    for domain, variables in columns.items():
         # Create ItemGroupDef for the domain
         item_group_class = DEF.Class(Name="SPECIAL PURPOSE")
         item_group = DEF.ItemGroupDef(
@@ -99,135 +236,73 @@ def generate_define_xml(temp_dir, domains):
         )
         meta_data_version.ItemGroupDef.append(item_group)
 
-        # Get variable names from the CSV header
-        df = pd.read_csv(domain_file)
-        variables = list(df.columns)
+        domain_metadata = metadata.get(domain.upper(), {})
 
-        for var_name in variables:
-            # Get variable metadata from CDISC Library using direct API call
-            try:
-                url = f"https://library.cdisc.org/products/sdtmig/{sdtmig_version}/datasets/{domain.upper()}/variables/{var_name}"
-                headers = {"api-key": api_key, "Accept": "application/json"}
-                response = httpx.get(
-                    url, headers=headers, timeout=60.0, follow_redirects=True
-                )
-                response.raise_for_status()
-                variable_metadata = response.json()
-
-                if variable_metadata:
-                    item_def = DEF.ItemDef(
-                        OID=f"IT.{domain.upper()}.{var_name}",
-                        Name=var_name,
-                        DataType=variable_metadata.get("datatype"),
-                        Length=variable_metadata.get("length"),
-                        SASFieldName=var_name,
-                    )
-                    item_def.Description = DEF.Description()
-                    item_def.Description.TranslatedText.append(
-                        ODM.TranslatedText(
-                            _content=variable_metadata.get("label"), lang="en"
-                        )
-                    )
-                    item_group.ItemRef.append(
-                        DEF.ItemRef(
-                            ItemOID=item_def.OID,
-                            OrderNumber=variables.index(var_name) + 1,
-                            Mandatory="No",
-                        )
-                    )
-                    meta_data_version.ItemDef.append(item_def)
-                else:
-                    console.print(
-                        f"  - Could not find metadata for variable {var_name} in domain {domain}",
-                        style="yellow",
-                    )
-            except httpx.HTTPStatusError as e:
+        for order, var_name in enumerate(variables, start=1):
+            variable_metadata = domain_metadata.get(var_name)
+            if not variable_metadata:
                 console.print(
-                    f"  - Error fetching metadata for variable {var_name} in domain {domain}: {e.response.status_code}",
+                    f"  - Could not find metadata for variable {var_name} in domain {domain}",
                     style="yellow",
                 )
-            except Exception as e:
-                console.print(
-                    f"  - Error fetching metadata for variable {var_name} in domain {domain}: {e}",
-                    style="yellow",
+                continue
+            item_def = DEF.ItemDef(
+                OID=f"IT.{domain.upper()}.{var_name}",
+                Name=var_name,
+                DataType=variable_metadata.get("datatype"),
+                Length=variable_metadata.get("length"),
+                SASFieldName=var_name,
+            )
+            item_def.Description = DEF.Description()
+            item_def.Description.TranslatedText.append(
+                ODM.TranslatedText(_content=variable_metadata.get("label"), lang="en")
+            )
+            item_group.ItemRef.append(
+                DEF.ItemRef(
+                    ItemOID=item_def.OID,
+                    OrderNumber=order,
+                    Mandatory="No",
                 )
+            )
+            meta_data_version.ItemDef.append(item_def)
 
-    # Write the file
-    define_xml_path = temp_dir / "define.xml"
-    root.write_xml(str(define_xml_path))
+    define_xml = io.BytesIO()
+    root.write_xml(define_xml)
     console.print("define.xml generated.")
+    return define_xml.getvalue()
 
 
-def package_datasets(temp_dir, output_dir):
+def package_datasets(
+    temp_dir, output_dir, compression="deflate", compression_level=None, jobs=1
+):
     """
     Packages the generated datasets into a zip file.
 
     This function takes all the files in the temporary directory, packages them into a
-    zip archive named "edc_raw_datasets.zip", and saves it in the output directory.
-    After packaging, it cleans up the temporary directory.
+    zip archive named "edc_raw_datasets.zip", together with a manifest of their
+    checksums, and saves it in the output directory. After packaging, it cleans
+    up the temporary directory. Packages generated in memory are better written
+    with a DatasetPackage directly, which needs no temporary directory.
 
     Args:
         temp_dir (pathlib.Path): The temporary directory containing the dataset files.
         output_dir (pathlib.Path): The directory where the zip file will be saved.
+        compression (str): The compression of the files (see
+                           ``dataset_package.COMPRESSIONS``).
+        compression_level (int): The compression level. Defaults to the
+                                 level of the compression.
+        jobs (int): The number of threads compressing the files.
     """
-    zip_filename = Path(output_dir) / "edc_raw_datasets.zip"
+    zip_filename = Path(output_dir) / PACKAGE_NAME
     console.print(f"Packaging datasets into {zip_filename}...")
-    with zipfile.ZipFile(zip_filename, "w") as zipf:
-        for file in temp_dir.glob("*"):
-            zipf.write(file, file.name)
+    with DatasetPackage(
+        zip_filename, compression, level=compression_level, jobs=jobs
+    ) as package:
+        for file in sorted(temp_dir.glob("*")):
+            package.write_file(file)
     console.print("Packaging complete.")
 
     # Clean up the temporary directory
     console.print("Cleaning up temporary files...")
     shutil.rmtree(temp_dir)
     console.print("Cleanup complete.")
-
-
-def apply_study_story(study_story, temp_dir, num_subjects, domains, file_format):
-    """
-    Applies a study story to the generated datasets.
-
-    This function modifies the datasets to simulate a real-world scenario, such as
-    a high dropout rate.
-
-    Args:
-        study_story (str): The name of the study story to apply (e.g., "high_dropout").
-        temp_dir (pathlib.Path): The temporary directory containing the dataset files.
-        num_subjects (int): The total number of subjects in the study.
-        domains (list): A list of domain names.
-        file_format (str): The file format of the datasets (e.g., "csv").
-    """
-    if study_story == "high_dropout":
-        console.print("Applying 'high_dropout' study story...")
-        dropout_rate = 0.3
-        num_dropouts = int(num_subjects * dropout_rate)
-
-        # Assuming DM is always present and contains the full subject list
-        dm_file = next(temp_dir.glob("sdtm_dm*.csv"), None)
-        if not dm_file:
-            console.print(
-                "Warning: DM domain not found. Cannot apply high dropout story.",
-                style="yellow",
-            )
-            return
-
-        if file_format == "csv":
-            dm_df = pd.read_csv(dm_file)
-            all_subject_ids = dm_df["USUBJID"].unique()
-            dropout_subject_ids = random.sample(list(all_subject_ids), num_dropouts)
-
-            for domain in domains:
-                if domain.upper() == "DM":
-                    continue  # Don't remove subjects from DM
-
-                domain_file = next(temp_dir.glob(f"sdtm_{domain.lower()}*.csv"), None)
-                if domain_file:
-                    df = pd.read_csv(domain_file)
-                    df = df[~df["USUBJID"].isin(dropout_subject_ids)]
-                    df.to_csv(domain_file, index=False)
-                    console.print(f"  - Applied dropout to {domain} domain.")
-        else:
-            console.print(
-                f"Warning: High dropout story not implemented for '{file_format}' format yet.",
-                style="yellow",
-            )
@@ -0,0 +1,281 @@
+"""
+This module writes synthetic datasets to disk chunk by chunk, and reads them back.
+
+A dataset is given as an iterable of DataFrame chunks (see
+``DataGenerator.iter_chunks``), and each chunk is appended to the output file
+as soon as it arrives, so memory stays bounded by the chunk size however many
+rows the dataset has. Datasets can be written to a file (``write_chunks``) or
+to any binary stream (``write_stream``), such as a member of a zip archive.
+
+XPT (SAS transport) output is written by ``xpt.XptWriter``, which takes the
+variable labels, types and lengths from the variable metadata when given.
+Parquet output needs the optional ``pyarrow`` package.
+
+Datasets are read with ``read_dataset``, which loads only the requested
+columns, and their columns are listed with ``dataset_columns``, which reads
+only the header or schema. Parquet and XPT keep the column types, so reading
+them involves no type inference.
+"""
+
+import io
+import pathlib
+from typing import BinaryIO, Iterable, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from clinical_data_study_buddy.generators.xpt import XptWriter
+
+DATASET_FORMATS = ("csv", "parquet", "xpt")
+
+
+class _CsvWriter:
+    """Appends chunks to a CSV stream, writing the header with the first one."""
+
+    def __init__(self, stream: BinaryIO, name=None, variables=None):
+        self._text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        self._header = True
+
+    def write(self, chunk: pd.DataFrame):
+        chunk.to_csv(self._text, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        # Leave the underlying stream open for its owner to close
+        self._text.flush()
+        self._text.detach()
+
+
+def _import_pyarrow():
+    """Imports pyarrow, which Parquet datasets need."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet datasets require pyarrow. Install it with the 'arrow' extra: "
+            "'pip install clinical-data-study-buddy[arrow]' or "
+            "'poetry install --extras arrow'."
+        ) from e
+    return pyarrow
+
+
+class _ParquetWriter:
+    """Appends chunks to a Parquet stream, one row group per chunk."""
+
+    def __init__(self, stream: BinaryIO, name=None, variables=None):
+        self._pyarrow = _import_pyarrow()
+        self._stream = stream
+        self._writer = None
+
+    def write(self, chunk: pd.DataFrame):
+        if self._writer is None:
+            table = self._pyarrow.Table.from_pandas(chunk, preserve_index=False)
+            self._writer = self._pyarrow.parquet.ParquetWriter(
+                self._stream, table.schema
+            )
+        else:
+            table = self._pyarrow.Table.from_pandas(
+                chunk, schema=self._writer.schema, preserve_index=False
+            )
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "parquet": _ParquetWriter, "xpt": XptWriter}
+
+
+def dataset_format(output_format: str) -> str:
+    """
+    Normalizes a dataset format.
+
+    Args:
+        output_format (str): The format, e.g. "CSV".
+
+    Returns:
+        str: The format in lower case, e.g. "csv".
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    output_format = output_format.lower()
+    if output_format not in _WRITERS:
+        raise ValueError(
+            f"Unsupported dataset format: {output_format}. "
+            f"Supported: {', '.join(DATASET_FORMATS)}"
+        )
+    return output_format
+
+
+def dataset_path(
+    directory: pathlib.Path, name: str, output_format: str = "csv"
+) -> pathlib.Path:
+    """
+    Returns the path of a dataset file in a directory.
+
+    Args:
+        directory (pathlib.Path): The directory of the dataset.
+        name (str): The name of the dataset, e.g. the domain.
+        output_format (str): The format of the dataset.
+
+    Returns:
+        pathlib.Path: The path, e.g. ``<directory>/DM.csv``.
+    """
+    return pathlib.Path(directory) / f"{name}.{output_format.lower()}"
+
+
+def write_chunks(
+    chunks: Iterable[pd.DataFrame],
+    path: pathlib.Path,
+    output_format: Optional[str] = None,
+    variables: Optional[Mapping[str, Mapping]] = None,
+) -> int:
+    """
+    Writes a dataset to a file one chunk at a time.
+
+    Each chunk is written as soon as it is produced and then released, so
+    only one chunk is held in memory. The file is replaced if it exists.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): The chunks of the dataset, in order,
+                                         all with the same columns.
+        path (pathlib.Path): The file to write. Its stem names the dataset.
+        output_format (Optional[str]): The format of the file: "csv",
+                                       "parquet" or "xpt". Defaults to the
+                                       file suffix.
+        variables (Optional[Mapping[str, Mapping]]): The "label", "type" and
+            "length" of each variable, used by formats that store them.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    path = pathlib.Path(path)
+    output_format = dataset_format(output_format or path.suffix.lstrip("."))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as stream:
+        return write_stream(
+            chunks, stream, output_format, name=path.stem, variables=variables
+        )
+
+
+def write_stream(
+    chunks: Iterable[pd.DataFrame],
+    stream: BinaryIO,
+    output_format: str,
+    name: Optional[str] = None,
+    variables: Optional[Mapping[str, Mapping]] = None,
+) -> int:
+    """
+    Writes a dataset to a binary stream one chunk at a time.
+
+    The stream is left open.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): The chunks of the dataset, in order,
+                                         all with the same columns.
+        stream (BinaryIO): The stream to write to.
+        output_format (str): The format of the dataset: "csv", "parquet" or "xpt".
+        name (Optional[str]): The name of the dataset, e.g. "DM". Required for XPT.
+        variables (Optional[Mapping[str, Mapping]]): The "label", "type" and
+            "length" of each variable, used by formats that store them.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the format is not supported, or the dataset or a
+                    variable name is not valid in the format.
+    """
+    writer = _WRITERS[dataset_format(output_format)](stream, name, variables)
+    rows = 0
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+
+def _path_format(path: pathlib.Path, output_format: Optional[str]) -> str:
+    return dataset_format(output_format or pathlib.Path(path).suffix.lstrip("."))
+
+
+def dataset_columns(
+    path: pathlib.Path, output_format: Optional[str] = None
+) -> List[str]:
+    """
+    Lists the columns of a dataset file without reading its rows.
+
+    Args:
+        path (pathlib.Path): The dataset file.
+        output_format (Optional[str]): The format of the file. Defaults to the
+                                       file suffix.
+
+    Returns:
+        List[str]: The column names, in order.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    output_format = _path_format(path, output_format)
+    if output_format == "parquet":
+        return list(_import_pyarrow().parquet.read_schema(path).names)
+    if output_format == "xpt":
+        with pd.read_sas(path, format="xport", iterator=True) as reader:
+            return list(reader.columns)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_dataset(
+    path: pathlib.Path,
+    columns: Optional[Sequence[str]] = None,
+    output_format: Optional[str] = None,
+    dtype=None,
+) -> pd.DataFrame:
+    """
+    Reads a dataset file, loading only the requested columns.
+
+    Parquet files are read column by column, so unrequested columns are never
+    decoded. CSV files skip unrequested columns while parsing.
+
+    Args:
+        path (pathlib.Path): The dataset file.
+        columns (Optional[Sequence[str]]): The columns to load. Requested
+                                           columns that the dataset lacks are
+                                           left out. Defaults to all columns.
+        output_format (Optional[str]): The format of the file. Defaults to the
+                                       file suffix.
+        dtype: The type of CSV columns, e.g. ``str`` to disable type
+               inference. Parquet and XPT columns keep their stored types.
+
+    Returns:
+        pd.DataFrame: The dataset.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    output_format = _path_format(path, output_format)
+    if output_format == "parquet":
+        if columns is not None:
+            present = set(dataset_columns(path, "parquet"))
+            columns = [column for column in columns if column in present]
+        return pd.read_parquet(path, columns=columns)
+    if output_format == "xpt":
+        dataset = pd.read_sas(path, format="xport", encoding="utf-8")
+        if columns is not None:
+            dataset = dataset[[c for c in dataset.columns if c in set(columns)]]
+        return dataset
+
+    options = {}
+    if columns is not None:
+        wanted = set(columns)
+        options["usecols"] = lambda column: column in wanted
+    if dtype is not None:
+        options["dtype"] = dtype
+    return pd.read_csv(path, **options)
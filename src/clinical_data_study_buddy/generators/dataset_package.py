@@ -0,0 +1,318 @@
+"""
+This module packages datasets into a zip archive as they are produced.
+
+Each dataset is streamed straight into its archive member chunk by chunk (see
+``dataset_io.write_stream``), so a package is written once, without going
+through a temporary directory.
+
+Deflated members can be compressed by several threads: the member is cut into
+blocks that are deflated concurrently, each primed with the end of the block
+before it, and the blocks are joined into a single deflate stream, as pigz
+does. The blocks are fed through zipfile's own member writer, which computes
+the CRC and sizes, by replacing the compressor it created for the member;
+members are deflated by zipfile alone on Pythons whose member writer has no
+such compressor. The archive ends with a ``manifest.json`` member listing the size, the
+SHA-256 checksum and, for datasets, the rows and columns of every member.
+"""
+
+import hashlib
+import io
+import json
+import pathlib
+import shutil
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Union
+
+import pandas as pd
+
+from clinical_data_study_buddy.generators.dataset_io import (
+    dataset_format,
+    write_stream,
+)
+
+COMPRESSIONS: Dict[str, int] = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+# Zstandard members need Python 3.14 or later
+if hasattr(zipfile, "ZIP_ZSTANDARD"):
+    COMPRESSIONS["zstd"] = zipfile.ZIP_ZSTANDARD
+
+MANIFEST_NAME = "manifest.json"
+
+_BLOCK_SIZE = 1 << 20
+# The deflate window: a block can refer back to this many bytes before it
+_WINDOW = 1 << 15
+# The type of the compressors zipfile creates for deflated members
+_ZLIB_COMPRESSOR = type(zlib.compressobj())
+
+
+def _deflate_block(block: bytes, dictionary: bytes, level: int, final: bool) -> bytes:
+    """Deflates one block of a member into a raw, byte-aligned deflate segment."""
+    options = {"zdict": dictionary} if dictionary else {}
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, **options)
+    flush = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+    return compressor.compress(block) + compressor.flush(flush)
+
+
+class _ParallelDeflate:
+    """
+    A zipfile compressor that deflates the blocks of a member on an executor.
+
+    Only the last block is finished; the others end on a sync flush, so their
+    concatenation is one valid deflate stream.
+    """
+
+    def __init__(self, executor: Executor, level: int, prefetch: int):
+        self._executor = executor
+        self._level = level
+        self._prefetch = prefetch
+        self._buffer = bytearray()
+        self._dictionary = b""
+        self._pending = deque()
+
+    def _submit(self, block: bytes, final: bool):
+        self._pending.append(
+            self._executor.submit(
+                _deflate_block, block, self._dictionary, self._level, final
+            )
+        )
+        self._dictionary = block[-_WINDOW:]
+
+    def _collect(self, keep: int) -> bytes:
+        # Wait for the oldest blocks while too many are pending, and take any
+        # other finished blocks at the head of the queue
+        segments = []
+        while self._pending and (len(self._pending) > keep or self._pending[0].done()):
+            segments.append(self._pending.popleft().result())
+        return b"".join(segments)
+
+    def compress(self, data: bytes) -> bytes:
+        self._buffer += data
+        while len(self._buffer) >= _BLOCK_SIZE:
+            self._submit(bytes(self._buffer[:_BLOCK_SIZE]), final=False)
+            del self._buffer[:_BLOCK_SIZE]
+        return self._collect(self._prefetch)
+
+    def flush(self) -> bytes:
+        self._submit(bytes(self._buffer), final=True)
+        self._buffer.clear()
+        return self._collect(0)
+
+
+def _replace_compressor(member, compressor) -> bool:
+    """
+    Makes an archive member being written compress through another compressor.
+
+    zipfile keeps the compressor of a member in the private ``_compressor``
+    attribute of its writer, which calls ``compress`` on each write and
+    ``flush`` on close. The compressor is only replaced when the writer still
+    has a zlib compressor there, so a change to zipfile's internals falls
+    back to zipfile's own compression rather than corrupting the member.
+
+    Args:
+        member: The writer returned by ``ZipFile.open(name, "w")``.
+        compressor: The replacement, with ``compress`` and ``flush`` methods.
+
+    Returns:
+        bool: True if the compressor was replaced.
+    """
+    if not isinstance(getattr(member, "_compressor", None), _ZLIB_COMPRESSOR):
+        return False
+    member._compressor = compressor
+    return True
+
+
+class _MemberWriter(io.RawIOBase):
+    """Forwards writes to an archive member, counting and hashing the bytes."""
+
+    def __init__(self, member):
+        self._member = member
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._member.write(data)
+        self.sha256.update(data)
+        size = memoryview(data).nbytes
+        self.size += size
+        return size
+
+    def tell(self) -> int:
+        return self.size
+
+
+class DatasetPackage:
+    """
+    A zip archive of datasets, written member by member as they are produced.
+
+    Use it as a context manager; the manifest is written when it closes.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        compression: str = "deflate",
+        level: Optional[int] = None,
+        jobs: int = 1,
+    ):
+        """
+        Initializes the DatasetPackage.
+
+        Args:
+            path (pathlib.Path): The zip archive to write. It is replaced if it exists.
+            compression (str): The compression of the members: one of
+                               ``COMPRESSIONS``.
+            level (Optional[int]): The compression level, e.g. 0-9 for deflate.
+                                   Defaults to the level of the compression.
+            jobs (int): The number of threads compressing deflated members.
+
+        Raises:
+            ValueError: If the compression is not supported.
+        """
+        compression = compression.lower()
+        if compression not in COMPRESSIONS:
+            raise ValueError(
+                f"Unsupported compression: {compression}. "
+                f"Supported: {', '.join(COMPRESSIONS)}"
+            )
+        self.path = pathlib.Path(path)
+        self.compression = compression
+        self.manifest: List[dict] = []
+        self._level = level
+        self._jobs = max(1, jobs)
+        self._executor = (
+            ThreadPoolExecutor(max_workers=self._jobs)
+            if self._jobs > 1 and compression == "deflate"
+            else None
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._zip = zipfile.ZipFile(
+            self.path, "w", COMPRESSIONS[compression], compresslevel=level
+        )
+
+    def __enter__(self) -> "DatasetPackage":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def _open(self, name: str, **entry) -> Iterator[_MemberWriter]:
+        """Opens a member for writing and adds it to the manifest once written."""
+        with self._zip.open(name, "w", force_zip64=True) as member:
+            if self._executor is not None:
+                # zipfile deflates on the writing thread; spread the blocks
+                # over the worker threads instead
+                level = self._level
+                if level is None:
+                    level = zlib.Z_DEFAULT_COMPRESSION
+                _replace_compressor(
+                    member,
+                    _ParallelDeflate(self._executor, level, prefetch=2 * self._jobs),
+                )
+            writer = _MemberWriter(member)
+            yield writer
+        self.manifest.append(
+            {
+                "name": name,
+                "size": writer.size,
+                "sha256": writer.sha256.hexdigest(),
+                **entry,
+            }
+        )
+
+    def write_chunks(
+        self,
+        name: str,
+        chunks: Iterable[pd.DataFrame],
+        output_format: Optional[str] = None,
+        variables: Optional[Mapping[str, Mapping]] = None,
+    ) -> int:
+        """
+        Streams a dataset into a member, one chunk at a time.
+
+        Args:
+            name (str): The member name, e.g. "DM.csv".
+            chunks (Iterable[pd.DataFrame]): The chunks of the dataset, in order,
+                                             all with the same columns.
+            output_format (Optional[str]): The format of the dataset: "csv",
+                                           "parquet" or "xpt". Defaults to
+                                           the name suffix.
+            variables (Optional[Mapping[str, Mapping]]): The "label", "type"
+                and "length" of each variable, used by formats that store them.
+
+        Returns:
+            int: The number of rows written.
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+        output_format = dataset_format(
+            output_format or pathlib.PurePosixPath(name).suffix.lstrip(".")
+        )
+        columns = []
+
+        def record_columns(chunks):
+            for chunk in chunks:
+                if not columns:
+                    columns.extend(str(column) for column in chunk.columns)
+                yield chunk
+
+        with self._open(name, format=output_format) as stream:
+            rows = write_stream(
+                record_columns(chunks),
+                stream,
+                output_format,
+                name=pathlib.PurePosixPath(name).stem,
+                variables=variables,
+            )
+        self.manifest[-1].update(rows=rows, columns=columns)
+        return rows
+
+    def write_bytes(self, name: str, data: Union[bytes, str]):
+        """
+        Writes a member from its content.
+
+        Args:
+            name (str): The member name, e.g. "define.xml".
+            data (Union[bytes, str]): The content; text is encoded as UTF-8.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with self._open(name) as stream:
+            stream.write(data)
+
+    def write_file(self, path: pathlib.Path, name: Optional[str] = None):
+        """
+        Copies a file into a member.
+
+        Args:
+            path (pathlib.Path): The file to copy.
+            name (Optional[str]): The member name. Defaults to the file name.
+        """
+        path = pathlib.Path(path)
+        with open(path, "rb") as source, self._open(name or path.name) as stream:
+            shutil.copyfileobj(source, stream, _BLOCK_SIZE)
+
+    def close(self):
+        """Writes the manifest and closes the archive."""
+        if self._zip.fp is None:
+            return
+        try:
+            manifest = {"compression": self.compression, "files": self.manifest}
+            with self._zip.open(MANIFEST_NAME, "w") as member:
+                member.write(json.dumps(manifest, indent=2).encode("utf-8"))
+        finally:
+            self._zip.close()
+            if self._executor is not None:
+                self._executor.shutdown()
@@ -3,19 +3,36 @@ This module contains the EDCRawDatasetPackageGenerator class, which is responsib
 generating a complete raw dataset package for a clinical study.
 """
 
-import os
 import pathlib
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Optional
 
-import pandas as pd
+import numpy as np
 
 from cdisc_library_client.harvest import harvest
+from clinical_data_study_buddy.core.ct_index import load_ct_index
 from clinical_data_study_buddy.generators.crfgen.utils import get_api_key
-from clinical_data_study_buddy.generators.data_generator import DataGenerator
+from clinical_data_study_buddy.generators.data_generator import (
+    DataGenerator,
+    domain_seed,
+    iter_ordered,
+)
+from clinical_data_study_buddy.generators import study_stories
 from clinical_data_study_buddy.generators.dataset_helpers import (
-    apply_study_story,
-    generate_define_xml,
-    package_datasets,
+    PACKAGE_NAME,
+    build_define_xml,
+)
+from clinical_data_study_buddy.generators.dataset_io import dataset_format
+from clinical_data_study_buddy.generators.dataset_package import DatasetPackage
+from clinical_data_study_buddy.generators.subject_schedule import (
+    SubjectSchedule,
+    derive_domain,
+    domain_variables,
+    schedule_seed,
 )
 
 
@@ -24,7 +41,7 @@ class EDCRawDatasetPackageGenerator:
     A class for generating a raw EDC (Electronic Data Capture) dataset package.
 
     This class orchestrates the generation of synthetic datasets for specified domains,
-    applies a study story, generates a define.xml file, and packages everything
+    applies a study story, generates a define.xml file, and streams everything
     into a zip archive.
     """
 
@@ -36,6 +53,10 @@ class EDCRawDatasetPackageGenerator:
         study_story: str,
         output_dir: pathlib.Path,
         output_format: str,
+        seed: Optional[int] = None,
+        jobs: int = 1,
+        compression: str = "deflate",
+        compression_level: Optional[int] = None,
     ):
         """
         Initializes the EDCRawDatasetPackageGenerator.
@@ -44,9 +65,20 @@ class EDCRawDatasetPackageGenerator:
             num_subjects (int): The number of subjects for the study.
             therapeutic_area (str): The therapeutic area of the study.
             domains (List[str]): A list of domains to include in the package.
-            study_story (str): The study story to apply to the data.
+            study_story (str): The study stories to apply to the data, comma
+                               separated (see ``study_stories.stories()``), or "none".
             output_dir (pathlib.Path): The directory where the final package will be saved.
-            output_format (str): The format for the generated datasets (e.g., "csv").
+            output_format (str): The format for the generated datasets: "csv",
+                                 "parquet" or "xpt".
+            seed (Optional[int]): The seed for reproducible datasets. The same
+                                  seed gives bit-identical datasets, whatever
+                                  the number of jobs.
+            jobs (int): The number of worker processes generating the datasets,
+                        and of threads compressing them.
+            compression (str): The compression of the package members (see
+                               ``dataset_package.COMPRESSIONS``).
+            compression_level (Optional[int]): The compression level. Defaults
+                                               to the level of the compression.
         """
         self.num_subjects = num_subjects
         self.therapeutic_area = therapeutic_area
@@ -54,16 +86,25 @@ class EDCRawDatasetPackageGenerator:
         self.study_story = study_story
         self.output_dir = output_dir
         self.output_format = output_format
+        self.seed = seed
+        self.jobs = max(1, jobs)
+        self.compression = compression
+        self.compression_level = compression_level
 
     def generate(self):
         """
         Generates and packages a raw EDC dataset.
 
         This method performs the following steps:
-        1. Generates synthetic data for each specified domain.
-        2. Applies the selected study story to the generated data.
-        3. Generates a define.xml file describing the datasets.
-        4. Packages all the generated files into a single zip archive.
+        1. Builds the schedule of subjects and visits, and derives the synthetic
+           data of each specified domain from it, streaming it chunk by chunk
+           into its member of the zip archive. With more than one job, the
+           domains and their subject chunks are generated in a process pool,
+           and the members are compressed by as many threads. The selected
+           study stories are applied to the codelist distributions, to the
+           schedule and to the records before they are written.
+        2. Adds a define.xml file describing the datasets to the archive.
+        3. Closes the archive with a manifest of its members and their checksums.
         """
         print("Generating EDC Raw Dataset Package...")
         print(f"  Number of Subjects: {self.num_subjects}")
@@ -72,36 +113,96 @@ class EDCRawDatasetPackageGenerator:
         print(f"  Study Story: {self.study_story}")
         print(f"  Output Format: {self.output_format}")
         print(f"  Output Directory: {self.output_dir}")
+        if self.seed is not None:
+            print(f"  Seed: {self.seed}")
 
+        stories = study_stories.compose(self.study_story)
+        output_format = dataset_format(self.output_format)
         api_key = get_api_key()
         forms = harvest(api_key)
 
-        temp_dir = pathlib.Path(self.output_dir) / "temp_datasets"
-        os.makedirs(temp_dir, exist_ok=True)
-
+        domain_forms = {}
         for domain in self.domains:
-            print(f"Generating {domain} dataset...")
             domain_form = next((f for f in forms if f.domain == domain), None)
             if not domain_form:
                 print(f"Warning: Domain {domain} not found in CDISC Library. Skipping.")
                 continue
-
-            generator = DataGenerator(domain_form)
-            dataset = generator.generate(self.num_subjects)
-
-            output_file = temp_dir / f"{domain}.csv"
-            df = pd.DataFrame(dataset)
-            df.to_csv(output_file, index=False)
-            print(f"{domain} dataset generated successfully.")
-
-        if self.study_story != "none":
-            apply_study_story(
-                self.study_story,
-                temp_dir,
-                self.num_subjects,
-                self.domains,
-                self.output_format,
+            domain_forms[domain] = domain_form
+
+        # Index the controlled terminology of every codelist field once
+        ct_index = load_ct_index(
+            [
+                field.codelist
+                for form in domain_forms.values()
+                for field in form.fields
+                if field.codelist
+            ],
+            api_key=api_key,
+        )
+        for story in stories:
+            story.apply_terminology(ct_index)
+        # Every domain is derived from one schedule of subjects and visits
+        study_seed = np.random.SeedSequence(self.seed)
+        schedule = SubjectSchedule.build(self.num_subjects, schedule_seed(study_seed))
+        story_rng = np.random.default_rng(domain_seed(study_seed, "__STORIES__"))
+        for story in stories:
+            print(f"Applying '{story.name}' study story...")
+            story.apply_schedule(schedule, story_rng)
+        generators = {
+            domain: DataGenerator(
+                domain_form,
+                seed=domain_seed(study_seed, domain),
+                ct_index=ct_index,
             )
-
-        generate_define_xml(temp_dir, self.domains)
-        package_datasets(temp_dir, self.output_dir)
+            for domain, domain_form in domain_forms.items()
+        }
+
+        # Every chunk of every domain, in order, so the datasets can be streamed
+        # to disk while the pool keeps generating the next chunks
+        domains = []
+        calls = []
+        for domain, generator in generators.items():
+            start = 0
+            for seed_sequence, size in generator.chunk_plan(self.num_subjects):
+                subjects = schedule[start : start + size]
+                domains.append(domain)
+                calls.append(
+                    partial(
+                        derive_domain,
+                        generator,
+                        domain,
+                        subjects,
+                        seed_sequence,
+                        stories,
+                    )
+                )
+                start += size
+
+        package_path = pathlib.Path(self.output_dir) / PACKAGE_NAME
+        with (
+            (
+                ProcessPoolExecutor(max_workers=self.jobs)
+                if self.jobs > 1
+                else nullcontext()
+            ) as pool,
+            DatasetPackage(
+                package_path,
+                self.compression,
+                level=self.compression_level,
+                jobs=self.jobs,
+            ) as package,
+        ):
+            chunks = zip(domains, iter_ordered(calls, pool, prefetch=2 * self.jobs))
+            columns = {}
+            for domain, domain_chunks in groupby(chunks, key=itemgetter(0)):
+                print(f"Generating {domain} dataset...")
+                package.write_chunks(
+                    f"{domain}.{output_format}",
+                    (chunk for _, chunk in domain_chunks),
+                    variables=domain_variables(generators[domain], domain, schedule),
+                )
+                columns[domain] = package.manifest[-1]["columns"]
+                print(f"{domain} dataset generated successfully.")
+
+            package.write_bytes("define.xml", build_define_xml(columns))
+        print(f"Package written to {package_path}")
@@ -7,10 +7,11 @@ It includes functions to:
 - Validate a dataset against its corresponding specification template.
 """
 
+import asyncio
 from pathlib import Path
+from typing import List, Optional
 
 import openpyxl
-import pandas as pd
 
 from cdisc_library_client.api.analysis_data_model_and_implementation_guide_a_da_m_and_a_da_mig import (
     get_mdr_adam_product_datastructures_structure,
@@ -18,74 +19,105 @@ from cdisc_library_client.api.analysis_data_model_and_implementation_guide_a_da_
 from cdisc_library_client.api.sdtm_implementation_guide_sdtmig import (
     get_mdr_sdtmig_version_datasets_dataset,
 )
-from clinical_data_study_buddy.core.cdisc_library_service import get_client
+from clinical_data_study_buddy.core.cdisc_library_service import (
+    DEFAULT_CONCURRENCY,
+    get_async_client,
+)
 from clinical_data_study_buddy.core.models.schema import FieldDef, Form
+from clinical_data_study_buddy.core.standards_store import StandardsStore
 from clinical_data_study_buddy.generators.data_generator import DataGenerator
+from clinical_data_study_buddy.generators.dataset_io import (
+    dataset_path,
+    write_chunks,
+)
+from clinical_data_study_buddy.generators.spec_model import load_spec
+from clinical_data_study_buddy.generators.spec_validation import (
+    Finding,
+    ValidationReport,
+    compile_rules,
+    domain_from_filename,
+    load_rule_sets,
+    validate_dataset,
+    validate_directory,
+    write_reports,
+)
 
 
-def generate_template(product: str, version: str, domains: list[str], output_dir: str):
+TEMPLATE_HEADER = [
+    "Variable Name",
+    "Variable Label",
+    "Data Type",
+    "Role",
+    "Core",
+    "Codelist",
+    "Description",
+]
+
+
+def generate_template(
+    product: str,
+    version: str,
+    domains: list[str],
+    output_dir: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+):
     """
     Generates an Excel-based specification template for CDISC datasets.
 
     This function fetches metadata from the CDISC Library for the specified product,
     version, and domains, and then creates an Excel spreadsheet with the specification.
+    The domains are fetched concurrently through one pooled client, and the
+    responses are cached on disk (see ``cdisc_library_client.cache``). The
+    metadata is read from the offline standards store instead when it holds a
+    snapshot of the product version. The workbook is written in openpyxl's
+    write-only mode, which streams the rows to the file.
 
     Args:
         product (str): The CDISC product (e.g., "sdtmig", "adamig").
         version (str): The version of the product (e.g., "3-3").
         domains (list[str]): A list of domains to include in the specification.
         output_dir (str): The directory where the generated Excel file will be saved.
+        concurrency (int): The maximum number of concurrent requests.
     """
-    client = get_client()
-    workbook = openpyxl.Workbook()
-    workbook.remove(workbook.active)
+    store = StandardsStore.from_env()
+    product_key = product.lower()
 
     print(f"Generating spec for {product} v{version} for domains: {', '.join(domains)}")
 
-    for domain in domains:
-        print(f"Fetching data for domain: {domain}")
-        worksheet = workbook.create_sheet(title=domain)
-        header = [
-            "Variable Name",
-            "Variable Label",
-            "Data Type",
-            "Role",
-            "Core",
-            "Codelist",
-            "Description",
-        ]
-        worksheet.append(header)
-        try:
-            variables = []
-            if product.lower() == "sdtmig":
-                response = get_mdr_sdtmig_version_datasets_dataset.sync(
-                    client=client, version=version, dataset=domain
-                )
-                if response and hasattr(response, "to_dict"):
-                    dataset = response.to_dict()
-                    variables = dataset.get("datasetVariables", [])
-            elif product.lower() == "adamig":
-                adam_product_id = f"adamig-{version}"
-                response = get_mdr_adam_product_datastructures_structure.sync(
-                    client=client, product=adam_product_id, structure=domain
+    if store.has(product_key, version):
+        results = []
+        for domain in domains:
+            try:
+                results.append(
+                    _variables_from_store(store, product_key, version, domain)
                 )
-                if response and hasattr(response, "to_dict"):
-                    dataset = response.to_dict()
-                    varsets = dataset.get("analysisVariableSets", [])
-                    for varset in varsets:
-                        variables.extend(varset.get("analysisVariables", []))
-
-            if not variables:
-                print(f"No variables found for domain {domain}")
-                worksheet.append([f"No variables found for domain {domain}"])
-                continue
-
-            for variable in variables:
-                codelist_info = ""
-                if variable.get("_links", {}).get("codelist"):
-                    codelists = variable["_links"]["codelist"]
-                    codelist_info = ", ".join([c.get("href", "") for c in codelists])
-                row = [
+            except Exception as e:
+                results.append(e)
+    else:
+        results = asyncio.run(
+            _fetch_variables(product_key, version, domains, concurrency)
+        )
+
+    workbook = openpyxl.Workbook(write_only=True)
+    for domain, variables in zip(domains, results):
+        worksheet = workbook.create_sheet(title=domain)
+        worksheet.append(TEMPLATE_HEADER)
+        if isinstance(variables, Exception):
+            print(f"Could not fetch data for domain {domain}: {variables}")
+            worksheet.append([f"Error fetching data for {domain}"])
+            continue
+        if not variables:
+            print(f"No variables found for domain {domain}")
+            worksheet.append([f"No variables found for domain {domain}"])
+            continue
+
+        for variable in variables:
+            codelist_info = ""
+            if variable.get("_links", {}).get("codelist"):
+                codelists = variable["_links"]["codelist"]
+                codelist_info = ", ".join([c.get("href", "") for c in codelists])
+            worksheet.append(
+                [
                     variable.get("name"),
                     variable.get("label"),
                     variable.get("simpleDatatype"),
@@ -94,145 +126,267 @@ def generate_template(product: str, version: str, domains: list[str], output_dir
                     codelist_info,
                     variable.get("description"),
                 ]
-                worksheet.append(row)
-
-        except Exception as e:
-            print(f"Could not fetch data for domain {domain}: {e}")
-            worksheet.append([f"Error fetching data for {domain}"])
+            )
 
     output_path = Path(output_dir) / f"{product}_{version}_spec.xlsx"
     workbook.save(output_path)
     print(f"Specification template generated at: {output_path}")
 
 
-def generate_dataset(spec_path: str, output_dir: str):
+async def _fetch_variables(
+    product: str, version: str, domains: list[str], concurrency: int
+) -> list:
+    """
+    Fetches the variables of several domains from the CDISC Library concurrently.
+
+    Args:
+        product (str): The CDISC product, in lower case.
+        version (str): The version of the product.
+        domains (list[str]): The domains or data structures to fetch.
+        concurrency (int): The maximum number of concurrent requests.
+
+    Returns:
+        list: For each domain, in order, its variables shaped like the CDISC
+              Library API documents, or the exception raised while fetching it.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    client = get_async_client(concurrency=concurrency)
+
+    async def fetch(domain: str):
+        async with semaphore:
+            print(f"Fetching data for domain: {domain}")
+            try:
+                if product == "sdtmig":
+                    response = await get_mdr_sdtmig_version_datasets_dataset.asyncio(
+                        client=client, version=version, dataset=domain
+                    )
+                    if response and hasattr(response, "to_dict"):
+                        return response.to_dict().get("datasetVariables", [])
+                elif product == "adamig":
+                    response = (
+                        await get_mdr_adam_product_datastructures_structure.asyncio(
+                            client=client,
+                            product=f"adamig-{version}",
+                            structure=domain,
+                        )
+                    )
+                    if response and hasattr(response, "to_dict"):
+                        varsets = response.to_dict().get("analysisVariableSets", [])
+                        return [
+                            variable
+                            for varset in varsets
+                            for variable in varset.get("analysisVariables", [])
+                        ]
+                return []
+            except Exception as e:
+                return e
+
+    async with client:
+        return await asyncio.gather(*(fetch(domain) for domain in domains))
+
+
+def _variables_from_store(
+    store: StandardsStore, product: str, version: str, domain: str
+) -> list[dict]:
+    """
+    Reads a domain's variables from the offline standards store.
+
+    Args:
+        store (StandardsStore): The store holding the product snapshot.
+        product (str): The CDISC product (e.g., "sdtmig").
+        version (str): The version of the product.
+        domain (str): The domain or data structure name.
+
+    Returns:
+        list[dict]: The variables, shaped like the CDISC Library API documents.
+    """
+    rows = store.frame(product, version, group=domain)
+    return [
+        {
+            "name": row.variable,
+            "label": row.label,
+            "simpleDatatype": row.datatype,
+            "role": row.role,
+            "core": row.core,
+            "description": row.description,
+            "_links": {
+                "codelist": [
+                    {"href": href}
+                    for href in (row.codelist_href or "").split(", ")
+                    if href
+                ]
+            },
+        }
+        for row in rows.itertuples()
+    ]
+
+
+def generate_dataset(spec_path: str, output_dir: str, output_format: str = "csv"):
     """
     Generates a synthetic dataset from a specification template.
 
-    This function reads an Excel-based specification template, and for each domain
-    (sheet) in the template, it generates a synthetic CSV dataset.
+    This function loads an Excel-based specification template (see
+    ``spec_model.load_spec``, which caches the parsed template), and for each
+    domain (sheet) in the template, it generates a synthetic dataset. Variable labels,
+    and lengths when the template has a "Length" column, are taken from the
+    template and stored in formats that support them, such as XPT.
 
     Args:
         spec_path (str): The path to the Excel specification template.
-        output_dir (str): The directory where the generated CSV files will be saved.
+        output_dir (str): The directory where the generated dataset files will be saved.
+        output_format (str): The format of the datasets: "csv", "parquet" or "xpt".
     """
-    path = Path(spec_path)
-    workbook = openpyxl.load_workbook(path)
-    domains = workbook.sheetnames
-
-    for domain in domains:
-        if domain.lower() == "metadata":
-            continue
+    spec = load_spec(Path(spec_path))
+
+    # Mapping from CDISC simpleDatatype to FieldDef datatype
+    datatype_mapping = {
+        "char": "text",
+        "num": "float",
+        "date": "date",
+        "datetime": "datetime",
+        "boolean": "boolean",
+        "integer": "integer",
+    }
+
+    for domain, spec_domain in spec.domains.items():
         print(f"Generating dataset for domain {domain}...")
 
-        spec_df = pd.read_excel(path, sheet_name=domain)
-        fields = []
-
-        # Mapping from CDISC simpleDatatype to FieldDef datatype
-        datatype_mapping = {
-            "char": "text",
-            "num": "float",
-            "date": "date",
-            "datetime": "datetime",
-            "boolean": "boolean",
-            "integer": "integer",
-        }
-
-        for _, row in spec_df.iterrows():
-            spec_datatype = str(row.get("Data Type", "")).lower()
-            field_datatype = datatype_mapping.get(spec_datatype, "text")
-            fields.append(
-                FieldDef(
-                    oid=row["Variable Name"],
-                    prompt=row["Variable Label"],
-                    datatype=field_datatype,
-                    cdash_var=row["Variable Name"],
-                )
+        fields = [
+            FieldDef(
+                oid=variable.name,
+                prompt=variable.label or variable.name,
+                datatype=datatype_mapping.get(variable.datatype.lower(), "text"),
+                cdash_var=variable.name,
+                length=variable.length,
             )
+            for variable in spec_domain.variables
+        ]
 
         form_data = Form(title=domain, domain=domain, fields=fields)
         generator = DataGenerator(form_data)
-        dataset = generator.generate(num_subjects=50)
-
-        output_path = Path(output_dir) / f"{domain}.csv"
-        df = pd.DataFrame(dataset)
-        df.to_csv(output_path, index=False)
+        output_path = dataset_path(output_dir, domain, output_format)
+        write_chunks(
+            generator.iter_chunks(num_subjects=50),
+            output_path,
+            variables=generator.variables(),
+        )
         print(f"Dataset for domain {domain} generated successfully at {output_path}")
 
 
-def validate(spec_path: str, dataset_path: str):
+def validate(
+    spec_path: str,
+    dataset_path: str,
+    domain: Optional[str] = None,
+    report_path: Optional[str] = None,
+) -> Optional[ValidationReport]:
     """
     Validates a dataset against a specification template.
 
-    This function checks a given dataset (in CSV format) against an Excel-based
-    specification template to ensure that the dataset conforms to the spec.
+    This function compiles the domain's sheet of an Excel-based specification
+    template into validation rules (type, length, required values, codelists,
+    ISO 8601 dates and key uniqueness, see ``spec_validation``) and checks a
+    dataset in CSV, Parquet or XPT format against them. Only the dataset's
+    header and the columns the rules use are read.
 
     Args:
         spec_path (str): The path to the Excel specification template.
-        dataset_path (str): The path to the CSV dataset to be validated.
+        dataset_path (str): The path to the dataset to be validated.
+        domain (Optional[str]): The domain of the dataset. Defaults to the
+                                domain in the dataset filename.
+        report_path (Optional[str]): A JSON or Excel (.xlsx) file to write the
+                                     validation report to.
+
+    Returns:
+        Optional[ValidationReport]: The report, or None if the domain or its
+                                    sheet could not be found.
     """
     spec_path = Path(spec_path)
     dataset_path = Path(dataset_path)
 
-    dataset_stem = dataset_path.stem
-    parts = dataset_stem.split("_")
-    if len(parts) == 3:  # product_domain_ts
-        domain = parts[1].upper()
-    elif len(parts) == 1:  # domain
-        domain = parts[0].upper()
-    else:
+    if domain is None:
+        domain = domain_from_filename(dataset_path)
+    if domain is None:
         print(
             f"Invalid dataset filename format: {dataset_path.name}. Expected '<product>_<domain>_<timestamp>.csv' or '<domain>.csv'."
         )
-        return
+        return None
+    domain = domain.upper()
 
     print(f"Validating dataset {dataset_path.name} against spec {spec_path.name}")
 
-    try:
-        spec_df = pd.read_excel(spec_path, sheet_name=domain)
-    except ValueError:
+    spec_domain = load_spec(spec_path).domains.get(domain)
+    if spec_domain is None:
         print(f"Sheet '{domain}' not found in the specification file.")
-        return
+        return None
 
-    dataset_df = pd.read_csv(dataset_path, dtype=str)
+    report = validate_dataset(compile_rules(spec_domain, domain), dataset_path)
 
-    validation_warnings = []
-    validation_errors = []
+    if report.passed:
+        print("\nValidation Successful: Dataset conforms to the specification.")
+    else:
+        print("\nValidation Failed:")
+        _print_findings(report.errors)
 
-    spec_columns = spec_df["Variable Name"].tolist()
-    dataset_columns = dataset_df.columns.tolist()
-    missing_columns = set(spec_columns) - set(dataset_columns)
-    if missing_columns:
-        validation_warnings.append(
-            f"Missing columns in dataset that are in the spec: {', '.join(missing_columns)}"
-        )
+    if report.warnings:
+        print("\nValidation Warnings:")
+        _print_findings(report.warnings)
+
+    if report_path:
+        report.write(Path(report_path))
+        print(f"\nValidation report written to: {report_path}")
+    return report
+
+
+def _print_findings(findings: List[Finding]):
+    """Prints findings, with the first failing records of each."""
+    for finding in findings:
+        print(f"- {finding.message}")
+        if finding.count:
+            more = ", ..." if finding.count > len(finding.rows) else ""
+            print(
+                f"  {finding.count} records: {', '.join(map(str, finding.rows))}{more}"
+            )
 
-    extra_columns = set(dataset_columns) - set(spec_columns)
-    if extra_columns:
-        validation_errors.append(
-            f"Extra columns in dataset that are not in the spec: {', '.join(extra_columns)}"
-        )
 
-    for _, row in spec_df.iterrows():
-        col_name = row["Variable Name"]
-        spec_type = row["Data Type"]
-        if col_name in dataset_df.columns:
-            if spec_type == "Num":
-                try:
-                    pd.to_numeric(dataset_df[col_name].dropna())
-                except (ValueError, TypeError):
-                    validation_errors.append(
-                        f"Data type error in column '{col_name}': Expected a numeric type."
-                    )
+def validate_dir(
+    spec_path: str,
+    dataset_dir: str,
+    report_path: Optional[str] = None,
+    jobs: int = 1,
+) -> List[ValidationReport]:
+    """
+    Validates every dataset of a directory against a specification template.
 
-    if validation_errors:
-        print("\nValidation Failed:")
-        for error in validation_errors:
-            print(f"- {error}")
-    else:
-        print("\nValidation Successful: Dataset conforms to the specification.")
+    The workbook is parsed and compiled into validation rules once, and the
+    datasets are validated in a process pool when ``jobs`` is above 1. The
+    domain of each dataset is read from its filename.
 
-    if validation_warnings:
-        print("\nValidation Warnings:")
-        for warning in validation_warnings:
-            print(f"- {warning}")
+    Args:
+        spec_path (str): The path to the Excel specification template.
+        dataset_dir (str): The directory of the datasets (CSV, Parquet or XPT).
+        report_path (Optional[str]): A JSON or Excel (.xlsx) file to write the
+                                     merged validation report to.
+        jobs (int): The number of worker processes.
+
+    Returns:
+        List[ValidationReport]: One report per dataset.
+    """
+    spec_path = Path(spec_path)
+    print(f"Compiling spec {spec_path.name}")
+    rule_sets = load_rule_sets(spec_path)
+    reports = validate_directory(rule_sets, Path(dataset_dir), jobs=jobs)
+
+    for report in reports:
+        status = "passed" if report.passed else "FAILED"
+        print(
+            f"\n{Path(report.dataset).name} ({report.domain}): {status}, "
+            f"{len(report.errors)} errors, {len(report.warnings)} warnings"
+        )
+        _print_findings(report.findings)
+
+    failed = sum(not report.passed for report in reports)
+    print(f"\nValidated {len(reports)} datasets: {failed} failed.")
+    if report_path:
+        write_reports(reports, Path(report_path))
+        print(f"Validation report written to: {report_path}")
+    return reports
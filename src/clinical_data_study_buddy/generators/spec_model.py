@@ -0,0 +1,262 @@
+"""
+This module loads Excel-based specification templates into a typed model.
+
+A spec workbook is parsed once, in openpyxl's read-only mode, which streams
+the rows of each sheet instead of loading the whole workbook. Each sheet
+becomes a SpecDomain holding one SpecVariable per row. The resulting Spec is
+stored in a binary (pickle) cache keyed by the SHA-256 digest of the workbook,
+so later loads of an unchanged workbook skip Excel parsing entirely.
+
+The cache directory defaults to ``.cache/cdisc_specs`` and can be changed with
+the ``CDISC_SPEC_CACHE_DIR`` environment variable. Set
+``CDISC_SPEC_CACHE_DISABLED`` to ``1``/``true`` to always parse the workbook.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import openpyxl
+import pandas as pd
+
+DEFAULT_CACHE_DIR = Path(".cache/cdisc_specs")
+# Bumped whenever the model changes, so older cache entries are not read
+CACHE_VERSION = 1
+
+# The spec sheet columns, and the SpecVariable attributes they are read into
+COLUMNS = {
+    "Variable Name": "name",
+    "Variable Label": "label",
+    "Data Type": "datatype",
+    "Role": "role",
+    "Core": "core",
+    "Codelist": "codelist",
+    "Description": "description",
+    "Length": "length",
+    "Key": "key",
+}
+
+
+@dataclass
+class SpecVariable:
+    """
+    A variable of a spec sheet.
+
+    Attributes:
+        name: The variable name, e.g. "USUBJID".
+        label: The variable label.
+        datatype: The data type, e.g. "Char" or "Num".
+        role: The variable role, e.g. "Identifier".
+        core: "Req", "Exp" or "Perm".
+        codelist: The comma-separated hrefs of the variable's codelists.
+        description: The variable description.
+        length: The maximum length of the values.
+        key: The key mark of the variable, e.g. its position in the keys.
+    """
+
+    name: str
+    label: str = ""
+    datatype: str = ""
+    role: str = ""
+    core: str = ""
+    codelist: str = ""
+    description: str = ""
+    length: Optional[int] = None
+    key: str = ""
+
+
+@dataclass
+class SpecDomain:
+    """
+    A sheet of a spec workbook.
+
+    Attributes:
+        name: The domain, e.g. "DM".
+        variables: The variables, in sheet order.
+    """
+
+    name: str
+    variables: List[SpecVariable] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, name: str, header: Iterable, rows: Iterable) -> "SpecDomain":
+        """
+        Builds a domain from the rows of its sheet.
+
+        Args:
+            name (str): The domain.
+            header (Iterable): The column names of the sheet.
+            rows (Iterable): The rows of the sheet, as sequences of cell values.
+                             Rows without a variable name are skipped.
+
+        Returns:
+            SpecDomain: The domain.
+        """
+        positions = {
+            COLUMNS[column]: i
+            for i, column in enumerate(header)
+            if isinstance(column, str) and column.strip() in COLUMNS
+        }
+        variables = []
+        for row in rows:
+            values = {
+                attribute: _value(row[i] if i < len(row) else None)
+                for attribute, i in positions.items()
+            }
+            if not values.get("name"):
+                continue
+            length = pd.to_numeric(values.pop("length", "") or None, errors="coerce")
+            variables.append(
+                SpecVariable(**values, length=int(length) if pd.notna(length) else None)
+            )
+        return cls(name=name, variables=variables)
+
+    @classmethod
+    def from_frame(cls, name: str, frame: pd.DataFrame) -> "SpecDomain":
+        """
+        Builds a domain from a spec sheet read as a DataFrame.
+
+        Args:
+            name (str): The domain.
+            frame (pd.DataFrame): The sheet.
+
+        Returns:
+            SpecDomain: The domain.
+        """
+        return cls.from_rows(
+            name, frame.columns, frame.itertuples(index=False, name=None)
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the domain as a spec sheet DataFrame.
+
+        Returns:
+            pd.DataFrame: One row per variable, with the spec sheet columns.
+        """
+        return pd.DataFrame(
+            [[getattr(v, a) for a in COLUMNS.values()] for v in self.variables],
+            columns=list(COLUMNS),
+        )
+
+
+@dataclass
+class Spec:
+    """
+    A spec workbook.
+
+    Attributes:
+        digest: The SHA-256 digest of the workbook file.
+        domains: The domains, keyed by upper-case domain name, in sheet order.
+    """
+
+    digest: str
+    domains: Dict[str, SpecDomain] = field(default_factory=dict)
+
+
+def _value(cell) -> str:
+    """Returns a cell value as stripped text, empty when the cell is blank."""
+    if cell is None or (isinstance(cell, float) and pd.isna(cell)):
+        return ""
+    if isinstance(cell, float) and cell.is_integer():
+        cell = int(cell)
+    return str(cell).strip()
+
+
+def file_digest(path: Path) -> str:
+    """
+    Returns the SHA-256 digest of a file.
+
+    Args:
+        path (Path): The file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def parse_spec(path: Path, digest: Optional[str] = None) -> Spec:
+    """
+    Parses a spec workbook, streaming the rows of each sheet.
+
+    The "metadata" sheet and sheets without a "Variable Name" column are
+    skipped.
+
+    Args:
+        path (Path): The Excel specification template.
+        digest (Optional[str]): The digest of the file, if already computed.
+
+    Returns:
+        Spec: The spec.
+    """
+    path = Path(path)
+    spec = Spec(digest=digest or file_digest(path))
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            if worksheet.title.lower() == "metadata":
+                continue
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, ())
+            if "Variable Name" not in header:
+                continue
+            domain = worksheet.title.upper()
+            spec.domains[domain] = SpecDomain.from_rows(domain, header, rows)
+    finally:
+        workbook.close()
+    return spec
+
+
+def _cache_dir() -> Optional[Path]:
+    """Returns the cache directory, or None if the cache is disabled."""
+    disabled = os.environ.get("CDISC_SPEC_CACHE_DISABLED", "").lower()
+    if disabled in ("1", "true", "yes"):
+        return None
+    return Path(os.environ.get("CDISC_SPEC_CACHE_DIR", DEFAULT_CACHE_DIR))
+
+
+def load_spec(path: Path, cache_dir: Optional[Path] = None) -> Spec:
+    """
+    Loads a spec workbook, from the cache when it holds the same file.
+
+    Cache entries that cannot be read are replaced, and failures to write
+    the cache are ignored, so the cache never prevents a spec from loading.
+
+    Args:
+        path (Path): The Excel specification template.
+        cache_dir (Optional[Path]): The cache directory. Defaults to the
+                                    directory configured by the environment.
+
+    Returns:
+        Spec: The spec.
+    """
+    path = Path(path)
+    digest = file_digest(path)
+    cache_dir = Path(cache_dir) if cache_dir is not None else _cache_dir()
+    if cache_dir is None:
+        return parse_spec(path, digest)
+
+    entry = cache_dir / f"{digest}.v{CACHE_VERSION}.pickle"
+    try:
+        with open(entry, "rb") as f:
+            spec = pickle.load(f)
+        if isinstance(spec, Spec) and spec.digest == digest:
+            return spec
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+        pass
+
+    spec = parse_spec(path, digest)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as tmp:
+            pickle.dump(spec, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp.name, entry)
+    except OSError:
+        pass
+    return spec
@@ -0,0 +1,765 @@
+"""
+This module validates datasets against Excel-based specification templates.
+
+A spec sheet is compiled once into a RuleSet: one rule per check of a
+variable (type, length, required values, codelist membership, ISO 8601
+dates) and one rule for the uniqueness of the dataset keys. Each rule is
+evaluated on a whole column at once with pandas and NumPy and yields a mask
+of the failing records, so validating a dataset costs a few vectorized
+passes over the columns the rules use, whatever the number of records.
+
+Rules are compiled from these columns of the spec sheet, which are all
+optional except "Variable Name":
+
+* "Data Type": "Num", "integer" and "float" variables must be numeric;
+  "date", "datetime" and "ISO 8601 ..." variables, and variables ending in
+  "DTC", must hold ISO 8601 dates.
+* "Length": the maximum length of character values.
+* "Core": "Req" variables must be present and have no missing values, and
+  "Exp" variables must be present.
+* "Codelist": codelist hrefs whose submission values are the only values
+  allowed (see ``core.ct_index.load_ct_index``). Their terms are read from
+  the standards store, or fetched from the CDISC Library with the API key.
+  Without an API key, codelists missing from the store are an error; with
+  one, codelists the CDISC Library does not have are not checked.
+* "Key": marks the key variables, in the order of its numeric values. Without
+  it, USUBJID and --SEQ are the keys when the spec has both.
+
+The results are collected in a ValidationReport, which can be written as
+JSON or as an Excel workbook. load_rule_sets compiles a whole workbook at
+once, and validate_directory validates every dataset of a directory against
+those rule sets in a process pool, merging the reports into one file.
+"""
+
+import json
+import pathlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from clinical_data_study_buddy.core.ct_index import (
+    ControlledTerminologyIndex,
+    load_ct_index,
+)
+from clinical_data_study_buddy.core.models.schema import Codelist
+from clinical_data_study_buddy.generators.crfgen.utils import get_api_key
+from clinical_data_study_buddy.generators.data_generator import iter_ordered
+from clinical_data_study_buddy.generators.dataset_io import (
+    DATASET_FORMATS,
+    dataset_columns,
+    read_dataset,
+)
+from clinical_data_study_buddy.generators.spec_model import SpecDomain, load_spec
+
+ERROR = "error"
+WARNING = "warning"
+# The number of failing record numbers listed for each finding
+MAX_EXAMPLE_ROWS = 10
+REPORT_FORMATS = (".json", ".xlsx")
+
+NUMERIC_TYPES = frozenset({"num", "integer", "float"})
+DATE_TYPES = frozenset({"date", "datetime", "time"})
+# Complete or partial ISO 8601 dates and datetimes; unknown components of
+# partial dates are written as a single dash, e.g. "2003---15"
+ISO8601 = re.compile(
+    r"(\d{4}|-)(-(\d{2}|-)(-(\d{2}|-)"
+    r"(T(\d{2}|-)(:(\d{2}|-)(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}(:\d{2})?)?)?)?)?"
+)
+_NCI_CODE = re.compile(r"C\d+$")
+
+
+@dataclass
+class Rule:
+    """
+    A check of one or more variables of a dataset.
+
+    Attributes:
+        kind: The check: "type", "length", "required", "codelist", "iso8601"
+              or "unique".
+        variables: The variables the check reads.
+        severity: "error" or "warning".
+        parameter: The data type, maximum length or allowed values the
+                   variables are checked against, if any.
+        message: A description of the failure.
+    """
+
+    kind: str
+    variables: Tuple[str, ...]
+    severity: str = ERROR
+    parameter: object = None
+    message: str = ""
+
+
+@dataclass
+class RuleSet:
+    """
+    The rules of one domain, compiled from its spec sheet.
+
+    Attributes:
+        domain: The domain, e.g. "DM".
+        variables: The variables of the spec, in spec order.
+        required: The variables that must be present ("Req").
+        expected: The variables that should be present ("Exp").
+        rules: The rules evaluated on the dataset records.
+    """
+
+    domain: str
+    variables: List[str]
+    required: List[str] = field(default_factory=list)
+    expected: List[str] = field(default_factory=list)
+    rules: List[Rule] = field(default_factory=list)
+
+    def columns(self) -> List[str]:
+        """
+        Returns the variables the rules read, in spec order.
+
+        Returns:
+            List[str]: The variables.
+        """
+        used = {variable for rule in self.rules for variable in rule.variables}
+        return [variable for variable in self.variables if variable in used]
+
+
+@dataclass
+class Finding:
+    """
+    A failed check.
+
+    Attributes:
+        domain: The domain of the dataset.
+        rule: The kind of rule that failed, or "structure" for missing and
+              extra variables.
+        variables: The variables concerned.
+        severity: "error" or "warning".
+        message: A description of the failure.
+        count: The number of failing records, 0 for structure findings.
+        rows: The record numbers (from 1) of the first failing records.
+    """
+
+    domain: str
+    rule: str
+    variables: Tuple[str, ...]
+    severity: str
+    message: str
+    count: int = 0
+    rows: List[int] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the finding as a JSON-serializable dictionary.
+
+        Returns:
+            dict: The finding.
+        """
+        return {
+            "domain": self.domain,
+            "rule": self.rule,
+            "variables": list(self.variables),
+            "severity": self.severity,
+            "message": self.message,
+            "count": self.count,
+            "rows": self.rows,
+        }
+
+
+@dataclass
+class ValidationReport:
+    """
+    The findings of the validation of one dataset.
+
+    Attributes:
+        domain: The domain of the dataset.
+        dataset: The path of the dataset.
+        records: The number of records validated, or None if no record
+                 needed to be read.
+        findings: The failed checks.
+    """
+
+    domain: str
+    dataset: str
+    records: Optional[int] = None
+    findings: List[Finding] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[Finding]:
+        """The findings that make the validation fail."""
+        return [f for f in self.findings if f.severity == ERROR]
+
+    @property
+    def warnings(self) -> List[Finding]:
+        """The findings that do not make the validation fail."""
+        return [f for f in self.findings if f.severity == WARNING]
+
+    @property
+    def passed(self) -> bool:
+        """Whether the dataset has no error."""
+        return not self.errors
+
+    def to_dict(self) -> dict:
+        """
+        Returns the report as a JSON-serializable dictionary.
+
+        Returns:
+            dict: The report.
+        """
+        return {
+            "domain": self.domain,
+            "dataset": self.dataset,
+            "records": self.records,
+            "passed": self.passed,
+            "errors": len(self.errors),
+            "warnings": len(self.warnings),
+            "findings": [finding.to_dict() for finding in self.findings],
+        }
+
+    def write(self, path: pathlib.Path):
+        """
+        Writes the report as JSON or as an Excel workbook.
+
+        Args:
+            path (pathlib.Path): The report file; its suffix (".json" or
+                                 ".xlsx") selects the format.
+
+        Raises:
+            ValueError: If the suffix is not supported.
+        """
+        write_reports([self], path)
+
+
+def write_reports(reports: Sequence[ValidationReport], path: pathlib.Path):
+    """
+    Writes the reports of several datasets to one JSON or Excel file.
+
+    The JSON file holds a list with one report per dataset. The workbook has
+    a "Summary" sheet with one row per dataset and a "Findings" sheet with one
+    row per finding.
+
+    Args:
+        reports (Sequence[ValidationReport]): The reports.
+        path (pathlib.Path): The report file; its suffix (".json" or ".xlsx")
+                             selects the format.
+
+    Raises:
+        ValueError: If the suffix is not supported.
+    """
+    path = pathlib.Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in REPORT_FORMATS:
+        raise ValueError(
+            f"Unsupported report format: {path.suffix or path.name}. "
+            f"Supported formats are: {', '.join(REPORT_FORMATS)}"
+        )
+    documents = [report.to_dict() for report in reports]
+    if suffix == ".json":
+        path.write_text(json.dumps(documents, indent=2))
+        return
+
+    summary = pd.DataFrame(
+        [
+            {key: value for key, value in document.items() if key != "findings"}
+            for document in documents
+        ],
+        columns=["domain", "dataset", "records", "passed", "errors", "warnings"],
+    )
+    findings = pd.DataFrame(
+        [
+            {
+                **finding,
+                "dataset": document["dataset"],
+                "variables": ", ".join(finding["variables"]),
+                "rows": ", ".join(map(str, finding["rows"])),
+            }
+            for document in documents
+            for finding in document["findings"]
+        ],
+        columns=[
+            "domain",
+            "dataset",
+            "rule",
+            "variables",
+            "severity",
+            "message",
+            "count",
+            "rows",
+        ],
+    )
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        summary.to_excel(writer, sheet_name="Summary", index=False)
+        findings.to_excel(writer, sheet_name="Findings", index=False)
+
+
+def _codelist_codes(href: str) -> List[Codelist]:
+    """Parses the codelists of a comma-separated list of codelist hrefs."""
+    codelists = []
+    for link in href.split(","):
+        link = link.strip()
+        code = link.rstrip("/").rsplit("/", 1)[-1]
+        if _NCI_CODE.match(code):
+            codelists.append(Codelist(nci_code=code, href=link))
+    return codelists
+
+
+def _keys(spec: SpecDomain, domain: str, variables: List[str]) -> List[str]:
+    """Returns the key variables of a spec sheet, in key order."""
+    marked = [variable for variable in spec.variables if variable.key]
+    order = pd.to_numeric([variable.key for variable in marked], errors="coerce")
+    if marked and not np.isnan(order).any():
+        marked = [marked[i] for i in np.argsort(order, kind="stable")]
+    if marked:
+        return [variable.name for variable in marked]
+    sequence = f"{domain}SEQ"
+    if "USUBJID" in variables and sequence in variables:
+        return ["USUBJID", sequence]
+    return []
+
+
+def _load_terminology(
+    codelists: Sequence[Codelist], api_key: Optional[str] = None
+) -> ControlledTerminologyIndex:
+    """
+    Loads the controlled terminology index of the codelists of a spec.
+
+    Args:
+        codelists (Sequence[Codelist]): The codelists.
+        api_key (Optional[str]): The CDISC Library API key. Defaults to the
+                                 configured key, if any.
+
+    Returns:
+        ControlledTerminologyIndex: The index.
+
+    Raises:
+        ValueError: If there is no API key and codelists are missing from the
+                    standards store.
+    """
+    if not codelists:
+        return ControlledTerminologyIndex()
+    if api_key is None:
+        try:
+            api_key = get_api_key()
+        except ValueError:
+            api_key = None
+    ct_index = load_ct_index(codelists, api_key=api_key)
+    missing = sorted({c.nci_code for c in codelists if c.nci_code not in ct_index})
+    if missing and not api_key:
+        raise ValueError(
+            f"No controlled terminology for codelists {', '.join(missing)}. "
+            "Set CDISC_PRIMARY_KEY to fetch it from the CDISC Library, or "
+            "snapshot its CT package into the standards store."
+        )
+    return ct_index
+
+
+def compile_rules(
+    spec: Union[SpecDomain, pd.DataFrame],
+    domain: str,
+    ct_index: Optional[ControlledTerminologyIndex] = None,
+    api_key: Optional[str] = None,
+) -> RuleSet:
+    """
+    Compiles the spec sheet of a domain into a rule set.
+
+    Args:
+        spec (Union[SpecDomain, pd.DataFrame]): The spec sheet, loaded with
+            ``spec_model.load_spec`` or read as a DataFrame.
+        domain (str): The domain, e.g. "DM".
+        ct_index (Optional[ControlledTerminologyIndex]): The controlled
+            terminology to check codelist variables against. Defaults to an
+            index of the codelists of the spec (see
+            ``core.ct_index.load_ct_index``).
+        api_key (Optional[str]): The CDISC Library API key the default index
+                                 fetches codelists with. Defaults to the
+                                 configured key, if any.
+
+    Returns:
+        RuleSet: The rules.
+
+    Raises:
+        ValueError: If the default index is loaded without an API key and
+                    codelists are missing from the standards store.
+    """
+    domain = domain.upper()
+    if isinstance(spec, pd.DataFrame):
+        spec = SpecDomain.from_frame(domain, spec)
+    variables = [variable.name for variable in spec.variables]
+    rule_set = RuleSet(domain=domain, variables=variables)
+
+    codelists: Dict[str, List[Codelist]] = {}
+    for spec_variable in spec.variables:
+        variable = spec_variable.name
+        datatype = spec_variable.datatype.lower()
+        core = spec_variable.core.lower()
+        length = spec_variable.length
+
+        if core == "req":
+            rule_set.required.append(variable)
+            rule_set.rules.append(
+                Rule(
+                    "required",
+                    (variable,),
+                    message=f"Required column '{variable}' has missing values.",
+                )
+            )
+        elif core == "exp":
+            rule_set.expected.append(variable)
+
+        if datatype in NUMERIC_TYPES:
+            rule_set.rules.append(
+                Rule(
+                    "type",
+                    (variable,),
+                    parameter=datatype,
+                    message=(
+                        f"Data type error in column '{variable}': Expected "
+                        f"{'an integer' if datatype == 'integer' else 'a numeric'}"
+                        " type."
+                    ),
+                )
+            )
+        elif (
+            datatype in DATE_TYPES
+            or datatype.startswith("iso 8601")
+            or variable.endswith("DTC")
+        ):
+            rule_set.rules.append(
+                Rule(
+                    "iso8601",
+                    (variable,),
+                    message=(
+                        f"Date format error in column '{variable}': Expected "
+                        "ISO 8601 dates."
+                    ),
+                )
+            )
+
+        if length is not None and datatype not in NUMERIC_TYPES:
+            rule_set.rules.append(
+                Rule(
+                    "length",
+                    (variable,),
+                    parameter=length,
+                    message=(
+                        f"Length error in column '{variable}': Values are longer "
+                        f"than {length} characters."
+                    ),
+                )
+            )
+
+        if spec_variable.codelist:
+            codelists[variable] = _codelist_codes(spec_variable.codelist)
+
+    if ct_index is None:
+        ct_index = _load_terminology(
+            [codelist for found in codelists.values() for codelist in found],
+            api_key=api_key,
+        )
+    for variable, found in codelists.items():
+        codes = [c.nci_code for c in found if ct_index and c.nci_code in ct_index]
+        if not codes:
+            continue
+        allowed = {value for code in codes for value in ct_index.values(code)}
+        rule_set.rules.append(
+            Rule(
+                "codelist",
+                (variable,),
+                parameter=frozenset(allowed),
+                message=(
+                    f"Codelist error in column '{variable}': Values are not in "
+                    f"codelist {', '.join(codes)}."
+                ),
+            )
+        )
+
+    keys = _keys(spec, domain, variables)
+    if keys:
+        rule_set.rules.append(
+            Rule(
+                "unique",
+                tuple(keys),
+                message=f"Key error: Records share the same {', '.join(keys)}.",
+            )
+        )
+    return rule_set
+
+
+def load_rule_sets(
+    spec_path: pathlib.Path,
+    ct_index: Optional[ControlledTerminologyIndex] = None,
+    api_key: Optional[str] = None,
+) -> Dict[str, RuleSet]:
+    """
+    Compiles every sheet of a spec workbook into the rule set of its domain.
+
+    The workbook is loaded once (see ``spec_model.load_spec``), and the
+    controlled terminology of the codelists of all sheets is loaded once. The
+    rule sets hold everything the validation needs, so they can be sent to
+    worker processes instead of the workbook.
+
+    Args:
+        spec_path (pathlib.Path): The Excel specification template.
+        ct_index (Optional[ControlledTerminologyIndex]): The controlled
+            terminology to check codelist variables against. Defaults to an
+            index of the codelists of the spec.
+        api_key (Optional[str]): The CDISC Library API key the default index
+                                 fetches codelists with. Defaults to the
+                                 configured key, if any.
+
+    Returns:
+        Dict[str, RuleSet]: The rule sets, keyed by domain. The "metadata"
+                            sheet and sheets without a "Variable Name" column
+                            are skipped.
+
+    Raises:
+        ValueError: If the default index is loaded without an API key and
+                    codelists are missing from the standards store.
+    """
+    domains = load_spec(spec_path).domains
+    if ct_index is None:
+        codelists = [
+            codelist
+            for spec in domains.values()
+            for variable in spec.variables
+            for codelist in _codelist_codes(variable.codelist)
+        ]
+        ct_index = _load_terminology(codelists, api_key=api_key)
+    return {
+        domain: compile_rules(spec, domain, ct_index=ct_index)
+        for domain, spec in domains.items()
+    }
+
+
+def domain_from_filename(dataset_path: pathlib.Path) -> Optional[str]:
+    """
+    Returns the domain named by a dataset filename.
+
+    Args:
+        dataset_path (pathlib.Path): The dataset, named "<domain>.<ext>" or
+                                     "<product>_<domain>_<timestamp>.<ext>".
+
+    Returns:
+        Optional[str]: The domain, or None if the filename has neither form.
+    """
+    parts = pathlib.Path(dataset_path).stem.split("_")
+    if len(parts) == 3:  # product_domain_ts
+        return parts[1].upper()
+    if len(parts) == 1:  # domain
+        return parts[0].upper()
+    return None
+
+
+def _blank(values: pd.Series) -> pd.Series:
+    """Flags missing values, including empty and blank strings."""
+    missing = values.isna()
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        missing |= values.astype(str).str.strip().eq("")
+    return missing
+
+
+def _check_type(values: pd.Series, rule: Rule) -> pd.Series:
+    numbers = pd.to_numeric(values, errors="coerce")
+    failed = numbers.isna() & ~_blank(values)
+    if rule.parameter == "integer":
+        failed |= numbers.notna() & (numbers % 1 != 0)
+    return failed
+
+
+def _check_length(values: pd.Series, rule: Rule) -> pd.Series:
+    return values.astype(str).str.len() > rule.parameter
+
+
+def _check_required(values: pd.Series, rule: Rule) -> pd.Series:
+    return _blank(values)
+
+
+def _check_codelist(values: pd.Series, rule: Rule) -> pd.Series:
+    return ~values.astype(str).isin(rule.parameter) & ~_blank(values)
+
+
+def _check_iso8601(values: pd.Series, rule: Rule) -> pd.Series:
+    matched = values.astype(str).str.fullmatch(ISO8601.pattern)
+    return ~matched.astype(bool) & ~_blank(values)
+
+
+# The checks of single variables. They are given the distinct non-missing
+# values of the variable and flag the failing ones.
+CHECKS: Dict[str, Callable[[pd.Series, Rule], pd.Series]] = {
+    "type": _check_type,
+    "length": _check_length,
+    "required": _check_required,
+    "codelist": _check_codelist,
+    "iso8601": _check_iso8601,
+}
+
+
+def _factorize(frame: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, pd.Series]]:
+    """Encodes each column as codes into its distinct values (-1 if missing)."""
+    encoded = {}
+    for column in frame.columns:
+        codes, uniques = pd.factorize(frame[column])
+        encoded[column] = (codes, pd.Series(uniques, dtype=object))
+    return encoded
+
+
+def _evaluate(
+    rule: Rule, encoded: Dict[str, Tuple[np.ndarray, pd.Series]]
+) -> np.ndarray:
+    """Returns the failing records of a rule as a boolean array."""
+    if rule.kind == "unique":
+        codes = pd.DataFrame({v: encoded[v][0] for v in rule.variables})
+        return ((codes >= 0).all(axis=1) & codes.duplicated(keep=False)).to_numpy()
+    codes, uniques = encoded[rule.variables[0]]
+    failed = CHECKS[rule.kind](uniques, rule).to_numpy(dtype=bool)
+    # Missing values only fail the required check
+    failed = np.append(failed, rule.kind == "required")
+    return failed[codes]
+
+
+def validate_dataset(
+    rule_set: RuleSet, dataset_path: pathlib.Path, output_format: Optional[str] = None
+) -> ValidationReport:
+    """
+    Validates a dataset against the rules of its domain.
+
+    The dataset's header is read first, then only the columns used by rules
+    whose variables are all present. CSV columns are read as text, so values
+    are checked as they were written. Each column is factorized once, and the
+    checks of a variable are evaluated on its distinct values only, which are
+    usually far fewer than its records.
+
+    Args:
+        rule_set (RuleSet): The rules of the domain.
+        dataset_path (pathlib.Path): The dataset (CSV, Parquet or XPT).
+        output_format (Optional[str]): The format of the dataset. Defaults to
+                                       the file suffix.
+
+    Returns:
+        ValidationReport: The findings.
+    """
+    dataset_path = pathlib.Path(dataset_path)
+    report = ValidationReport(domain=rule_set.domain, dataset=str(dataset_path))
+    columns = dataset_columns(dataset_path, output_format)
+    present = set(columns)
+
+    missing = [v for v in rule_set.variables if v not in present]
+    missing_required = [v for v in missing if v in rule_set.required]
+    if missing_required:
+        report.findings.append(
+            Finding(
+                rule_set.domain,
+                "structure",
+                tuple(missing_required),
+                ERROR,
+                f"Missing required columns in dataset: {', '.join(missing_required)}",
+            )
+        )
+    if len(missing) > len(missing_required):
+        others = [v for v in missing if v not in rule_set.required]
+        report.findings.append(
+            Finding(
+                rule_set.domain,
+                "structure",
+                tuple(others),
+                WARNING,
+                f"Missing columns in dataset that are in the spec: {', '.join(others)}",
+            )
+        )
+    extra = [column for column in columns if column not in set(rule_set.variables)]
+    if extra:
+        report.findings.append(
+            Finding(
+                rule_set.domain,
+                "structure",
+                tuple(extra),
+                ERROR,
+                f"Extra columns in dataset that are not in the spec: {', '.join(extra)}",
+            )
+        )
+
+    rules = [r for r in rule_set.rules if present.issuperset(r.variables)]
+    needed = [v for v in rule_set.columns() if v in present]
+    if not rules:
+        return report
+
+    frame = read_dataset(
+        dataset_path, columns=needed, output_format=output_format, dtype=str
+    )
+    report.records = len(frame)
+    encoded = _factorize(frame)
+    for rule in rules:
+        failed = np.flatnonzero(_evaluate(rule, encoded))
+        if len(failed):
+            report.findings.append(
+                Finding(
+                    rule_set.domain,
+                    rule.kind,
+                    rule.variables,
+                    rule.severity,
+                    rule.message,
+                    count=len(failed),
+                    rows=(failed[:MAX_EXAMPLE_ROWS] + 1).tolist(),
+                )
+            )
+    return report
+
+
+def _validate_file(
+    rule_sets: Dict[str, RuleSet], dataset_path: pathlib.Path
+) -> ValidationReport:
+    """Validates a dataset against the rule set of the domain in its filename."""
+    domain = domain_from_filename(dataset_path)
+    rule_set = rule_sets.get(domain)
+    if rule_set is None:
+        report = ValidationReport(domain=domain or "", dataset=str(dataset_path))
+        report.findings.append(
+            Finding(
+                report.domain,
+                "structure",
+                (),
+                ERROR,
+                f"No specification sheet for dataset {dataset_path.name}.",
+            )
+        )
+        return report
+    return validate_dataset(rule_set, dataset_path)
+
+
+def validate_directory(
+    rule_sets: Dict[str, RuleSet], dataset_dir: pathlib.Path, jobs: int = 1
+) -> List[ValidationReport]:
+    """
+    Validates every dataset of a directory against the rule set of its domain.
+
+    The datasets are the CSV, Parquet and XPT files of the directory, and
+    their domains are read from their filenames (see domain_from_filename).
+    With several jobs, the datasets are validated in a process pool; each
+    worker is sent only the rule set of the dataset it validates.
+
+    Args:
+        rule_sets (Dict[str, RuleSet]): The rule sets, keyed by domain (see
+                                        load_rule_sets).
+        dataset_dir (pathlib.Path): The directory of the datasets.
+        jobs (int): The number of worker processes.
+
+    Returns:
+        List[ValidationReport]: One report per dataset, in filename order.
+    """
+    paths = sorted(
+        path
+        for path in pathlib.Path(dataset_dir).iterdir()
+        if path.is_file() and path.suffix.lstrip(".").lower() in DATASET_FORMATS
+    )
+    calls = (
+        partial(
+            _validate_file,
+            {domain: rule_sets[domain]} if domain in rule_sets else {},
+            path,
+        )
+        for path, domain in ((path, domain_from_filename(path)) for path in paths)
+    )
+    with ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext() as pool:
+        return list(iter_ordered(calls, pool, prefetch=2 * jobs))
@@ -0,0 +1,6 @@
+"""Study stories simulating real-world scenarios in synthetic datasets."""
+
+from . import stories as _stories  # noqa: F401  (registers the built-in stories)
+from .registry import StudyStory, compose, get, register, stories
+
+__all__ = ["StudyStory", "register", "get", "stories", "compose"]
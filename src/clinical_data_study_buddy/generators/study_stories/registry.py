@@ -0,0 +1,146 @@
+"""
+This module provides a registry for study stories.
+
+A study story simulates a real-world scenario, such as a high dropout rate,
+by transforming the subject schedule and the generated records of a study
+before anything is written to disk. Stories are registered under a name
+(e.g., "high_dropout") and retrieved by that name, so new stories can be
+added without modifying the package generator.
+"""
+
+from typing import Dict, Iterable, List, Union
+
+_registry = {}
+
+
+class StudyStory:
+    """
+    The base class of study stories.
+
+    A story is instantiated once per study. ``apply_schedule`` is called once
+    with the whole subject schedule, before any domain is derived, and
+    ``apply_records`` is called on every chunk of generated records, possibly
+    in another process. Subclasses override either or both.
+
+    A story may also set ``codelist_weights``, the relative frequency of the
+    submission values of codelists keyed by NCI code, which
+    ``apply_terminology`` sets on the controlled terminology index the
+    records are sampled from.
+    """
+
+    name = ""
+    codelist_weights: Dict[str, Dict[str, float]] = {}
+
+    def apply_terminology(self, ct_index):
+        """
+        Sets the weights of the story's codelists on a terminology index.
+
+        Codelists that are not indexed, or none of whose indexed values have
+        a weight, keep their uniform distribution.
+
+        Args:
+            ct_index (ControlledTerminologyIndex): The index of the study.
+        """
+        for code, weights in self.codelist_weights.items():
+            if code in ct_index and any(
+                weights.get(value, 0) > 0 for value in ct_index.values(code)
+            ):
+                ct_index.set_weights(code, weights)
+
+    def apply_schedule(self, schedule, rng):
+        """
+        Transforms the subject schedule in place.
+
+        Args:
+            schedule (SubjectSchedule): The schedule of the study.
+            rng (numpy.random.Generator): The random number generator of the study.
+        """
+
+    def apply_records(self, domain, records, schedule, subject, rng):
+        """
+        Transforms a chunk of generated records.
+
+        Args:
+            domain (str): The domain of the records.
+            records (pd.DataFrame): The records.
+            schedule (SubjectSchedule): The schedule of the chunk's subjects.
+            subject (numpy.ndarray): The index in ``schedule`` of each record's subject.
+            rng (numpy.random.Generator): The random number generator of the chunk.
+
+        Returns:
+            pd.DataFrame: The transformed records.
+        """
+        return records
+
+
+def register(name: str):
+    """
+    A decorator to register a study story class under a name.
+
+    Args:
+        name (str): The name of the story (e.g., "high_dropout").
+
+    Returns:
+        A decorator function that registers the decorated class.
+    """
+
+    def decorator(cls):
+        cls.name = name
+        _registry[name] = cls
+        return cls
+
+    return decorator
+
+
+def get(name: str):
+    """
+    Gets the study story class registered under a name.
+
+    Args:
+        name (str): The name of the story.
+
+    Returns:
+        The study story class, or None if not found.
+    """
+    return _registry.get(name)
+
+
+def stories():
+    """
+    Returns a list of all registered study story names.
+
+    Returns:
+        list: A list of strings, where each string is a registered story name.
+    """
+    return list(_registry.keys())
+
+
+def compose(names: Union[str, Iterable[str], None]) -> List[StudyStory]:
+    """
+    Instantiates the study stories to apply, in order.
+
+    Args:
+        names (Union[str, Iterable[str], None]): The story names, as a list or
+            a comma-separated string (e.g., "high_dropout,missing_data").
+            "none" and empty names are ignored.
+
+    Returns:
+        List[StudyStory]: The stories.
+
+    Raises:
+        ValueError: If a story is not registered.
+    """
+    if isinstance(names, str):
+        names = names.split(",")
+    composed = []
+    for name in names or []:
+        name = name.strip()
+        if not name or name == "none":
+            continue
+        cls = get(name)
+        if cls is None:
+            raise ValueError(
+                f"Unknown study story: {name}. Available: {', '.join(stories())}"
+            )
+        composed.append(cls())
+    return composed
@@ -0,0 +1,128 @@
+"""
+This module provides the built-in study stories.
+"""
+
+import numpy as np
+
+from .registry import StudyStory, register
+
+# Columns identifying a record, which stories never blank or alter
+KEY_COLUMNS = frozenset(
+    {"STUDYID", "DOMAIN", "SITEID", "SUBJID", "USUBJID", "VISIT", "VISITNUM"}
+)
+
+
+@register("high_dropout")
+class HighDropout(StudyStory):
+    """
+    A share of the subjects drop out of the study after a random visit.
+
+    Dropouts keep their DM record but have no visits, findings or events
+    after they drop out.
+    """
+
+    rate = 0.3
+
+    def apply_schedule(self, schedule, rng):
+        visits = len(schedule.visits)
+        dropouts = rng.random(len(schedule)) < self.rate
+        if visits > 1:
+            last_visit = rng.integers(1, visits, size=len(schedule))
+            schedule.visits_completed[dropouts] = np.minimum(
+                schedule.visits_completed[dropouts], last_visit[dropouts]
+            )
+
+
+@register("protocol_deviations")
+class ProtocolDeviations(StudyStory):
+    """A share of the visits take place outside their visit window."""
+
+    rate = 0.1
+    min_days = 7
+    max_days = 21
+
+    def apply_schedule(self, schedule, rng):
+        shape = schedule.visit_offsets.shape
+        deviates = rng.random(shape) < self.rate
+        days = rng.integers(self.min_days, self.max_days, size=shape, endpoint=True)
+        sign = rng.choice([-1, 1], size=shape)
+        schedule.visit_offsets += np.where(deviates, sign * days, 0)
+
+
+@register("missing_data")
+class MissingData(StudyStory):
+    """A share of the recorded values are missing, as if never entered."""
+
+    rate = 0.05
+
+    def apply_records(self, domain, records, schedule, subject, rng):
+        columns = [c for c in records.columns if c not in KEY_COLUMNS]
+        if not columns or records.empty:
+            return records
+        missing = rng.random((len(records), len(columns))) < self.rate
+        records[columns] = records[columns].astype(object).mask(missing)
+        return records
+
+
+@register("realistic_demographics")
+class RealisticDemographics(StudyStory):
+    """
+    Sex, race and ethnicity follow the distribution of a typical US trial
+    population instead of being uniform over their codelists.
+    """
+
+    codelist_weights = {
+        # SEX
+        "C66731": {"F": 0.51, "M": 0.48, "U": 0.01},
+        # RACE
+        "C74457": {
+            "WHITE": 0.72,
+            "BLACK OR AFRICAN AMERICAN": 0.13,
+            "ASIAN": 0.09,
+            "AMERICAN INDIAN OR ALASKA NATIVE": 0.02,
+            "NATIVE HAWAIIAN OR OTHER PACIFIC ISLANDER": 0.01,
+            "NOT REPORTED": 0.02,
+            "UNKNOWN": 0.01,
+        },
+        # ETHNIC
+        "C66790": {
+            "NOT HISPANIC OR LATINO": 0.8,
+            "HISPANIC OR LATINO": 0.17,
+            "NOT REPORTED": 0.02,
+            "UNKNOWN": 0.01,
+        },
+    }
+
+
+@register("site_effects")
+class SiteEffects(StudyStory):
+    """
+    Numeric results are biased per site, as with miscalibrated equipment.
+
+    Each site gets a multiplicative factor, drawn once for the whole study.
+    """
+
+    spread = 0.1
+
+    def __init__(self):
+        self.factors = {}
+
+    def apply_schedule(self, schedule, rng):
+        sites = sorted(set(schedule.siteid))
+        self.factors = dict(
+            zip(sites, rng.normal(1.0, self.spread, size=len(sites)).clip(0.5, 1.5))
+        )
+
+    def apply_records(self, domain, records, schedule, subject, rng):
+        columns = [
+            c
+            for c in records.select_dtypes(include="float").columns
+            if c not in KEY_COLUMNS
+        ]
+        if not columns or records.empty:
+            return records
+        factor = np.array(
+            [self.factors.get(site, 1.0) for site in schedule.siteid], dtype=float
+        )[subject]
+        records[columns] = records[columns].mul(factor, axis=0).round(2)
+        return records
@@ -0,0 +1,354 @@
+"""
+This module builds synthetic EDC datasets subject first.
+
+A SubjectSchedule holds the subjects of a study and their visits as a few
+NumPy arrays: identifiers, reference start dates, and the number of visits
+each subject completed. Every domain is derived from it with vectorized
+joins, so subject identifiers, visits and dates line up across DM, AE, VS,
+LB and the other domains without rereading the generated files.
+
+How a domain is derived depends on its SDTM class:
+
+* DM and DS have one record per subject.
+* Findings domains (VS, LB, EG, ...) have one record per completed visit,
+  dated on the visit.
+* Other domains (AE, CM, MH, ...) have a random number of records per subject,
+  dated within the subject's participation.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from clinical_data_study_buddy.generators.data_generator import (
+    DataGenerator,
+    domain_seed,
+)
+
+DEFAULT_STUDY_ID = "CDISC-TA-1"
+# Visit name, visit number and planned study day of each scheduled visit
+DEFAULT_VISITS: Tuple[Tuple[str, float, int], ...] = (
+    ("SCREENING", 1.0, -14),
+    ("BASELINE", 2.0, 1),
+    ("WEEK 2", 3.0, 15),
+    ("WEEK 4", 4.0, 29),
+    ("WEEK 8", 5.0, 57),
+    ("WEEK 12", 6.0, 85),
+)
+DEFAULT_SITES = 10
+SUBJECT_DOMAINS = frozenset({"DM", "DS"})
+FINDINGS_DOMAINS = frozenset(
+    {"DA", "EG", "FA", "LB", "MB", "PC", "PE", "PP", "QS", "RS", "TR", "TU", "VS"}
+)
+# The mean number of records per subject in event and intervention domains
+MEAN_EVENTS = 2.0
+
+_FIRST_START = np.datetime64("2020-01-01", "D")
+_LAST_START = np.datetime64("2023-06-30", "D")
+_VISIT_WINDOW = 2
+_MAX_DURATION = 14
+
+
+@dataclass
+class SubjectSchedule:
+    """
+    The subjects of a study and their visit schedule, stored as arrays.
+
+    Attributes:
+        study_id: The study identifier.
+        subjid: The subject identifiers within their sites.
+        siteid: The site identifiers.
+        rfstdtc: The reference start date (first dose) of each subject.
+        visits_completed: The number of scheduled visits each subject completed.
+        visits: The visit name, number and planned study day of each visit.
+    """
+
+    study_id: str
+    subjid: np.ndarray
+    siteid: np.ndarray
+    rfstdtc: np.ndarray
+    visits_completed: np.ndarray
+    visits: Tuple[Tuple[str, float, int], ...] = field(default=DEFAULT_VISITS)
+    visit_offsets: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        if self.visit_offsets is None:
+            self.visit_offsets = np.zeros(
+                (len(self.subjid), len(self.visits)), dtype=np.int64
+            )
+
+    @classmethod
+    def build(
+        cls,
+        num_subjects: int,
+        seed=None,
+        study_id: str = DEFAULT_STUDY_ID,
+        visits: Tuple[Tuple[str, float, int], ...] = DEFAULT_VISITS,
+        sites: int = DEFAULT_SITES,
+    ) -> "SubjectSchedule":
+        """
+        Builds the schedule of a study with random sites and start dates.
+
+        Args:
+            num_subjects (int): The number of subjects.
+            seed: The seed (an int or a ``numpy.random.SeedSequence``).
+            study_id (str): The study identifier.
+            visits (Tuple[Tuple[str, float, int], ...]): The visit name, number
+                and planned study day of each scheduled visit.
+            sites (int): The number of sites subjects are spread over.
+
+        Returns:
+            SubjectSchedule: The schedule, with every visit completed.
+        """
+        rng = np.random.default_rng(seed)
+        site_numbers = rng.integers(1, max(1, sites), size=num_subjects, endpoint=True)
+        days = (_LAST_START - _FIRST_START).astype(int)
+        rfstdtc = _FIRST_START + rng.integers(
+            0, days, size=num_subjects, endpoint=True
+        ).astype("timedelta64[D]")
+        return cls(
+            study_id=study_id,
+            subjid=np.char.zfill(np.arange(1, num_subjects + 1).astype(str), 4).astype(
+                object
+            ),
+            siteid=np.char.zfill(site_numbers.astype(str), 3).astype(object),
+            rfstdtc=rfstdtc,
+            visits_completed=np.full(num_subjects, len(visits), dtype=np.int64),
+            visits=tuple(visits),
+            visit_offsets=rng.integers(
+                -_VISIT_WINDOW,
+                _VISIT_WINDOW,
+                size=(num_subjects, len(visits)),
+                endpoint=True,
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.subjid)
+
+    def __getitem__(self, subjects: slice) -> "SubjectSchedule":
+        """Returns the schedule of a contiguous range of subjects."""
+        return SubjectSchedule(
+            study_id=self.study_id,
+            subjid=self.subjid[subjects],
+            siteid=self.siteid[subjects],
+            rfstdtc=self.rfstdtc[subjects],
+            visits_completed=self.visits_completed[subjects],
+            visits=self.visits,
+            visit_offsets=self.visit_offsets[subjects],
+        )
+
+    @property
+    def usubjid(self) -> np.ndarray:
+        """The unique subject identifiers, ``<study>-<site>-<subject>``."""
+        return (f"{self.study_id}-" + self.siteid + "-" + self.subjid).astype(object)
+
+    @property
+    def visit_dates(self) -> np.ndarray:
+        """The date of every scheduled visit of every subject (subjects x visits)."""
+        planned = np.array([day for _, _, day in self.visits], dtype=np.int64)
+        # Study day 1 is the reference start date; there is no day 0
+        offsets = planned - (planned > 0) + self.visit_offsets
+        return self.rfstdtc[:, None] + offsets.astype("timedelta64[D]")
+
+    @property
+    def rfendtc(self) -> np.ndarray:
+        """The date of the last completed visit of each subject."""
+        last = np.clip(self.visits_completed - 1, 0, None)
+        return self.visit_dates[np.arange(len(self)), last]
+
+    def subject_table(self) -> pd.DataFrame:
+        """
+        Returns one record per subject.
+
+        Returns:
+            pd.DataFrame: The ``subject`` index and ``date`` (reference start)
+                          of each record.
+        """
+        return pd.DataFrame({"subject": np.arange(len(self)), "date": self.rfstdtc})
+
+    def visit_table(self) -> pd.DataFrame:
+        """
+        Returns one record per completed visit of each subject.
+
+        Returns:
+            pd.DataFrame: The ``subject`` index, ``visit`` index and ``date`` of
+                          each record, in subject then visit order.
+        """
+        completed = (
+            np.arange(len(self.visits))[None, :] < self.visits_completed[:, None]
+        )
+        subject, visit = np.nonzero(completed)
+        return pd.DataFrame(
+            {
+                "subject": subject,
+                "visit": visit,
+                "date": self.visit_dates[subject, visit],
+            }
+        )
+
+    def event_table(
+        self, rng: np.random.Generator, mean_events: float = MEAN_EVENTS
+    ) -> pd.DataFrame:
+        """
+        Returns a random number of records per subject, dated within participation.
+
+        Args:
+            rng (numpy.random.Generator): The random number generator to draw from.
+            mean_events (float): The mean number of records per subject.
+
+        Returns:
+            pd.DataFrame: The ``subject`` index and ``date`` of each record, in
+                          subject then date order.
+        """
+        counts = rng.poisson(mean_events, size=len(self))
+        subject = np.repeat(np.arange(len(self)), counts)
+        span = (self.rfendtc - self.rfstdtc).astype(np.int64)[subject]
+        offsets = np.floor(rng.random(len(subject)) * (span + 1)).astype(np.int64)
+        events = pd.DataFrame(
+            {
+                "subject": subject,
+                "date": self.rfstdtc[subject] + offsets.astype("timedelta64[D]"),
+            }
+        )
+        return events.sort_values(["subject", "date"], kind="stable", ignore_index=True)
+
+
+def schedule_seed(study_seed: np.random.SeedSequence) -> np.random.SeedSequence:
+    """Returns the seed sequence of a study's schedule, independent of its domains."""
+    return domain_seed(study_seed, "__SCHEDULE__")
+
+
+def _iso(dates: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(dates.astype("datetime64[D]"), unit="D").astype(object)
+
+
+def domain_variables(
+    generator: DataGenerator, domain: str, schedule: SubjectSchedule
+) -> Dict[str, dict]:
+    """
+    Describes the variables of a domain derived from a schedule.
+
+    The identifier and visit variables are filled from the schedule rather
+    than generated, so their types and lengths come from the schedule; the
+    other variables are described by the generator (see
+    ``DataGenerator.variables``).
+
+    Args:
+        generator (DataGenerator): The generator of the domain's form.
+        domain (str): The domain name.
+        schedule (SubjectSchedule): The schedule of the study.
+
+    Returns:
+        Dict[str, dict]: The "label", "type" and "length" of each variable.
+    """
+
+    def longest(values) -> int:
+        return max((len(str(value)) for value in values), default=1)
+
+    keys = {
+        "STUDYID": ("Study Identifier", "char", len(schedule.study_id)),
+        "DOMAIN": ("Domain Abbreviation", "char", len(domain)),
+        "SITEID": ("Study Site Identifier", "char", longest(schedule.siteid)),
+        "SUBJID": (
+            "Subject Identifier for the Study",
+            "char",
+            longest(schedule.subjid),
+        ),
+        "USUBJID": ("Unique Subject Identifier", "char", longest(schedule.usubjid)),
+        "VISIT": (
+            "Visit Name",
+            "char",
+            longest(name for name, _, _ in schedule.visits),
+        ),
+        "VISITNUM": ("Visit Number", "num", 8),
+    }
+    variables = generator.variables()
+    for name, (label, kind, length) in keys.items():
+        variables[name] = {
+            "label": variables.get(name, {}).get("label") or label,
+            "type": kind,
+            "length": length,
+        }
+    return variables
+
+
+def derive_domain(
+    generator: DataGenerator,
+    domain: str,
+    schedule: SubjectSchedule,
+    seed_sequence: np.random.SeedSequence,
+    stories: Sequence = (),
+) -> pd.DataFrame:
+    """
+    Derives the records of a domain for the subjects of a schedule.
+
+    The record skeleton (which subject, visit and date each record belongs to)
+    comes from the schedule; the other fields get random values from the
+    generator. Identifier, visit and date fields of the form are then filled
+    from the skeleton, and USUBJID is added when the form lacks it so that
+    every domain can be joined on it. Finally, the records go through the
+    ``apply_records`` transform of each study story.
+
+    Args:
+        generator (DataGenerator): The generator of the domain's form.
+        domain (str): The domain name.
+        schedule (SubjectSchedule): The schedule of the subjects to derive.
+        seed_sequence (numpy.random.SeedSequence): The seed of this chunk.
+        stories (Sequence[StudyStory]): The study stories to apply.
+
+    Returns:
+        pd.DataFrame: The records of the domain, in subject order.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    domain = domain.upper()
+    if domain in SUBJECT_DOMAINS:
+        skeleton = schedule.subject_table()
+    elif domain in FINDINGS_DOMAINS:
+        skeleton = schedule.visit_table()
+    else:
+        skeleton = schedule.event_table(rng)
+
+    records = generator.generate_records(rng, len(skeleton))
+    subject = skeleton["subject"].to_numpy()
+    dates = skeleton["date"].to_numpy()
+
+    keys = {
+        "STUDYID": np.full(len(skeleton), schedule.study_id, dtype=object),
+        "DOMAIN": np.full(len(skeleton), domain, dtype=object),
+        "SITEID": schedule.siteid[subject],
+        "SUBJID": schedule.subjid[subject],
+        "USUBJID": schedule.usubjid[subject],
+    }
+    if "visit" in skeleton:
+        visit = skeleton["visit"].to_numpy()
+        names = np.array([name for name, _, _ in schedule.visits], dtype=object)
+        numbers = np.array([number for _, number, _ in schedule.visits])
+        keys["VISIT"] = names[visit]
+        keys["VISITNUM"] = numbers[visit]
+    for name, values in keys.items():
+        if name in records:
+            records[name] = values
+    if "USUBJID" not in records:
+        records.insert(0, "USUBJID", keys["USUBJID"])
+
+    durations = rng.integers(0, _MAX_DURATION, size=len(skeleton), endpoint=True)
+    for form_field in generator.form_data.fields:
+        if form_field.datatype.lower() != "date" or form_field.codelist:
+            continue
+        name = form_field.cdash_var
+        if name.endswith(("ENDAT", "ENDTC")):
+            records[name] = _iso(dates + durations.astype("timedelta64[D]"))
+        elif (
+            name == "BRTHDAT" and "AGE" in records and records["AGE"].dtype.kind == "i"
+        ):
+            age = records["AGE"].to_numpy().astype(np.int64)
+            records[name] = _iso(dates - (age * 365.25).astype("timedelta64[D]"))
+        else:
+            records[name] = _iso(dates)
+
+    for story in stories:
+        records = story.apply_records(domain, records, schedule, subject, rng)
+    return records
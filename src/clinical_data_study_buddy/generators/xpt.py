@@ -0,0 +1,263 @@
+"""
+This module writes datasets as SAS transport (XPORT version 5) files.
+
+XPT is the format regulators expect for submitted datasets. A file is a
+sequence of 80-byte records: a library header, then one member with a
+descriptor (namestr) per variable, followed by the observations. Observations
+are encoded column by column with NumPy: numeric variables as 8-byte IBM
+hexadecimal floating point, character variables as fixed-width, blank-padded
+bytes.
+
+The namestrs come before the observations, so the type and length of every
+variable must be known before the first observation is written. They are
+taken from the variable metadata when it is given (see
+``DataGenerator.variables``) and otherwise from the first chunk. A character
+value longer than its variable is an error rather than being truncated, so
+datasets whose later chunks hold longer values need the lengths in the
+metadata.
+
+Only version 5 is written, which limits names to 8 characters, labels to 40
+characters and character values to 200 bytes.
+"""
+
+import struct
+from datetime import datetime
+from typing import BinaryIO, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+MAX_NAME_LENGTH = 8
+MAX_LABEL_LENGTH = 40
+MAX_CHAR_LENGTH = 200
+
+_RECORD = 80
+_BLANK = 0x20
+# The namestr of a variable: type, hash, length, number, name, label, format
+# (name, length, decimals, justification), padding, informat (name, length,
+# decimals), position in the observation and padding
+_NAMESTR = struct.Struct(">hhhh8s40s8shhh2s8shhl52s")
+_NUMERIC, _CHARACTER = 1, 2
+# The SAS missing value (.) of numeric variables
+_MISSING = np.uint64(0x2E << 56)
+
+
+def ibm_float(values) -> np.ndarray:
+    """
+    Converts IEEE 754 doubles to IBM hexadecimal floating point.
+
+    The conversion is exact: the 56-bit IBM fraction holds the 53-bit IEEE
+    significand. NaN becomes the SAS missing value, magnitudes too small for
+    IBM floats become zero, and magnitudes too large become the largest IBM
+    float.
+
+    Args:
+        values (array-like): The values to convert.
+
+    Returns:
+        numpy.ndarray: The converted values, as big-endian 8-byte integers.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    bits = values.view(np.uint64)
+    sign = bits & np.uint64(1 << 63)
+    biased = ((bits >> np.uint64(52)) & np.uint64(0x7FF)).astype(np.int64)
+    mantissa = (bits & np.uint64((1 << 52) - 1)) | np.uint64(1 << 52)
+
+    # x = mantissa / 2**53 * 2**binary, with the significand in [1/2, 1).
+    # Rewrite it as fraction / 2**56 * 16**hexadecimal, with the fraction
+    # shifted right by 0-3 bits so that it lies in [1/16, 1).
+    binary = biased - 1022
+    hexadecimal = -(-binary // 4)
+    shift = (3 - (4 * hexadecimal - binary)).astype(np.uint64)
+    exponent = hexadecimal + 64
+    result = (
+        sign
+        | (np.clip(exponent, 0, 127).astype(np.uint64) << np.uint64(56))
+        | (mantissa << shift)
+    )
+
+    result[(biased == 0) | (exponent < 0)] = 0
+    overflow = (exponent > 127) | np.isinf(values)
+    result[overflow] = sign[overflow] | np.uint64((1 << 63) - 1)
+    result[np.isnan(values)] = _MISSING
+    return result.astype(">u8")
+
+
+def _text(value: str, width: int) -> bytes:
+    """Encodes header text, truncated or blank-padded to a fixed width."""
+    return str(value).encode("latin-1", "replace")[:width].ljust(width)
+
+
+def _header(name: str, counts: str = "0" * 30) -> bytes:
+    return f"HEADER RECORD*******{name:<8}HEADER RECORD!!!!!!!{counts}  ".encode()
+
+
+def _check_name(name: str, kind: str) -> str:
+    if not name or len(name) > MAX_NAME_LENGTH or not name.isascii():
+        raise ValueError(
+            f"Invalid XPT {kind} name: {name!r}. XPT names have 1 to "
+            f"{MAX_NAME_LENGTH} ASCII characters."
+        )
+    return name
+
+
+def _is_numeric(values: pd.Series) -> bool:
+    if pd.api.types.is_numeric_dtype(values):
+        return True
+    inferred = pd.api.types.infer_dtype(values, skipna=True)
+    return inferred in ("integer", "floating", "mixed-integer-float", "decimal")
+
+
+def _encode_text(values: pd.Series, length: int) -> np.ndarray:
+    """
+    Encodes text values as blank-padded bytes, one row per value.
+
+    Raises:
+        ValueError: If a value is longer than ``length`` bytes.
+    """
+    text = values.astype(object).where(values.notna(), "").astype(str).to_numpy()
+    try:
+        encoded = text.astype("S")
+    except UnicodeEncodeError:
+        encoded = np.array([value.encode("utf-8") for value in text], dtype="S")
+    if encoded.dtype.itemsize > length:
+        raise ValueError(
+            f"XPT variable {values.name} has a {encoded.dtype.itemsize}-byte "
+            f"value, longer than its length of {length}. Give the length in the "
+            f"variable metadata (at most {MAX_CHAR_LENGTH} bytes)."
+        )
+    encoded = encoded.astype(f"S{length}")
+    rows = encoded.view(np.uint8).reshape(len(text), length).copy()
+    rows[rows == 0] = _BLANK
+    return rows
+
+
+class XptWriter:
+    """Writes a dataset to an XPT stream, one chunk of observations at a time."""
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        name: Optional[str] = None,
+        variables: Optional[Mapping[str, Mapping]] = None,
+        label: str = "",
+    ):
+        """
+        Initializes the XptWriter.
+
+        Args:
+            stream (BinaryIO): The stream to write to.
+            name (Optional[str]): The dataset name, e.g. "DM".
+            variables (Optional[Mapping[str, Mapping]]): The metadata of each
+                variable: its "label", "type" ("char" or "num") and "length".
+            label (str): The dataset label.
+
+        Raises:
+            ValueError: If the dataset name is not a valid XPT name.
+        """
+        self._stream = stream
+        self._name = _check_name((name or "").upper(), "dataset")
+        self._variables = variables or {}
+        self._label = label
+        self._layout: Optional[List[dict]] = None
+        self._size = 0
+
+    def _describe(self, column: str, values: pd.Series) -> dict:
+        """Fixes the type and length of a variable from its metadata or values."""
+        metadata = self._variables.get(column, {})
+        kind = metadata.get("type") or ("num" if _is_numeric(values) else "char")
+        if kind == "num":
+            length = 8
+        elif metadata.get("length"):
+            length = int(metadata["length"])
+        else:
+            encoded = values.dropna().astype(str).str.encode("utf-8")
+            length = int(encoded.str.len().max()) if len(encoded) else 1
+        return {
+            "name": _check_name(str(column), "variable"),
+            "label": metadata.get("label") or "",
+            "type": kind,
+            "length": max(1, min(length, MAX_CHAR_LENGTH)),
+        }
+
+    def _start(self, chunk: pd.DataFrame):
+        """Writes the library and member headers and the namestrs."""
+        self._layout = [
+            self._describe(column, chunk[column]) for column in chunk.columns
+        ]
+        stamp = datetime.now().strftime("%d%b%y:%H:%M:%S").upper().encode()
+        release = _text("9.4", 8) + _text("X64_7PRO", 8) + b" " * 24 + stamp
+        records = [
+            _header("LIBRARY"),
+            _text("SAS", 8) + _text("SAS", 8) + _text("SASLIB", 8) + release,
+            stamp + b" " * 64,
+            _header("MEMBER", "000000000000000001600000000140"),
+            _header("DSCRPTR"),
+            _text("SAS", 8) + _text(self._name, 8) + _text("SASDATA", 8) + release,
+            stamp + b" " * 16 + _text(self._label, 40) + b" " * 8,
+            _header("NAMESTR", f"000000{len(self._layout):04d}" + "0" * 20),
+        ]
+        namestrs = []
+        position = 0
+        for number, variable in enumerate(self._layout, start=1):
+            namestrs.append(
+                _NAMESTR.pack(
+                    _NUMERIC if variable["type"] == "num" else _CHARACTER,
+                    0,
+                    variable["length"],
+                    number,
+                    _text(variable["name"], 8),
+                    _text(variable["label"], MAX_LABEL_LENGTH),
+                    b" " * 8,
+                    0,
+                    0,
+                    0,
+                    b"\0\0",
+                    b" " * 8,
+                    0,
+                    0,
+                    position,
+                    b"\0" * 52,
+                )
+            )
+            variable["position"] = position
+            position += variable["length"]
+        namestrs = b"".join(namestrs)
+        namestrs += b" " * (-len(namestrs) % _RECORD)
+        self._stream.write(b"".join(records) + namestrs + _header("OBS"))
+
+    def write(self, chunk: pd.DataFrame):
+        """
+        Writes a chunk of observations.
+
+        Args:
+            chunk (pd.DataFrame): The observations, with the columns of the
+                                  first chunk.
+
+        Raises:
+            ValueError: If a character value is longer than its variable.
+        """
+        if self._layout is None:
+            self._start(chunk)
+        width = sum(variable["length"] for variable in self._layout)
+        rows = np.empty((len(chunk), width), dtype=np.uint8)
+        for variable in self._layout:
+            values = chunk[variable["name"]]
+            start = variable["position"]
+            end = start + variable["length"]
+            if variable["type"] == "num":
+                numbers = pd.to_numeric(values, errors="coerce").astype(float)
+                rows[:, start:end] = (
+                    ibm_float(numbers.to_numpy()).view(np.uint8).reshape(-1, 8)
+                )
+            else:
+                rows[:, start:end] = _encode_text(values, variable["length"])
+        data = rows.tobytes()
+        self._stream.write(data)
+        self._size += len(data)
+
+    def close(self):
+        """Pads the observations to a whole record. The stream is left open."""
+        if self._layout is None:
+            self._start(pd.DataFrame(columns=list(self._variables)))
+        self._stream.write(b" " * (-self._size % _RECORD))
@@ -1,12 +1,18 @@
 from unittest.mock import MagicMock, patch
 
-from clinical_data_study_buddy.core.cdisc_library_service import get_client
+from clinical_data_study_buddy.core.cdisc_library_service import (
+    get_async_client,
+    get_client,
+)
 
 
 @patch("clinical_data_study_buddy.core.cdisc_library_service.AuthenticatedClient")
+@patch("clinical_data_study_buddy.core.cdisc_library_service.cached_transport")
 @patch("clinical_data_study_buddy.core.cdisc_library_service.httpx.HTTPTransport")
 @patch("clinical_data_study_buddy.core.cdisc_library_service.get_api_key")
-def test_get_client(mock_get_api_key, mock_http_transport, mock_auth_client):
+def test_get_client(
+    mock_get_api_key, mock_http_transport, mock_cached_transport, mock_auth_client
+):
     """
     Test that the get_client function configures and returns an AuthenticatedClient correctly.
     """
@@ -16,6 +22,8 @@ def test_get_client(mock_get_api_key, mock_http_transport, mock_auth_client):
 
     mock_transport_instance = MagicMock()
     mock_http_transport.return_value = mock_transport_instance
+    mock_cached_instance = MagicMock()
+    mock_cached_transport.return_value = mock_cached_instance
 
     mock_client_instance = MagicMock()
     mock_auth_client.return_value = mock_client_instance
@@ -26,16 +34,39 @@ def test_get_client(mock_get_api_key, mock_http_transport, mock_auth_client):
     # Assert
     mock_get_api_key.assert_called_once()
     mock_http_transport.assert_called_once_with(retries=5)
+    mock_cached_transport.assert_called_once_with(mock_transport_instance)
 
     expected_headers = {"api-key": mock_api_key, "Accept": "application/json"}
     mock_auth_client.assert_called_once_with(
         base_url="https://library.cdisc.org/api",
-        token="dummy",
+        token=mock_api_key,
         headers=expected_headers,
         auth_header_name="api-key",
         prefix="",
         timeout=30.0,
-        httpx_args={"transport": mock_transport_instance},
+        httpx_args={"transport": mock_cached_instance},
     )
 
     assert client == mock_client_instance
+
+
+@patch("clinical_data_study_buddy.core.cdisc_library_service.get_api_key")
+def test_get_client_with_explicit_api_key(mock_get_api_key):
+    """
+    Test that an explicit API key is sent with every request.
+    """
+    client = get_client(api_key="explicit-key")
+
+    mock_get_api_key.assert_not_called()
+    assert client.get_httpx_client().headers["api-key"] == "explicit-key"
+
+
+def test_get_async_client():
+    """
+    Test that the async client sends the API key to the CDISC Library.
+    """
+    client = get_async_client(api_key="explicit-key", concurrency=4)
+
+    async_client = client.get_async_httpx_client()
+    assert async_client.headers["api-key"] == "explicit-key"
+    assert str(async_client.base_url) == "https://library.cdisc.org/api/"
@@ -0,0 +1,131 @@
+import os
+import stat
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from clinical_data_study_buddy.core import conversion_service
+from clinical_data_study_buddy.core.conversion_service import (
+    ConversionService,
+    get_conversion_service,
+)
+from clinical_data_study_buddy.generators.crfgen.exporter.rtf import (
+    convert_docx_to_rtf,
+)
+
+# Copies its input to --output; inputs named fail* fail and slow* hang
+FAKE_PANDOC = """#!/bin/sh
+case "$(basename "$1")" in
+  fail*) echo "cannot read $1" >&2; exit 1 ;;
+  slow*) sleep 5 ;;
+esac
+cp "$1" "$3"
+"""
+
+
+@pytest.fixture
+def pandoc(tmp_path):
+    path = tmp_path / "pandoc"
+    path.write_text(FAKE_PANDOC)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def _source(tmp_path, name):
+    path = tmp_path / name
+    path.write_text(name)
+    return path
+
+
+def test_convert(tmp_path, pandoc):
+    service = ConversionService(workers=2, pandoc_path=pandoc)
+    source = _source(tmp_path, "form.docx")
+
+    service.convert(source, "rtf", tmp_path / "form.rtf")
+
+    assert (tmp_path / "form.rtf").read_text() == "form.docx"
+    assert source.exists()
+    service.close()
+
+
+def test_submit_queues_conversions(tmp_path, pandoc):
+    service = ConversionService(workers=2, queue_size=2, pandoc_path=pandoc)
+    sources = [_source(tmp_path, f"form{i}.docx") for i in range(5)]
+
+    futures = [
+        service.submit(source, "rtf", tmp_path / f"form{i}.rtf")
+        for i, source in enumerate(sources)
+    ]
+
+    assert [future.result() for future in futures] == [
+        tmp_path / f"form{i}.rtf" for i in range(5)
+    ]
+    assert [(tmp_path / f"form{i}.rtf").read_text() for i in range(5)] == [
+        f"form{i}.docx" for i in range(5)
+    ]
+    service.close()
+
+
+def test_convert_raises_pandoc_errors(tmp_path, pandoc):
+    service = ConversionService(workers=2, pandoc_path=pandoc)
+
+    with pytest.raises(RuntimeError, match="cannot read"):
+        service.convert(_source(tmp_path, "fail.docx"), "rtf", tmp_path / "fail.rtf")
+    service.close()
+
+
+def test_convert_times_out(tmp_path, pandoc):
+    service = ConversionService(workers=1, timeout=0.2, pandoc_path=pandoc)
+    start = time.perf_counter()
+
+    with pytest.raises(RuntimeError, match="timed out after 0.2s"):
+        service.convert(_source(tmp_path, "slow.docx"), "pdf", tmp_path / "slow.pdf")
+
+    assert time.perf_counter() - start < 4
+    service.close()
+
+
+def test_submit_waits_for_a_free_slot(tmp_path, pandoc):
+    service = ConversionService(workers=1, queue_size=1, pandoc_path=pandoc)
+    release = threading.Event()
+    # Holds the only slot until released
+    service._executor.submit(release.wait)
+    service._slots.acquire()
+    submitted = threading.Event()
+
+    def submit():
+        service.submit(_source(tmp_path, "form.docx"), "rtf", tmp_path / "form.rtf")
+        submitted.set()
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    assert not submitted.wait(0.2)
+    service._slots.release()
+    release.set()
+    thread.join(5)
+    assert submitted.is_set()
+    service.close()
+
+
+def test_get_conversion_service_is_per_process(monkeypatch):
+    monkeypatch.setattr(conversion_service, "_service", None)
+    service = get_conversion_service()
+    assert get_conversion_service() is service
+
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    assert get_conversion_service() is not service
+
+
+def test_convert_docx_to_rtf_uses_service(tmp_path, pandoc, monkeypatch):
+    monkeypatch.setattr(
+        conversion_service, "_service", ConversionService(pandoc_path=pandoc)
+    )
+    monkeypatch.setattr(conversion_service, "_service_pid", os.getpid())
+    source = _source(tmp_path, "forms.docx")
+
+    convert_docx_to_rtf(source, [SimpleNamespace(id="DM")], tmp_path)
+
+    assert (tmp_path / "DM.rtf").read_text() == "forms.docx"
+    assert source.exists()
@@ -0,0 +1,123 @@
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pytest
+
+from cdisc_library_client.client import AuthenticatedClient
+from clinical_data_study_buddy.core import ct_index
+from clinical_data_study_buddy.core.ct_index import (
+    ControlledTerminologyIndex,
+    codelist_package,
+    load_ct_index,
+)
+from clinical_data_study_buddy.core.models.schema import Codelist, FieldDef, Form
+from clinical_data_study_buddy.core.standards_store import StandardsStore
+from clinical_data_study_buddy.generators.data_generator import DataGenerator
+
+CODELISTS = {
+    "C66731": {
+        "conceptId": "C66731",
+        "name": "Sex",
+        "submissionValue": "SEX",
+        "terms": [
+            {"conceptId": "C20197", "submissionValue": "M"},
+            {"conceptId": "C16576", "submissionValue": "F"},
+            {"conceptId": "C17998", "submissionValue": "U"},
+        ],
+    },
+    "C66742": {
+        "conceptId": "C66742",
+        "name": "No Yes Response",
+        "submissionValue": "NY",
+        "terms": [
+            {"conceptId": "C49488", "submissionValue": "Y"},
+            {"conceptId": "C49487", "submissionValue": "N"},
+        ],
+    },
+}
+
+
+def _client(requests):
+    def handler(request):
+        requests.append(request.url.path)
+        code = request.url.path.rsplit("/", 1)[-1]
+        if code not in CODELISTS:
+            return httpx.Response(404, json={})
+        return httpx.Response(200, json=CODELISTS[code])
+
+    return AuthenticatedClient(
+        base_url="https://library.cdisc.org/api",
+        token="test-key",
+        auth_header_name="api-key",
+        prefix="",
+        httpx_args={"transport": httpx.MockTransport(handler)},
+    )
+
+
+@patch("clinical_data_study_buddy.core.ct_index.get_client")
+def test_from_api_fetches_each_codelist_once(mock_get_client, monkeypatch):
+    """Each codelist is requested once per process, and unknown ones are skipped."""
+    monkeypatch.setattr(ct_index, "_FETCHED", {})
+    requests = []
+    mock_get_client.return_value = _client(requests)
+
+    index = ControlledTerminologyIndex.from_api(
+        "sdtmct-2024-03-29", ["C66731", "C66742", "C99999"], api_key="key"
+    )
+    assert index.values("C66731") == ["M", "F", "U"]
+    assert "C99999" not in index
+    assert sorted(requests) == [
+        "/api/mdr/ct/packages/sdtmct-2024-03-29/codelists/C66731",
+        "/api/mdr/ct/packages/sdtmct-2024-03-29/codelists/C66742",
+        "/api/mdr/ct/packages/sdtmct-2024-03-29/codelists/C99999",
+    ]
+
+    requests.clear()
+    again = ControlledTerminologyIndex.from_api(
+        "sdtmct-2024-03-29", ["C66742"], api_key="key"
+    )
+    assert again.values("C66742") == ["Y", "N"]
+    assert requests == []
+
+
+def test_weighted_sampling():
+    """Values are drawn with the configured weights."""
+    index = ControlledTerminologyIndex({"C66731": ["M", "F", "U"]})
+    index.set_weights("C66731", {"M": 3, "F": 1})
+
+    values = index.sample("C66731", 20_000, np.random.default_rng(0))
+
+    assert set(values) == {"M", "F"}
+    assert 0.72 < np.mean(values == "M") < 0.78
+    with pytest.raises(ValueError, match="positive weight"):
+        index.set_weights("C66731", {"X": 1})
+
+
+def test_codelist_package():
+    assert (
+        codelist_package("/mdr/ct/packages/sdtmct-2024-03-29/codelists/C66731")
+        == "sdtmct-2024-03-29"
+    )
+    assert codelist_package("/mdr/root/ct/sdtmct/codelists/C66731") is None
+
+
+def test_load_ct_index_from_store_feeds_data_generator(tmp_path, monkeypatch):
+    """Codelist fields are sampled from the newest CT snapshot in the store."""
+    pytest.importorskip("pyarrow")
+    monkeypatch.delenv("CDISC_CT_PACKAGE", raising=False)
+    store = StandardsStore(tmp_path)
+    store.save("ct", "sdtmct-2024-03-29", {"codelists": list(CODELISTS.values())})
+    sex = Codelist(nci_code="C66731", href="/mdr/root/ct/sdtmct/codelists/C66731")
+
+    index = load_ct_index([sex], store=store)
+
+    assert index.values("C66731") == ["M", "F", "U"]
+    fields = [
+        FieldDef(
+            oid="SEX", prompt="Sex", datatype="text", cdash_var="SEX", codelist=sex
+        )
+    ]
+    form_data = Form(title="DM", domain="DM", fields=fields)
+    df = DataGenerator(form_data, seed=1, ct_index=index).generate_frame(500)
+    assert set(df["SEX"]) == {"M", "F", "U"}
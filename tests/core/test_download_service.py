@@ -1,90 +1,109 @@
 import json
 from pathlib import Path
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import patch
 
+import httpx
 import pytest
 
+from cdisc_library_client.client import AuthenticatedClient
 from clinical_data_study_buddy.core.download_service import download_standard
 
+SDTMIG = {
+    "/mdr/sdtmig/3-3": {"name": "SDTMIG v3.3", "classes": [{"name": "embedded"}]},
+    "/mdr/sdtmig/3-3/classes": {
+        "_links": {"classes": [{"href": "/mdr/sdtmig/3-3/classes/Events"}]}
+    },
+    "/mdr/sdtmig/3-3/datasets": {
+        "_links": {
+            "datasets": [
+                {"href": "/mdr/sdtmig/3-3/datasets/DM"},
+                {"href": "/mdr/sdtmig/3-3/datasets/AE"},
+            ]
+        }
+    },
+    "/mdr/sdtmig/3-3/classes/Events": {"name": "Events"},
+    "/mdr/sdtmig/3-3/datasets/DM": {"name": "DM"},
+    "/mdr/sdtmig/3-3/datasets/AE": {"name": "AE"},
+}
+
+
+def _client(handler):
+    return AuthenticatedClient(
+        base_url="https://library.cdisc.org/api",
+        token="test-key",
+        auth_header_name="api-key",
+        prefix="",
+        httpx_args={"transport": httpx.MockTransport(handler)},
+    )
+
 
-@pytest.fixture
-def mock_cdisc_client():
-    """Fixture for a mocked AuthenticatedClient."""
-    return MagicMock()
+def _library(requests, fail=()):
+    """Returns a handler serving the SDTMIG documents and recording request paths."""
+
+    def handler(request):
+        path = request.url.path.removeprefix("/api")
+        requests.append(path)
+        if path in fail:
+            return httpx.Response(503)
+        return httpx.Response(200, json=SDTMIG[path])
+
+    return handler
 
 
 def test_download_standard_unsupported_standard():
     """
     Test that download_standard raises a ValueError for an unsupported standard.
     """
-    with pytest.raises(ValueError, match="Only sdtmig is supported at this time."):
+    with pytest.raises(ValueError, match="Unsupported standard: unsupported"):
         download_standard("unsupported", "1.0", Path("output"))
 
 
 @patch("clinical_data_study_buddy.core.download_service.get_client")
-@patch("clinical_data_study_buddy.core.download_service.get_mdr_sdtmig_version.sync")
-@patch(
-    "clinical_data_study_buddy.core.download_service.get_mdr_sdtmig_version_classes.sync"
-)
-@patch(
-    "clinical_data_study_buddy.core.download_service.get_mdr_sdtmig_version_datasets.sync"
-)
-@patch("pathlib.Path.mkdir")
-@patch("builtins.open", new_callable=mock_open)
-def test_download_standard_success(
-    mock_open_file,
-    mock_mkdir,
-    mock_get_datasets,
-    mock_get_classes,
-    mock_get_version,
-    mock_get_client,
-    mock_cdisc_client,
-):
+def test_download_standard_success(mock_get_client, tmp_path):
     """
-    Test the successful download and processing of a standard.
+    Test the successful download of a standard and its linked resources.
     """
-    # Arrange
-    mock_get_client.return_value = mock_cdisc_client
-    mock_get_version.return_value = {
-        "_links": {
-            "classes": [{"title": "class1"}],
-            "datasets": [{"title": "dataset1"}],
-        }
-    }
-    mock_get_classes.return_value = {"name": "class1_data"}
-    mock_get_datasets.return_value = {"name": "dataset1_data"}
-    output_dir = Path("output")
-    version = "3.3"
-    standard = "sdtmig"
-
-    # Act
-    download_standard(standard, version, output_dir)
-
-    # Assert
-    mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
-    mock_get_client.assert_called_once()
-    mock_get_version.assert_called_once_with(client=mock_cdisc_client, version=version)
-    mock_get_classes.assert_called_once_with(
-        client=mock_cdisc_client, version=version, class_name="class1"
-    )
-    mock_get_datasets.assert_called_once_with(
-        client=mock_cdisc_client, version=version, dataset_name="dataset1"
+    requests = []
+    mock_get_client.return_value = _client(_library(requests))
+
+    output_file = download_standard("sdtmig", "3-3", tmp_path, jobs=4)
+
+    assert output_file == tmp_path / "sdtmig_3-3.json"
+    data = json.loads(output_file.read_text())
+    assert data["name"] == "SDTMIG v3.3"
+    assert data["classes"] == [{"name": "Events"}]
+    assert data["datasets"] == [{"name": "DM"}, {"name": "AE"}]
+    assert sorted(requests) == sorted(SDTMIG)
+    assert not (tmp_path / ".sdtmig_3-3.parts").exists()
+
+
+@patch("clinical_data_study_buddy.core.download_service.get_client")
+def test_download_standard_resumes_after_failure(mock_get_client, tmp_path):
+    """
+    Test that an interrupted download only fetches the missing resources when rerun.
+    """
+    requests = []
+    mock_get_client.return_value = _client(
+        _library(requests, fail={"/mdr/sdtmig/3-3/datasets/AE"})
     )
+    with pytest.raises(httpx.HTTPStatusError):
+        download_standard("sdtmig", "3-3", tmp_path)
+    assert (tmp_path / ".sdtmig_3-3.parts" / "datasets" / "00000.json").exists()
+    assert not (tmp_path / "sdtmig_3-3.json").exists()
 
-    output_file = output_dir / f"{standard}_{version}.json"
-    mock_open_file.assert_called_once_with(output_file, "w")
+    requests.clear()
+    mock_get_client.return_value = _client(_library(requests))
+    download_standard("sdtmig", "3-3", tmp_path)
 
-    handle = mock_open_file()
-    # json.dump with indent writes multiple lines, so we need to join them
-    written_content = "".join(c[0][0] for c in handle.write.call_args_list)
-    written_data = json.loads(written_content)
+    assert requests == ["/mdr/sdtmig/3-3/datasets/AE"]
+    data = json.loads((tmp_path / "sdtmig_3-3.json").read_text())
+    assert data["datasets"] == [{"name": "DM"}, {"name": "AE"}]
 
-    expected_data = {
-        "_links": {
-            "classes": [{"title": "class1"}],
-            "datasets": [{"title": "dataset1"}],
-        },
-        "classes": [{"name": "class1_data"}],
-        "datasets": [{"name": "dataset1_data"}],
-    }
-    assert written_data == expected_data
+
+@patch("clinical_data_study_buddy.core.download_service.get_client")
+def test_download_standard_qrs_requires_measure(mock_get_client, tmp_path):
+    """
+    Test that QRS versions must name the measure.
+    """
+    with pytest.raises(ValueError, match="<measure>/<version>"):
+        download_standard("qrs", "2-0", tmp_path)
@@ -0,0 +1,210 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from cdisc_library_client.harvest import forms_from_store
+from clinical_data_study_buddy.core.download_service import snapshot_standard
+from clinical_data_study_buddy.core.standards_store import (
+    StandardsStore,
+    library_version,
+)
+from clinical_data_study_buddy.generators.crfgen.cdash import load_ig
+
+SDTMIG = {
+    "classes": [
+        {
+            "name": "Special-Purpose",
+            "datasets": [
+                {
+                    "name": "DM",
+                    "label": "Demographics",
+                    "datasetVariables": [
+                        {
+                            "ordinal": "2",
+                            "name": "SEX",
+                            "label": "Sex",
+                            "simpleDatatype": "Char",
+                            "core": "Req",
+                            "_links": {
+                                "codelist": [
+                                    {"href": "/mdr/ct/packages/sdtmct/codelists/C66731"}
+                                ]
+                            },
+                        },
+                        {
+                            "ordinal": "1",
+                            "name": "USUBJID",
+                            "label": "Unique Subject Identifier",
+                            "simpleDatatype": "Char",
+                        },
+                    ],
+                }
+            ],
+        }
+    ]
+}
+
+CDASHIG = {
+    "classes": [
+        {
+            "name": "Findings",
+            "domains": [
+                {
+                    "name": "VS",
+                    "label": "Vital Signs",
+                    "fields": [
+                        {
+                            "ordinal": "1",
+                            "name": "VSDAT",
+                            "label": "Vital Signs Date",
+                            "prompt": "Date",
+                            "simpleDatatype": "Date",
+                        }
+                    ],
+                },
+                {
+                    "name": "LB",
+                    "label": "Laboratory Test Results",
+                    "fields": [
+                        {"ordinal": "1", "name": "LBDAT", "simpleDatatype": "Date"}
+                    ],
+                },
+            ],
+            "scenarios": [
+                {
+                    "scenario": "VS - Generic",
+                    "_links": {
+                        "self": {"href": "/mdr/cdashig/2-3/scenarios/VS.Generic"}
+                    },
+                    "fields": [
+                        {
+                            "ordinal": "1",
+                            "name": "VSORRES",
+                            "label": "Result",
+                            "simpleDatatype": "Num",
+                        }
+                    ],
+                }
+            ],
+        }
+    ]
+}
+
+CT = {
+    "codelists": [
+        {
+            "conceptId": "C66731",
+            "name": "Sex",
+            "submissionValue": "SEX",
+            "extensible": "false",
+            "terms": [
+                {
+                    "conceptId": "C20197",
+                    "submissionValue": "M",
+                    "preferredTerm": "Male",
+                },
+                {
+                    "conceptId": "C16576",
+                    "submissionValue": "F",
+                    "preferredTerm": "Female",
+                },
+            ],
+        }
+    ]
+}
+
+
+def test_save_and_read_variables(tmp_path):
+    """Variables are stored per domain, in variable order, and indexed by name."""
+    store = StandardsStore(tmp_path)
+    store.save("sdtmig", "3-3", SDTMIG)
+
+    assert store.has("sdtmig", "3-3")
+    assert store.versions("sdtmig") == ["3-3"]
+    assert store.groups("sdtmig", "3-3") == ["DM"]
+
+    dm = store.frame("sdtmig", "3-3", group="DM", columns=["variable", "order"])
+    assert dm["variable"].tolist() == ["USUBJID", "SEX"]
+    assert store.frame("sdtmig", "3-3", group="AE").empty
+
+    sex = store.record("sdtmig", "3-3", "DM", "SEX")
+    assert sex["codelist"] == "C66731"
+    assert sex["core"] == "Req"
+    assert store.record("sdtmig", "3-3", "DM", "AGE") is None
+
+
+def test_controlled_terminology_is_grouped_by_codelist(tmp_path):
+    """CT packages are stored as terms grouped by codelist code."""
+    store = StandardsStore(tmp_path)
+    store.save("ct", "sdtmct-2024-03-29", CT)
+
+    terms = store.frame("ct", "sdtmct-2024-03-29", group="C66731")
+    assert terms["submission_value"].tolist() == ["M", "F"]
+    assert store.record("ct", "sdtmct-2024-03-29", "C66731", "F")["code"] == "C16576"
+
+
+def test_save_rejects_unknown_standard(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported standard"):
+        StandardsStore(tmp_path).save("qrs", "1", {})
+
+
+def test_cdashig_snapshot_feeds_harvest_and_load_ig(tmp_path, monkeypatch):
+    """CDASHIG snapshots are read by harvest and load_ig without network access."""
+    store = StandardsStore(tmp_path)
+    store.save("cdashig", "2-3", CDASHIG)
+    monkeypatch.setenv("CDISC_STANDARDS_DIR", str(tmp_path))
+    monkeypatch.delenv("CDISC_PRIMARY_KEY", raising=False)
+
+    forms = forms_from_store(store, ["2-3"])
+    assert [(f.domain, f.scenario) for f in forms] == [
+        ("VS", None),
+        ("VS", "Generic"),
+        ("LB", None),
+    ]
+    assert forms[0].fields[0].prompt == "Date"
+    assert forms[1].fields[0].datatype == "float"
+
+    df = load_ig("2-3")
+    assert df["Variable"].tolist() == ["VSDAT", "LBDAT"]
+    assert df["Display Label"].tolist() == ["Date", None]
+
+
+@pytest.mark.parametrize("ig_version", ["v2.3", "2.3"])
+def test_load_ig_normalizes_the_version(tmp_path, monkeypatch, ig_version):
+    """CLI-style versions such as "v2.3" find the "2-3" snapshot."""
+    StandardsStore(tmp_path).save("cdashig", "2-3", CDASHIG)
+    monkeypatch.setenv("CDISC_STANDARDS_DIR", str(tmp_path))
+    monkeypatch.delenv("CDISC_PRIMARY_KEY", raising=False)
+
+    df = load_ig(ig_version)
+
+    assert df["Variable"].tolist() == ["VSDAT", "LBDAT"]
+
+
+def test_library_version():
+    assert library_version("v2.3") == "2-3"
+    assert library_version("2.3") == "2-3"
+    assert library_version("2-3") == "2-3"
+
+
+@patch("clinical_data_study_buddy.core.download_service.get_client")
+@patch(
+    "cdisc_library_client.api.sdtm_implementation_guide_sdtmig.get_mdr_sdtmig_version.sync_detailed"
+)
+def test_snapshot_standard(mock_endpoint, mock_get_client, tmp_path):
+    """snapshot_standard fetches the product document once and stores it."""
+    mock_endpoint.return_value = MagicMock(
+        status_code=200, content=json.dumps(SDTMIG).encode()
+    )
+    store = StandardsStore(tmp_path)
+
+    path = snapshot_standard("SDTMIG", "3-3", store)
+
+    assert path == tmp_path / "sdtmig" / "3-3"
+    mock_endpoint.assert_called_once_with(
+        client=mock_get_client.return_value, version="3-3"
+    )
+    assert store.record("sdtmig", "3-3", "DM", "USUBJID")["order"] == 1
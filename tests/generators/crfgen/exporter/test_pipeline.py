@@ -0,0 +1,165 @@
+import json
+import os
+import stat
+import threading
+
+import docx
+import pytest
+
+import clinical_data_study_buddy.generators.crfgen.exporter.csv  # noqa
+import clinical_data_study_buddy.generators.crfgen.exporter.docx  # noqa
+import clinical_data_study_buddy.generators.crfgen.exporter.pdf  # noqa
+import clinical_data_study_buddy.generators.crfgen.exporter.rtf  # noqa
+from clinical_data_study_buddy.core import conversion_service
+from clinical_data_study_buddy.core.conversion_service import ConversionService
+from clinical_data_study_buddy.generators.crfgen.exporter import registry as reg
+from clinical_data_study_buddy.generators.crfgen.exporter.pipeline import (
+    build_artifacts,
+)
+from clinical_data_study_buddy.generators.crfgen.tfl.listings import Listing
+
+FORMS = [Listing(id="L1", title="Ages", data=[{"USUBJID": "S-001", "AGE": 34}])]
+
+
+def convert_docx_to_txt(docx_path, forms, outdir):
+    """Writes the text of a .docx file, and the file it was converted from."""
+    text = "\n".join(p.text for p in docx.Document(docx_path).paragraphs)
+    # Staging directories are named after the format they render
+    (outdir / f"{forms[0].id}.{outdir.name[:3]}.txt").write_text(
+        json.dumps({"source": str(docx_path), "text": text})
+    )
+
+
+@pytest.fixture
+def conversions(monkeypatch):
+    """Registers two formats converted from docx."""
+    for name in ("txa", "txb"):
+        monkeypatch.setitem(reg._registry, name, convert_docx_to_txt)
+        monkeypatch.setitem(reg._group_by, name, None)
+        monkeypatch.setitem(reg._templates, name, ())
+        monkeypatch.setitem(reg._intermediates, name, ("docx", convert_docx_to_txt))
+
+
+def _sources(outdir):
+    return {
+        path.name: json.loads(path.read_text())["source"]
+        for path in outdir.glob("*.txt")
+    }
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_build_artifacts_shares_intermediate(tmp_path, conversions, jobs):
+    results = build_artifacts(FORMS, tmp_path, ["txa", "docx", "txb"], jobs=jobs)
+
+    assert [(r.format, r.rendered, r.up_to_date) for r in results] == [
+        ("txa", 1, 0),
+        ("docx", 1, 0),
+        ("txb", 1, 0),
+    ]
+    # Both conversions read the docx artifact, rendered once
+    assert set(_sources(tmp_path).values()) == {str(tmp_path / "L1.docx")}
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        ".build-manifest.json",
+        "L1.docx",
+        "L1.txa.txt",
+        "L1.txb.txt",
+    ]
+
+
+def test_build_artifacts_renders_private_intermediate(tmp_path, conversions):
+    results = build_artifacts(FORMS, tmp_path, ["txa", "txb"], jobs=2)
+
+    assert [(r.format, r.rendered) for r in results] == [
+        ("txa", 1),
+        ("txb", 1),
+        ("docx (intermediate)", 1),
+    ]
+    assert "Ages" in json.loads((tmp_path / "L1.txa.txt").read_text())["text"]
+    assert len(set(_sources(tmp_path).values())) == 1
+    assert not (tmp_path / "L1.docx").exists()
+
+
+def test_build_artifacts_converts_up_to_date_intermediate(tmp_path, conversions):
+    build_artifacts(FORMS, tmp_path, ["docx"])
+    (tmp_path / "L1.txa.txt").unlink(missing_ok=True)
+
+    results = build_artifacts(FORMS, tmp_path, ["docx", "txa"])
+
+    assert [(r.format, r.rendered, r.up_to_date) for r in results] == [
+        ("docx", 0, 1),
+        ("txa", 1, 0),
+    ]
+    assert _sources(tmp_path) == {"L1.txa.txt": str(tmp_path / "L1.docx")}
+
+
+def test_build_artifacts_overlaps_conversions(tmp_path, monkeypatch):
+    """Conversions run concurrently even without worker processes."""
+    monkeypatch.setattr(conversion_service, "_service", ConversionService(workers=2))
+    monkeypatch.setattr(conversion_service, "_service_pid", os.getpid())
+    barrier = threading.Barrier(2, timeout=5)
+
+    def convert_when_both_started(docx_path, forms, outdir):
+        barrier.wait()
+        convert_docx_to_txt(docx_path, forms, outdir)
+
+    for name in ("txa", "txb"):
+        monkeypatch.setitem(reg._registry, name, convert_when_both_started)
+        monkeypatch.setitem(reg._group_by, name, None)
+        monkeypatch.setitem(reg._templates, name, ())
+        monkeypatch.setitem(
+            reg._intermediates, name, ("docx", convert_when_both_started)
+        )
+
+    results = build_artifacts(FORMS, tmp_path, ["docx", "txa", "txb"], jobs=1)
+
+    assert [r.rendered for r in results] == [1, 1, 1]
+
+
+def test_build_artifacts_converts_with_pandoc_service(tmp_path, monkeypatch):
+    pandoc = tmp_path / "pandoc"
+    pandoc.write_text('#!/bin/sh\ncp "$1" "$3"\n')
+    pandoc.chmod(pandoc.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setattr(
+        conversion_service, "_service", ConversionService(pandoc_path=str(pandoc))
+    )
+    monkeypatch.setattr(conversion_service, "_service_pid", os.getpid())
+    outdir = tmp_path / "out"
+
+    build_artifacts(FORMS, outdir, ["pdf", "rtf"])
+
+    docx_bytes = (outdir / "L1.pdf").read_bytes()
+    assert docx_bytes[:2] == b"PK"
+    assert (outdir / "L1.rtf").read_bytes() == docx_bytes
+
+
+def test_build_artifacts_rejects_unknown_formats(tmp_path):
+    with pytest.raises(ValueError, match="Unknown formats: html"):
+        build_artifacts(FORMS, tmp_path, ["csv", "html"])
+
+
+def test_build_artifacts_renders_again_after_helper_changes(tmp_path, monkeypatch):
+    package = tmp_path / "pipeline_probe"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "helpers.py").write_text("HEADER = 'v1'\n")
+    (package / "exporter.py").write_text(
+        "from .helpers import HEADER\n"
+        "\n"
+        "def export_probe(forms, outdir):\n"
+        "    (outdir / 'probe.txt').write_text(HEADER)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    from pipeline_probe.exporter import export_probe
+
+    monkeypatch.setitem(reg._registry, "probe", export_probe)
+    monkeypatch.setitem(reg._group_by, "probe", None)
+    monkeypatch.setitem(reg._templates, "probe", ())
+    outdir = tmp_path / "out"
+
+    build_artifacts(FORMS, outdir, ["probe"])
+    (result,) = build_artifacts(FORMS, outdir, ["probe"])
+    assert (result.rendered, result.up_to_date) == (0, 1)
+
+    (package / "helpers.py").write_text("HEADER = 'v2'\n")
+    (result,) = build_artifacts(FORMS, outdir, ["probe"])
+    assert (result.rendered, result.up_to_date) == (1, 0)
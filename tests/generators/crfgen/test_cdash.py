@@ -1,8 +1,13 @@
 from unittest.mock import MagicMock, patch
 
+import pandas as pd
 import pytest
+from docx import Document
 
+from cdisc_library_client.models.cdashig_domain import CdashigDomain
+from clinical_data_study_buddy.generators.crfgen import cdash
 from clinical_data_study_buddy.generators.crfgen.cdash import (
+    build_domain_crf,
     get_cdashig_variables_from_api,
 )
 
@@ -19,7 +24,8 @@ def test_get_cdashig_variables_from_api_with_pagination(
 ):
     """
     Tests that get_cdashig_variables_from_api correctly handles pagination
-    and fetches all variables across multiple pages.
+    and fetches all variables across multiple pages when the domain document
+    does not embed its fields.
     """
     monkeypatch.setenv("CDISC_PRIMARY_KEY", "test_key")
 
@@ -58,6 +64,9 @@ def test_get_cdashig_variables_from_api_with_pagination(
     with patch(
         "cdisc_library_client.api.cdash_implementation_guide_cdashig.get_mdr_cdashig_version_domains.sync"
     ) as mock_get_domains, patch(
+        "cdisc_library_client.api.cdash_implementation_guide_cdashig.get_mdr_cdashig_version_domains_domain.sync",
+        return_value=None,
+    ), patch(
         "cdisc_library_client.api.cdash_implementation_guide_cdashig.get_mdr_cdashig_version_domains_domain_fields.sync"
     ) as mock_get_fields, patch(
         "cdisc_library_client.api.cdash_implementation_guide_cdashig.get_mdr_cdashig_version_domains_domain_fields_field.sync"
@@ -75,3 +84,107 @@ def test_get_cdashig_variables_from_api_with_pagination(
 
         assert len(df) == 15
         assert df["Variable"].tolist() == [f"field_{i}" for i in range(15)]
+
+
+def test_get_cdashig_variables_from_api_uses_embedded_fields(monkeypatch):
+    """
+    Tests that variables are read from the domain document in one request,
+    with an individual field fetch only for a field missing attributes.
+    """
+    monkeypatch.setenv("CDISC_PRIMARY_KEY", "test_key")
+
+    mock_domains_response = MagicMock()
+    mock_domains_response.field_links.domains = [
+        MagicMock(href="/mdr/cdashig/2-3/domains/VS")
+    ]
+    domain_doc = CdashigDomain.from_dict(
+        {
+            "name": "VS",
+            "fields": [
+                {
+                    "ordinal": "2",
+                    "name": "VSDAT",
+                    "label": "Vital Signs Date",
+                    "prompt": "Date",
+                    "simpleDatatype": "Char",
+                    "completionInstructions": "Record the date.",
+                },
+                {
+                    "ordinal": "1",
+                    "name": "VSPERF",
+                    "label": "Vital Signs Performed",
+                    "simpleDatatype": "Char",
+                    "codelistSubmissionValues": ["N", "Y"],
+                },
+                {"ordinal": "3", "name": "VSTESTCD"},
+            ],
+        }
+    )
+    field_details = MagicMock()
+    field_details.name = "VSTESTCD"
+    field_details.ordinal = "3"
+    field_details.prompt = "Test"
+    field_details.simple_datatype = "Char"
+    field_details.completion_instructions = None
+    field_details.implementation_notes = None
+    field_details.additional_properties = {}
+
+    with patch(
+        "cdisc_library_client.api.cdash_implementation_guide_cdashig.get_mdr_cdashig_version_domains.sync",
+        return_value=mock_domains_response,
+    ), patch(
+        "cdisc_library_client.api.cdash_implementation_guide_cdashig.get_mdr_cdashig_version_domains_domain.sync",
+        return_value=domain_doc,
+    ), patch(
+        "cdisc_library_client.api.cdash_implementation_guide_cdashig.get_mdr_cdashig_version_domains_domain_fields.sync"
+    ) as mock_get_fields, patch(
+        "cdisc_library_client.api.cdash_implementation_guide_cdashig.get_mdr_cdashig_version_domains_domain_fields_field.sync",
+        return_value=field_details,
+    ) as mock_get_field:
+        df = get_cdashig_variables_from_api("2-3")
+
+    mock_get_fields.assert_not_called()
+    mock_get_field.assert_called_once()
+    assert mock_get_field.call_args.kwargs["field"] == "VSTESTCD"
+    assert df["Variable"].tolist() == ["VSDAT", "VSPERF", "VSTESTCD"]
+    assert df["Display Label"].tolist() == ["Date", "Vital Signs Performed", "Test"]
+    assert df.loc[1, "CT Values"] == "N; Y"
+    assert df.loc[0, "CRF Instructions"] == "Record the date."
+
+
+def test_build_domain_crf_reuses_base_document(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdash, "_BASE_DOCUMENTS", {})
+    config = {"version_label": "Version 2.0", "study_metadata": {"protocol_id": "P1"}}
+    domain_df = pd.DataFrame(
+        {
+            "Variable": ["VSDAT", "VSPERF", "VSORRES"],
+            "Order": [1, 2, 3],
+            "Display Label": ["Date", "Performed", "Result"],
+            "Type": ["date", "text", "float"],
+            "CT Values": [None, "N; Y", None],
+        }
+    )
+
+    with patch.object(cdash, "_create_header", wraps=cdash._create_header) as header:
+        build_domain_crf(domain_df, "VS", tmp_path, config)
+        build_domain_crf(domain_df, "AE", tmp_path, config)
+    header.assert_called_once()
+
+    for domain, title in [("VS", "Vital Signs"), ("AE", "Adverse Events")]:
+        document = Document(tmp_path / f"{domain}_{title.replace(' ', '_')}_CRF.docx")
+        section = document.sections[0]
+        assert section.header.tables[0].cell(0, 1).text == title
+        assert section.header.tables[0].cell(1, 0).text.startswith("Subject ID: P1")
+        assert section.footer.paragraphs[-2].text == f"{title}, Version 2.0"
+        assert document.tables[0].cell(1, 0).text == f"Was {title.lower()} completed?"
+        rows = document.tables[1].rows
+        assert [row.cells[0].text for row in rows[:4]] == [
+            "Variable",
+            "VSDAT",
+            "VSPERF",
+            "VSORRES",
+        ]
+        # The copied rows keep the column widths and their own entry controls
+        assert rows[3].cells[5].width == rows[0].cells[5].width
+        xml = rows[2].cells[4]._tc.xml
+        assert xml.count("w14:checkbox") == 2 and "w14:date" not in xml
@@ -0,0 +1,44 @@
+import docx
+
+from clinical_data_study_buddy.generators.crfgen.docx_table import (
+    STREAMING_THRESHOLD,
+    TableWriter,
+)
+from clinical_data_study_buddy.generators.crfgen.exporter.docx import export_docx
+from clinical_data_study_buddy.generators.crfgen.tfl.listings import Listing
+
+ROWS = [
+    ["S-001", 34, None],
+    ["S-002", "  padded ", "tab\there"],
+    ["S-003 & <4>", "line\nbreak\r\n", ""],
+    ["S-004"],
+]
+
+
+def test_table_writer_matches_python_docx_rows():
+    expected = docx.Document().add_table(rows=1, cols=3)
+    for row in ROWS:
+        cells = expected.add_row().cells
+        for i, value in enumerate(row):
+            cells[i].text = str(value)
+
+    table = docx.Document().add_table(rows=1, cols=3)
+    # Several batches, the last one partial
+    assert TableWriter(table, batch_rows=3).write_rows(ROWS) == len(ROWS)
+
+    assert table._tbl.xml == expected._tbl.xml
+    assert table.cell(2, 1).text == "  padded "
+    assert table.cell(3, 1).text == "line\nbreak\n\n"
+
+
+def test_export_docx_streams_large_tables(tmp_path):
+    data = [
+        {"USUBJID": f"S-{i:04d}", "AGE": 20 + i % 50}
+        for i in range(STREAMING_THRESHOLD + 5)
+    ]
+    export_docx([Listing(id="L1", title="Ages", data=data)], tmp_path)
+
+    (table,) = docx.Document(tmp_path / "L1.docx").tables
+    assert len(table.rows) == len(data) + 1
+    assert [cell.text for cell in table.rows[0].cells] == ["USUBJID", "AGE"]
+    assert [cell.text for cell in table.rows[-1].cells] == ["S-0204", "24"]
@@ -0,0 +1,77 @@
+from clinical_data_study_buddy.generators.build_manifest import (
+    MANIFEST_NAME,
+    BuildManifest,
+    digest,
+    files_digest,
+    source_digest,
+)
+
+
+def test_digest():
+    assert digest("ab", "c") != digest("a", "bc")
+    assert digest({"a": 1, "b": 2}) == digest({"b": 2, "a": 1})
+    assert digest(b"x") != digest("x")
+
+
+def test_files_digest_tracks_contents(tmp_path):
+    template = tmp_path / "form.j2"
+    template.write_text("{{ form.title }}")
+    before = files_digest([template, tmp_path / "missing.j2"])
+    template.write_text("{{ form.domain }}")
+    assert files_digest([template, tmp_path / "missing.j2"]) != before
+
+
+def test_build_manifest_round_trip(tmp_path):
+    manifest = BuildManifest.load(tmp_path)
+    assert manifest.entries == {}
+
+    (tmp_path / "VS.md").write_text("# Vital Signs")
+    manifest.record("md/VS", "1234", ["VS.md"])
+    manifest.save()
+    assert (tmp_path / MANIFEST_NAME).is_file()
+
+    manifest = BuildManifest.load(tmp_path)
+    assert manifest.is_current("md/VS", "1234")
+    assert not manifest.is_current("md/VS", "5678")
+    assert not manifest.is_current("md/AE", "1234")
+    # Deleted outputs are rendered again
+    (tmp_path / "VS.md").unlink()
+    assert not manifest.is_current("md/VS", "1234")
+
+
+def test_build_manifest_ignores_unreadable_manifest(tmp_path):
+    (tmp_path / MANIFEST_NAME).write_text("not json")
+    assert BuildManifest.load(tmp_path).entries == {}
+    (tmp_path / MANIFEST_NAME).write_text('{"version": 0, "entries": {"md": {}}}')
+    assert BuildManifest.load(tmp_path).entries == {}
+
+
+def _write_package(root, name):
+    package = root / name
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "helpers.py").write_text("SHADE = 'grey'\n")
+    (package / "lazy.py").write_text("")
+    (package / "exporter.py").write_text(
+        "from .helpers import SHADE\n"
+        "\n"
+        "def export():\n"
+        "    from . import lazy\n"
+        "    return SHADE, lazy\n"
+    )
+    return package
+
+
+def test_source_digest_tracks_imported_modules(tmp_path, monkeypatch):
+    package = _write_package(tmp_path, "manifest_probe")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    from manifest_probe.exporter import export
+
+    before = source_digest(export)
+    assert source_digest(export) == before
+    # Editing a module the exporter imports, even lazily, changes the digest
+    (package / "helpers.py").write_text("SHADE = 'blue'\n")
+    after = source_digest(export)
+    assert after != before
+    (package / "lazy.py").write_text("LAZY = True\n")
+    assert source_digest(export) != after
@@ -1,17 +1,60 @@
 import os
 import zipfile
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
+import httpx
 import pandas as pd
 import pytest
 
+from cdisc_library_client.client import AuthenticatedClient
 from clinical_data_study_buddy.generators.dataset_helpers import (
-    apply_study_story,
     generate_define_xml,
     package_datasets,
 )
 
 
+DATASETS = {
+    "DM": {
+        "name": "DM",
+        "datasetVariables": [
+            {
+                "name": "USUBJID",
+                "label": "Unique Subject Identifier",
+                "simpleDatatype": "Char",
+            },
+            {"name": "AGE", "label": "Age", "simpleDatatype": "Num"},
+        ],
+    },
+    "AE": {
+        "name": "AE",
+        "datasetVariables": [
+            {
+                "name": "AETERM",
+                "label": "Reported Term for the Adverse Event",
+                "simpleDatatype": "Char",
+            }
+        ],
+    },
+}
+
+
+def _library_client(requests):
+    """Returns a client serving the SDTMIG datasets and recording request paths."""
+
+    def handler(request):
+        requests.append(request.url.path)
+        dataset = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json=DATASETS[dataset])
+
+    return AuthenticatedClient(
+        base_url="https://library.cdisc.org/api",
+        token="test-key",
+        auth_header_name="api-key",
+        prefix="",
+        httpx_args={"transport": httpx.MockTransport(handler)},
+    )
+
+
 @pytest.fixture
 def temp_dir(tmp_path):
     """Create a temporary directory for test files."""
@@ -73,68 +116,10 @@ def test_package_datasets_cleans_temp_dir(setup_test_data, temp_dir):
     assert not os.path.exists(temp_dir_path_str)
 
 
-def test_apply_study_story_high_dropout(setup_test_data):
-    """Test the 'high_dropout' study story."""
-    num_subjects = 5
-    domains = ["DM", "AE"]
-    apply_study_story("high_dropout", setup_test_data, num_subjects, domains, "csv")
-
-    # DM should be unchanged
-    dm_df = pd.read_csv(setup_test_data / "sdtm_dm_test.csv")
-    assert len(dm_df) == 5
-
-    # AE should have fewer subjects
-    ae_df = pd.read_csv(setup_test_data / "sdtm_ae_test.csv")
-    assert len(ae_df) < 5
-
-
-def test_apply_study_story_high_dropout_dm_not_found(setup_test_data):
-    """Test high_dropout story when DM domain is not found."""
-    os.remove(setup_test_data / "sdtm_dm_test.csv")
-    num_subjects = 5
-    domains = ["DM", "AE"]
-    apply_study_story("high_dropout", setup_test_data, num_subjects, domains, "csv")
-
-    # AE should be unchanged
-    ae_df = pd.read_csv(setup_test_data / "sdtm_ae_test.csv")
-    assert len(ae_df) == 5
-
-
-def test_apply_study_story_high_dropout_unsupported_format(setup_test_data):
-    """Test high_dropout story with an unsupported file format."""
-    num_subjects = 5
-    domains = ["DM", "AE"]
-    apply_study_story("high_dropout", setup_test_data, num_subjects, domains, "json")
-
-    # AE should be unchanged
-    ae_df = pd.read_csv(setup_test_data / "sdtm_ae_test.csv")
-    assert len(ae_df) == 5
-
-
-def test_apply_study_story_invalid_story(setup_test_data):
-    """Test that nothing happens when an invalid story name is passed."""
-    num_subjects = 5
-    domains = ["DM", "AE"]
-    apply_study_story("invalid_story", setup_test_data, num_subjects, domains, "csv")
-
-    # Both files should be unchanged
-    dm_df = pd.read_csv(setup_test_data / "sdtm_dm_test.csv")
-    assert len(dm_df) == 5
-    ae_df = pd.read_csv(setup_test_data / "sdtm_ae_test.csv")
-    assert len(ae_df) == 5
-
-
-@patch("httpx.get")
-def test_generate_define_xml_creates_file(mock_get, setup_test_data):
+@patch("clinical_data_study_buddy.generators.dataset_helpers.get_client")
+def test_generate_define_xml_creates_file(mock_get_client, setup_test_data):
     """Test that generate_define_xml creates a define.xml file."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "label": "Subject ID",
-        "datatype": "text",
-        "length": 10,
-    }
-    mock_get.return_value = mock_response
+    mock_get_client.return_value = _library_client([])
     os.environ["CDISC_API_KEY"] = "test-key"
 
     domains = ["DM"]
@@ -158,43 +143,34 @@ def test_generate_define_xml_no_api_key(setup_test_data):
         assert "<ODM></ODM>" in content
 
 
-@patch("httpx.get")
-def test_generate_define_xml_with_mocked_api(mock_get, setup_test_data):
+@patch("clinical_data_study_buddy.generators.dataset_helpers.get_client")
+def test_generate_define_xml_with_mocked_api(mock_get_client, setup_test_data):
     """Test define.xml generation with a mocked CDISC Library API."""
-    mock_responses = {
-        "https://library.cdisc.org/products/sdtmig/3-3/datasets/DM/variables/USUBJID": {
-            "label": "Unique Subject Identifier",
-            "datatype": "text",
-            "length": 20,
-        },
-        "https://library.cdisc.org/products/sdtmig/3-3/datasets/DM/variables/AGE": {
-            "label": "Age",
-            "datatype": "integer",
-            "length": 3,
-        },
-    }
-
-    def mock_get_side_effect(url, headers, timeout, follow_redirects):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_responses.get(url, {})
-        return mock_response
-
-    mock_get.side_effect = mock_get_side_effect
+    requests = []
+    mock_get_client.return_value = _library_client(requests)
     os.environ["CDISC_API_KEY"] = "test-key"
 
-    domains = ["DM"]
+    domains = ["DM", "AE"]
     generate_define_xml(setup_test_data, domains)
     define_xml_path = setup_test_data / "define.xml"
     assert define_xml_path.exists()
 
+    # One request per domain, not one per variable
+    assert sorted(requests) == [
+        "/api/mdr/sdtmig/3-3/datasets/AE",
+        "/api/mdr/sdtmig/3-3/datasets/DM",
+    ]
+    mock_get_client.assert_called_once_with(api_key="test-key")
+
     with open(define_xml_path, "r") as f:
         content = f.read()
         assert 'OID="IG.DM"' in content
         assert 'OID="IT.DM.USUBJID"' in content
         assert 'OID="IT.DM.AGE"' in content
+        assert 'DataType="float"' in content
         assert (
             '<TranslatedText xml:lang="en">Unique Subject Identifier</TranslatedText>'
             in content
         )
         assert '<TranslatedText xml:lang="en">Age</TranslatedText>' in content
+        assert 'OID="IT.AE.AETERM"' in content
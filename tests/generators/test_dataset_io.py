@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from clinical_data_study_buddy.generators.crfgen.tfl.tfl_generator import TFLGenerator
+from clinical_data_study_buddy.generators.dataset_io import (
+    dataset_columns,
+    read_dataset,
+    write_chunks,
+)
+
+DM = pd.DataFrame(
+    {
+        "USUBJID": ["S-001", "S-002", "S-003"],
+        "AGE": [34, 51, 47],
+        "WEIGHT": [70.5, 82.25, 64.0],
+        "SEX": ["F", "M", "F"],
+    }
+)
+
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet", "xpt"])
+def test_read_dataset_loads_requested_columns(tmp_path, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"DM.{output_format}"
+    write_chunks([DM.iloc[:2], DM.iloc[2:]], path)
+
+    assert dataset_columns(path) == list(DM.columns)
+    subset = read_dataset(path, columns=["WEIGHT", "USUBJID", "MISSING"])
+    assert sorted(subset.columns) == ["USUBJID", "WEIGHT"]
+    assert list(subset["USUBJID"]) == list(DM["USUBJID"])
+    assert list(subset["WEIGHT"]) == list(DM["WEIGHT"])
+    assert subset["WEIGHT"].dtype == float
+
+
+def test_read_dataset_csv_dtype(tmp_path):
+    path = tmp_path / "DM.csv"
+    write_chunks([DM], path)
+    assert read_dataset(path, columns=["AGE"], dtype=str)["AGE"].tolist() == [
+        "34",
+        "51",
+        "47",
+    ]
+
+
+def test_read_dataset_unsupported_format(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported dataset format: json"):
+        read_dataset(tmp_path / "DM.json")
+
+
+def test_tfl_generator_loads_only_used_columns(tmp_path):
+    write_chunks([DM], tmp_path / "DM.xpt")
+    write_chunks([DM], tmp_path / "DM.csv")
+    write_chunks([DM], tmp_path / "VS.csv")
+    generator = TFLGenerator(
+        {
+            "tfls": [
+                {"type": "table", "id": "t1", "title": "Age", "domain": "DM"},
+                {
+                    "type": "listing",
+                    "id": "l1",
+                    "title": "Sex",
+                    "domain": "DM",
+                    "columns": ["SEX"],
+                },
+            ],
+            "data_path": str(tmp_path),
+        }
+    )
+    generator._load_data()
+    # VS is not used by any TFL; DM is read from the typed XPT file
+    assert list(generator.data) == ["DM"]
+    assert list(generator.data["DM"].columns) == list(DM.columns)
+    assert generator.data["DM"]["AGE"].dtype == float
+
+    generator.tfls_config[0]["columns"] = ["USUBJID", "AGE"]
+    generator.data = {}
+    generator._load_data()
+    assert sorted(generator.data["DM"].columns) == ["AGE", "SEX", "USUBJID"]
@@ -0,0 +1,104 @@
+import hashlib
+import io
+import json
+import zipfile
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from clinical_data_study_buddy.generators import dataset_package
+from clinical_data_study_buddy.generators.dataset_package import (
+    MANIFEST_NAME,
+    DatasetPackage,
+)
+
+
+def _chunks(rows, chunk_size=10_000):
+    rng = np.random.default_rng(0)
+    for start in range(0, rows, chunk_size):
+        size = min(chunk_size, rows - start)
+        yield pd.DataFrame(
+            {
+                "USUBJID": [f"SUBJ-{i:06d}" for i in range(start, start + size)],
+                "VSORRES": rng.normal(70, 10, size).round(1),
+            }
+        )
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_dataset_package_streams_datasets(tmp_path, jobs):
+    """Members deflated by several threads read back as a single stream."""
+    path = tmp_path / "package.zip"
+    with DatasetPackage(path, jobs=jobs, level=6) as package:
+        rows = package.write_chunks("VS.csv", _chunks(200_000))
+
+    assert rows == 200_000
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        info = zf.getinfo("VS.csv")
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        # The member spans several parallel blocks and still compresses well
+        assert info.file_size > 2 * (1 << 20)
+        assert info.compress_size < info.file_size / 2
+        data = zf.read("VS.csv")
+    expected = pd.concat(list(_chunks(200_000)), ignore_index=True)
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(data)), expected)
+
+
+def test_dataset_package_replaces_zipfile_compressor(tmp_path):
+    """Fails if zipfile no longer keeps a replaceable member compressor."""
+    with zipfile.ZipFile(tmp_path / "probe.zip", "w", zipfile.ZIP_DEFLATED) as zf:
+        with zf.open("probe", "w") as member:
+            raw_deflate = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+            assert dataset_package._replace_compressor(member, raw_deflate)
+            member.write(b"probe")
+    with zipfile.ZipFile(tmp_path / "probe.zip") as zf:
+        assert zf.read("probe") == b"probe"
+
+
+def test_dataset_package_falls_back_to_zipfile_compression(tmp_path, monkeypatch):
+    """Members are deflated by zipfile when its compressor cannot be replaced."""
+    monkeypatch.setattr(dataset_package, "_ZLIB_COMPRESSOR", type(None))
+    path = tmp_path / "package.zip"
+    with DatasetPackage(path, jobs=4) as package:
+        package.write_chunks("VS.csv", _chunks(50_000))
+
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        data = zf.read("VS.csv")
+    expected = pd.concat(list(_chunks(50_000)), ignore_index=True)
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(data)), expected)
+
+
+def test_dataset_package_writes_manifest(tmp_path):
+    path = tmp_path / "package.zip"
+    define_xml = tmp_path / "define.xml"
+    define_xml.write_text("<ODM></ODM>")
+    with DatasetPackage(path, compression="stored") as package:
+        package.write_chunks("DM.csv", _chunks(25, chunk_size=10))
+        package.write_file(define_xml)
+        package.write_bytes("README.txt", "Synthetic data")
+
+    with zipfile.ZipFile(path) as zf:
+        assert zf.namelist() == ["DM.csv", "define.xml", "README.txt", MANIFEST_NAME]
+        manifest = json.loads(zf.read(MANIFEST_NAME))
+        contents = {name: zf.read(name) for name in zf.namelist()}
+
+    assert manifest["compression"] == "stored"
+    dm, define, readme = manifest["files"]
+    assert dm["rows"] == 25
+    assert dm["columns"] == ["USUBJID", "VSORRES"]
+    assert dm["format"] == "csv"
+    for entry in manifest["files"]:
+        content = contents[entry["name"]]
+        assert entry["size"] == len(content)
+        assert entry["sha256"] == hashlib.sha256(content).hexdigest()
+    assert "rows" not in define
+
+
+def test_dataset_package_unsupported_compression(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported compression: rar"):
+        DatasetPackage(tmp_path / "package.zip", compression="rar")
+    assert not (tmp_path / "package.zip").exists()
@@ -1,5 +1,9 @@
+import io
+import json
+import zipfile
 from unittest.mock import patch
 
+import pandas as pd
 import pytest
 
 from clinical_data_study_buddy.core.models.schema import FieldDef, Form
@@ -57,32 +61,32 @@ def mock_data_generator():
         "clinical_data_study_buddy.generators.edc_raw_dataset_package_generator.DataGenerator"
     ) as mock:
         instance = mock.return_value
-        instance.generate.return_value = [{"USUBJID": "1"}, {"USUBJID": "2"}]
+        instance.chunk_plan.return_value = [(None, 2)]
+        instance.form_data.fields = []
+        instance.generate_records.side_effect = lambda rng, size: pd.DataFrame(
+            index=pd.RangeIndex(size)
+        )
         yield mock
 
 
 @pytest.fixture
-def mock_apply_study_story():
+def mock_build_define_xml():
     with patch(
-        "clinical_data_study_buddy.generators.edc_raw_dataset_package_generator.apply_study_story"
+        "clinical_data_study_buddy.generators.edc_raw_dataset_package_generator.build_define_xml"
     ) as mock:
+        mock.return_value = b"<ODM></ODM>"
         yield mock
 
 
-@pytest.fixture
-def mock_generate_define_xml():
-    with patch(
-        "clinical_data_study_buddy.generators.edc_raw_dataset_package_generator.generate_define_xml"
-    ) as mock:
-        yield mock
+def _read_member(output_dir, name):
+    with zipfile.ZipFile(output_dir / "edc_raw_datasets.zip") as zf:
+        return zf.read(name)
 
 
-@pytest.fixture
-def mock_package_datasets():
-    with patch(
-        "clinical_data_study_buddy.generators.edc_raw_dataset_package_generator.package_datasets"
-    ) as mock:
-        yield mock
+def _read_dataset(output_dir, name):
+    with zipfile.ZipFile(output_dir / "edc_raw_datasets.zip") as zf:
+        with zf.open(name) as member:
+            return pd.read_csv(member)
 
 
 def test_edc_raw_dataset_package_generator(
@@ -90,9 +94,7 @@ def test_edc_raw_dataset_package_generator(
     mock_get_api_key,
     mock_harvest,
     mock_data_generator,
-    mock_apply_study_story,
-    mock_generate_define_xml,
-    mock_package_datasets,
+    mock_build_define_xml,
 ):
     output_dir = tmp_path
     generator = EDCRawDatasetPackageGenerator(
@@ -109,40 +111,54 @@ def test_edc_raw_dataset_package_generator(
     assert mock_get_api_key.called
     assert mock_harvest.called
     assert mock_data_generator.called
-    assert not mock_apply_study_story.called
-    assert mock_generate_define_xml.called
-    assert mock_package_datasets.called
-
-    # Assert that the temp directory was created
-    temp_dir = output_dir / "temp_datasets"
-    assert temp_dir.exists()
+    mock_build_define_xml.assert_called_once_with(
+        {"DM": ["USUBJID"], "AE": ["USUBJID"]}
+    )
 
-    # Assert that the datasets were created
-    assert (temp_dir / "DM.csv").exists()
-    assert (temp_dir / "AE.csv").exists()
+    # The datasets are streamed into the package, without a temp directory
+    assert not (output_dir / "temp_datasets").exists()
+    with zipfile.ZipFile(output_dir / "edc_raw_datasets.zip") as zf:
+        assert zf.namelist() == ["DM.csv", "AE.csv", "define.xml", "manifest.json"]
+        assert zf.testzip() is None
 
 
 def test_edc_raw_dataset_package_generator_with_study_story(
     tmp_path,
     mock_get_api_key,
     mock_harvest,
-    mock_data_generator,
-    mock_apply_study_story,
-    mock_generate_define_xml,
-    mock_package_datasets,
+    mock_build_define_xml,
 ):
     output_dir = tmp_path
     generator = EDCRawDatasetPackageGenerator(
         num_subjects=10,
         therapeutic_area="Oncology",
-        domains=["DM"],
-        study_story="mystory",
+        domains=["DM", "AE"],
+        study_story="high_dropout,missing_data",
         output_dir=output_dir,
         output_format="csv",
+        seed=1,
     )
     generator.generate()
 
-    assert mock_apply_study_story.called
+    dm = _read_dataset(output_dir, "DM.csv")
+    assert len(dm) == 10
+    assert dm["USUBJID"].notna().all()
+
+
+def test_edc_raw_dataset_package_generator_unknown_study_story(
+    tmp_path, mock_get_api_key, mock_harvest
+):
+    generator = EDCRawDatasetPackageGenerator(
+        num_subjects=10,
+        therapeutic_area="Oncology",
+        domains=["DM"],
+        study_story="mystory",
+        output_dir=tmp_path,
+        output_format="csv",
+    )
+    with pytest.raises(ValueError, match="Unknown study story: mystory"):
+        generator.generate()
+    assert not mock_harvest.called
 
 
 def test_edc_raw_dataset_package_generator_domain_not_found(
@@ -150,9 +166,7 @@ def test_edc_raw_dataset_package_generator_domain_not_found(
     mock_get_api_key,
     mock_harvest,
     mock_data_generator,
-    mock_apply_study_story,
-    mock_generate_define_xml,
-    mock_package_datasets,
+    mock_build_define_xml,
     capsys,
 ):
     output_dir = tmp_path
@@ -168,4 +182,105 @@ def test_edc_raw_dataset_package_generator_domain_not_found(
 
     captured = capsys.readouterr()
     assert "Warning: Domain VS not found in CDISC Library. Skipping." in captured.out
-    assert not (output_dir / "temp_datasets" / "VS.csv").exists()
+    with zipfile.ZipFile(output_dir / "edc_raw_datasets.zip") as zf:
+        assert "VS.csv" not in zf.namelist()
+
+
+def _generate_package(output_dir, seed, jobs):
+    EDCRawDatasetPackageGenerator(
+        num_subjects=25,
+        therapeutic_area="Oncology",
+        domains=["DM", "AE"],
+        study_story="none",
+        output_dir=output_dir,
+        output_format="csv",
+        seed=seed,
+        jobs=jobs,
+    ).generate()
+    return {name: _read_member(output_dir, name) for name in ("DM.csv", "AE.csv")}
+
+
+def test_edc_raw_dataset_package_generator_is_reproducible_across_jobs(
+    tmp_path,
+    mock_get_api_key,
+    mock_harvest,
+    mock_build_define_xml,
+):
+    serial = _generate_package(tmp_path / "serial", seed=7, jobs=1)
+    parallel = _generate_package(tmp_path / "parallel", seed=7, jobs=2)
+    reseeded = _generate_package(tmp_path / "reseeded", seed=8, jobs=1)
+
+    assert serial == parallel
+    assert serial != reseeded
+    # Each domain has its own random stream
+    assert serial["DM.csv"].splitlines()[1:] != serial["AE.csv"].splitlines()[1:]
+
+
+def test_edc_raw_dataset_package_generator_links_domains_by_subject(
+    tmp_path,
+    mock_get_api_key,
+    mock_harvest,
+    mock_build_define_xml,
+):
+    """Every domain is derived from the same subjects."""
+    _generate_package(tmp_path, seed=11, jobs=1)
+    dm = _read_dataset(tmp_path, "DM.csv")
+    ae = _read_dataset(tmp_path, "AE.csv")
+
+    assert dm["USUBJID"].is_unique
+    assert len(dm) == 25
+    assert set(ae["USUBJID"]) <= set(dm["USUBJID"])
+    assert list(ae.columns) == ["USUBJID", "AETERM"]
+
+
+def test_edc_raw_dataset_package_generator_writes_manifest(
+    tmp_path, mock_get_api_key, mock_harvest, mock_build_define_xml
+):
+    _generate_package(tmp_path, seed=3, jobs=2)
+    manifest = json.loads(_read_member(tmp_path, "manifest.json"))
+
+    assert manifest["compression"] == "deflate"
+    files = {entry["name"]: entry for entry in manifest["files"]}
+    assert set(files) == {"DM.csv", "AE.csv", "define.xml"}
+    assert files["DM.csv"]["rows"] == 25
+    assert files["DM.csv"]["columns"] == ["USUBJID"]
+    assert files["DM.csv"]["size"] == len(_read_member(tmp_path, "DM.csv"))
+
+
+def test_edc_raw_dataset_package_generator_writes_xpt(
+    tmp_path, mock_get_api_key, mock_harvest, mock_build_define_xml
+):
+    EDCRawDatasetPackageGenerator(
+        num_subjects=10,
+        therapeutic_area="Oncology",
+        domains=["DM", "AE"],
+        study_story="none",
+        output_dir=tmp_path,
+        output_format="xpt",
+        seed=5,
+    ).generate()
+
+    with zipfile.ZipFile(tmp_path / "edc_raw_datasets.zip") as zf:
+        assert {"DM.xpt", "AE.xpt"} <= set(zf.namelist())
+        with zf.open("DM.xpt") as member:
+            dm = pd.read_sas(
+                io.BytesIO(member.read()), format="xport", encoding="utf-8"
+            )
+    assert len(dm) == 10
+    assert dm["USUBJID"].is_unique
+
+
+def test_edc_raw_dataset_package_generator_unsupported_format(
+    tmp_path, mock_get_api_key, mock_harvest
+):
+    generator = EDCRawDatasetPackageGenerator(
+        num_subjects=10,
+        therapeutic_area="Oncology",
+        domains=["DM"],
+        study_story="none",
+        output_dir=tmp_path,
+        output_format="json",
+    )
+    with pytest.raises(ValueError, match="Unsupported dataset format: json"):
+        generator.generate()
+    assert not mock_harvest.called
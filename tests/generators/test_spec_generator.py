@@ -1,6 +1,8 @@
+import asyncio
 from pathlib import Path
 from unittest.mock import MagicMock, call, patch
 
+import openpyxl
 import pandas as pd
 import pytest
 
@@ -9,6 +11,15 @@ from clinical_data_study_buddy.generators.spec import (
     generate_template,
     validate,
 )
+from clinical_data_study_buddy.generators.spec_model import Spec, SpecDomain
+
+
+def _spec(**sheets):
+    """Builds a loaded spec from spec sheets given as DataFrames."""
+    return Spec(
+        digest="0" * 64,
+        domains={name: SpecDomain.from_frame(name, df) for name, df in sheets.items()},
+    )
 
 
 @pytest.fixture
@@ -18,7 +29,7 @@ def mock_cdisc_client():
 
 
 # Tests for generate_template
-@patch("clinical_data_study_buddy.generators.spec.get_client")
+@patch("clinical_data_study_buddy.generators.spec.get_async_client")
 @patch("clinical_data_study_buddy.generators.spec.openpyxl.Workbook")
 def test_generate_template_sdtmig(
     mock_workbook_class, mock_get_client, mock_cdisc_client
@@ -51,7 +62,7 @@ def test_generate_template_sdtmig(
     }
 
     with patch(
-        "clinical_data_study_buddy.generators.spec.get_mdr_sdtmig_version_datasets_dataset.sync",
+        "clinical_data_study_buddy.generators.spec.get_mdr_sdtmig_version_datasets_dataset.asyncio",
         return_value=mock_response,
     ) as mock_api_call:
         # Act
@@ -89,21 +100,14 @@ def test_generate_template_sdtmig(
 
 
 # Tests for generate_dataset
-@patch("clinical_data_study_buddy.generators.spec.openpyxl.load_workbook")
-@patch("clinical_data_study_buddy.generators.spec.pd.read_excel")
+@patch("clinical_data_study_buddy.generators.spec.load_spec")
 @patch("clinical_data_study_buddy.generators.spec.DataGenerator")
-@patch("clinical_data_study_buddy.generators.spec.pd.DataFrame.to_csv")
-def test_generate_dataset(
-    mock_to_csv, mock_data_generator_class, mock_read_excel, mock_load_workbook
-):
+@patch("clinical_data_study_buddy.generators.spec.write_chunks")
+def test_generate_dataset(mock_write_chunks, mock_data_generator_class, mock_load_spec):
     # Arrange
     spec_path = "spec.xlsx"
     output_dir = "output"
 
-    mock_workbook = MagicMock()
-    mock_workbook.sheetnames = ["DM", "AE"]
-    mock_load_workbook.return_value = mock_workbook
-
     spec_df = pd.DataFrame(
         {
             "Variable Name": ["STUDYID"],
@@ -111,17 +115,18 @@ def test_generate_dataset(
             "Data Type": ["Char"],
         }
     )
-    mock_read_excel.return_value = spec_df
+    mock_load_spec.return_value = _spec(DM=spec_df, AE=spec_df)
 
     mock_data_generator = MagicMock()
-    mock_data_generator.generate.return_value = [{"STUDYID": "TEST01"}]
+    chunks = iter([pd.DataFrame({"STUDYID": ["TEST01"]})])
+    mock_data_generator.iter_chunks.return_value = chunks
     mock_data_generator_class.return_value = mock_data_generator
 
     # Act
     generate_dataset(spec_path, output_dir)
 
     # Assert
-    assert mock_read_excel.call_count == 2
+    mock_load_spec.assert_called_once_with(Path(spec_path))
     assert mock_data_generator_class.call_count == 2
 
     # Check that DataGenerator was instantiated correctly for DM
@@ -134,23 +139,27 @@ def test_generate_dataset(
     assert field_def.datatype == "text"  # 'Char' should be mapped to 'text'
     assert field_def.cdash_var == "STUDYID"
 
-    assert mock_data_generator.generate.call_count == 2
-    mock_data_generator.generate.assert_called_with(num_subjects=50)
+    assert mock_data_generator.iter_chunks.call_count == 2
+    mock_data_generator.iter_chunks.assert_called_with(num_subjects=50)
 
-    assert mock_to_csv.call_count == 2
+    assert mock_write_chunks.call_count == 2
     dm_output_path = Path(output_dir) / "DM.csv"
     ae_output_path = Path(output_dir) / "AE.csv"
-    mock_to_csv.assert_has_calls(
-        [call(dm_output_path, index=False), call(ae_output_path, index=False)],
+    variables = mock_data_generator.variables.return_value
+    mock_write_chunks.assert_has_calls(
+        [
+            call(chunks, dm_output_path, variables=variables),
+            call(chunks, ae_output_path, variables=variables),
+        ],
         any_order=True,
     )
 
 
 # Tests for validate
-@patch("clinical_data_study_buddy.generators.spec.pd.read_csv")
-@patch("clinical_data_study_buddy.generators.spec.pd.read_excel")
+@patch("pandas.read_csv")
+@patch("clinical_data_study_buddy.generators.spec.load_spec")
 @patch("builtins.print")
-def test_validate_success(mock_print, mock_read_excel, mock_read_csv):
+def test_validate_success(mock_print, mock_load_spec, mock_read_csv):
     # Arrange
     spec_path = "spec.xlsx"
     dataset_path = "DM.csv"
@@ -159,7 +168,7 @@ def test_validate_success(mock_print, mock_read_excel, mock_read_csv):
         {"Variable Name": ["STUDYID", "USUBJID"], "Data Type": ["Char", "Char"]}
     )
     dataset_df = pd.DataFrame({"STUDYID": ["TEST01"], "USUBJID": ["SUBJ-01"]})
-    mock_read_excel.return_value = spec_df
+    mock_load_spec.return_value = _spec(**{Path(dataset_path).stem: spec_df})
     mock_read_csv.return_value = dataset_df
 
     # Act
@@ -171,10 +180,10 @@ def test_validate_success(mock_print, mock_read_excel, mock_read_csv):
     )
 
 
-@patch("clinical_data_study_buddy.generators.spec.pd.read_csv")
-@patch("clinical_data_study_buddy.generators.spec.pd.read_excel")
+@patch("pandas.read_csv")
+@patch("clinical_data_study_buddy.generators.spec.load_spec")
 @patch("builtins.print")
-def test_validate_missing_columns(mock_print, mock_read_excel, mock_read_csv):
+def test_validate_missing_columns(mock_print, mock_load_spec, mock_read_csv):
     # Arrange
     spec_path = "spec.xlsx"
     dataset_path = "DM.csv"
@@ -183,7 +192,7 @@ def test_validate_missing_columns(mock_print, mock_read_excel, mock_read_csv):
         {"Variable Name": ["STUDYID", "USUBJID"], "Data Type": ["Char", "Char"]}
     )
     dataset_df = pd.DataFrame({"STUDYID": ["TEST01"]})
-    mock_read_excel.return_value = spec_df
+    mock_load_spec.return_value = _spec(**{Path(dataset_path).stem: spec_df})
     mock_read_csv.return_value = dataset_df
 
     # Act
@@ -196,17 +205,17 @@ def test_validate_missing_columns(mock_print, mock_read_excel, mock_read_csv):
     )
 
 
-@patch("clinical_data_study_buddy.generators.spec.pd.read_csv")
-@patch("clinical_data_study_buddy.generators.spec.pd.read_excel")
+@patch("pandas.read_csv")
+@patch("clinical_data_study_buddy.generators.spec.load_spec")
 @patch("builtins.print")
-def test_validate_extra_columns(mock_print, mock_read_excel, mock_read_csv):
+def test_validate_extra_columns(mock_print, mock_load_spec, mock_read_csv):
     # Arrange
     spec_path = "spec.xlsx"
     dataset_path = "DM.csv"
 
     spec_df = pd.DataFrame({"Variable Name": ["STUDYID"], "Data Type": ["Char"]})
     dataset_df = pd.DataFrame({"STUDYID": ["TEST01"], "EXTRACOL": ["extra"]})
-    mock_read_excel.return_value = spec_df
+    mock_load_spec.return_value = _spec(**{Path(dataset_path).stem: spec_df})
     mock_read_csv.return_value = dataset_df
 
     # Act
@@ -219,17 +228,17 @@ def test_validate_extra_columns(mock_print, mock_read_excel, mock_read_csv):
     )
 
 
-@patch("clinical_data_study_buddy.generators.spec.pd.read_csv")
-@patch("clinical_data_study_buddy.generators.spec.pd.read_excel")
+@patch("pandas.read_csv")
+@patch("clinical_data_study_buddy.generators.spec.load_spec")
 @patch("builtins.print")
-def test_validate_dtype_error(mock_print, mock_read_excel, mock_read_csv):
+def test_validate_dtype_error(mock_print, mock_load_spec, mock_read_csv):
     # Arrange
     spec_path = "spec.xlsx"
     dataset_path = "VS.csv"
 
     spec_df = pd.DataFrame({"Variable Name": ["VSSTRESN"], "Data Type": ["Num"]})
     dataset_df = pd.DataFrame({"VSSTRESN": ["not-a-number"]})
-    mock_read_excel.return_value = spec_df
+    mock_load_spec.return_value = _spec(**{Path(dataset_path).stem: spec_df})
     mock_read_csv.return_value = dataset_df
 
     # Act
@@ -242,7 +251,7 @@ def test_validate_dtype_error(mock_print, mock_read_excel, mock_read_csv):
     )
 
 
-@patch("clinical_data_study_buddy.generators.spec.get_client")
+@patch("clinical_data_study_buddy.generators.spec.get_async_client")
 @patch("clinical_data_study_buddy.generators.spec.openpyxl.Workbook")
 def test_generate_template_adamig(
     mock_workbook_class, mock_get_client, mock_cdisc_client
@@ -279,7 +288,7 @@ def test_generate_template_adamig(
     }
 
     with patch(
-        "clinical_data_study_buddy.generators.spec.get_mdr_adam_product_datastructures_structure.sync",
+        "clinical_data_study_buddy.generators.spec.get_mdr_adam_product_datastructures_structure.asyncio",
         return_value=mock_response,
     ) as mock_api_call:
         # Act
@@ -317,7 +326,7 @@ def test_generate_template_adamig(
         mock_workbook.save.assert_called_once_with(output_path)
 
 
-@patch("clinical_data_study_buddy.generators.spec.get_client")
+@patch("clinical_data_study_buddy.generators.spec.get_async_client")
 @patch("clinical_data_study_buddy.generators.spec.openpyxl.Workbook")
 def test_generate_template_no_variables(
     mock_workbook_class, mock_get_client, mock_cdisc_client
@@ -338,7 +347,7 @@ def test_generate_template_no_variables(
     mock_response.to_dict.return_value = {"datasetVariables": []}
 
     with patch(
-        "clinical_data_study_buddy.generators.spec.get_mdr_sdtmig_version_datasets_dataset.sync",
+        "clinical_data_study_buddy.generators.spec.get_mdr_sdtmig_version_datasets_dataset.asyncio",
         return_value=mock_response,
     ):
         # Act
@@ -348,7 +357,7 @@ def test_generate_template_no_variables(
         mock_sheet.append.assert_any_call(["No variables found for domain DM"])
 
 
-@patch("clinical_data_study_buddy.generators.spec.get_client")
+@patch("clinical_data_study_buddy.generators.spec.get_async_client")
 @patch("clinical_data_study_buddy.generators.spec.openpyxl.Workbook")
 def test_generate_template_api_error(
     mock_workbook_class, mock_get_client, mock_cdisc_client
@@ -366,7 +375,7 @@ def test_generate_template_api_error(
     output_dir = "output"
 
     with patch(
-        "clinical_data_study_buddy.generators.spec.get_mdr_sdtmig_version_datasets_dataset.sync",
+        "clinical_data_study_buddy.generators.spec.get_mdr_sdtmig_version_datasets_dataset.asyncio",
         side_effect=Exception("API Error"),
     ):
         # Act
@@ -388,13 +397,51 @@ def test_validate_invalid_filename(mock_print):
 
 
 @patch(
-    "clinical_data_study_buddy.generators.spec.pd.read_excel",
-    side_effect=ValueError("Sheet not found"),
+    "clinical_data_study_buddy.generators.spec.load_spec",
+    return_value=_spec(),
 )
 @patch("builtins.print")
-def test_validate_sheet_not_found(mock_print, mock_read_excel):
+def test_validate_sheet_not_found(mock_print, mock_load_spec):
     # Act
     validate("spec.xlsx", "DM.csv")
 
     # Assert
     mock_print.assert_any_call("Sheet 'DM' not found in the specification file.")
+
+
+@patch("clinical_data_study_buddy.generators.spec.get_async_client")
+def test_generate_template_fetches_domains_concurrently(mock_get_client, tmp_path):
+    in_flight = []
+    peak = []
+
+    async def fetch_dataset(client, version, dataset):
+        in_flight.append(dataset)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(dataset)
+        if dataset == "XX":
+            raise RuntimeError("Not found")
+        response = MagicMock()
+        response.to_dict.return_value = {
+            "datasetVariables": [
+                {"name": f"{dataset}SEQ", "label": "Sequence Number", "core": "Req"}
+            ]
+        }
+        return response
+
+    with patch(
+        "clinical_data_study_buddy.generators.spec.get_mdr_sdtmig_version_datasets_dataset.asyncio",
+        side_effect=fetch_dataset,
+    ):
+        generate_template("sdtmig", "3-3", ["AE", "XX", "VS", "LB"], tmp_path, 2)
+
+    mock_get_client.assert_called_once_with(concurrency=2)
+    assert max(peak) == 2
+    workbook = openpyxl.load_workbook(tmp_path / "sdtmig_3-3_spec.xlsx")
+    assert workbook.sheetnames == ["AE", "XX", "VS", "LB"]
+    rows = {
+        name: [list(row) for row in workbook[name].iter_rows(values_only=True)]
+        for name in workbook.sheetnames
+    }
+    assert rows["VS"][1][:5] == ["VSSEQ", "Sequence Number", None, None, "Req"]
+    assert rows["XX"][1][0] == "Error fetching data for XX"
@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from clinical_data_study_buddy.generators import spec_model
+from clinical_data_study_buddy.generators.spec_model import (
+    SpecVariable,
+    load_spec,
+    parse_spec,
+)
+
+
+@pytest.fixture
+def spec_path(tmp_path):
+    path = tmp_path / "spec.xlsx"
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame({"Product": ["sdtmig"]}).to_excel(
+            writer, sheet_name="Metadata", index=False
+        )
+        pd.DataFrame(
+            {
+                "Variable Name": ["USUBJID", "AGE", None],
+                "Variable Label": ["Unique Subject Identifier", "Age", None],
+                "Data Type": ["Char", "Num", None],
+                "Core": ["Req", "Exp", None],
+                "Length": [20, None, None],
+                "Key": [1, None, None],
+            }
+        ).to_excel(writer, sheet_name="dm", index=False)
+        pd.DataFrame({"Notes": ["No variables"]}).to_excel(
+            writer, sheet_name="Notes", index=False
+        )
+    return path
+
+
+def test_parse_spec(spec_path):
+    spec = parse_spec(spec_path)
+
+    assert spec.digest == spec_model.file_digest(spec_path)
+    assert list(spec.domains) == ["DM"]
+    assert spec.domains["DM"].variables == [
+        SpecVariable(
+            name="USUBJID",
+            label="Unique Subject Identifier",
+            datatype="Char",
+            core="Req",
+            length=20,
+            key="1",
+        ),
+        SpecVariable(name="AGE", label="Age", datatype="Num", core="Exp"),
+    ]
+    assert spec.domains["DM"].to_frame()["Variable Name"].tolist() == [
+        "USUBJID",
+        "AGE",
+    ]
+
+
+def test_load_spec_caches_parsed_spec(spec_path, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    calls = []
+    monkeypatch.setattr(
+        spec_model,
+        "parse_spec",
+        lambda *args: calls.append(args) or parse_spec(*args),
+    )
+
+    first = load_spec(spec_path, cache_dir=cache_dir)
+    second = load_spec(spec_path, cache_dir=cache_dir)
+
+    assert len(calls) == 1
+    assert second == first
+    (entry,) = cache_dir.iterdir()
+    assert entry.name == f"{first.digest}.v{spec_model.CACHE_VERSION}.pickle"
+
+    # Unreadable entries are replaced
+    entry.write_bytes(b"not a pickle")
+    assert load_spec(spec_path, cache_dir=cache_dir) == first
+    assert len(calls) == 2
+
+    # A changed workbook has a new digest and is parsed again
+    with pd.ExcelWriter(spec_path, engine="openpyxl") as writer:
+        pd.DataFrame({"Variable Name": ["AETERM"]}).to_excel(
+            writer, sheet_name="AE", index=False
+        )
+    assert list(load_spec(spec_path, cache_dir=cache_dir).domains) == ["AE"]
+    assert len(calls) == 3
+
+
+def test_load_spec_cache_disabled(spec_path, tmp_path, monkeypatch):
+    monkeypatch.setenv("CDISC_SPEC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("CDISC_SPEC_CACHE_DISABLED", "true")
+    assert list(load_spec(spec_path).domains) == ["DM"]
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,245 @@
+import json
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from clinical_data_study_buddy.core.ct_index import ControlledTerminologyIndex
+from clinical_data_study_buddy.generators.dataset_io import write_chunks
+from clinical_data_study_buddy.generators.spec import validate_dir
+from clinical_data_study_buddy.generators.spec_model import parse_spec
+from clinical_data_study_buddy.generators.spec_validation import (
+    compile_rules,
+    load_rule_sets,
+    validate_dataset,
+    validate_directory,
+    write_reports,
+)
+
+SPEC = pd.DataFrame(
+    {
+        "Variable Name": ["USUBJID", "VSSEQ", "VSTESTCD", "VSSTRESN", "VSDTC"],
+        "Data Type": ["Char", "integer", "Char", "Num", "ISO 8601 datetime"],
+        "Length": [10, None, 8, None, None],
+        "Core": ["Req", "Req", "Req", "Exp", "Perm"],
+        "Codelist": [
+            None,
+            None,
+            "/mdr/ct/packages/sdtmct-2024-03-29/codelists/C66741",
+            None,
+            None,
+        ],
+    }
+)
+CT = ControlledTerminologyIndex({"C66741": ["SYSBP", "DIABP", "PULSE"]})
+
+
+def _findings(report):
+    return {
+        (finding.rule, finding.variables): (finding.count, finding.rows)
+        for finding in report.findings
+    }
+
+
+def test_compile_rules():
+    rule_set = compile_rules(SPEC, "vs", ct_index=CT)
+
+    assert rule_set.domain == "VS"
+    assert rule_set.required == ["USUBJID", "VSSEQ", "VSTESTCD"]
+    assert rule_set.expected == ["VSSTRESN"]
+    assert [(rule.kind, rule.variables) for rule in rule_set.rules] == [
+        ("required", ("USUBJID",)),
+        ("length", ("USUBJID",)),
+        ("required", ("VSSEQ",)),
+        ("type", ("VSSEQ",)),
+        ("required", ("VSTESTCD",)),
+        ("length", ("VSTESTCD",)),
+        ("type", ("VSSTRESN",)),
+        ("iso8601", ("VSDTC",)),
+        ("codelist", ("VSTESTCD",)),
+        ("unique", ("USUBJID", "VSSEQ")),
+    ]
+    assert rule_set.rules[8].parameter == {"SYSBP", "DIABP", "PULSE"}
+
+
+def test_compile_rules_fetches_codelists_with_api_key():
+    with patch(
+        "clinical_data_study_buddy.generators.spec_validation.load_ct_index",
+        return_value=CT,
+    ) as load_ct:
+        rule_set = compile_rules(SPEC, "VS", api_key="test-key")
+
+    assert load_ct.call_args.kwargs["api_key"] == "test-key"
+    assert "codelist" in [rule.kind for rule in rule_set.rules]
+
+
+def test_compile_rules_requires_terminology_without_api_key(monkeypatch):
+    monkeypatch.delenv("CDISC_PRIMARY_KEY", raising=False)
+    with patch(
+        "clinical_data_study_buddy.generators.spec_validation.load_ct_index",
+        return_value=ControlledTerminologyIndex(),
+    ):
+        with pytest.raises(ValueError, match="No controlled terminology for .*C66741"):
+            compile_rules(SPEC, "VS")
+
+
+def test_compile_rules_uses_key_column():
+    spec = SPEC.assign(Key=[1, None, 2, None, None])
+    rule_set = compile_rules(spec, "VS", ct_index=ControlledTerminologyIndex())
+    assert rule_set.rules[-1].variables == ("USUBJID", "VSTESTCD")
+    # Codelists that are not indexed are not checked
+    assert "codelist" not in [rule.kind for rule in rule_set.rules]
+
+
+@pytest.mark.parametrize("output_format", ["csv", "xpt"])
+def test_validate_dataset_reports_failing_records(tmp_path, output_format):
+    dataset = pd.DataFrame(
+        {
+            "USUBJID": ["S-001", "S-001", "S-002-TOO-LONG", None, "S-003-0001"],
+            "VSSEQ": [1, 1, 2.5, 1, 1],
+            "VSTESTCD": ["SYSBP", "TEMP", "PULSE", "DIABP", "PULSE"],
+            "VSDTC": ["2024-01-05T10:30", "2024-01", "05/01/2024", None, "2024"],
+            "VSPOS": ["SITTING"] * 5,
+        }
+    )
+    path = tmp_path / f"VS.{output_format}"
+    # Ends with a complete record: pandas reads trailing blank values of small
+    # XPT files as padding
+    write_chunks([dataset], path)
+
+    report = validate_dataset(compile_rules(SPEC, "VS", ct_index=CT), path)
+
+    assert report.records == 5
+    assert not report.passed
+    assert _findings(report) == {
+        ("structure", ("VSSTRESN",)): (0, []),
+        ("structure", ("VSPOS",)): (0, []),
+        ("required", ("USUBJID",)): (1, [4]),
+        ("length", ("USUBJID",)): (1, [3]),
+        ("type", ("VSSEQ",)): (1, [3]),
+        ("iso8601", ("VSDTC",)): (1, [3]),
+        ("codelist", ("VSTESTCD",)): (1, [2]),
+        ("unique", ("USUBJID", "VSSEQ")): (2, [1, 2]),
+    }
+    assert [f.variables for f in report.warnings] == [("VSSTRESN",)]
+
+
+def test_validate_dataset_passes(tmp_path):
+    path = tmp_path / "VS.csv"
+    write_chunks(
+        [
+            pd.DataFrame(
+                {
+                    "USUBJID": ["S-001", "S-001"],
+                    "VSSEQ": [1, 2],
+                    "VSTESTCD": ["SYSBP", "DIABP"],
+                    "VSSTRESN": [120, None],
+                    "VSDTC": ["2024-01-05", "2024---05"],
+                }
+            )
+        ],
+        path,
+    )
+    report = validate_dataset(compile_rules(SPEC, "VS", ct_index=CT), path)
+    assert report.passed
+    assert report.findings == []
+
+
+def test_write_reports(tmp_path):
+    path = tmp_path / "VS.csv"
+    write_chunks([pd.DataFrame({"USUBJID": ["S-001", None]})], path)
+    report = validate_dataset(compile_rules(SPEC, "VS", ct_index=CT), path)
+
+    write_reports([report], tmp_path / "report.json")
+    (document,) = json.loads((tmp_path / "report.json").read_text())
+    assert document["passed"] is False
+    assert document["errors"] == 2
+    assert document["findings"][-1]["rows"] == [2]
+
+    report.write(tmp_path / "report.xlsx")
+    summary = pd.read_excel(tmp_path / "report.xlsx", sheet_name="Summary")
+    findings = pd.read_excel(tmp_path / "report.xlsx", sheet_name="Findings")
+    assert summary[["domain", "records", "errors"]].values.tolist() == [["VS", 2, 2]]
+    assert findings["rule"].tolist() == ["structure", "structure", "required"]
+
+    with pytest.raises(ValueError, match="Unsupported report format: .html"):
+        write_reports([report], tmp_path / "report.html")
+
+
+def _write_spec(path):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame({"Product": ["sdtmig"]}).to_excel(
+            writer, sheet_name="Metadata", index=False
+        )
+        SPEC.to_excel(writer, sheet_name="VS", index=False)
+        pd.DataFrame(
+            {"Variable Name": ["USUBJID"], "Data Type": ["Char"], "Core": ["Req"]}
+        ).to_excel(writer, sheet_name="DM", index=False)
+
+
+def test_load_rule_sets_parses_workbook_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("CDISC_SPEC_CACHE_DIR", str(tmp_path / "cache"))
+    _write_spec(tmp_path / "spec.xlsx")
+    with (
+        patch(
+            "clinical_data_study_buddy.generators.spec_model.parse_spec",
+            wraps=parse_spec,
+        ) as parse,
+        patch(
+            "clinical_data_study_buddy.generators.spec_validation.load_ct_index",
+            return_value=CT,
+        ) as load_ct,
+    ):
+        rule_sets = load_rule_sets(tmp_path / "spec.xlsx")
+
+    parse.assert_called_once()
+    # The codelists of every sheet are resolved together
+    assert [c.nci_code for c in load_ct.call_args.args[0]] == ["C66741"]
+    assert list(rule_sets) == ["VS", "DM"]
+    assert rule_sets["VS"].rules == compile_rules(SPEC, "VS", ct_index=CT).rules
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_validate_directory(tmp_path, jobs):
+    rule_sets = {
+        "VS": compile_rules(SPEC, "VS", ct_index=CT),
+        "DM": compile_rules(pd.DataFrame({"Variable Name": ["USUBJID"]}), "DM"),
+    }
+    write_chunks([pd.DataFrame({"USUBJID": ["S-001", "S-002"]})], tmp_path / "DM.xpt")
+    write_chunks([pd.DataFrame({"USUBJID": ["S-001", None]})], tmp_path / "VS.csv")
+    write_chunks([pd.DataFrame({"USUBJID": ["S-001"]})], tmp_path / "AE.csv")
+    (tmp_path / "define.xml").write_text("<ODM/>")
+
+    reports = validate_directory(rule_sets, tmp_path, jobs=jobs)
+
+    assert [(r.domain, r.passed) for r in reports] == [
+        ("AE", False),
+        ("DM", True),
+        ("VS", False),
+    ]
+    assert reports[0].findings[0].message == (
+        "No specification sheet for dataset AE.csv."
+    )
+    assert _findings(reports[2])[("required", ("USUBJID",))] == (1, [2])
+
+
+def test_validate_dir_writes_merged_report(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv("CDISC_SPEC_CACHE_DISABLED", "1")
+    _write_spec(tmp_path / "spec.xlsx")
+    datasets = tmp_path / "datasets"
+    datasets.mkdir()
+    write_chunks([pd.DataFrame({"USUBJID": ["S-001", "S-002"]})], datasets / "DM.csv")
+    write_chunks([pd.DataFrame({"USUBJID": ["S-001", ""]})], datasets / "VS.csv")
+
+    with patch(
+        "clinical_data_study_buddy.generators.spec_validation.load_ct_index",
+        return_value=CT,
+    ):
+        reports = validate_dir(
+            tmp_path / "spec.xlsx", datasets, report_path=tmp_path / "report.json"
+        )
+
+    assert [r.passed for r in reports] == [True, False]
+    documents = json.loads((tmp_path / "report.json").read_text())
+    assert [d["domain"] for d in documents] == ["DM", "VS"]
+    assert "Validated 2 datasets: 1 failed." in capsys.readouterr().out
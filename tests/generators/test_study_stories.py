@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from clinical_data_study_buddy.core.ct_index import ControlledTerminologyIndex
+from clinical_data_study_buddy.core.models.schema import Codelist, FieldDef, Form
+from clinical_data_study_buddy.generators import study_stories
+from clinical_data_study_buddy.generators.study_stories import registry
+from clinical_data_study_buddy.generators.data_generator import DataGenerator
+from clinical_data_study_buddy.generators.subject_schedule import (
+    SubjectSchedule,
+    derive_domain,
+)
+
+VS = DataGenerator(
+    Form(
+        title="VS",
+        domain="VS",
+        fields=[
+            FieldDef(oid="VSDAT", prompt="Date", datatype="date", cdash_var="VSDAT"),
+            FieldDef(
+                oid="VSORRES", prompt="Result", datatype="float", cdash_var="VSORRES"
+            ),
+        ],
+    )
+)
+
+
+def _derive(story_names, seed=0):
+    schedule = SubjectSchedule.build(200, seed=seed)
+    stories = study_stories.compose(story_names)
+    rng = np.random.default_rng(seed)
+    for story in stories:
+        story.apply_schedule(schedule, rng)
+    return derive_domain(VS, "VS", schedule, np.random.SeedSequence(seed), stories)
+
+
+def test_builtin_stories_are_registered():
+    assert {
+        "high_dropout",
+        "protocol_deviations",
+        "missing_data",
+        "site_effects",
+        "realistic_demographics",
+    } <= set(study_stories.stories())
+    assert study_stories.compose("none") == []
+    with pytest.raises(ValueError, match="Unknown study story"):
+        study_stories.compose(["high_dropout", "nope"])
+
+
+def test_high_dropout_truncates_visits():
+    baseline = _derive("none")
+    dropout = _derive("high_dropout")
+
+    assert len(dropout) < len(baseline)
+    assert set(dropout["USUBJID"]) == set(baseline["USUBJID"])
+
+
+def test_stories_compose_on_records():
+    """Stories transform the records in memory and compose in order."""
+    baseline = _derive("none")
+    records = _derive("site_effects,missing_data")
+
+    assert records["USUBJID"].notna().all()
+    missing = records["VSORRES"].isna().mean()
+    assert 0.01 < missing < 0.1
+    present = records["VSORRES"].notna()
+    assert not np.allclose(
+        pd.to_numeric(records.loc[present, "VSORRES"]),
+        baseline.loc[present, "VSORRES"],
+    )
+
+
+def test_custom_story_registration():
+    @study_stories.register("test_no_results")
+    class NoResults(study_stories.StudyStory):
+        def apply_records(self, domain, records, schedule, subject, rng):
+            return records.drop(columns=["VSORRES"])
+
+    try:
+        records = _derive("test_no_results")
+        assert "VSORRES" not in records
+        assert study_stories.get("test_no_results") is NoResults
+    finally:
+        registry._registry.pop("test_no_results")
+
+
+def test_realistic_demographics_weights_codelists():
+    ct_index = ControlledTerminologyIndex(
+        {"C66731": ["F", "M", "U", "UNDIFFERENTIATED"], "C99999": ["A", "B"]}
+    )
+    for story in study_stories.compose("realistic_demographics"):
+        story.apply_terminology(ct_index)
+    dm = DataGenerator(
+        Form(
+            title="DM",
+            domain="DM",
+            fields=[
+                FieldDef(
+                    oid="SEX",
+                    prompt="Sex",
+                    datatype="text",
+                    cdash_var="SEX",
+                    codelist=Codelist(
+                        nci_code="C66731", href="/mdr/ct/codelists/C66731"
+                    ),
+                )
+            ],
+        ),
+        seed=0,
+        ct_index=ct_index,
+    )
+
+    sex = dm.generate_frame(5000)["SEX"].value_counts(normalize=True)
+    assert "UNDIFFERENTIATED" not in sex
+    assert abs(sex["F"] - 0.51) < 0.03
+    assert sex["U"] < 0.03
+    # Codelists the story does not weight stay uniform
+    assert ct_index._weights.keys() == {"C66731"}
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from clinical_data_study_buddy.core.models.schema import FieldDef, Form
+from clinical_data_study_buddy.generators.data_generator import DataGenerator
+from clinical_data_study_buddy.generators.subject_schedule import (
+    DEFAULT_VISITS,
+    SubjectSchedule,
+    derive_domain,
+)
+
+
+def _generator(domain, fields):
+    return DataGenerator(
+        Form(
+            title=domain,
+            domain=domain,
+            fields=[
+                FieldDef(oid=name, prompt=name, datatype=datatype, cdash_var=name)
+                for name, datatype in fields
+            ],
+        )
+    )
+
+
+def test_domains_share_subjects_visits_and_dates():
+    """Domains derived from a schedule line up on subjects, visits and dates."""
+    schedule = SubjectSchedule.build(40, seed=1)
+    seed = np.random.SeedSequence(2)
+
+    dm = derive_domain(
+        _generator(
+            "DM", [("STUDYID", "text"), ("SUBJID", "text"), ("RFSTDAT", "date")]
+        ),
+        "DM",
+        schedule,
+        seed,
+    )
+    vs = derive_domain(
+        _generator("VS", [("VISITNUM", "float"), ("VSDAT", "date")]),
+        "VS",
+        schedule,
+        seed,
+    )
+    ae = derive_domain(
+        _generator("AE", [("AESTDAT", "date"), ("AEENDAT", "date")]),
+        "AE",
+        schedule,
+        seed,
+    )
+
+    assert dm["USUBJID"].is_unique and len(dm) == 40
+    assert (dm["STUDYID"] == "CDISC-TA-1").all()
+    assert len(vs) == 40 * len(DEFAULT_VISITS)
+    assert set(vs["USUBJID"]) == set(dm["USUBJID"])
+    assert set(ae["USUBJID"]) <= set(dm["USUBJID"])
+
+    start = dm.set_index("USUBJID")["RFSTDAT"]
+    baseline = vs[vs["VISITNUM"] == 2.0].set_index("USUBJID")["VSDAT"]
+    pd.testing.assert_series_equal(
+        pd.to_datetime(baseline).sub(pd.to_datetime(start)).dt.days.abs().le(2),
+        pd.Series(True, index=baseline.index),
+        check_names=False,
+    )
+    assert (ae["AESTDAT"] >= ae["USUBJID"].map(start)).all()
+    assert (ae["AEENDAT"] >= ae["AESTDAT"]).all()
+
+
+def test_completed_visits_and_chunks():
+    """Subjects only have records for the visits they completed, in any chunk."""
+    schedule = SubjectSchedule.build(6, seed=3)
+    schedule.visits_completed[:] = [6, 2, 0, 6, 1, 3]
+    generator = _generator("LB", [("LBORRES", "float")])
+
+    whole = derive_domain(generator, "LB", schedule, np.random.SeedSequence(4))
+    tail = derive_domain(generator, "LB", schedule[3:], np.random.SeedSequence(4))
+
+    assert whole.groupby("USUBJID", sort=False).size().tolist() == [6, 2, 6, 1, 3]
+    assert tail["USUBJID"].tolist() == whole["USUBJID"].tolist()[8:]
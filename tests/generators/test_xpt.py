@@ -0,0 +1,119 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.io.sas.sas_xport import XportReader
+
+from clinical_data_study_buddy.core.models.schema import FieldDef, Form
+from clinical_data_study_buddy.generators.data_generator import DataGenerator
+from clinical_data_study_buddy.generators.dataset_io import write_chunks
+from clinical_data_study_buddy.generators.xpt import XptWriter, ibm_float
+
+
+def test_ibm_float_known_values():
+    values = [0.0, 1.0, -1.0, 0.1, 16.0, 0.0625, np.nan, 1e-80, 1e80]
+    encoded = ibm_float(values).tobytes()
+    assert [encoded[i : i + 8].hex() for i in range(0, len(encoded), 8)] == [
+        "0000000000000000",
+        "4110000000000000",
+        "c110000000000000",
+        "401999999999999a",
+        "4210000000000000",
+        "4010000000000000",
+        "2e00000000000000",
+        "0000000000000000",
+        "7fffffffffffffff",
+    ]
+
+
+def _read_xpt(data):
+    reader = XportReader(io.BytesIO(data))
+    fields = {
+        field["name"].decode(): (field["label"].decode(), field["field_length"])
+        for field in reader.fields
+    }
+    return pd.read_sas(io.BytesIO(data), format="xport", encoding="utf-8"), fields
+
+
+def test_xpt_writer_streams_chunks():
+    """Chunks read back with the labels and lengths of the metadata."""
+    stream = io.BytesIO()
+    writer = XptWriter(
+        stream,
+        "vs",
+        variables={
+            "USUBJID": {"label": "Unique Subject Identifier", "length": 6},
+            "VSORRES": {"label": "Result", "type": "num"},
+        },
+    )
+    first = pd.DataFrame(
+        {"USUBJID": ["S-1", None], "VSORRES": [72.5, None], "VSPOS": ["SITTING"] * 2}
+    )
+    second = pd.DataFrame(
+        {"USUBJID": ["S-3"], "VSORRES": ["-0.001"], "VSPOS": ["SUPINE"]}
+    )
+    writer.write(first)
+    writer.write(second)
+    writer.close()
+
+    data = stream.getvalue()
+    assert len(data) % 80 == 0
+    dataset, fields = _read_xpt(data)
+    assert fields == {
+        "USUBJID": ("Unique Subject Identifier", 6),
+        "VSORRES": ("Result", 8),
+        # Inferred from the first chunk
+        "VSPOS": ("", 7),
+    }
+    assert list(dataset["USUBJID"]) == ["S-1", "", "S-3"]
+    assert dataset["VSORRES"].tolist()[0] == 72.5
+    assert np.isnan(dataset["VSORRES"][1])
+    assert dataset["VSORRES"][2] == -0.001
+    assert list(dataset["VSPOS"]) == ["SITTING", "SITTING", "SUPINE"]
+
+
+def test_xpt_writer_rejects_values_longer_than_the_variable():
+    """Later chunks cannot silently truncate values to the inferred length."""
+    writer = XptWriter(io.BytesIO(), "VS")
+    writer.write(pd.DataFrame({"VSPOS": ["SITTING"]}))
+    with pytest.raises(ValueError, match="VSPOS has a 8-byte value.*length of 7"):
+        writer.write(pd.DataFrame({"VSPOS": ["STANDING"]}))
+
+    writer = XptWriter(io.BytesIO(), "VS", variables={"VSPOS": {"length": 3}})
+    with pytest.raises(ValueError, match="VSPOS has a 7-byte value.*length of 3"):
+        writer.write(pd.DataFrame({"VSPOS": ["SITTING"]}))
+
+
+def test_xpt_writer_rejects_long_names():
+    with pytest.raises(ValueError, match="Invalid XPT dataset name"):
+        XptWriter(io.BytesIO(), "SUPPQUAL_AE")
+    writer = XptWriter(io.BytesIO(), "AE")
+    with pytest.raises(ValueError, match="Invalid XPT variable name: 'AEVERYLONGNAME'"):
+        writer.write(pd.DataFrame({"AEVERYLONGNAME": [1]}))
+
+
+def test_write_chunks_xpt_uses_generator_metadata(tmp_path):
+    fields = [
+        FieldDef(oid="ID", prompt="Subject", datatype="text", cdash_var="USUBJID"),
+        FieldDef(oid="AGE", prompt="Age", datatype="integer", cdash_var="AGE"),
+        FieldDef(oid="DAT", prompt="Birth Date", datatype="date", cdash_var="BRTHDAT"),
+    ]
+    generator = DataGenerator(Form(title="DM", domain="DM", fields=fields), seed=1)
+    expected = DataGenerator(
+        Form(title="DM", domain="DM", fields=fields), seed=1
+    ).generate_frame(30)
+
+    rows = write_chunks(
+        generator.iter_chunks(30), tmp_path / "DM.xpt", variables=generator.variables()
+    )
+
+    assert rows == 30
+    dataset, fields = _read_xpt((tmp_path / "DM.xpt").read_bytes())
+    assert fields == {
+        "USUBJID": ("Subject", 10),
+        "AGE": ("Age", 8),
+        "BRTHDAT": ("Birth Date", 10),
+    }
+    expected["AGE"] = expected["AGE"].astype(float)
+    pd.testing.assert_frame_equal(dataset, expected)
@@ -1,3 +1,4 @@
+import json
 import pathlib
 from unittest.mock import patch
 
@@ -37,3 +38,48 @@ def test_build_cli(mock_harvest, mock_get_api_key, tmp_path: pathlib.Path, fmt):
             assert (tmp_path / "forms.csv").exists()
         elif f == "tex":
             assert any(tmp_path.glob("*.tex"))
+
+
+def test_build_cli_is_incremental(tmp_path: pathlib.Path):
+    forms = json.loads(pathlib.Path("tests/.data/sample_crf.json").read_text())
+    forms.append(
+        {
+            "title": "Adverse Events",
+            "domain": "AE",
+            "fields": [
+                {
+                    "oid": "AETERM",
+                    "prompt": "Term",
+                    "datatype": "text",
+                    "cdash_var": "AETERM",
+                }
+            ],
+        }
+    )
+    source = tmp_path / "crf.json"
+    source.write_text(json.dumps(forms))
+    outdir = tmp_path / "out"
+    cmd = ["build", "build", "--source", str(source), "--outdir", str(outdir)]
+    cmd += ["--formats", "md", "--formats", "csv"]
+
+    result = runner.invoke(app, cmd)
+    assert result.exit_code == 0, result.stdout
+    assert "(2 rendered, 0 up to date)" in result.stdout
+    assert "Rendered csv" in result.stdout
+
+    result = runner.invoke(app, cmd)
+    assert "md is up to date" in result.stdout
+    assert "csv is up to date" in result.stdout
+
+    # Only the group of the changed form is rendered again
+    forms[-1]["title"] = "Adverse Events Log"
+    source.write_text(json.dumps(forms))
+    (outdir / "VS.md").write_text("stale")
+    result = runner.invoke(app, cmd)
+    assert "(1 rendered, 1 up to date)" in result.stdout
+    assert "Adverse Events Log" in (outdir / "AE.md").read_text()
+    assert (outdir / "VS.md").read_text() == "stale"
+
+    result = runner.invoke(app, cmd + ["--force"])
+    assert "(2 rendered, 0 up to date)" in result.stdout
+    assert (outdir / "VS.md").read_text() != "stale"
@@ -1,5 +1,8 @@
 import re
 
+import pandas as pd
+import pytest
+
 from clinical_data_study_buddy.core.models.schema import Codelist, FieldDef, Form
 from clinical_data_study_buddy.generators.data_generator import DataGenerator
 
@@ -81,3 +84,71 @@ def test_generate_text_with_length():
     generated_text = dataset[0]["TEXTVAR"]
 
     assert len(generated_text) == 20
+
+
+def test_generate_frame_is_columnar_and_reproducible():
+    """
+    Tests that generate_frame builds typed columns for many subjects and that
+    a seed makes the data reproducible.
+    """
+    fields = [
+        FieldDef(oid="ID", prompt="ID", datatype="text", cdash_var="USUBJID", length=8),
+        FieldDef(oid="AGE", prompt="Age", datatype="integer", cdash_var="AGE"),
+        FieldDef(oid="WT", prompt="Weight", datatype="float", cdash_var="WEIGHT"),
+        FieldDef(oid="DT", prompt="Date", datatype="date", cdash_var="VISDAT"),
+    ]
+    form_data = Form(title="DM", domain="DM", fields=fields)
+
+    df = DataGenerator(form_data, seed=42).generate_frame(100_000)
+
+    assert list(df.columns) == ["USUBJID", "AGE", "WEIGHT", "VISDAT"]
+    assert len(df) == 100_000
+    assert df["USUBJID"].str.fullmatch(r"[A-Z0-9]{8}").all()
+    assert df["AGE"].between(0, 100).all()
+    assert df["WEIGHT"].between(0.0, 100.0).all()
+    assert df["VISDAT"].between("2020-01-01", "2023-12-31").all()
+    assert df.equals(DataGenerator(form_data, seed=42).generate_frame(100_000))
+
+
+def test_generate_frame_chunks_match_executor_output():
+    """
+    Tests that a chunked dataset is the same whether its chunks run in turn
+    or on an executor.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    fields = [FieldDef(oid="AGE", prompt="Age", datatype="integer", cdash_var="AGE")]
+    form_data = Form(title="DM", domain="DM", fields=fields)
+
+    serial = DataGenerator(form_data, seed=3, chunk_size=7).generate_frame(30)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        concurrent = DataGenerator(form_data, seed=3, chunk_size=7).generate_frame(
+            30, executor=executor
+        )
+
+    assert len(serial) == 30
+    assert serial.index.equals(pd.RangeIndex(30))
+    assert serial.equals(concurrent)
+
+
+def test_iter_chunks_streams_to_csv_and_parquet(tmp_path):
+    """
+    Tests that chunks streamed to disk give the same dataset as generate_frame.
+    """
+    from clinical_data_study_buddy.generators.dataset_io import write_chunks
+
+    fields = [
+        FieldDef(oid="ID", prompt="ID", datatype="text", cdash_var="USUBJID"),
+        FieldDef(oid="WT", prompt="Weight", datatype="float", cdash_var="WEIGHT"),
+    ]
+    form_data = Form(title="VS", domain="VS", fields=fields)
+    expected = DataGenerator(form_data, seed=5, chunk_size=4).generate_frame(10)
+
+    chunks = DataGenerator(form_data, seed=5, chunk_size=4).iter_chunks(10)
+    assert write_chunks(chunks, tmp_path / "VS.csv") == 10
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "VS.csv"), expected)
+
+    pytest.importorskip("pyarrow")
+    chunks = DataGenerator(form_data, seed=5, chunk_size=4).iter_chunks(10)
+    write_chunks(chunks, tmp_path / "VS.parquet")
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "VS.parquet"), expected)
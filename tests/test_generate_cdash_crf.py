@@ -218,3 +218,85 @@ def test_generate_with_custom_styling(mock_load_ig, tmp_path):
         styles_xml = zf.read("word/styles.xml").decode("utf-8")
         assert '<w:rFonts w:ascii="Comic Sans MS"' in styles_xml
         assert '<w:sz w:val="24"/>' in styles_xml
+
+
+@patch("clinical_data_study_buddy.core.generation_service.load_ig")
+def test_generate_with_jobs(mock_load_ig, tmp_path):
+    out_dir = tmp_path / "out"
+    mock_load_ig.return_value = pd.DataFrame(
+        [
+            {
+                "Domain": domain,
+                "Variable": variable,
+                "Order": 1,
+                "Display Label": variable,
+                "CRF Instructions": None,
+                "Type": "Char",
+                "CT Values": None,
+                "CT Codes": None,
+                "Implementation Notes": None,
+            }
+            for domain, variable in [("AE", "AETERM"), ("VS", "VSTESTCD")]
+        ]
+    )
+
+    result = runner.invoke(
+        app,
+        [
+            "generate",
+            "cdash-crf",
+            "--ig-version",
+            "v2.3",
+            "--out",
+            str(out_dir),
+            "--domains",
+            "VS",
+            "--domains",
+            "AE",
+            "--domains",
+            "XX",
+            "--jobs",
+            "2",
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+
+    # Progress is reported per domain, in order; unknown domains are skipped
+    assert "[1/2] Rendered VS CRF" in result.stdout
+    assert "[2/2] Rendered AE CRF" in result.stdout
+    assert (out_dir / "AE_Adverse_Events_CRF.docx").exists()
+    assert len(list(out_dir.glob("VS_*.docx"))) == 1
+
+
+@patch("clinical_data_study_buddy.core.generation_service.load_ig")
+def test_generate_skips_unchanged_domains(mock_load_ig, tmp_path):
+    out_dir = tmp_path / "out"
+    ig = pd.DataFrame(
+        {
+            "Domain": ["AE", "VS"],
+            "Variable": ["AETERM", "VSTESTCD"],
+            "Order": [1, 1],
+            "Display Label": ["Term", "Test"],
+            "Type": ["Char", "Char"],
+        }
+    )
+    mock_load_ig.return_value = ig
+    cmd = ["generate", "cdash-crf", "--ig-version", "v2.3", "--out", str(out_dir)]
+
+    result = runner.invoke(app, cmd)
+    assert "[2/2] Rendered VS CRF" in result.stdout
+
+    result = runner.invoke(app, cmd)
+    assert result.exit_code == 0, result.stdout
+    assert "2 CRFs are up to date" in result.stdout
+    assert "Rendered" not in result.stdout
+
+    mock_load_ig.return_value = ig.assign(Type=["Char", "Num"])
+    (out_dir / "AE_Adverse_Events_CRF.docx").unlink()
+    result = runner.invoke(app, cmd)
+    # AE is rendered again because its document is missing, VS because it changed
+    assert "[1/2] Rendered AE CRF" in result.stdout
+    assert "[2/2] Rendered VS CRF" in result.stdout
+
+    result = runner.invoke(app, cmd + ["--force"])
+    assert "[2/2] Rendered VS CRF" in result.stdout
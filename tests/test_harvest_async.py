@@ -0,0 +1,184 @@
+import asyncio
+
+import httpx
+import pytest
+
+from cdisc_library_client import harvest
+from cdisc_library_client.client import AuthenticatedClient
+from cdisc_library_client.harvest import CrfGen
+from clinical_data_study_buddy.core.cdisc_library_service import BASE_URL
+from clinical_data_study_buddy.core.standards_store import StandardsStore
+
+DOMAINS = ["DM", "AE", "VS"]
+
+
+def _payload(path):
+    if path.endswith("/mdr/products/DataCollection"):
+        return {
+            "_links": {
+                "cdashig": [
+                    {"href": "/mdr/cdashig/2-1", "title": "CDASHIG v2.1"},
+                    {"href": "/mdr/cdashig/2-2", "title": "CDASHIG v2.2"},
+                ]
+            }
+        }
+    if path.endswith("/domains"):
+        return {
+            "_links": {
+                "domains": [{"href": f"{path}/{name}"} for name in DOMAINS],
+            }
+        }
+    if "/scenarios/" in path:
+        name = path.rsplit("/", 1)[-1]
+        return {
+            "scenario": f"{name} scenario",
+            "fields": [
+                {"name": "VSORRES", "label": "Result", "simpleDatatype": "Char"}
+            ],
+        }
+    version, domain = path.split("/")[-3], path.split("/")[-1]
+    links = {}
+    if domain == "VS":
+        links["scenarios"] = [
+            {"href": f"/mdr/cdashig/{version}/scenarios/VS.Generic"},
+            {"href": f"/mdr/cdashig/{version}/scenarios/VS.Horizontal"},
+        ]
+    return {
+        "name": domain,
+        "label": f"{domain} label",
+        "_links": links,
+        "fields": [
+            {"name": f"{domain}DAT", "prompt": "Date", "simpleDatatype": "Date"}
+        ],
+    }
+
+
+def _client(handler):
+    return AuthenticatedClient(
+        base_url=BASE_URL,
+        token="key",
+        auth_header_name="api-key",
+        prefix="",
+        httpx_args={"transport": httpx.MockTransport(handler)},
+    )
+
+
+def _crfgen(monkeypatch, handler, concurrency=4):
+    monkeypatch.setattr(
+        harvest, "get_async_client", lambda api_key, concurrency: _client(handler)
+    )
+    crfgen = CrfGen("key", ig_filter="2-2", concurrency=concurrency)
+    crfgen.client = _client(handler)
+    return crfgen
+
+
+def test_harvest_async_matches_sequential_order(monkeypatch):
+    """The concurrent harvest returns the same forms, in the same order."""
+
+    def handler(request):
+        return httpx.Response(200, json=_payload(request.url.path))
+
+    sequential = _crfgen(monkeypatch, handler).harvest()
+    concurrent = asyncio.run(_crfgen(monkeypatch, handler).harvest_async())
+
+    assert [(f.domain, f.scenario) for f in concurrent] == [
+        ("DM", None),
+        ("AE", None),
+        ("VS", None),
+        ("VS", "Generic"),
+        ("VS", "Horizontal"),
+    ]
+    assert concurrent == sequential
+    assert concurrent[0].fields[0].datatype == "date"
+    assert concurrent[3].fields[0].datatype == "text"
+
+
+def test_harvest_async_bounds_concurrency(monkeypatch):
+    """No more than ``concurrency`` requests are in flight at once."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json=_payload(request.url.path))
+
+    forms = asyncio.run(_crfgen(monkeypatch, handler, concurrency=2).harvest_async())
+
+    assert len(forms) == 5
+    assert peak == 2
+
+
+def test_ig_filter_matches_title_or_href():
+    products = _payload("/mdr/products/DataCollection")
+    for ig_filter in ("2.2", "2-2", "v2.2"):
+        assert CrfGen("key", ig_filter=ig_filter)._versions(products) == ["2-2"]
+    assert CrfGen("key")._versions(products) == ["2-1", "2-2"]
+
+
+# A stored CDASHIG 2-1 snapshot with a single domain
+STORED_CDASHIG = {
+    "classes": [
+        {
+            "name": "Findings",
+            "domains": [
+                {
+                    "name": "LB",
+                    "label": "Laboratory Test Results",
+                    "fields": [
+                        {"ordinal": "1", "name": "LBDAT", "simpleDatatype": "Date"}
+                    ],
+                }
+            ],
+        }
+    ]
+}
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_harvest_merges_store_and_api_versions(tmp_path, monkeypatch, concurrency):
+    """Stored versions come from the store and the other versions from the API."""
+    pytest.importorskip("pyarrow")
+    StandardsStore(tmp_path).save("cdashig", "2-1", STORED_CDASHIG)
+    monkeypatch.setenv("CDISC_STANDARDS_DIR", str(tmp_path))
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        return httpx.Response(200, json=_payload(request.url.path))
+
+    monkeypatch.setattr(harvest, "get_client", lambda api_key: _client(handler))
+    monkeypatch.setattr(
+        harvest, "get_async_client", lambda api_key, concurrency: _client(handler)
+    )
+
+    forms = harvest.harvest("key", concurrency=concurrency)
+
+    assert [(f.domain, f.scenario) for f in forms] == [
+        ("LB", None),
+        ("DM", None),
+        ("AE", None),
+        ("VS", None),
+        ("VS", "Generic"),
+        ("VS", "Horizontal"),
+    ]
+    assert not [path for path in paths if "/2-1/" in path]
+
+
+def test_harvest_reads_a_stored_version_offline(tmp_path, monkeypatch):
+    """An ig_filter naming a stored version needs no API request."""
+    pytest.importorskip("pyarrow")
+    StandardsStore(tmp_path).save("cdashig", "2-1", STORED_CDASHIG)
+    monkeypatch.setenv("CDISC_STANDARDS_DIR", str(tmp_path))
+
+    def handler(request):
+        raise AssertionError(f"unexpected request to {request.url}")
+
+    monkeypatch.setattr(harvest, "get_client", lambda api_key: _client(handler))
+
+    forms = harvest.harvest("key", ig_filter="v2.1")
+
+    assert [(f.domain, f.scenario) for f in forms] == [("LB", None)]
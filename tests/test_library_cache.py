@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from cdisc_library_client.cache import CachingTransport, MetadataCache, cached_transport
+
+BASE_URL = "https://library.cdisc.org/api"
+
+
+class RecordingTransport(httpx.MockTransport):
+    """A mock transport that records the requests it receives."""
+
+    def __init__(self, handler):
+        self.requests = []
+
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+
+        super().__init__(record)
+
+
+def _client(transport):
+    return httpx.Client(base_url=BASE_URL, transport=transport)
+
+
+def test_conditional_revalidation_serves_cached_body(tmp_path):
+    """A 304 answer to a conditional request is served from the cache."""
+
+    def handler(request):
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"name": "AE"}, headers={"ETag": '"v1"'})
+
+    inner = RecordingTransport(handler)
+    cache = MetadataCache(tmp_path)
+    client = _client(CachingTransport(inner, cache, check_lastupdated=False))
+
+    first = client.get("/mdr/cdashig/2-3/domains/AE")
+    second = client.get("/mdr/cdashig/2-3/domains/AE")
+
+    assert first.json() == second.json() == {"name": "AE"}
+    assert second.headers["x-cache"] == "HIT"
+    assert len(inner.requests) == 2
+    assert inner.requests[1].headers["if-none-match"] == '"v1"'
+
+
+def test_lastupdated_skips_revalidation(tmp_path):
+    """Entries stored after the last library publication are served offline."""
+
+    def handler(request):
+        if request.url.path.endswith("/mdr/lastupdated"):
+            return httpx.Response(200, json={"overall": "2020-02-14"})
+        return httpx.Response(200, json={"name": "DM"})
+
+    inner = RecordingTransport(handler)
+    client = _client(CachingTransport(inner, MetadataCache(tmp_path)))
+
+    client.get("/mdr/sdtmig/3-3/datasets/DM")
+    response = client.get("/mdr/sdtmig/3-3/datasets/DM")
+
+    assert response.json() == {"name": "DM"}
+    paths = [r.url.path for r in inner.requests]
+    assert paths.count("/api/mdr/sdtmig/3-3/datasets/DM") == 1
+    assert paths.count("/api/mdr/lastupdated") == 1
+
+
+def test_keys_include_accept_header(tmp_path):
+    """The same URL requested as JSON and XML is cached separately."""
+    cache = MetadataCache(tmp_path)
+    url = f"{BASE_URL}/mdr/ct/packages"
+    as_json = httpx.Request("GET", url, headers={"Accept": "application/json"})
+    as_xml = httpx.Request("GET", url, headers={"Accept": "application/xml"})
+
+    assert cache.key(as_json) != cache.key(as_xml)
+
+
+def test_lru_eviction_bounds_size(tmp_path):
+    """The least recently used entries are evicted once the cache is full."""
+    cache = MetadataCache(tmp_path, max_bytes=25)
+    requests = [httpx.Request("GET", f"{BASE_URL}/mdr/item/{i}") for i in range(3)]
+    keys = [cache.key(r) for r in requests]
+
+    cache.put(keys[0], str(requests[0].url), 200, {}, b"0" * 10)
+    cache.put(keys[1], str(requests[1].url), 200, {}, b"1" * 10)
+    cache.touch(keys[0])
+    cache.put(keys[2], str(requests[2].url), 200, {}, b"2" * 10)
+
+    assert cache.total_size() <= 25
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+
+
+def test_identical_bodies_share_one_object(tmp_path):
+    """Bodies are content-addressed, so duplicates are stored once."""
+    cache = MetadataCache(tmp_path)
+    cache.put("a", f"{BASE_URL}/a", 200, {}, b"same")
+    cache.put("b", f"{BASE_URL}/b", 200, {}, b"same")
+
+    assert cache.total_size() == len(b"same")
+    assert len(list((tmp_path / "objects").glob("*/*"))) == 1
+
+
+def test_size_accounting_is_thread_safe(tmp_path):
+    """Threads sharing the cache keep its running size exact."""
+    cache = MetadataCache(tmp_path, max_bytes=10_000)
+    cache.total_size()
+
+    def put(i):
+        # Every body is stored by two threads at once
+        content = str(i % 50).encode() * 100
+        cache.put(f"key-{i}", f"{BASE_URL}/{i}", 200, {}, content)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(put, range(200)))
+
+    on_disk = sum(p.stat().st_size for p in (tmp_path / "objects").glob("*/*"))
+    assert cache.total_size() == on_disk <= 10_000
+
+
+@pytest.mark.parametrize("value", ["1", "true"])
+def test_cache_can_be_disabled(monkeypatch, value):
+    monkeypatch.setenv("CDISC_CACHE_DISABLED", value)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200))
+
+    assert cached_transport(transport) is transport
@@ -4,6 +4,16 @@ from unittest.mock import patch
 import pandas as pd
 
 from clinical_data_study_buddy.generators import spec
+from clinical_data_study_buddy.generators.spec_model import Spec, SpecDomain
+
+
+def _load_spec(domain, spec_df):
+    return patch(
+        "clinical_data_study_buddy.generators.spec.load_spec",
+        return_value=Spec(
+            digest="0" * 64, domains={domain: SpecDomain.from_frame(domain, spec_df)}
+        ),
+    )
 
 
 def test_validate_handles_simple_filename(capsys):
@@ -15,15 +25,15 @@ def test_validate_handles_simple_filename(capsys):
     spec_df = pd.DataFrame({"Variable Name": ["USUBJID"], "Data Type": ["Char"]})
     dataset_df = pd.DataFrame({"USUBJID": ["CDISC-01-001"]})
 
-    with patch("pandas.read_excel", return_value=spec_df) as mock_read_excel, patch(
+    with _load_spec("DM", spec_df) as mock_load_spec, patch(
         "pandas.read_csv", return_value=dataset_df
     ) as mock_read_csv:
 
         spec.validate(spec_path=Path("dummy_spec.xlsx"), dataset_path=Path("DM.csv"))
 
-        mock_read_excel.assert_called_once()
-        assert mock_read_excel.call_args.kwargs["sheet_name"] == "DM"
-        mock_read_csv.assert_called_once_with(Path("DM.csv"), dtype=str)
+        mock_load_spec.assert_called_once()
+        # Only the header is read: the spec has no numeric columns to check
+        mock_read_csv.assert_called_once_with(Path("DM.csv"), nrows=0)
 
         captured = capsys.readouterr()
         assert "Invalid dataset filename format" not in captured.out
@@ -38,7 +48,7 @@ def test_validate_handles_complex_filename(capsys):
     spec_df = pd.DataFrame({"Variable Name": ["USUBJID"], "Data Type": ["Char"]})
     dataset_df = pd.DataFrame({"USUBJID": ["CDISC-01-001"]})
 
-    with patch("pandas.read_excel", return_value=spec_df) as mock_read_excel, patch(
+    with _load_spec("DM", spec_df) as mock_load_spec, patch(
         "pandas.read_csv", return_value=dataset_df
     ) as mock_read_csv:
 
@@ -47,12 +57,31 @@ def test_validate_handles_complex_filename(capsys):
             dataset_path=Path("sdtmig_DM_2025-09-03.csv"),
         )
 
-        mock_read_excel.assert_called_once()
-        assert mock_read_excel.call_args.kwargs["sheet_name"] == "DM"
-        mock_read_csv.assert_called_once_with(
-            Path("sdtmig_DM_2025-09-03.csv"), dtype=str
-        )
+        mock_load_spec.assert_called_once()
+        mock_read_csv.assert_called_once_with(Path("sdtmig_DM_2025-09-03.csv"), nrows=0)
 
         captured = capsys.readouterr()
         assert "Invalid dataset filename format" not in captured.out
         assert "Validation Successful" in captured.out
+
+
+def test_validate_reads_only_numeric_columns(tmp_path, capsys):
+    """
+    Tests that the validate function only loads the columns it type-checks.
+    """
+    spec_df = pd.DataFrame(
+        {"Variable Name": ["USUBJID", "VSSTRESN"], "Data Type": ["Char", "Num"]}
+    )
+    dataset_file = tmp_path / "VS.csv"
+    pd.DataFrame({"USUBJID": ["CDISC-01-001"], "VSSTRESN": ["abc"]}).to_csv(
+        dataset_file, index=False
+    )
+
+    with _load_spec("VS", spec_df), patch(
+        "pandas.read_csv", wraps=pd.read_csv
+    ) as mock_read_csv:
+        spec.validate(spec_path=Path("dummy_spec.xlsx"), dataset_path=dataset_file)
+
+    usecols = mock_read_csv.call_args.kwargs["usecols"]
+    assert [usecols(c) for c in ("USUBJID", "VSSTRESN")] == [False, True]
+    assert "Data type error in column 'VSSTRESN'" in capsys.readouterr().out
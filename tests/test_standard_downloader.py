@@ -1,8 +1,10 @@
 import json
 from pathlib import Path
 
+import httpx
 from typer.testing import CliRunner
 
+from cdisc_library_client.client import AuthenticatedClient
 from clinical_data_study_buddy.cli.main import app
 
 runner = CliRunner()
@@ -13,26 +15,30 @@ def test_download_standard(mocker):
     Tests that the download-standard command runs successfully
     and creates the expected output file.
     """
-    mocker.patch(
-        "clinical_data_study_buddy.core.download_service.get_client"
-    )
-    mock_sdtmig_version = {
-        "_links": {
-            "classes": [{"title": "Events"}],
-            "datasets": [{"title": "DM"}],
-        }
+    documents = {
+        "/mdr/sdtmig/3-3": {"name": "SDTMIG v3.3"},
+        "/mdr/sdtmig/3-3/classes": {
+            "_links": {"classes": [{"href": "/mdr/sdtmig/3-3/classes/Events"}]}
+        },
+        "/mdr/sdtmig/3-3/datasets": {
+            "_links": {"datasets": [{"href": "/mdr/sdtmig/3-3/datasets/DM"}]}
+        },
+        "/mdr/sdtmig/3-3/classes/Events": {"name": "Events"},
+        "/mdr/sdtmig/3-3/datasets/DM": {"name": "DM"},
     }
+
+    def handler(request):
+        return httpx.Response(
+            200, json=documents[request.url.path.removeprefix("/api")]
+        )
+
     mocker.patch(
-        "cdisc_library_client.api.sdtm_implementation_guide_sdtmig.get_mdr_sdtmig_version.sync",
-        return_value=mock_sdtmig_version,
-    )
-    mocker.patch(
-        "cdisc_library_client.api.sdtm_implementation_guide_sdtmig.get_mdr_sdtmig_version_classes.sync",
-        return_value={"name": "Events"},
-    )
-    mocker.patch(
-        "cdisc_library_client.api.sdtm_implementation_guide_sdtmig.get_mdr_sdtmig_version_datasets.sync",
-        return_value={"name": "DM"},
+        "clinical_data_study_buddy.core.download_service.get_client",
+        return_value=AuthenticatedClient(
+            base_url="https://library.cdisc.org/api",
+            token="test-key",
+            httpx_args={"transport": httpx.MockTransport(handler)},
+        ),
     )
 
     with runner.isolated_filesystem() as temp_dir: